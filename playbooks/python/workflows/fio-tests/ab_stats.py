@@ -0,0 +1 @@
+../../../../scripts/ab_stats.py
\ No newline at end of file
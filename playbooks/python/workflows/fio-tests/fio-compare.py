@@ -7,10 +7,37 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import json
 import argparse
+import math
 import os
 import sys
 from pathlib import Path
 
+try:
+    import ab_stats
+
+    AB_STATS_AVAILABLE = True
+except ImportError:
+    AB_STATS_AVAILABLE = False
+try:
+    from results_store import DEFAULT_STORE, STORE_AVAILABLE, ResultsStore
+except ImportError:
+    DEFAULT_STORE = None
+    STORE_AVAILABLE = False
+
+RESULTS_PREFIX = "fio-tests-results-"
+
+
+# Metrics of the results store, with their conversion to the units of the
+# report: MiB/s, IOPS and ms.
+STORE_METRICS = {
+    "read_bw": ("read_bw", 1),
+    "read_iops": ("read_iops", 1),
+    "read_lat_mean": ("read_lat", 1 / 1000),
+    "write_bw": ("write_bw", 1),
+    "write_iops": ("write_iops", 1),
+    "write_lat_mean": ("write_lat", 1 / 1000),
+}
+
 
 def parse_fio_json(file_path):
     """Parse fio JSON output and extract key metrics"""
@@ -79,11 +106,56 @@ def extract_test_params(filename):
     return params
 
 
-def load_results(results_dir, config_name):
-    """Load all fio results from a directory"""
+def host_of(results_dir):
+    """The host of a fio-tests-results-<host> directory"""
+    name = Path(results_dir).resolve().name
+    return name[len(RESULTS_PREFIX) :] if name.startswith(RESULTS_PREFIX) else name
+
+
+def load_results(store, results_dir, host, config_name):
+    """
+    Ingest the fio results of a directory into the results store and load
+    them back, one row per result file.
+    """
+    counts = store.ingest("fio-tests", results_dir, host=host)
+    df = store.query(
+        columns=["source", "test", "metric", "value"],
+        workflow="fio-tests",
+        host=host,
+        run=counts["run"],
+    )
+    if df.empty:
+        return None
+
+    results = df.pivot_table(
+        index=["source", "test"], columns="metric", values="value", aggfunc="first"
+    )
+    # A direction without I/O has no rows
+    results = results.reindex(columns=list(STORE_METRICS)).fillna(0)
+    for metric, (column, scale) in STORE_METRICS.items():
+        results[column] = results.pop(metric) * scale
+    results = results.reset_index()
+
+    # The store names the tests <pattern>/bs<bs>/iodepth<n>/jobs<n>
+    params = results["test"].str.split("/", expand=True)
+    results["pattern"] = params[0]
+    results["block_size"] = params[1].str[len("bs") :]
+    results["io_depth"] = params[2].str[len("iodepth") :].astype(int)
+    results["num_jobs"] = params[3].str[len("jobs") :].astype(int)
+    results["total_bw"] = results["read_bw"] + results["write_bw"]
+    results["total_iops"] = results["read_iops"] + results["write_iops"]
+    results["config"] = config_name
+    return results.drop(columns=["source", "test"])
+
+
+def load_json_results(results_dir, config_name):
+    """Load all fio results from a directory, without the results store"""
     results = []
 
     json_files = list(Path(results_dir).glob("results_*.json"))
+    if not json_files:
+        # Repeated runs, one subdirectory per run
+        json_files = list(Path(results_dir).glob("*/results_*.json"))
     if not json_files:
         json_files = list(Path(results_dir).glob("results_*.txt"))
 
@@ -283,6 +355,81 @@ def generate_summary_report(baseline_df, dev_df, output_file):
             else:
                 f.write(f"  No data available\n\n")
 
+        write_statistics(f, baseline_df, dev_df)
+
+
+def write_statistics(f, baseline_df, dev_df):
+    """Write the statistical comparison of the runs of each configuration"""
+    f.write("Statistical Comparison\n")
+    f.write("=" * 40 + "\n\n")
+    if not AB_STATS_AVAILABLE:
+        f.write("  Not available, scripts/ab_stats.py could not be imported\n")
+        return
+
+    keys = ["pattern", "block_size", "io_depth", "num_jobs"]
+    metrics = [
+        ("total_bw", "Bandwidth"),
+        ("total_iops", "IOPS"),
+        ("read_lat", "Read Latency"),
+        ("write_lat", "Write Latency"),
+    ]
+    baseline_groups = baseline_df.groupby(keys)
+    dev_groups = dev_df.groupby(keys)
+    labels, baselines, devs, lower_better = [], [], [], []
+    for config in sorted(set(baseline_groups.groups) & set(dev_groups.groups)):
+        baseline = baseline_groups.get_group(config)
+        dev = dev_groups.get_group(config)
+        pattern, bs, depth, jobs = config
+        for metric, name in metrics:
+            # e.g. the read latency of a write test
+            if not baseline[metric].any() and not dev[metric].any():
+                continue
+            labels.append(f"{pattern} {bs}@{depth} jobs{jobs} {name}")
+            baselines.append(baseline[metric].to_numpy())
+            devs.append(dev[metric].to_numpy())
+            lower_better.append("lat" in metric)
+    if not labels:
+        f.write("  No common configurations\n")
+        return
+
+    result = ab_stats.compare(baselines, devs, lower_better)
+    counts = {v: int((result["verdict"] == v).sum()) for v in ab_stats.VERDICTS}
+    f.write(
+        f"  {len(labels)} metrics: "
+        + ", ".join(f"{counts[v]} {v}" for v in ab_stats.VERDICTS)
+        + "\n\n"
+    )
+    if max(result["n_baseline"].max(), result["n_dev"].max()) < 2:
+        f.write(
+            "  Only one run per configuration, significance needs at least\n"
+            f"  {ab_stats.min_runs()} runs on each side, one subdirectory per run\n\n"
+        )
+        return
+
+    for verdict in ("regression", "improvement"):
+        rows = [i for i, v in enumerate(result["verdict"]) if v == verdict]
+        if not rows:
+            continue
+        f.write(f"  Significant {verdict}s:\n")
+        for i in rows:
+            f.write(
+                f"    {labels[i]}: {result['change_pct'][i]:+.1f}% "
+                f"(95% CI {result['ci_low'][i]:+.1f}% to {result['ci_high'][i]:+.1f}%, "
+                f"q={result['q_value'][i]:.3g})\n"
+            )
+        f.write("\n")
+
+    additional = result["additional_runs"][result["verdict"] == "inconclusive"]
+    if len(additional):
+        needed = [n for n in additional if math.isfinite(n)]
+        f.write(f"  Inconclusive: {len(additional)} metrics")
+        if len(needed):
+            f.write(
+                f", {int(min(needed))} to {int(max(needed))} more runs per side"
+                " needed to conclude"
+            )
+        f.write("\n")
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -315,6 +462,22 @@ def main():
         default="Development",
         help="Label for development configuration",
     )
+    parser.add_argument(
+        "--baseline-host",
+        type=str,
+        help="Host of the baseline results (default: from the directory name)",
+    )
+    parser.add_argument(
+        "--dev-host",
+        type=str,
+        help="Host of the development results (default: from the directory name)",
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=DEFAULT_STORE and str(DEFAULT_STORE),
+        help=f"Results store the results are ingested into (default: {DEFAULT_STORE})",
+    )
 
     args = parser.parse_args()
 
@@ -326,13 +489,32 @@ def main():
         print(f"Error: Development directory '{args.dev_dir}' not found.")
         sys.exit(1)
 
+    baseline_host = args.baseline_host or host_of(args.baseline_dir)
+    dev_host = args.dev_host or host_of(args.dev_dir)
+    if baseline_host == dev_host:
+        print(f"Error: baseline and development results of the same host {dev_host}.")
+        sys.exit(1)
+
+    if STORE_AVAILABLE:
+        store = ResultsStore(args.store)
+    else:
+        print("The results store needs pandas and pyarrow, parsing the fio JSON.")
+
     os.makedirs(args.output_dir, exist_ok=True)
 
     print("Loading baseline results...")
-    baseline_df = load_results(args.baseline_dir, args.baseline_label)
+    if STORE_AVAILABLE:
+        baseline_df = load_results(
+            store, args.baseline_dir, baseline_host, args.baseline_label
+        )
+    else:
+        baseline_df = load_json_results(args.baseline_dir, args.baseline_label)
 
     print("Loading development results...")
-    dev_df = load_results(args.dev_dir, args.dev_label)
+    if STORE_AVAILABLE:
+        dev_df = load_results(store, args.dev_dir, dev_host, args.dev_label)
+    else:
+        dev_df = load_json_results(args.dev_dir, args.dev_label)
 
     if baseline_df is None or baseline_df.empty:
         print("No baseline results found.")
@@ -11,6 +11,13 @@ import os
 import sys
 from pathlib import Path
 
+try:
+    import fio_logs
+
+    FIO_LOGS_AVAILABLE = True
+except ImportError:
+    FIO_LOGS_AVAILABLE = False
+
 
 def parse_fio_json(file_path):
     """Parse fio JSON output and extract key metrics"""
@@ -343,6 +350,14 @@ def main():
         df, os.path.join(args.output_dir, f"{args.prefix}_pattern_comparison.png")
     )
 
+    if FIO_LOGS_AVAILABLE and fio_logs.find_logs([args.results_dir]):
+        print("Generating time series graphs from the fio logs...")
+        summary = fio_logs.analyze([args.results_dir], args.output_dir)
+        with open(
+            os.path.join(args.output_dir, f"{args.prefix}_timeseries.json"), "w"
+        ) as f:
+            json.dump(summary, f, indent=2)
+
     print(f"Graphs saved to {args.output_dir}")
 
 
@@ -0,0 +1 @@
+../../../../scripts/results_store.py
\ No newline at end of file
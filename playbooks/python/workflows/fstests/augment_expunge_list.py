@@ -6,29 +6,24 @@
 # Given a directory path it finds all test failures and augments your
 # existing expunge list you can use with oscheck. If a failure was
 # present it will not be added again. If you had no expunge files,
-# they will be created for you.
+# they will be created for you. With --remove-passed tests which
+# passed are also removed from the expunge list.
+#
+# All expunge files are loaded once, the changes are computed in memory
+# and every changed file is written once, sorted.
 
 import argparse
 import os
 import sys
-import subprocess
 import configparser
+import xml.etree.ElementTree as ET
 from itertools import chain
+from lib.expunges import ExpungeSet
 
 oscheck_ansible_python_dir = os.path.dirname(os.path.abspath(__file__))
-oscheck_sort_expunge = (
-    oscheck_ansible_python_dir + "/../../../scripts/workflows/fstests/sort-expunges.sh"
-)
 top_dir = oscheck_ansible_python_dir + "/../../../../"
 
 
-def append_line(output_file, test_failure_line):
-    # We want to now add entries like generic/xxx where xxx are digits
-    output = open(output_file, "a+")
-    output.write("%s\n" % test_failure_line)
-    output.close()
-
-
 def is_config_bool_true(config, name):
     if name in config and config[name].strip('"') == "y":
         return True
@@ -46,6 +41,79 @@ def get_config(dotconfig):
     return None
 
 
+def shortcut_expunge_dir(config, filesystem, hostname, kernel):
+    """
+    Return the path components of the distribution or shortcut kernel
+    expunge directory to use for kernel, or None.
+    """
+    if not is_config_bool_true(config, "CONFIG_LIBVIRT_OPENSUSE"):
+        return None
+    if (
+        is_config_bool_true(config, "CONFIG_WORKFLOW_KOTD_ENABLE")
+        and "leap" in hostname
+    ):
+        leap_host_parts = hostname.split("leap")
+        if len(leap_host_parts) <= 1:
+            sys.stderr.write("Invalid hostname: %s\n" % hostname)
+            sys.exit(1)
+        leap_release_parts = leap_host_parts[1].split("-" + filesystem)
+        leap_release_name = leap_release_parts[0]
+        leap_release_parts = leap_release_name.split("sp")
+        if len(leap_release_parts) <= 1:
+            sys.stderr.write("Unexpected sles_release_name: %s\n" % leap_release_name)
+            sys.exit(1)
+        leap_point_release = leap_release_parts[0] + "." + leap_release_parts[1]
+
+        # This becomes generic release directory, not specific to any
+        # kernel.
+        return ["opensuse-leap", leap_point_release, filesystem]
+
+    ksplit = kernel.split(".")
+    shortcut_kernel = ksplit[0] + "." + ksplit[1] + "." + ksplit[2]
+    return [shortcut_kernel, filesystem]
+
+
+def expunge_file_parts(expunges, config, filesystem, hostname, kernel, section):
+    """
+    Return the path components of the expunge file for failures of
+    section on kernel, such as 4.19.17/xfs/unassigned/xfs_nocrc.txt
+    """
+    kernel_dir = [kernel, filesystem]
+    base_kernel = kernel[:-1] if kernel.endswith("+") else kernel
+    shortcut_dir = shortcut_expunge_dir(config, filesystem, hostname, kernel)
+
+    if not expunges.has_dir(*kernel_dir, "unassigned"):
+        if shortcut_dir and expunges.has_dir(*shortcut_dir, "unassigned"):
+            kernel_dir = shortcut_dir
+        elif base_kernel != kernel and expunges.has_dir(
+            base_kernel, filesystem, "unassigned"
+        ):
+            sys.stdout.write(
+                "<== expunges for %s not found but found base kernel %s expunge directory ==>\n"
+                % (kernel, base_kernel)
+            )
+            kernel_dir = [base_kernel, filesystem]
+        else:
+            sys.stdout.write("<== New expunge set for %s\n" % kernel)
+
+    return kernel_dir + ["unassigned", section + ".txt"]
+
+
+def passed_tests(section_dir):
+    """Tests which passed according to the xunit file of a section."""
+    result = os.path.join(section_dir, "result.xml")
+    if not os.path.isfile(result):
+        return set()
+    passed = set()
+    for testcase in ET.parse(result).getroot().iter("testcase"):
+        if any(
+            testcase.find(tag) is not None for tag in ("failure", "error", "skipped")
+        ):
+            continue
+        passed.add(testcase.get("name"))
+    return passed
+
+
 def main():
     parser = argparse.ArgumentParser(description="Augments expunge list for oscheck")
     parser.add_argument(
@@ -66,6 +134,20 @@ def main():
         type=str,
         help="The directory where to generate the expunge lists to",
     )
+    parser.add_argument(
+        "--remove-passed",
+        const=True,
+        default=False,
+        action="store_const",
+        help="Also remove tests which passed from the expunge lists",
+    )
+    parser.add_argument(
+        "--dry-run",
+        const=True,
+        default=False,
+        action="store_const",
+        help="Only print the changes which would be made",
+    )
     parser.add_argument(
         "--verbose",
         const=True,
@@ -75,196 +157,91 @@ def main():
     )
     args = parser.parse_args()
 
-    expunge_kernel_dir = ""
-
-    #    all_files = os.listdir(args.results)
     dotconfig = top_dir + "/.config"
     config = get_config(dotconfig)
     if not config:
         sys.stdout.write("%s does not exist\n" % (dotconfig))
         sys.exit(1)
 
-    bad_files = []
+    # (hostname, kernel, section) -> failed tests
+    failures = {}
+    section_dirs = set()
     for root, dirs, all_files in os.walk(args.results):
+        if "result.xml" in all_files:
+            section_dirs.add(root)
         for fname in all_files:
-            f = os.path.join(root, fname)
-            if os.path.isdir(f):
-                continue
-            if not os.path.isfile(f):
+            if not fname.endswith(".bad") and not fname.endswith(".dmesg"):
                 continue
-            if f.endswith(".bad") or f.endswith(".dmesg"):
-                bad_files.append(f)
-    for f in bad_files:
-        if args.verbose:
-            sys.stdout.write("Processing %s\n" % f)
-
-        # f may be results/oscheck-xfs/4.19.0-4-amd64/xfs/generic/xxx.out.bad
-        # f may be results/oscheck-xfs/4.19.0-4-amd64/xfs/generic/xxx.dmesg
-        # where xxx are digits
-        bad_file_list = f.split("/")
-        bad_file_list_len = len(bad_file_list) - 1
-        bad_file = bad_file_list[bad_file_list_len]
-        test_group = bad_file_list[bad_file_list_len - 1]
-        section = bad_file_list[bad_file_list_len - 2]
-        kernel = bad_file_list[bad_file_list_len - 3]
-        hostname = bad_file_list[bad_file_list_len - 4]
-
-        if args.verbose:
-            sys.stdout.write("%s\n" % bad_file_list)
-            sys.stdout.write("\tbad_file: %s\n" % bad_file)
-            sys.stdout.write("\ttest_group: %s\n" % test_group)
-            sys.stdout.write("\tsection: %s\n" % section)
-            sys.stdout.write("\thostname: %s\n" % hostname)
-
-        bad_file_parts = bad_file.split(".")
-        bad_file_test_number = bad_file_parts[0]
-        # This is like for example generic/xxx where xxx are digits
-        test_failure_line = test_group + "/" + bad_file_test_number
-
-        # now to stuff this into expunge files such as:
-        # path/4.19.17/xfs/unassigned/xfs_nocrc.txt
-        expunge_kernel_dir = args.outputdir + "/" + kernel + "/" + args.filesystem + "/"
-        output_dir = expunge_kernel_dir + "unassigned/"
-        output_file = output_dir + section + ".txt"
-
-        base_kernel = kernel
-        if base_kernel.endswith("+"):
-            base_kernel = kernel.replace("+", "")
-            base_expunge_kernel_dir = (
-                args.outputdir + "/" + base_kernel + "/" + args.filesystem + "/"
+            f = os.path.join(root, fname)
+            if args.verbose:
+                sys.stdout.write("Processing %s\n" % f)
+
+            # f may be results/oscheck-xfs/4.19.0-4-amd64/xfs/generic/xxx.out.bad
+            # f may be results/oscheck-xfs/4.19.0-4-amd64/xfs/generic/xxx.dmesg
+            # where xxx are digits
+            bad_file_list = f.split("/")
+            bad_file_list_len = len(bad_file_list) - 1
+            bad_file = bad_file_list[bad_file_list_len]
+            test_group = bad_file_list[bad_file_list_len - 1]
+            section = bad_file_list[bad_file_list_len - 2]
+            kernel = bad_file_list[bad_file_list_len - 3]
+            hostname = bad_file_list[bad_file_list_len - 4]
+
+            if args.verbose:
+                sys.stdout.write("%s\n" % bad_file_list)
+                sys.stdout.write("\tbad_file: %s\n" % bad_file)
+                sys.stdout.write("\ttest_group: %s\n" % test_group)
+                sys.stdout.write("\tsection: %s\n" % section)
+                sys.stdout.write("\thostname: %s\n" % hostname)
+
+            bad_file_test_number = bad_file.split(".")[0]
+            # This is like for example generic/xxx where xxx are digits
+            test_failure_line = test_group + "/" + bad_file_test_number
+            failures.setdefault((hostname, kernel, section), set()).add(
+                test_failure_line
             )
-            base_output_dir = base_expunge_kernel_dir + "unassigned/"
-            base_output_file = base_output_dir + section + ".txt"
-
-        shortcut_kernel_dir = None
-        shortcut_dir = None
-        shortcut_file = None
-
-        # Vagrant support removed - keeping for reference
-        if False and is_config_bool_true(config, "CONFIG_VAGRANT_SUSE"):
-            if is_config_bool_true(config, "CONFIG_WORKFLOW_KOTD_ENABLE"):
-                sles_host_parts = hostname.split("sles")
-                if len(sles_host_parts) <= 1:
-                    sys.stderr.write("Invalid hostname: %s\n" % hostname)
-                    sys.exit(1)
-                sles_release_parts = sles_host_parts[1].split("-" + args.filesystem)
-                sles_release_name = sles_release_parts[0]
-                sles_release_parts = sles_release_name.split("sp")
-                if len(sles_release_parts) <= 1:
-                    sys.stderr.write(
-                        "Unexpected sles_release_name: %s\n" % sles_release_name
-                    )
-                    sys.exit(1)
-                sles_point_release = sles_release_parts[0] + "." + sles_release_parts[1]
-
-                # This becomes generic release directory, not specific to any
-                # kernel.
-                shortcut_kernel_dir = (
-                    args.outputdir
-                    + "/"
-                    + "sles/"
-                    + sles_point_release
-                    + "/"
-                    + args.filesystem
-                    + "/"
-                )
 
-                shortcut_dir = shortcut_kernel_dir + "unassigned/"
-                shortcut_file = shortcut_dir + section + ".txt"
-            else:
-                ksplit = kernel.split(".")
-                shortcut_kernel = ksplit[0] + "." + ksplit[1] + "." + ksplit[2]
-                shortcut_kernel_dir = (
-                    args.outputdir + "/" + shortcut_kernel + "/" + args.filesystem + "/"
-                )
-                shortcut_dir = shortcut_kernel_dir + "unassigned/"
-                shortcut_file = shortcut_dir + section + ".txt"
-        elif is_config_bool_true(config, "CONFIG_LIBVIRT_OPENSUSE"):
-            if (
-                is_config_bool_true(config, "CONFIG_WORKFLOW_KOTD_ENABLE")
-                and "leap" in hostname
-            ):
-                leap_host_parts = hostname.split("leap")
-                if len(leap_host_parts) <= 1:
-                    sys.stderr.write("Invalid hostname: %s\n" % hostname)
-                    sys.exit(1)
-                leap_release_parts = leap_host_parts[1].split("-" + args.filesystem)
-                leap_release_name = leap_release_parts[0]
-                leap_release_parts = leap_release_name.split("sp")
-                if len(leap_release_parts) <= 1:
-                    sys.stderr.write(
-                        "Unexpected sles_release_name: %s\n" % leap_release_name
-                    )
-                    sys.exit(1)
-                leap_point_release = leap_release_parts[0] + "." + leap_release_parts[1]
+    expunges = ExpungeSet(args.outputdir)
 
-                # This becomes generic release directory, not specific to any
-                # kernel.
-                shortcut_kernel_dir = (
-                    args.outputdir
-                    + "/"
-                    + "opensuse-leap/"
-                    + leap_point_release
-                    + "/"
-                    + args.filesystem
-                    + "/"
-                )
-
-                shortcut_dir = shortcut_kernel_dir + "unassigned/"
-                shortcut_file = shortcut_dir + section + ".txt"
-            else:
-                ksplit = kernel.split(".")
-                shortcut_kernel = ksplit[0] + "." + ksplit[1] + "." + ksplit[2]
-                shortcut_kernel_dir = (
-                    args.outputdir + "/" + shortcut_kernel + "/" + args.filesystem + "/"
-                )
-                shortcut_dir = shortcut_kernel_dir + "unassigned/"
-                shortcut_file = shortcut_dir + section + ".txt"
-
-        if not os.path.isdir(output_dir):
-            if shortcut_dir and os.path.isdir(shortcut_dir):
-                output_dir = shortcut_dir
-                output_file = shortcut_file
-                expunge_kernel_dir = shortcut_kernel_dir
-            elif base_kernel != kernel and os.path.isdir(base_output_dir):
-                sys.stdout.write(
-                    "<== expunges for %s not found but found base kernel %s expunge directory ==>\n"
-                    % (kernel, base_kernel)
-                )
-                expunge_kernel_dir = base_expunge_kernel_dir
-                output_dir = base_output_dir
-                output_file = base_output_file
-            else:
-                sys.stdout.write("<== New expunge set for %s\n" % kernel)
-                os.makedirs(output_dir)
-
-        if not os.path.isfile(output_file):
-            sys.stdout.write(
-                "====%s %s new failure found file was empty\n"
-                % (section, test_failure_line)
-            )
-            append_line(output_file, test_failure_line)
-        else:
-            existing_file = open(output_file, "r")
-            all_lines = existing_file.readlines()
-            existing_file.close()
-            found = False
-            for line in all_lines:
-                if test_failure_line.strip() in line.strip():
-                    found = True
-                    break
-            if not found:
-                sys.stdout.write(
-                    "%s %s new failure found\n" % (section, test_failure_line)
-                )
-                append_line(output_file, test_failure_line)
-
-    if expunge_kernel_dir != "":
-        sys.stdout.write("Sorting %s ...\n" % (expunge_kernel_dir))
-        sys.stdout.write(
-            "Running %s %s...\n" % (oscheck_sort_expunge, expunge_kernel_dir)
+    for (hostname, kernel, section), tests in sorted(failures.items()):
+        parts = expunge_file_parts(
+            expunges, config, args.filesystem, hostname, kernel, section
         )
-        subprocess.call([oscheck_sort_expunge, expunge_kernel_dir])
+        expunge_file = expunges.get(*parts)
+        for test in sorted(tests):
+            if expunge_file.add(test):
+                sys.stdout.write("%s %s new failure found\n" % (section, test))
+
+    if args.remove_passed:
+        for section_dir in sorted(section_dirs):
+            # section_dir may be results/oscheck-xfs/4.19.0-4-amd64/xfs_crc
+            dir_list = section_dir.rstrip("/").split("/")
+            if len(dir_list) < 3:
+                continue
+            hostname, kernel, section = dir_list[-3:]
+            passed = passed_tests(section_dir) - failures.get(
+                (hostname, kernel, section), set()
+            )
+            if not passed:
+                continue
+            parts = expunge_file_parts(
+                expunges, config, args.filesystem, hostname, kernel, section
+            )
+            expunge_file = expunges.get(*parts)
+            for test in sorted(passed):
+                if expunge_file.remove(test):
+                    sys.stdout.write("%s %s now passes\n" % (section, test))
+
+    for path, added, removed in expunges.diff():
+        sys.stdout.write("--- %s\n" % path)
+        for test in added:
+            sys.stdout.write("+%s\n" % test)
+        for test in removed:
+            sys.stdout.write("-%s\n" % test)
+
+    if not args.dry_run:
+        written = expunges.write()
+        sys.stdout.write("Updated %d expunge files\n" % written)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+# In memory view of an expunge list directory.
+#
+# All expunge files under a directory are read once into sets keyed by
+# their path relative to it, ie: 6.6.0/xfs/unassigned/xfs_crc.txt for
+# fstests or 6.6.0/failures.txt for blktests. Failures are added to and
+# removed from these sets, the result can be reviewed as a diff, and
+# only files which changed are rewritten, sorted, once and atomically.
+#
+# Each line of an expunge file is a test optionally followed by a
+# comment, ie: "generic/251 # korg#218226". Lines are matched on the
+# test only, so comments are kept when the file is rewritten.
+
+import os, re
+
+TEST_RE = re.compile(r"^\s*([^\s#]+)")
+
+
+class ExpungeError(Exception):
+    pass
+
+
+def parse_test(line):
+    m = TEST_RE.match(line)
+    if not m:
+        return None
+    return m.group(1)
+
+
+class ExpungeFile:
+    def __init__(self, path):
+        self.path = path
+        # test -> line as written to the file
+        self.lines = {}
+        # Lines without a test, such as comments, kept as they are
+        self.other = []
+        self.added = set()
+        self.removed = set()
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    test = parse_test(line)
+                    if test is None:
+                        if line.strip():
+                            self.other.append(line)
+                        continue
+                    self.lines.setdefault(test, line)
+
+    def __contains__(self, test):
+        return test in self.lines
+
+    def add(self, test, comment=None):
+        if test in self.lines:
+            return False
+        self.lines[test] = test if not comment else "%s # %s" % (test, comment)
+        if test in self.removed:
+            self.removed.discard(test)
+        else:
+            self.added.add(test)
+        return True
+
+    def remove(self, test):
+        if test not in self.lines:
+            return False
+        del self.lines[test]
+        if test in self.added:
+            self.added.discard(test)
+        else:
+            self.removed.add(test)
+        return True
+
+    def dirty(self):
+        return bool(self.added or self.removed)
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp, "w") as f:
+            for line in sorted(set(self.other) | set(self.lines.values())):
+                f.write("%s\n" % line)
+        os.replace(tmp, self.path)
+        self.added = set()
+        self.removed = set()
+
+
+class ExpungeSet:
+    def __init__(self, topdir):
+        self.topdir = os.path.realpath(topdir)
+        # Keyed by real path so files shared through symlinks are only
+        # loaded, and written, once.
+        self.files = {}
+        for root, dirs, files in os.walk(self.topdir):
+            for fname in files:
+                if fname.endswith(".txt"):
+                    self._load(os.path.join(root, fname))
+
+    def _load(self, path):
+        real = os.path.realpath(path)
+        expunge_file = self.files.get(real)
+        if expunge_file is None:
+            expunge_file = ExpungeFile(real)
+            self.files[real] = expunge_file
+        return expunge_file
+
+    def path(self, *parts):
+        return os.path.join(self.topdir, *parts)
+
+    def has_dir(self, *parts):
+        """True if the directory exists or will once changes are written."""
+        path = self.path(*parts)
+        if os.path.isdir(path):
+            return True
+        prefix = os.path.join(path, "")
+        return any(
+            real.startswith(prefix) and expunge_file.dirty()
+            for real, expunge_file in self.files.items()
+        )
+
+    def get(self, *parts):
+        """
+        Return the expunge file at the given path components relative to
+        the top directory, an empty one if it does not exist yet.
+        """
+        if not parts[-1].endswith(".txt"):
+            raise ExpungeError("Expunge files must end in .txt: %s" % parts[-1])
+        return self._load(self.path(*parts))
+
+    def diff(self):
+        """
+        Return the pending changes as a sorted list of
+        (relative path, added tests, removed tests).
+        """
+        changes = []
+        for real, expunge_file in self.files.items():
+            if not expunge_file.dirty():
+                continue
+            changes.append(
+                (
+                    os.path.relpath(real, self.topdir),
+                    sorted(expunge_file.added),
+                    sorted(expunge_file.removed),
+                )
+            )
+        return sorted(changes)
+
+    def write(self):
+        """Write every changed expunge file, returning how many were written."""
+        written = 0
+        for expunge_file in self.files.values():
+            if expunge_file.dirty():
+                expunge_file.write()
+                written += 1
+        return written
@@ -4,17 +4,28 @@ Milvus Vector Database Benchmark Script
 
 This script performs comprehensive benchmarking of Milvus vector database
 including vector insertion, index creation, and query performance testing.
+
+With benchmark_recall enabled the quality of the search results is measured
+too: the exact nearest neighbors of a query set are computed locally by
+brute force over the inserted dataset and the recall@k and latency
+percentiles of the index are reported for a sweep of the ef (HNSW) or
+nprobe (IVF_FLAT) search parameter. The dataset is generated from a fixed
+seed so it can be regenerated for the brute force search, and the ground
+truth is cached on disk as it only depends on the dataset and queries.
 """
 
+import hashlib
 import json
 import numpy as np
+import queue
+import threading
 import time
 import argparse
 import sys
 import subprocess
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 try:
@@ -34,11 +45,106 @@ except ImportError as e:
     print("Please ensure pymilvus is installed in the virtual environment")
     sys.exit(1)
 
+# The dataset is generated in blocks of vectors with their own seed, so any
+# part of it can be regenerated by the ground truth search whatever the
+# insert batch size.
+VECTOR_BLOCK_SIZE = 1000
+
+DEFAULT_INSERT_BATCH_SIZE = 1000
+DEFAULT_INSERT_THREADS = 4
+# Threads generating the batches for the inserters
+GENERATOR_THREADS = 2
+# Window of the insert throughput timeline in seconds
+THROUGHPUT_WINDOW = 10
+# State of the segments which are not sealed yet
+GROWING_SEGMENT_STATES = ("Growing",)
+
+GROUND_TRUTH_VERSION = 1
+GROUND_TRUTH_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "kdevops", "milvus-ground-truth"
+)
+# Dataset rows compared against all queries at once by the brute force
+# search, bounds its memory use to about chunk * queries * 4 bytes.
+GROUND_TRUTH_CHUNK = 16 * VECTOR_BLOCK_SIZE
+
+# Default search parameter sweeps of the recall benchmark
+RECALL_SWEEPS = {
+    "HNSW": ("ef", [16, 32, 64, 128, 256, 512]),
+    "IVF_FLAT": ("nprobe", [1, 4, 16, 64, 256]),
+}
+
+
+def exact_neighbors(
+    queries: np.ndarray, chunks, topk: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact L2 nearest neighbors of the queries by brute force. chunks yields
+    (first id, vectors) for consecutive parts of the dataset, only the
+    best topk candidates of each query are kept between chunks. Returns
+    the (ids, squared distances) of the neighbors, nearest first.
+    """
+    nq = len(queries)
+    best_ids = np.full((nq, 0), -1, dtype=np.int64)
+    best_dist = np.empty((nq, 0), dtype=np.float32)
+    q = queries.astype(np.float32)
+    q_norms = np.einsum("ij,ij->i", q, q)[:, None]
+
+    for start, vectors in chunks:
+        vectors = vectors.astype(np.float32, copy=False)
+        # |q - x|^2 = |q|^2 - 2 q.x + |x|^2
+        dist = q @ vectors.T
+        dist *= -2.0
+        dist += np.einsum("ij,ij->i", vectors, vectors)[None, :]
+        dist += q_norms
+        ids = np.broadcast_to(
+            np.arange(start, start + len(vectors), dtype=np.int64), dist.shape
+        )
+
+        dist = np.concatenate([best_dist, dist], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        if dist.shape[1] > topk:
+            keep = np.argpartition(dist, topk - 1, axis=1)[:, :topk]
+            dist = np.take_along_axis(dist, keep, axis=1)
+            ids = np.take_along_axis(ids, keep, axis=1)
+        best_dist, best_ids = dist, ids
+
+    order = np.argsort(best_dist, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_ids, order, axis=1),
+        np.maximum(np.take_along_axis(best_dist, order, axis=1), 0),
+    )
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> np.ndarray:
+    """
+    Recall of each query, the fraction of its true topk neighbors among
+    the ids found. found is padded with -1 for queries with fewer hits.
+    """
+    topk = truth.shape[1]
+    hits = (found[:, :, None] == truth[:, None, :]).any(axis=2).sum(axis=1)
+    return hits / topk
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Mean and p50/p95/p99 of latencies in seconds, reported in ms."""
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "mean": float(ms.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(ms.max()),
+    }
+
 
 class MilvusBenchmark:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.collection = None
+        # Vectors in the collection, more than the dataset size with a
+        # sustained ingest
+        self.inserted_vectors = config.get("vector_dataset_size", 0)
         self.results = {
             "config": config,
             "timestamp": datetime.now().isoformat(),
@@ -190,56 +296,264 @@ class MilvusBenchmark:
         )
         return ids, vectors
 
-    def benchmark_insert(self) -> bool:
-        """Benchmark vector insertion performance"""
+    def dataset_seed(self) -> int:
+        return int(self.config.get("vector_seed", 42))
+
+    def dataset_vectors(self, start: int, count: int) -> np.ndarray:
+        """
+        The dataset vectors with ids start to start + count. Every block of
+        VECTOR_BLOCK_SIZE vectors has its own seed so any part of the
+        dataset can be regenerated.
+        """
+        dim = self.config["vector_dimensions"]
+        end = start + count
+        first = start - start % VECTOR_BLOCK_SIZE
+        blocks = []
+        for block_start in range(first, end, VECTOR_BLOCK_SIZE):
+            rng = np.random.default_rng([self.dataset_seed(), 0, block_start])
+            blocks.append(rng.random((VECTOR_BLOCK_SIZE, dim), dtype=np.float32))
+        vectors = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        return vectors[start - first : end - first]
+
+    def recall_query_vectors(self, count: int) -> np.ndarray:
+        rng = np.random.default_rng([self.dataset_seed(), 1])
+        return rng.random((count, self.config["vector_dimensions"]), dtype=np.float32)
+
+    def _insert_batches(self, next_batch, threads: int, stats: Dict[str, Any]):
+        """
+        Insert the batches returned by next_batch() until it returns None.
+        Generator threads generate the batches into a bounded queue, so
+        generating vectors overlaps with the inserts, and threads inserters
+        insert them concurrently.
+        """
+        batches = queue.Queue(maxsize=2 * threads)
+        stop = threading.Event()
+        lock = threading.Lock()
+        t0 = time.perf_counter()
+
+        def generate():
+            while not stop.is_set():
+                batch = next_batch()
+                if batch is None:
+                    return
+                start, count = batch
+                item = (
+                    list(range(start, start + count)),
+                    self.dataset_vectors(start, count).tolist(),
+                )
+                while not stop.is_set():
+                    try:
+                        batches.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+
+        def insert():
+            while True:
+                item = batches.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    # Drain the queue after a failure
+                    continue
+                ids, vectors = item
+                start_time = time.perf_counter()
+                try:
+                    self.collection.insert([ids, vectors])
+                except Exception as e:
+                    with lock:
+                        stats["errors"].append(e)
+                    stop.set()
+                    continue
+                end_time = time.perf_counter()
+                with lock:
+                    stats["latencies"].append(end_time - start_time)
+                    stats["completed"].append((end_time - t0, len(ids)))
+
+        inserters = [threading.Thread(target=insert) for _ in range(threads)]
+        generators = [
+            threading.Thread(target=generate) for _ in range(GENERATOR_THREADS)
+        ]
+        for thread in inserters + generators:
+            thread.start()
+        for thread in generators:
+            thread.join()
+        for _ in inserters:
+            batches.put(None)
+        for thread in inserters:
+            thread.join()
+        return time.perf_counter() - t0
+
+    def _segment_states(self, loaded: bool) -> Dict[str, int]:
+        """
+        Number of segments of the collection in each state. Growing
+        segments are only reported by the query nodes of a loaded
+        collection, otherwise the persisted segments are counted.
+        """
+        if loaded:
+            segments = utility.get_query_segment_info(self.collection.name)
+        else:
+            segments = utility.get_persistent_segment_info(self.collection.name)
+        states = {}
+        for segment in segments:
+            state = str(getattr(segment.state, "name", segment.state))
+            states[state] = states.get(state, 0) + 1
+        return states
+
+    def _flush(self) -> Tuple[float, Optional[float], Dict[str, int]]:
+        """
+        Flush the collection. Returns the flush time, the time until no
+        segment was growing anymore, None if it could not be told, and the
+        segment states after the flush.
+
+        Growing segments are only visible to the query nodes of a loaded
+        collection. Otherwise the seal time is the completion of flush(),
+        which only returns once every segment is sealed and flushed.
+        """
         try:
-            self.logger.info("Starting insert benchmark...")
-
-            batch_size = 1000
-            total_vectors = self.config["vector_dataset_size"]
+            loaded = utility.load_state(self.collection.name) == LoadState.Loaded
+        except Exception as e:
+            self.logger.warning(f"Could not get the load state: {e}")
+            loaded = False
+        done = threading.Event()
+        seal = {}
 
-            insert_times = []
+        def watch_segments(start_time):
+            while True:
+                try:
+                    states = self._segment_states(loaded)
+                except Exception as e:
+                    self.logger.warning(f"Could not get segment states: {e}")
+                    return
+                if not any(state in states for state in GROWING_SEGMENT_STATES):
+                    seal["time"] = time.perf_counter() - start_time
+                    return
+                if done.wait(0.1):
+                    return
+
+        flush_start = time.perf_counter()
+        watcher = None
+        if loaded:
+            watcher = threading.Thread(target=watch_segments, args=(flush_start,))
+            watcher.start()
+        try:
+            self.collection.flush()
+        finally:
+            flush_time = time.perf_counter() - flush_start
+            done.set()
+            if watcher:
+                watcher.join()
+        if not loaded:
+            seal["time"] = flush_time
 
-            for i in range(0, total_vectors, batch_size):
-                current_batch_size = min(batch_size, total_vectors - i)
+        try:
+            states = self._segment_states(loaded)
+        except Exception:
+            return flush_time, seal.get("time"), {}
+        if "time" not in seal and not any(
+            state in states for state in GROWING_SEGMENT_STATES
+        ):
+            # Sealed after the last poll
+            seal["time"] = flush_time
+        return flush_time, seal.get("time"), states
 
-                # Generate batch data
-                ids, vectors = self.generate_vectors(current_batch_size)
-                ids = [id + i for id in ids]  # Ensure unique IDs
+    def benchmark_insert(self) -> bool:
+        """
+        Benchmark vector insertion performance. The dataset is inserted
+        once, or with insert_duration set vectors are inserted for that many
+        seconds to measure sustained ingest.
+        """
+        try:
+            batch_size = self.config.get("batch_size") or DEFAULT_INSERT_BATCH_SIZE
+            threads = max(1, self.config.get("insert_threads", DEFAULT_INSERT_THREADS))
+            duration = self.config.get("insert_duration", 0)
+            total_vectors = self.config["vector_dataset_size"]
 
-                # Insert batch
-                start_time = time.time()
-                self.collection.insert([ids, vectors])
-                insert_time = time.time() - start_time
-                insert_times.append(insert_time)
+            if duration:
+                self.logger.info(
+                    f"Starting sustained insert benchmark for {duration}s "
+                    f"({threads} inserters, batch size {batch_size})..."
+                )
+            else:
+                self.logger.info(
+                    f"Starting insert benchmark ({threads} inserters, "
+                    f"batch size {batch_size})..."
+                )
 
-                if (i // batch_size) % 100 == 0:
-                    self.logger.info(
-                        f"Inserted {i + current_batch_size}/{total_vectors} vectors"
-                    )
+            lock = threading.Lock()
+            state = {"next": 0, "batches": 0}
+            deadline = time.monotonic() + duration
+
+            def next_batch():
+                with lock:
+                    start = state["next"]
+                    if duration:
+                        if time.monotonic() >= deadline:
+                            return None
+                        count = batch_size
+                    else:
+                        if start >= total_vectors:
+                            return None
+                        count = min(batch_size, total_vectors - start)
+                    state["next"] = start + count
+                    state["batches"] += 1
+                    if state["batches"] % 100 == 0:
+                        self.logger.info(f"Inserting vectors {start}-{start + count}")
+                return start, count
+
+            stats = {"latencies": [], "completed": [], "errors": []}
+            insert_time = self._insert_batches(next_batch, threads, stats)
+            if stats["errors"]:
+                raise stats["errors"][0]
+
+            inserted = sum(count for _, count in stats["completed"])
+            self.inserted_vectors = inserted
+            self.logger.info(f"Inserted {inserted} vectors in {insert_time:.2f}s")
 
             # Flush to ensure data is persisted
             self.logger.info("Flushing collection...")
-            flush_start = time.time()
-            self.collection.flush()
-            flush_time = time.time() - flush_start
+            flush_time, seal_time, segments = self._flush()
+
+            # Throughput over time, a sustained ingest shows the effect of
+            # compaction and write amplification on the insert rate. Only
+            # full windows are kept: batches complete in lumps, and a few of
+            # them completing in the short last window would inflate its
+            # rate. Windows without completed batches are kept as stalls.
+            windows = {}
+            for end_time, count in stats["completed"]:
+                window = int(end_time // THROUGHPUT_WINDOW)
+                windows[window] = windows.get(window, 0) + count
+            timeline = [
+                {
+                    "time_seconds": window * THROUGHPUT_WINDOW,
+                    "vectors_per_second": windows.get(window, 0) / THROUGHPUT_WINDOW,
+                }
+                for window in range(int(insert_time // THROUGHPUT_WINDOW))
+            ]
 
-            # Calculate statistics
-            total_insert_time = sum(insert_times)
-            avg_insert_time = total_insert_time / len(insert_times)
-            vectors_per_second = total_vectors / total_insert_time
+            latencies = stats["latencies"]
+            vectors_per_second = inserted / insert_time
 
             self.results["insert_performance"] = {
-                "total_vectors": total_vectors,
-                "total_time_seconds": total_insert_time,
+                "mode": "sustained" if duration else "dataset",
+                "total_vectors": inserted,
+                "total_time_seconds": insert_time,
                 "flush_time_seconds": flush_time,
-                "average_batch_time_seconds": avg_insert_time,
+                "seal_time_seconds": seal_time,
+                "average_batch_time_seconds": sum(latencies) / len(latencies),
+                "batch_latency_ms": latency_percentiles(latencies),
                 "vectors_per_second": vectors_per_second,
                 "batch_size": batch_size,
+                "insert_threads": threads,
+                "segments": segments,
+                "throughput_timeline": timeline,
             }
+            if duration:
+                self.results["insert_performance"]["duration_seconds"] = duration
 
             self.logger.info(
-                f"Insert benchmark completed: {vectors_per_second:.2f} vectors/sec"
+                f"Insert benchmark completed: {vectors_per_second:.2f} vectors/sec, "
+                f"flush {flush_time:.2f}s"
             )
             return True
 
@@ -452,6 +766,145 @@ class MilvusBenchmark:
             self.logger.error(f"Query benchmark failed: {e}")
             return False
 
+    def ground_truth(self, queries: np.ndarray, topk: int) -> Tuple[np.ndarray, bool]:
+        """
+        Exact topk neighbor ids of the recall queries, returns (ids, cached).
+        The brute force search is done once per dataset and query set, the
+        result is cached on disk.
+        """
+        total_vectors = self.inserted_vectors
+        key = json.dumps(
+            [
+                GROUND_TRUTH_VERSION,
+                self.dataset_seed(),
+                total_vectors,
+                self.config["vector_dimensions"],
+                len(queries),
+                topk,
+                "L2",
+            ]
+        )
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        cache_dir = self.config.get("recall_cache_dir") or GROUND_TRUTH_CACHE_DIR
+        cache_file = os.path.join(cache_dir, f"gt-{digest}.npy")
+
+        try:
+            ids = np.load(cache_file, allow_pickle=False)
+            if ids.shape == (len(queries), topk):
+                self.logger.info(f"Using cached ground truth {cache_file}")
+                return ids, True
+        except (OSError, ValueError):
+            pass
+
+        self.logger.info(
+            f"Computing exact top-{topk} neighbors of {len(queries)} queries "
+            f"over {total_vectors} vectors..."
+        )
+        chunk = max(1, self.config.get("recall_chunk_size", GROUND_TRUTH_CHUNK))
+        chunks = (
+            (start, self.dataset_vectors(start, min(chunk, total_vectors - start)))
+            for start in range(0, total_vectors, chunk)
+        )
+        ids, _ = exact_neighbors(queries, chunks, topk)
+
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, ids)
+            os.replace(tmp, cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not cache ground truth in {cache_file}: {e}")
+        return ids, False
+
+    def recall_sweep(self, topk: int) -> Tuple[Optional[str], List[Any]]:
+        """The search parameter and the values of the recall sweep."""
+        index_type = self.config["index_type"]
+        param, default_values = RECALL_SWEEPS.get(index_type, (None, [None]))
+        if param is None:
+            # Exhaustive index, a single point without a search parameter
+            return None, [None]
+
+        values = self.config.get("recall_sweep") or default_values
+        if param == "ef":
+            # HNSW needs ef >= topk
+            values = [v for v in values if v >= topk] or [topk]
+        elif param == "nprobe":
+            nlist = self.config.get("index_ivf_nlist", 1024)
+            values = [v for v in values if v <= nlist] or [nlist]
+        return param, sorted(set(values))
+
+    def benchmark_recall(self) -> bool:
+        """
+        Benchmark recall@k and latency percentiles across a sweep of the
+        search parameter of the index. Expects the collection loaded by
+        benchmark_queries.
+        """
+        try:
+            self.logger.info("Starting recall benchmark...")
+            topk = self.config.get("recall_topk", 10)
+            query_count = self.config.get("recall_queries", 1000)
+            queries = self.recall_query_vectors(query_count)
+
+            start_time = time.time()
+            truth, cached = self.ground_truth(queries, topk)
+            ground_truth_time = time.time() - start_time
+
+            param, values = self.recall_sweep(topk)
+            query_list = queries.tolist()
+            sweep = []
+            for value in values:
+                search_params = {"metric_type": "L2", "params": {}}
+                if param is not None:
+                    search_params["params"][param] = value
+                self.logger.info(f"Testing recall@{topk} with {param}={value}")
+
+                found = np.full((query_count, topk), -1, dtype=np.int64)
+                latencies = []
+                for i, vector in enumerate(query_list):
+                    start_time = time.perf_counter()
+                    results = self.collection.search(
+                        [vector],
+                        "vector",
+                        search_params,
+                        limit=topk,
+                        output_fields=["id"],
+                    )
+                    latencies.append(time.perf_counter() - start_time)
+                    hit_ids = list(results[0].ids)[:topk]
+                    found[i, : len(hit_ids)] = hit_ids
+
+                recalls = recall_at_k(found, truth)
+                point = {
+                    "param": param,
+                    "value": value,
+                    "recall": float(recalls.mean()),
+                    "min_recall": float(recalls.min()),
+                    "queries_per_second": len(latencies) / sum(latencies),
+                    "latency_ms": latency_percentiles(latencies),
+                }
+                sweep.append(point)
+                self.logger.info(
+                    f"{param}={value}: recall@{topk}={point['recall']:.4f}, "
+                    f"{point['queries_per_second']:.1f} QPS, "
+                    f"p99 {point['latency_ms']['p99']:.2f}ms"
+                )
+
+            self.results["recall_performance"] = {
+                "topk": topk,
+                "total_queries": query_count,
+                "search_param": param,
+                "ground_truth_seconds": ground_truth_time,
+                "ground_truth_cached": cached,
+                "sweep": sweep,
+            }
+            self.logger.info("Recall benchmark completed")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Recall benchmark failed: {e}")
+            return False
+
     def run_benchmark(self) -> bool:
         """Run complete benchmark suite"""
         self.logger.info("Starting Milvus benchmark suite...")
@@ -516,6 +969,10 @@ class MilvusBenchmark:
         if not self.benchmark_queries():
             return False
 
+        if self.config.get("benchmark_recall", False):
+            if not self.benchmark_recall():
+                return False
+
         self.logger.info("Benchmark suite completed successfully")
         return True
 
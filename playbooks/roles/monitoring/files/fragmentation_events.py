@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Columnar event store shared by the fragmentation analysis tools.
+
+The tracker writes its events as a JSON list of dicts. Iterating over
+millions of those dicts for every graph and comparison is what made the
+visualizer and the A/B comparison tools slow, so the events are converted
+once into a numpy structured array (one column per field) and binning,
+heatmaps and metrics are done as vectorized operations over the columns.
+
+The converted array is cached in a <data file>.npz sidecar next to the
+JSON file, which is used as long as the size and modification time of the
+JSON file are unchanged, so the JSON is only parsed by the first tool
+loading a data file.
+
+Files of the tracker's aggregate mode only hold 1 in sample_rate raw
+events, they are loaded from the exact counts in the aggregates section
+instead, as count weighted rows, see EventStore.from_aggregates().
+"""
+
+import json
+import os
+import numpy as np
+
+CACHE_VERSION = 3
+SIDECAR_SUFFIX = ".npz"
+
+# Event type codes of the "type" column
+EVENT_TYPES = (
+    "extfrag",
+    "compaction_success",
+    "compaction_failure",
+    "migration",
+    "compaction",
+)
+EXTFRAG, COMPACTION_SUCCESS, COMPACTION_FAILURE, MIGRATION, COMPACTION = range(
+    len(EVENT_TYPES)
+)
+UNKNOWN_TYPE = 255
+
+# Aggregate mode timeline series: (event type, is_steal, series)
+TIMELINE_SERIES = (
+    (EXTFRAG, True, "extfrag_steal"),
+    (EXTFRAG, False, "extfrag_claim"),
+    (COMPACTION_SUCCESS, False, "compaction_success"),
+    (COMPACTION_FAILURE, False, "compaction_failure"),
+)
+
+# migrate_from and migrate_to are indexes into EventStore.migrate_types,
+# index 0 is used by events without a migrate type. count is the number of
+# events of the row, 1 for raw events.
+EVENT_DTYPE = np.dtype(
+    [
+        ("timestamp", "f8"),
+        ("type", "u1"),
+        ("order", "i4"),
+        ("fallback_order", "i4"),
+        ("migrate_from", "u1"),
+        ("migrate_to", "u1"),
+        ("is_steal", "?"),
+        ("node", "i4"),
+        ("fragmentation_index", "i8"),
+        ("nr_migrated", "i8"),
+        ("success", "?"),
+        ("count", "i8"),
+    ]
+)
+
+
+def load_data(filename):
+    """Load JSON data, handling incomplete/corrupted files gracefully."""
+    with open(filename, "r") as f:
+        content = f.read()
+
+    # Try standard JSON parsing first
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        print(f"Warning: JSON decode error at position {e.pos}: {e.msg}")
+        print("Attempting to recover valid events...")
+
+        # Try to recover by finding the last complete event
+        # Look for the last complete JSON object in the events array
+        try:
+            # Find the events array start
+            events_start = content.find('"events": [')
+            if events_start == -1:
+                events_start = content.find('"events":[')
+
+            if events_start == -1:
+                print("Error: Could not find events array in JSON")
+                return {"events": []}
+
+            # Extract just the events portion
+            events_section = content[events_start:]
+
+            # Try to parse up to various truncation points
+            valid_events = []
+            bracket_count = 0
+            brace_count = 0
+            in_string = False
+            escape_next = False
+            last_valid_end = -1
+
+            for i, char in enumerate(events_section):
+                if escape_next:
+                    escape_next = False
+                    continue
+
+                if char == "\\" and in_string:
+                    escape_next = True
+                    continue
+
+                if char == '"' and not escape_next:
+                    in_string = not in_string
+                    continue
+
+                if in_string:
+                    continue
+
+                if char == "{":
+                    brace_count += 1
+                elif char == "}":
+                    brace_count -= 1
+                    # A complete object when brace_count returns to 0
+                    if brace_count == 0 and bracket_count > 0:
+                        last_valid_end = events_start + i + 1
+                elif char == "[":
+                    bracket_count += 1
+                elif char == "]":
+                    bracket_count -= 1
+                    if bracket_count == 0:
+                        # Found the end of events array
+                        break
+
+            # Try to construct valid JSON up to last valid event
+            if last_valid_end > 0:
+                truncated = content[:last_valid_end]
+                # Close the events array and main object
+                if not truncated.rstrip().endswith("]"):
+                    truncated = truncated.rstrip().rstrip(",") + "]"
+                if not truncated.rstrip().endswith("}"):
+                    truncated += "}"
+
+                try:
+                    result = json.loads(truncated)
+                    num_events = len(result.get("events", []))
+                    print(f"Successfully recovered {num_events} valid events")
+                    return result
+                except:
+                    pass
+
+            # Fallback: Try to extract individual event objects
+            print("Attempting line-by-line event recovery...")
+            result = recover_events_line_by_line(content)
+            # Keep sampled events from being taken for all events.
+            if '"mode": "aggregate"' in content:
+                result["metadata"] = {"mode": "aggregate"}
+            return result
+
+        except Exception as recovery_error:
+            print(f"Recovery failed: {recovery_error}")
+            return {"events": []}
+
+
+def recover_events_line_by_line(content):
+    """Try to recover events by parsing line by line."""
+    events = []
+    lines = content.split("\n")
+    current_event = ""
+    brace_count = 0
+
+    for line in lines:
+        if "{" in line:
+            brace_count += line.count("{") - line.count("}")
+            if brace_count > 0:
+                current_event += line + "\n"
+        elif "}" in line:
+            current_event += line + "\n"
+            brace_count += line.count("{") - line.count("}")
+            if brace_count == 0 and current_event.strip():
+                # Try to parse this event
+                try:
+                    # Clean up the event string
+                    event_str = current_event.strip()
+                    if event_str.endswith(","):
+                        event_str = event_str[:-1]
+                    if event_str.startswith("{") and event_str.endswith("}"):
+                        event = json.loads(event_str)
+                        if "event_type" in event:  # Validate it's a real event
+                            events.append(event)
+                except:
+                    pass  # Skip malformed events
+                current_event = ""
+        elif brace_count > 0:
+            current_event += line + "\n"
+
+    print(f"Recovered {len(events)} events through line-by-line parsing")
+    return {"events": events}
+
+
+class EventStore:
+    """
+    Events of one tracker output file.
+
+    events is a structured array of EVENT_DTYPE in the order of the file,
+    migrate_types the names of the migrate type codes and info the other
+    top level fields of the file (kernel_version, statistics, ...).
+
+    totals holds the rows with the orders, migrate types and nodes of the
+    events. For raw events they are the events themselves, in aggregate
+    mode the counts of each recorded pattern, see from_aggregates().
+    """
+
+    def __init__(self, events, migrate_types, info, totals=None):
+        self.events = events
+        self.totals = events if totals is None else totals
+        self.migrate_types = list(migrate_types)
+        self.info = info
+
+    def __len__(self):
+        """The number of events, not of rows."""
+        return event_count(self.totals)
+
+    @property
+    def aggregate(self):
+        """Whether the file comes from the tracker's aggregate mode."""
+        return self.info.get("metadata", {}).get("mode") == "aggregate"
+
+    @classmethod
+    def from_json(cls, data):
+        """Convert the decoded JSON of a tracker output file."""
+        if data.get("metadata", {}).get("mode") == "aggregate":
+            return cls.from_aggregates(data)
+        events = [
+            e for e in data.get("events", []) if "timestamp" in e and "event_type" in e
+        ]
+        info = {k: v for k, v in data.items() if k != "events"}
+        type_codes = {name: code for code, name in enumerate(EVENT_TYPES)}
+        migrate_codes = {"": 0}
+
+        def migrate_code(name):
+            code = migrate_codes.get(name)
+            if code is None:
+                code = migrate_codes[name] = len(migrate_codes)
+            return code
+
+        arr = np.zeros(len(events), dtype=EVENT_DTYPE)
+        if events:
+            arr["timestamp"] = [e["timestamp"] for e in events]
+            arr["type"] = [
+                type_codes.get(e["event_type"], UNKNOWN_TYPE) for e in events
+            ]
+            arr["order"] = [e.get("order") or 0 for e in events]
+            arr["fallback_order"] = [e.get("fallback_order") or 0 for e in events]
+            arr["migrate_from"] = [
+                migrate_code(e.get("migrate_from", "")) for e in events
+            ]
+            arr["migrate_to"] = [migrate_code(e.get("migrate_to", "")) for e in events]
+            arr["is_steal"] = [bool(e.get("is_steal")) for e in events]
+            arr["node"] = [e.get("node") or 0 for e in events]
+            arr["fragmentation_index"] = [
+                e.get("fragmentation_index") or 0 for e in events
+            ]
+            arr["nr_migrated"] = [e.get("nr_migrated") or 0 for e in events]
+            arr["success"] = [e.get("status") == "success" for e in events]
+            arr["count"] = 1
+        return cls(arr, migrate_codes, info)
+
+    @classmethod
+    def from_aggregates(cls, data):
+        """
+        Load an aggregate mode file from its aggregates, one count weighted
+        row per recorded count instead of one row per event.
+
+        events gets one row per timeline bucket and event type, at the
+        middle of the bucket. Which pattern the events of a bucket had is
+        not recorded, so these rows have no order, migrate types or node
+        (-1, "" and -1). totals gets one row per extfrag pattern and
+        compaction order and result, without a timestamp (NaN). The
+        sampled raw events are not used.
+        """
+        aggregates = data.get("aggregates")
+        if not aggregates or not all(
+            k in aggregates for k in ("bucket_seconds", "timeline", "extfrag")
+        ):
+            rate = data.get("metadata", {}).get("sample_rate", "?")
+            raise ValueError(
+                f"aggregate mode file with 1 in {rate} events sampled but no "
+                "aggregates, it is probably truncated"
+            )
+        info = {k: v for k, v in data.items() if k not in ("events", "aggregates")}
+        timeline = aggregates["timeline"]
+        times = np.array([b["timestamp"] for b in timeline], dtype="f8")
+        times += aggregates["bucket_seconds"] / 2
+
+        parts = []
+        for event_type, is_steal, series in TIMELINE_SERIES:
+            counts = np.array([b.get(series, 0) for b in timeline], dtype=np.int64)
+            recorded = counts > 0
+            arr = np.zeros(np.count_nonzero(recorded), dtype=EVENT_DTYPE)
+            arr["timestamp"] = times[recorded]
+            arr["type"] = event_type
+            arr["order"] = -1
+            arr["is_steal"] = is_steal
+            arr["node"] = -1
+            arr["count"] = counts[recorded]
+            parts.append(arr)
+        events = np.concatenate(parts)
+        events = events[np.argsort(events["timestamp"], kind="stable")]
+
+        migrate_codes = {"": 0}
+
+        def migrate_code(name):
+            code = migrate_codes.get(name)
+            if code is None:
+                code = migrate_codes[name] = len(migrate_codes)
+            return code
+
+        extfrag = [p for p in aggregates["extfrag"] if p["count"]]
+        compaction = [
+            (event_type, c["order"], c[result])
+            for c in aggregates.get("compaction", [])
+            for event_type, result in (
+                (COMPACTION_SUCCESS, "success"),
+                (COMPACTION_FAILURE, "failure"),
+            )
+            if c.get(result)
+        ]
+        totals = np.zeros(len(extfrag) + len(compaction), dtype=EVENT_DTYPE)
+        totals["timestamp"] = np.nan
+        totals["node"] = -1
+        head, tail = totals[: len(extfrag)], totals[len(extfrag) :]
+        if extfrag:
+            head["type"] = EXTFRAG
+            head["order"] = [p["order"] for p in extfrag]
+            head["migrate_from"] = [migrate_code(p["migrate_from"]) for p in extfrag]
+            head["migrate_to"] = [migrate_code(p["migrate_to"]) for p in extfrag]
+            head["is_steal"] = [bool(p["is_steal"]) for p in extfrag]
+            head["node"] = [p["node"] for p in extfrag]
+            head["count"] = [p["count"] for p in extfrag]
+        if compaction:
+            tail["type"], tail["order"], tail["count"] = zip(*compaction)
+        return cls(events, migrate_codes, info, totals)
+
+    def of_type(self, *types, totals=False):
+        """
+        The events of the given type codes, their totals rows with totals
+        set.
+        """
+        rows = self.totals if totals else self.events
+        if len(types) == 1:
+            return rows[rows["type"] == types[0]]
+        return rows[np.isin(rows["type"], types)]
+
+    def patterns(self, events):
+        """
+        Group events by migration pattern. Returns the list of
+        (migrate_from, migrate_to) names of the patterns present, in the
+        order they first occur, and the index into that list of each event.
+        """
+        keys = events["migrate_from"].astype(np.int32) << 8 | events["migrate_to"]
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        names = self.migrate_types
+        pairs = [(names[k >> 8], names[k & 0xFF]) for k in uniq[order].tolist()]
+        return pairs, rank[inverse.reshape(-1)]
+
+
+def event_count(rows):
+    """The number of events of rows."""
+    return int(rows["count"].sum())
+
+
+def bin_index(times, bins):
+    """
+    Index of the bin of each time, like np.digitize(times, bins) - 1, -1
+    for times outside of the bins.
+    """
+    idx = np.digitize(times, bins) - 1
+    idx[(idx < 0) | (idx >= len(bins) - 1)] = -1
+    return idx
+
+
+def bin_counts(rows, n_rows, cols, n_cols, weights=None):
+    """
+    Count (row, col) pairs, or sum their weights, into a n_rows x n_cols
+    matrix, cols < 0 skipped.
+    """
+    valid = cols >= 0
+    flat = rows[valid].astype(np.int64) * n_cols + cols[valid]
+    if weights is None:
+        counts = np.bincount(flat, minlength=n_rows * n_cols)
+    else:
+        counts = np.bincount(
+            flat, weights=weights[valid], minlength=n_rows * n_cols
+        ).astype(weights.dtype)
+    return counts.reshape(n_rows, n_cols)
+
+
+def histogram(times, bin_size, weights=None):
+    """
+    Event counts, or sums of the weights, in bin_size bins spanning the
+    times, returns (centers, counts).
+    """
+    if not len(times):
+        return np.array([]), np.array([])
+    tmin, tmax = times.min(), times.max()
+    if tmax == tmin:
+        tmax = tmin + bin_size
+    bins = np.arange(tmin, tmax + bin_size, bin_size)
+    counts, edges = np.histogram(times, bins=bins, weights=weights)
+    centers = (edges[:-1] + edges[1:]) / 2.0
+    return centers, counts
+
+
+def fixed_bins(times, bin_size, weights=None):
+    """
+    Aggregate events into bin_size windows aligned to 0, only windows with
+    events are returned. Returns (window starts, event counts or sums of
+    the weights).
+    """
+    if not len(times):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    windows, inverse = np.unique(
+        np.floor_divide(times, bin_size).astype(np.int64), return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    if weights is None:
+        values = np.bincount(inverse)
+    else:
+        values = np.bincount(inverse, weights=weights).astype(weights.dtype)
+    return windows * bin_size, values
+
+
+def _sidecar_source(path):
+    st = os.stat(path)
+    return [CACHE_VERSION, st.st_size, st.st_mtime_ns]
+
+
+def _load_sidecar(sidecar, source):
+    try:
+        with np.load(sidecar, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("source") != source:
+                return None
+            totals = z["totals"] if "totals" in z.files else None
+            return EventStore(
+                z["events"], z["migrate_types"].tolist(), meta["info"], totals
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_sidecar(sidecar, source, store):
+    meta = json.dumps({"source": source, "info": store.info})
+    # Raw event files have no separate totals
+    totals = {} if store.totals is store.events else {"totals": store.totals}
+    tmp = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                events=store.events,
+                migrate_types=np.array(store.migrate_types, dtype=str),
+                meta=np.array(meta),
+                **totals,
+            )
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        print(f"Warning: could not cache events in {sidecar}: {e}")
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def load_events(filename, cache=True):
+    """
+    Load the events of a tracker output file into an EventStore, through
+    the .npz sidecar unless cache is False.
+    """
+    filename = str(filename)
+    sidecar = filename + SIDECAR_SUFFIX
+    source = _sidecar_source(filename)
+    if cache:
+        store = _load_sidecar(sidecar, source)
+        if store is not None:
+            return store
+    store = EventStore.from_json(load_data(filename))
+    if cache:
+        _save_sidecar(sidecar, source, store)
+    return store
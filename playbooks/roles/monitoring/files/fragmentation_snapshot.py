@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 """
 Create a snapshot of fragmentation monitoring data.
-This script safely stops the fragmentation tracker, saves its data,
-and restarts it with a new output file.
+This script asks the running fragmentation tracker to write a snapshot of
+the data captured so far. The tracker keeps running with its probes
+attached, so no events are lost and the eBPF program is not recompiled.
+
+By default a full snapshot of all events is written, with --delta only
+the events since the previous snapshot.
 """
 
+import argparse
 import os
 import sys
 import time
 import signal
-import subprocess
-import json
 from pathlib import Path
-from datetime import datetime
+
+# Seconds to wait for the tracker to write the snapshot
+SNAPSHOT_TIMEOUT = 300
 
 
 def get_pid_from_file(pid_file):
@@ -33,62 +38,39 @@ def is_process_running(pid):
         return False
 
 
-def stop_tracker_and_save(pid):
-    """Stop the tracker gracefully and wait for it to save data."""
+def file_version(path):
+    """Identify a version of a file, the tracker replaces it atomically."""
     try:
-        # Send INT signal to trigger save
-        os.kill(pid, signal.SIGINT)
-
-        # Wait indefinitely for process to exit
-        print(f"Sent INT signal to tracker PID {pid}, waiting for it to save data...")
-        while is_process_running(pid):
-            time.sleep(0.1)
-
-        print(f"Tracker PID {pid} has exited successfully")
-        return True
-    except Exception as e:
-        print(f"Error stopping tracker: {e}", file=sys.stderr)
-        return False
-
-
-def find_latest_json(output_dir):
-    """Find the most recently created JSON file in the directory."""
-    json_files = list(Path(output_dir).glob("fragmentation_data*.json"))
-    if not json_files:
+        st = os.stat(path)
+    except FileNotFoundError:
         return None
+    return (st.st_ino, st.st_mtime_ns)
 
-    # Sort by modification time
-    json_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    return json_files[0]
-
-
-def start_new_tracker(output_dir):
-    """Start a new fragmentation tracker process."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    new_output = f"{output_dir}/fragmentation_data_{timestamp}.json"
-    log_file = f"{output_dir}/fragmentation_tracker.log"
-    pid_file = f"{output_dir}/fragmentation_tracker.pid"
 
-    cmd = ["python3", "/opt/fragmentation/fragmentation_tracker.py", "-o", new_output]
-
-    # Start the process in the background
-    with open(log_file, "a") as log:
-        process = subprocess.Popen(
-            cmd,
-            stdout=log,
-            stderr=subprocess.STDOUT,
-            cwd="/opt/fragmentation",
-            start_new_session=True,
-        )
-
-    # Save the PID
-    with open(pid_file, "w") as f:
-        f.write(str(process.pid))
+def request_snapshot(pid, snapshot_file, delta=False, timeout=SNAPSHOT_TIMEOUT):
+    """Signal the tracker and wait for it to write a new snapshot."""
+    before = file_version(snapshot_file)
+    sig = signal.SIGUSR2 if delta else signal.SIGUSR1
+    try:
+        os.kill(pid, sig)
+    except OSError as e:
+        print(f"Error signaling tracker: {e}", file=sys.stderr)
+        return False
 
-    return process.pid
+    print(f"Sent {sig.name} to tracker PID {pid}, waiting for the snapshot...")
+    deadline = time.monotonic() + timeout
+    while file_version(snapshot_file) == before:
+        if not is_process_running(pid):
+            print(f"Tracker PID {pid} exited", file=sys.stderr)
+            return False
+        if time.monotonic() > deadline:
+            print(f"Timed out waiting for {snapshot_file}", file=sys.stderr)
+            return False
+        time.sleep(0.1)
+    return True
 
 
-def create_snapshot(output_dir):
+def create_snapshot(output_dir, delta=False):
     """Main function to create fragmentation data snapshot."""
     output_dir = Path(output_dir)
     pid_file = output_dir / "fragmentation_tracker.pid"
@@ -104,48 +86,29 @@ def create_snapshot(output_dir):
         print("not_running")
         return 1
 
-    print(f"Stopping tracker (PID: {pid})...")
-
-    # Stop the tracker to make it save data
-    if not stop_tracker_and_save(pid):
-        print("failed_to_stop")
+    if not request_snapshot(pid, snapshot_file, delta):
+        print("snapshot_failed")
         return 1
 
-    # Find the saved JSON file
-    time.sleep(0.5)  # Give filesystem time to sync
-    latest_json = find_latest_json(output_dir)
-
-    if latest_json:
-        # Create snapshot
-        try:
-            # Copy the file content (not just rename) to preserve original
-            with open(latest_json, "r") as src:
-                data = json.load(src)
-            with open(snapshot_file, "w") as dst:
-                json.dump(data, dst, indent=2)
-            print(f"Snapshot created from {latest_json.name}")
-        except Exception as e:
-            print(f"Error creating snapshot: {e}", file=sys.stderr)
-            return 1
-    else:
-        print("no_json_found")
-        return 1
-
-    # Start a new tracker
-    new_pid = start_new_tracker(output_dir)
-    print(f"Started new tracker (PID: {new_pid})")
-
+    kind = "Delta" if delta else "Full"
+    print(f"{kind} snapshot created in {snapshot_file.name}, tracker still running")
     return 0
 
 
 def main():
     """Main entry point."""
-    if len(sys.argv) < 2:
-        print("Usage: fragmentation_snapshot.py <output_dir>", file=sys.stderr)
-        sys.exit(1)
-
-    output_dir = sys.argv[1]
-    sys.exit(create_snapshot(output_dir))
+    parser = argparse.ArgumentParser(
+        description="Snapshot the data of a running fragmentation tracker"
+    )
+    parser.add_argument("output_dir", help="Fragmentation tracker output directory")
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only include events since the previous snapshot",
+    )
+    args = parser.parse_args()
+
+    sys.exit(create_snapshot(args.output_dir, args.delta))
 
 
 if __name__ == "__main__":
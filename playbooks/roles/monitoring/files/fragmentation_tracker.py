@@ -2,6 +2,17 @@
 """
 Enhanced eBPF-based memory fragmentation tracker.
 Primary focus on mm_page_alloc_extfrag events with optional compaction tracking.
+
+Snapshots can be taken while tracking without detaching the probes:
+SIGUSR1 writes all events captured so far and SIGUSR2 only the events
+since the previous snapshot, along with the in-kernel counters, to the
+snapshot file (see --snapshot-file).
+
+With --aggregate the events are counted in eBPF maps instead of being
+sent to user space one by one, per (order, migrate_from, migrate_to,
+node, steal) and per time bucket, and only 1 in --sample-rate raw events
+is sent for the timeline. The maps are read periodically, which keeps
+the overhead low enough to leave tracking on during heavy workloads.
 """
 
 from bcc import BPF
@@ -11,9 +22,20 @@ import sys
 import os
 import json
 import argparse
+import queue
+import threading
 from collections import defaultdict
 from datetime import datetime
 
+# Milliseconds to wait for events before checking for requests
+POLL_TIMEOUT_MS = 100
+
+# Aggregate mode defaults: 1 in N raw events kept, time bucket width
+DEFAULT_SAMPLE_RATE = 100
+DEFAULT_BUCKET_SECONDS = 1.0
+# Seconds between reads of the time bucket map in aggregate mode
+AGGREGATE_READ_INTERVAL = 5
+
 # eBPF program to trace fragmentation events
 bpf_program = """
 #include <uapi/linux/ptrace.h>
@@ -54,6 +76,51 @@ BPF_PERF_OUTPUT(events);
 BPF_HASH(extfrag_stats, u32, u64);  // Key: order, Value: count
 BPF_HASH(compact_stats, u32, u64);  // Key: order|success<<16, Value: count
 
+// 1 in SAMPLE_RATE events is sent to user space, 0 for none. Without
+// AGGREGATE every event is sent.
+#ifndef SAMPLE_RATE
+#define SAMPLE_RATE 1
+#endif
+
+#ifdef AGGREGATE
+struct extfrag_key {
+    u32 order;
+    u32 migrate_from;
+    u32 migrate_to;
+    s32 node;       // NUMA node of the allocating CPU
+    u32 is_steal;
+};
+
+struct bucket_key {
+    u64 bucket;     // bpf_ktime_get_ns() / BUCKET_NS
+    u32 event_type;
+    u32 is_steal;
+};
+
+BPF_HASH(extfrag_hist, struct extfrag_key, u64, 10240);
+// Completed buckets are read and deleted by user space
+BPF_HASH(time_hist, struct bucket_key, u64, 65536);
+
+static inline void count_bucket(u64 ts, u32 event_type, u32 is_steal) {
+    struct bucket_key key = {};
+
+    key.bucket = ts / BUCKET_NS;
+    key.event_type = event_type;
+    key.is_steal = is_steal;
+    time_hist.increment(key);
+}
+#endif
+
+static inline int sample_event(void) {
+#if SAMPLE_RATE == 1
+    return 1;
+#elif SAMPLE_RATE == 0
+    return 0;
+#else
+    return bpf_get_prandom_u32() % SAMPLE_RATE == 0;
+#endif
+}
+
 // Helper to get current fragmentation state (simplified)
 static inline int get_fragmentation_estimate(int order) {
     // This is a simplified estimate
@@ -67,8 +134,34 @@ static inline int get_fragmentation_estimate(int order) {
 // Trace external fragmentation events (page steal/claim from different migratetype)
 TRACEPOINT_PROBE(kmem, mm_page_alloc_extfrag) {
     struct fragmentation_event event = {};
+    u64 ts = bpf_ktime_get_ns();
+    u32 order = args->alloc_order;
+
+    // Update statistics
+    u64 *count = extfrag_stats.lookup(&order);
+    if (count) {
+        (*count)++;
+    } else {
+        u64 initial = 1;
+        extfrag_stats.update(&order, &initial);
+    }
+
+#ifdef AGGREGATE
+    struct extfrag_key key = {};
+
+    key.order = order;
+    key.migrate_from = args->fallback_migratetype;
+    key.migrate_to = args->alloc_migratetype;
+    key.node = bpf_get_numa_node_id();
+    key.is_steal = args->change_ownership ? 0 : 1;
+    extfrag_hist.increment(key);
+    count_bucket(ts, EVENT_EXTFRAG, key.is_steal);
+#endif
+
+    if (!sample_event())
+        return 0;
 
-    event.timestamp = bpf_ktime_get_ns();
+    event.timestamp = ts;
     event.pid = bpf_get_current_pid_tgid() >> 32;
     event.tid = bpf_get_current_pid_tgid() & 0xFFFFFFFF;
     event.event_type = EVENT_EXTFRAG;
@@ -100,15 +193,6 @@ TRACEPOINT_PROBE(kmem, mm_page_alloc_extfrag) {
 
     events.perf_submit(args, &event, sizeof(event));
 
-    // Update statistics
-    u64 *count = extfrag_stats.lookup(&event.order);
-    if (count) {
-        (*count)++;
-    } else {
-        u64 initial = 1;
-        extfrag_stats.update(&event.order, &initial);
-    }
-
     return 0;
 }
 
@@ -116,8 +200,25 @@ TRACEPOINT_PROBE(kmem, mm_page_alloc_extfrag) {
 #ifdef TRACE_COMPACTION
 TRACEPOINT_PROBE(page_alloc, mm_compaction_success) {
     struct fragmentation_event event = {};
+    u64 ts = bpf_ktime_get_ns();
 
-    event.timestamp = bpf_ktime_get_ns();
+    u32 key = (args->order) | (1 << 16);  // Set success bit
+    u64 *count = compact_stats.lookup(&key);
+    if (count) {
+        (*count)++;
+    } else {
+        u64 initial = 1;
+        compact_stats.update(&key, &initial);
+    }
+
+#ifdef AGGREGATE
+    count_bucket(ts, EVENT_COMPACTION_SUCCESS, 0);
+#endif
+
+    if (!sample_event())
+        return 0;
+
+    event.timestamp = ts;
     event.pid = bpf_get_current_pid_tgid() >> 32;
     event.tid = bpf_get_current_pid_tgid() & 0xFFFFFFFF;
     event.event_type = EVENT_COMPACTION_SUCCESS;
@@ -131,7 +232,14 @@ TRACEPOINT_PROBE(page_alloc, mm_compaction_success) {
 
     events.perf_submit(args, &event, sizeof(event));
 
-    u32 key = (event.order) | (1 << 16);  // Set success bit
+    return 0;
+}
+
+TRACEPOINT_PROBE(page_alloc, mm_compaction_failure) {
+    struct fragmentation_event event = {};
+    u64 ts = bpf_ktime_get_ns();
+
+    u32 key = args->order;  // No success bit
     u64 *count = compact_stats.lookup(&key);
     if (count) {
         (*count)++;
@@ -140,13 +248,14 @@ TRACEPOINT_PROBE(page_alloc, mm_compaction_success) {
         compact_stats.update(&key, &initial);
     }
 
-    return 0;
-}
+#ifdef AGGREGATE
+    count_bucket(ts, EVENT_COMPACTION_FAILURE, 0);
+#endif
 
-TRACEPOINT_PROBE(page_alloc, mm_compaction_failure) {
-    struct fragmentation_event event = {};
+    if (!sample_event())
+        return 0;
 
-    event.timestamp = bpf_ktime_get_ns();
+    event.timestamp = ts;
     event.pid = bpf_get_current_pid_tgid() >> 32;
     event.tid = bpf_get_current_pid_tgid() & 0xFFFFFFFF;
     event.event_type = EVENT_COMPACTION_FAILURE;
@@ -160,15 +269,6 @@ TRACEPOINT_PROBE(page_alloc, mm_compaction_failure) {
 
     events.perf_submit(args, &event, sizeof(event));
 
-    u32 key = event.order;  // No success bit
-    u64 *count = compact_stats.lookup(&key);
-    if (count) {
-        (*count)++;
-    } else {
-        u64 initial = 1;
-        compact_stats.update(&key, &initial);
-    }
-
     return 0;
 }
 #endif
@@ -185,9 +285,35 @@ MIGRATE_TYPES = {
     6: "ISOLATE",
 }
 
+# Aggregate time bucket series by (event_type, is_steal)
+TIMELINE_SERIES = {
+    (3, 1): "extfrag_steal",
+    (3, 0): "extfrag_claim",
+    (1, 0): "compaction_success",
+    (2, 0): "compaction_failure",
+}
+
+
+def diff_counts(counts, before):
+    """Counts minus the counts at a previous cut, without the unchanged keys."""
+    diff = {}
+    for key, value in counts.items():
+        value -= before.get(key, 0)
+        if value:
+            diff[key] = value
+    return diff
+
 
 class FragmentationTracker:
-    def __init__(self, verbose=True, output_file=None):
+    def __init__(
+        self,
+        verbose=True,
+        output_file=None,
+        snapshot_file=None,
+        aggregate=False,
+        sample_rate=DEFAULT_SAMPLE_RATE,
+        bucket_seconds=DEFAULT_BUCKET_SECONDS,
+    ):
         self.start_time = time.time()
         self.events_data = []
         self.extfrag_stats = defaultdict(int)
@@ -197,6 +323,28 @@ class FragmentationTracker:
         self.output_file = output_file
         self.event_count = 0
         self.interrupted = False
+        self.snapshot_file = snapshot_file
+        # Set from signal handlers, None or "full" / "delta"
+        self.snapshot_request = None
+        self.snapshot_seq = 0
+        # State at the previous snapshot, for delta snapshots
+        self.last_cut = {
+            "time": self.start_time,
+            "index": 0,
+            "extfrag": {},
+            "compaction": {},
+            "kernel": {"extfrag": {}, "compaction": {}},
+            "patterns": {},
+            "timeline": {},
+        }
+        self.snapshot_queue = queue.Queue()
+        self.snapshot_writer = None
+        self.aggregate = aggregate
+        self.sample_rate = sample_rate if aggregate else 1
+        self.bucket_ns = int(bucket_seconds * 1e9)
+        # (bucket, event_type, is_steal) -> count of the buckets already
+        # read and deleted from the time_hist map
+        self.timeline = defaultdict(int)
 
     def process_event(self, cpu, data, size):
         """Process a fragmentation event from eBPF."""
@@ -314,6 +462,10 @@ class FragmentationTracker:
         print("FRAGMENTATION TRACKING SUMMARY")
         print("=" * 80)
 
+        if self.aggregate:
+            self.print_aggregate_summary()
+            return
+
         total_events = len(self.events_data)
         print(f"\nTotal events captured: {total_events}")
 
@@ -396,16 +548,68 @@ class FragmentationTracker:
                         f"{total:<10} {success_pct:<10.1f}"
                     )
 
-    def save_data(self, filename=None):
-        """Save captured data to JSON file for visualization."""
-        if filename is None and self.output_file:
-            filename = self.output_file
+    def print_aggregate_summary(self):
+        """Print summary statistics from the eBPF maps."""
+        patterns, _ = self.read_aggregates()
+        kernel = self.get_kernel_counters()
+        extfrag_count = sum(patterns.values())
+        sampled = "none" if not self.sample_rate else f"1 in {self.sample_rate}"
+        print(f"\nRaw events captured: {len(self.events_data)} ({sampled} sampled)")
+        print(f"External Fragmentation events: {extfrag_count}")
+
+        if extfrag_count > 0:
+            print("\nExternal Fragmentation Events by Order:")
+            print("-" * 40)
+            print(f"{'Order':<8} {'Count':<10} {'Percentage':<10}")
+            print("-" * 40)
+            for order, count in sorted(
+                kernel["extfrag"].items(), key=lambda x: int(x[0])
+            ):
+                pct = (count / extfrag_count) * 100
+                print(f"{order:<8} {count:<10} {pct:<10.1f}%")
+
+            migrate_patterns = defaultdict(int)
+            steal = 0
+            for (_, from_type, to_type, _, is_steal), count in patterns.items():
+                migrate_patterns[f"{from_type}->{to_type}"] += count
+                if is_steal:
+                    steal += count
+
+            print("\nMigrate Type Patterns:")
+            print("-" * 40)
+            for pattern, count in sorted(
+                migrate_patterns.items(), key=lambda x: x[1], reverse=True
+            )[:5]:
+                print(f"  {pattern:<30} {count:5d} ({count/extfrag_count*100:5.1f}%)")
+
+            claim = extfrag_count - steal
+            print(f"\nSteal vs Claim:")
+            print(f"  Steal (partial): {steal} ({steal/extfrag_count*100:.1f}%)")
+            print(f"  Claim (whole):   {claim} ({claim/extfrag_count*100:.1f}%)")
+
+        if kernel["compaction"]:
+            print("\nCompaction Events by Order:")
+            print("-" * 40)
+            print(
+                f"{'Order':<8} {'Success':<10} {'Failure':<10} {'Total':<10} {'Success%':<10}"
+            )
+            print("-" * 40)
+            for order, stats in sorted(
+                kernel["compaction"].items(), key=lambda x: int(x[0])
+            ):
+                total = stats["success"] + stats["failure"]
+                success_pct = (stats["success"] / total * 100) if total > 0 else 0
+                print(
+                    f"{order:<8} {stats['success']:<10} {stats['failure']:<10} "
+                    f"{total:<10} {success_pct:<10.1f}"
+                )
 
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"fragmentation_data_{timestamp}.json"
+    def get_statistics(self):
+        # Only sampled events reach user space in aggregate mode, the
+        # eBPF maps have the complete counts.
+        if self.aggregate:
+            return self.get_kernel_counters()
 
-        # Prepare statistics
         stats = {}
 
         # ExtFrag stats
@@ -414,44 +618,281 @@ class FragmentationTracker:
         # Compaction stats
         stats["compaction"] = {}
         for order, counts in self.compact_stats.items():
-            stats["compaction"][str(order)] = counts
+            stats["compaction"][str(order)] = dict(counts)
+        return stats
+
+    def get_kernel_counters(self):
+        """Read the statistics maps maintained by the eBPF program."""
+        counters = {"extfrag": {}, "compaction": {}}
+        for key, value in self.b["extfrag_stats"].items():
+            counters["extfrag"][str(key.value)] = value.value
+        if self.has_compaction:
+            for key, value in self.b["compact_stats"].items():
+                order = key.value & 0xFFFF
+                result = "success" if key.value >> 16 else "failure"
+                counts = counters["compaction"].setdefault(
+                    str(order), {"success": 0, "failure": 0}
+                )
+                counts[result] = value.value
+        return counters
+
+    def drain_timeline(self):
+        """
+        Move the completed time buckets from the time_hist map to user
+        space, so the map does not fill up on long runs. The current and
+        previous buckets may still be counted by other CPUs and are left.
+        """
+        current = time.perf_counter_ns() // self.bucket_ns
+        table = self.b["time_hist"]
+        drained = 0
+        for key, value in table.items():
+            if key.bucket >= current - 1:
+                continue
+            self.timeline[(key.bucket, key.event_type, key.is_steal)] += value.value
+            drained += value.value
+            del table[key]
+        if self.verbose and drained:
+            rel_time = (time.perf_counter_ns() - self.start_ns) / 1e9
+            print(f"[{rel_time:8.3f}s] {'AGGREGATE':10s} {drained} events counted")
+
+    def read_aggregates(self):
+        """
+        Read the aggregate maps. Returns the extfrag counts by (order,
+        migrate_from, migrate_to, node, is_steal) and the event counts by
+        (bucket, event_type, is_steal).
+        """
+        patterns = {}
+        for key, value in self.b["extfrag_hist"].items():
+            pattern = (
+                key.order,
+                MIGRATE_TYPES.get(key.migrate_from, f"TYPE_{key.migrate_from}"),
+                MIGRATE_TYPES.get(key.migrate_to, f"TYPE_{key.migrate_to}"),
+                key.node,
+                bool(key.is_steal),
+            )
+            patterns[pattern] = value.value
+        timeline = dict(self.timeline)
+        for key, value in self.b["time_hist"].items():
+            bucket = (key.bucket, key.event_type, key.is_steal)
+            timeline[bucket] = timeline.get(bucket, 0) + value.value
+        return patterns, timeline
+
+    def format_aggregates(self, patterns, timeline, compaction):
+        extfrag = [
+            {
+                "order": order,
+                "migrate_from": from_type,
+                "migrate_to": to_type,
+                "node": node,
+                "is_steal": is_steal,
+                "count": count,
+            }
+            for (order, from_type, to_type, node, is_steal), count in sorted(
+                patterns.items()
+            )
+        ]
+        buckets = {}
+        for (bucket, event_type, is_steal), count in timeline.items():
+            series = TIMELINE_SERIES.get((event_type, is_steal))
+            if series is None:
+                continue
+            if bucket not in buckets:
+                buckets[bucket] = {
+                    "timestamp": (bucket * self.bucket_ns - self.start_ns) / 1e9,
+                    **dict.fromkeys(TIMELINE_SERIES.values(), 0),
+                }
+            buckets[bucket][series] += count
+        return {
+            "bucket_seconds": self.bucket_ns / 1e9,
+            "sample_rate": self.sample_rate,
+            "extfrag": extfrag,
+            "compaction": [
+                {"order": int(order), **counts}
+                for order, counts in sorted(compaction.items(), key=lambda x: int(x[0]))
+            ],
+            "timeline": [buckets[b] for b in sorted(buckets)],
+        }
 
+    def build_output(self, events, stats, end_time, start_time=None, aggregates=None):
+        if start_time is None:
+            start_time = self.start_time
         output = {
             "metadata": {
-                "start_time": self.start_time,
-                "end_time": time.time(),
-                "duration": time.time() - self.start_time,
-                "total_events": len(self.events_data),
+                "start_time": start_time,
+                "end_time": end_time,
+                "duration": end_time - start_time,
+                "total_events": len(events),
                 "kernel_version": os.uname().release,
             },
-            "events": self.events_data,
+            "events": events,
             "statistics": stats,
         }
+        if self.aggregate:
+            output["metadata"]["mode"] = "aggregate"
+            output["metadata"]["sample_rate"] = self.sample_rate
+            output["aggregates"] = aggregates
+        return output
+
+    def save_data(self, filename=None):
+        """Save captured data to JSON file for visualization."""
+        if filename is None and self.output_file:
+            filename = self.output_file
+
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"fragmentation_data_{timestamp}.json"
+
+        stats = self.get_statistics()
+        aggregates = None
+        if self.aggregate:
+            aggregates = self.format_aggregates(
+                *self.read_aggregates(), stats["compaction"]
+            )
+        output = self.build_output(
+            self.events_data, stats, time.time(), aggregates=aggregates
+        )
 
         with open(filename, "w") as f:
             json.dump(output, f, indent=2)
         print(f"\nData saved to {filename}")
         return filename
 
+    def take_snapshot(self, kind):
+        """
+        Cut the events processed so far and queue them for writing.
+
+        Events are only processed from perf_buffer_poll() in this thread,
+        so the cut is consistent with the user space statistics. The perf
+        buffer is drained first; the kernel counters are read right after
+        and may include the few events submitted in between.
+        """
+        self.b.perf_buffer_poll(timeout=0)
+        now = time.time()
+        count = len(self.events_data)
+        stats = self.get_statistics()
+        kernel = self.get_kernel_counters()
+        patterns, timeline = {}, {}
+        if self.aggregate:
+            patterns, timeline = self.read_aggregates()
+        last = self.last_cut
+
+        if kind == "delta":
+            events = self.events_data[last["index"] : count]
+            start_time = last["time"]
+            snap_stats = {
+                "extfrag": {
+                    order: value - last["extfrag"].get(order, 0)
+                    for order, value in stats["extfrag"].items()
+                },
+                "compaction": {
+                    order: {
+                        result: value - last["compaction"].get(order, {}).get(result, 0)
+                        for result, value in counts.items()
+                    }
+                    for order, counts in stats["compaction"].items()
+                },
+            }
+            snap_kernel = {
+                "extfrag": {
+                    order: value - last["kernel"]["extfrag"].get(order, 0)
+                    for order, value in kernel["extfrag"].items()
+                },
+                "compaction": {
+                    order: {
+                        result: value
+                        - last["kernel"]["compaction"].get(order, {}).get(result, 0)
+                        for result, value in counts.items()
+                    }
+                    for order, counts in kernel["compaction"].items()
+                },
+            }
+            snap_patterns = diff_counts(patterns, last["patterns"])
+            snap_timeline = diff_counts(timeline, last["timeline"])
+        else:
+            # Events are never modified once appended, a shallow copy is
+            # enough for the writer thread.
+            events = self.events_data[:count]
+            start_time = self.start_time
+            snap_stats = stats
+            snap_kernel = kernel
+            snap_patterns = patterns
+            snap_timeline = timeline
+
+        self.snapshot_seq += 1
+        aggregates = None
+        if self.aggregate:
+            aggregates = self.format_aggregates(
+                snap_patterns, snap_timeline, snap_kernel["compaction"]
+            )
+        output = self.build_output(events, snap_stats, now, start_time, aggregates)
+        output["kernel_counters"] = snap_kernel
+        output["metadata"]["snapshot"] = {
+            "seq": self.snapshot_seq,
+            "type": kind,
+            "first_event": last["index"] if kind == "delta" else 0,
+            "tracker_start_time": self.start_time,
+        }
+        self.last_cut = {
+            "time": now,
+            "index": count,
+            "extfrag": stats["extfrag"],
+            "compaction": stats["compaction"],
+            "kernel": kernel,
+            "patterns": patterns,
+            "timeline": timeline,
+        }
+        self.snapshot_queue.put(output)
+
+    def write_snapshots(self):
+        """Writer thread, serializing outside the event loop."""
+        while True:
+            output = self.snapshot_queue.get()
+            if output is None:
+                return
+            tmp = f"{self.snapshot_file}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(output, f)
+                os.replace(tmp, self.snapshot_file)
+                print(
+                    f"\nSnapshot {output['metadata']['snapshot']['seq']} "
+                    f"({output['metadata']['snapshot']['type']}, "
+                    f"{len(output['events'])} events) saved to {self.snapshot_file}"
+                )
+            except OSError as e:
+                print(f"Error writing snapshot: {e}", file=sys.stderr)
+
     def run(self):
         """Main execution loop."""
         print("Compiling eBPF program...")
 
         # Check if compaction tracepoints are available
-        has_compaction = os.path.exists(
+        self.has_compaction = os.path.exists(
             "/sys/kernel/debug/tracing/events/page_alloc/mm_compaction_success"
         )
 
         # Modify BPF program based on available tracepoints
         program = bpf_program
-        if has_compaction:
+        if self.has_compaction:
             program = program.replace("#ifdef TRACE_COMPACTION", "#if 1")
             print("  Compaction tracepoints: AVAILABLE")
         else:
             program = program.replace("#ifdef TRACE_COMPACTION", "#if 0")
             print("  Compaction tracepoints: NOT AVAILABLE (will track extfrag only)")
 
-        self.b = BPF(text=program)
+        cflags = []
+        if self.aggregate:
+            cflags = [
+                "-DAGGREGATE",
+                f"-DSAMPLE_RATE={self.sample_rate}",
+                f"-DBUCKET_NS={self.bucket_ns}ULL",
+            ]
+            sampled = "none" if not self.sample_rate else f"1 in {self.sample_rate}"
+            print(
+                f"  Aggregate mode: {self.bucket_ns / 1e9:g}s buckets, {sampled} raw events"
+            )
+
+        self.b = BPF(text=program, cflags=cflags)
         self.start_ns = time.perf_counter_ns()
 
         # Setup event handler
@@ -467,27 +908,65 @@ class FragmentationTracker:
         print("\nStarting fragmentation event tracking...")
         print(f"Primary focus: mm_page_alloc_extfrag events")
         print(f"Data will be saved to: {save_file}")
+        if self.snapshot_file:
+            print(
+                f"Snapshots (SIGUSR1 full, SIGUSR2 delta) go to: {self.snapshot_file}"
+            )
+            self.snapshot_writer = threading.Thread(target=self.write_snapshots)
+            self.snapshot_writer.start()
         print("Press Ctrl+C to stop and see summary\n")
         print("-" * 80)
         print(f"{'Time':>10s} {'Event':>12s} {'Details'}")
         print("-" * 80)
 
+        next_read = time.monotonic() + AGGREGATE_READ_INTERVAL
         try:
             while not self.interrupted:
-                self.b.perf_buffer_poll()
+                self.b.perf_buffer_poll(timeout=POLL_TIMEOUT_MS)
+                if self.aggregate and time.monotonic() >= next_read:
+                    self.drain_timeline()
+                    next_read = time.monotonic() + AGGREGATE_READ_INTERVAL
+                if self.snapshot_request and self.snapshot_file:
+                    kind = self.snapshot_request
+                    self.snapshot_request = None
+                    self.take_snapshot(kind)
         except KeyboardInterrupt:
             self.interrupted = True
         finally:
+            if self.snapshot_writer:
+                self.snapshot_queue.put(None)
+                self.snapshot_writer.join()
             # Always save data on exit
             self.print_summary()
             self.save_data()
 
 
+def sample_rate_arg(value):
+    rate = int(value)
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"{value} is not >= 0")
+    return rate
+
+
+def bucket_arg(value):
+    seconds = float(value)
+    # BUCKET_NS divides the eBPF timestamps and must not be 0.
+    if not seconds * 1e9 >= 1:
+        raise argparse.ArgumentTypeError(f"{value} is not at least 1ns")
+    return seconds
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Track memory fragmentation events using eBPF"
     )
     parser.add_argument("-o", "--output", help="Output JSON file")
+    parser.add_argument(
+        "-s",
+        "--snapshot-file",
+        help="File written on SIGUSR1/SIGUSR2 snapshots "
+        "(default: fragmentation_snapshot.json next to the output file)",
+    )
     parser.add_argument(
         "-t", "--time", type=int, help="Run for specified seconds then exit"
     )
@@ -497,6 +976,26 @@ def main():
         action="store_true",
         help="Suppress event output (summary only)",
     )
+    parser.add_argument(
+        "-a",
+        "--aggregate",
+        action="store_true",
+        help="Count events in eBPF maps and only send sampled raw events",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=sample_rate_arg,
+        default=DEFAULT_SAMPLE_RATE,
+        help="With --aggregate keep 1 in N raw events, 0 for none "
+        f"(default: {DEFAULT_SAMPLE_RATE})",
+    )
+    parser.add_argument(
+        "--bucket",
+        type=bucket_arg,
+        default=DEFAULT_BUCKET_SECONDS,
+        help="With --aggregate the time bucket width in seconds "
+        f"(default: {DEFAULT_BUCKET_SECONDS})",
+    )
 
     args = parser.parse_args()
 
@@ -505,19 +1004,36 @@ def main():
         print("This script must be run as root (uses eBPF)")
         sys.exit(1)
 
+    snapshot_file = args.snapshot_file
+    if snapshot_file is None:
+        output_dir = os.getcwd()
+        if args.output:
+            output_dir = os.path.dirname(os.path.abspath(args.output))
+        snapshot_file = os.path.join(output_dir, "fragmentation_snapshot.json")
+
     # Create tracker instance
-    tracker = FragmentationTracker(verbose=not args.quiet, output_file=args.output)
+    tracker = FragmentationTracker(
+        verbose=not args.quiet,
+        output_file=args.output,
+        snapshot_file=snapshot_file,
+        aggregate=args.aggregate,
+        sample_rate=args.sample_rate,
+        bucket_seconds=args.bucket,
+    )
 
     # Set up signal handler
     def signal_handler_with_tracker(sig, frame):
         tracker.interrupted = True
 
+    def snapshot_handler(sig, frame):
+        tracker.snapshot_request = "delta" if sig == signal.SIGUSR2 else "full"
+
     signal.signal(signal.SIGINT, signal_handler_with_tracker)
+    signal.signal(signal.SIGUSR1, snapshot_handler)
+    signal.signal(signal.SIGUSR2, snapshot_handler)
 
     if args.time:
         # Run for specified time
-        import threading
-
         def timeout_handler():
             time.sleep(args.time)
             tracker.interrupted = True
@@ -6,7 +6,7 @@ Combines datasets on the same graphs using different visual markers.
 Usage:
   python c6.py fragmentation_data_A.json --compare fragmentation_data_B.json -o comparison.png
 """
-import json
+
 import sys
 import numpy as np
 import matplotlib.pyplot as plt
@@ -15,135 +15,16 @@ import matplotlib.patches as mpatches
 from matplotlib.patches import Rectangle
 from datetime import datetime
 import argparse
-from collections import defaultdict
-
-
-def load_data(filename):
-    """Load JSON data, handling incomplete/corrupted files gracefully."""
-    with open(filename, "r") as f:
-        content = f.read()
-
-    # Try standard JSON parsing first
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError as e:
-        print(f"Warning: JSON decode error at position {e.pos}: {e.msg}")
-        print("Attempting to recover valid events...")
-
-        # Try to recover by finding the last complete event
-        # Look for the last complete JSON object in the events array
-        try:
-            # Find the events array start
-            events_start = content.find('"events": [')
-            if events_start == -1:
-                events_start = content.find('"events":[')
-
-            if events_start == -1:
-                print("Error: Could not find events array in JSON")
-                return {"events": []}
-
-            # Extract just the events portion
-            events_section = content[events_start:]
-
-            # Try to parse up to various truncation points
-            valid_events = []
-            bracket_count = 0
-            brace_count = 0
-            in_string = False
-            escape_next = False
-            last_valid_end = -1
-
-            for i, char in enumerate(events_section):
-                if escape_next:
-                    escape_next = False
-                    continue
-
-                if char == "\\" and in_string:
-                    escape_next = True
-                    continue
-
-                if char == '"' and not escape_next:
-                    in_string = not in_string
-                    continue
-
-                if in_string:
-                    continue
-
-                if char == "{":
-                    brace_count += 1
-                elif char == "}":
-                    brace_count -= 1
-                    # A complete object when brace_count returns to 0
-                    if brace_count == 0 and bracket_count > 0:
-                        last_valid_end = events_start + i + 1
-                elif char == "[":
-                    bracket_count += 1
-                elif char == "]":
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        # Found the end of events array
-                        break
-
-            # Try to construct valid JSON up to last valid event
-            if last_valid_end > 0:
-                truncated = content[:last_valid_end]
-                # Close the events array and main object
-                if not truncated.rstrip().endswith("]"):
-                    truncated = truncated.rstrip().rstrip(",") + "]"
-                if not truncated.rstrip().endswith("}"):
-                    truncated += "}"
-
-                try:
-                    result = json.loads(truncated)
-                    num_events = len(result.get("events", []))
-                    print(f"Successfully recovered {num_events} valid events")
-                    return result
-                except:
-                    pass
-
-            # Fallback: Try to extract individual event objects
-            print("Attempting line-by-line event recovery...")
-            return recover_events_line_by_line(content)
-
-        except Exception as recovery_error:
-            print(f"Recovery failed: {recovery_error}")
-            return {"events": []}
-
-
-def recover_events_line_by_line(content):
-    """Try to recover events by parsing line by line."""
-    events = []
-    lines = content.split("\n")
-    current_event = ""
-    brace_count = 0
-
-    for line in lines:
-        if "{" in line:
-            brace_count += line.count("{") - line.count("}")
-            if brace_count > 0:
-                current_event += line + "\n"
-        elif "}" in line:
-            current_event += line + "\n"
-            brace_count += line.count("{") - line.count("}")
-            if brace_count == 0 and current_event.strip():
-                # Try to parse this event
-                try:
-                    # Clean up the event string
-                    event_str = current_event.strip()
-                    if event_str.endswith(","):
-                        event_str = event_str[:-1]
-                    if event_str.startswith("{") and event_str.endswith("}"):
-                        event = json.loads(event_str)
-                        if "event_type" in event:  # Validate it's a real event
-                            events.append(event)
-                except:
-                    pass  # Skip malformed events
-                current_event = ""
-        elif brace_count > 0:
-            current_event += line + "\n"
-
-    print(f"Recovered {len(events)} events through line-by-line parsing")
-    return {"events": events}
+from fragmentation_events import (
+    COMPACTION_FAILURE,
+    COMPACTION_SUCCESS,
+    EXTFRAG,
+    bin_counts,
+    bin_index,
+    event_count,
+    histogram,
+    load_events,
+)
 
 
 def get_dot_size(order: int) -> float:
@@ -152,16 +33,42 @@ def get_dot_size(order: int) -> float:
 
 
 def build_counts(events, bin_size):
-    if not events:
-        return np.array([]), np.array([])
-    times = np.array([e["timestamp"] for e in events], dtype=float)
-    tmin, tmax = times.min(), times.max()
-    if tmax == tmin:
-        tmax = tmin + bin_size
-    bins = np.arange(tmin, tmax + bin_size, bin_size)
-    counts, edges = np.histogram(times, bins=bins)
-    centers = (edges[:-1] + edges[1:]) / 2.0
-    return centers, counts
+    return histogram(events["timestamp"], bin_size, events["count"])
+
+
+def compaction_points(data, event_type):
+    """
+    Compaction events to scatter by fragmentation index, none in aggregate
+    mode which only counts them.
+    """
+    events = data.of_type(event_type)
+    return events[:0] if data.aggregate else events
+
+
+def pattern_time_bins(times, whole_run):
+    """
+    Time bins of a migration pattern heatmap. Aggregate mode does not
+    record when each pattern occurred, its heatmaps get a single bin for
+    the whole run.
+    """
+    if not len(times):
+        times = np.zeros(1)
+    min_time, max_time = times.min(), times.max()
+    n_bins = 1 if whole_run else min(25, max(15, int((max_time - min_time) / 10)))
+    return np.linspace(min_time, max_time, n_bins + 1)
+
+
+def pattern_time_index(events, time_bins, whole_run):
+    """The heatmap time bin of each row of events."""
+    if whole_run:
+        return np.zeros(len(events), dtype=np.int64)
+    return bin_index(events["timestamp"], time_bins)
+
+
+def pattern_time_labels(time_centers, whole_run):
+    if whole_run:
+        return ["whole run"]
+    return [f"{t:.0f}s" for t in time_centers]
 
 
 def get_migrate_type_color(mtype):
@@ -205,35 +112,30 @@ def get_severity_color(severity_score):
         return "#ffd43b"  # Yellow
 
 
+def migration_severities(data, events):
+    """Severity of the migration pattern of each row of events"""
+    pairs, inverse = data.patterns(events)
+    severities = np.array([get_migration_severity(f, t) for f, t in pairs], dtype=float)
+    return severities[inverse]
+
+
 def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
     """Create overlaid compaction events graph"""
 
     # Process dataset A
-    events_a = data_a.get("events", [])
-    compact_a = [
-        e
-        for e in events_a
-        if e["event_type"] in ["compaction_success", "compaction_failure"]
-    ]
-    success_a = [e for e in compact_a if e["event_type"] == "compaction_success"]
-    failure_a = [e for e in compact_a if e["event_type"] == "compaction_failure"]
+    success_a = compaction_points(data_a, COMPACTION_SUCCESS)
+    failure_a = compaction_points(data_a, COMPACTION_FAILURE)
 
     # Process dataset B
-    events_b = data_b.get("events", [])
-    compact_b = [
-        e
-        for e in events_b
-        if e["event_type"] in ["compaction_success", "compaction_failure"]
-    ]
-    success_b = [e for e in compact_b if e["event_type"] == "compaction_success"]
-    failure_b = [e for e in compact_b if e["event_type"] == "compaction_failure"]
+    success_b = compaction_points(data_b, COMPACTION_SUCCESS)
+    failure_b = compaction_points(data_b, COMPACTION_FAILURE)
 
     # Plot A with circles
-    for e in success_a:
+    if len(success_a):
         ax.scatter(
-            e["timestamp"],
-            e.get("fragmentation_index", 0),
-            s=get_dot_size(e["order"]),
+            success_a["timestamp"],
+            success_a["fragmentation_index"],
+            s=get_dot_size(success_a["order"]),
             c="#2ecc71",
             alpha=0.3,
             edgecolors="none",
@@ -241,12 +143,11 @@ def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
             label=None,
         )
 
-    for i, e in enumerate(failure_a):
-        y_pos = -50 - (e["order"] * 10)
+    if len(failure_a):
         ax.scatter(
-            e["timestamp"],
-            y_pos,
-            s=get_dot_size(e["order"]),
+            failure_a["timestamp"],
+            -50 - (failure_a["order"] * 10),
+            s=get_dot_size(failure_a["order"]),
             c="#e74c3c",
             alpha=0.3,
             edgecolors="none",
@@ -255,11 +156,11 @@ def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
         )
 
     # Plot B with triangles
-    for e in success_b:
+    if len(success_b):
         ax.scatter(
-            e["timestamp"],
-            e.get("fragmentation_index", 0),
-            s=get_dot_size(e["order"]) * 1.2,
+            success_b["timestamp"],
+            success_b["fragmentation_index"],
+            s=get_dot_size(success_b["order"]) * 1.2,
             c="#27ae60",
             alpha=0.4,
             edgecolors="black",
@@ -268,12 +169,11 @@ def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
             label=None,
         )
 
-    for i, e in enumerate(failure_b):
-        y_pos = -55 - (e["order"] * 10)  # Slightly offset from A
+    if len(failure_b):
         ax.scatter(
-            e["timestamp"],
-            y_pos,
-            s=get_dot_size(e["order"]) * 1.2,
+            failure_b["timestamp"],
+            -55 - (failure_b["order"] * 10),  # Slightly offset from A
+            s=get_dot_size(failure_b["order"]) * 1.2,
             c="#c0392b",
             alpha=0.4,
             edgecolors="black",
@@ -283,25 +183,12 @@ def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
         )
 
     # Set y-axis limits - cap at 1000, ignore data above
-    all_y_values = []
-    if success_a:
-        all_y_values.extend(
-            [
-                e.get("fragmentation_index", 0)
-                for e in success_a
-                if e.get("fragmentation_index", 0) <= 1000
-            ]
-        )
-    if success_b:
-        all_y_values.extend(
-            [
-                e.get("fragmentation_index", 0)
-                for e in success_b
-                if e.get("fragmentation_index", 0) <= 1000
-            ]
-        )
+    all_y_values = np.concatenate(
+        [success_a["fragmentation_index"], success_b["fragmentation_index"]]
+    )
+    all_y_values = all_y_values[all_y_values <= 1000]
 
-    max_y = max(all_y_values) if all_y_values else 1000
+    max_y = all_y_values.max() if all_y_values.size else 1000
     min_y = -200  # Fixed minimum for failure lanes
     ax.set_ylim(min_y, min(max_y + 100, 1000))
 
@@ -377,12 +264,12 @@ def create_overlaid_compaction_graph(ax, data_a, data_b, labels):
 def create_overlaid_extfrag_timeline(ax, data_a, data_b, labels, bin_size=0.5):
     """Create overlaid ExtFrag timeline"""
 
-    events_a = [e for e in data_a.get("events", []) if e["event_type"] == "extfrag"]
-    events_b = [e for e in data_b.get("events", []) if e["event_type"] == "extfrag"]
+    events_a = data_a.of_type(EXTFRAG)
+    events_b = data_b.of_type(EXTFRAG)
 
     # Dataset A - solid lines
-    steal_a = [e for e in events_a if e.get("is_steal")]
-    claim_a = [e for e in events_a if not e.get("is_steal")]
+    steal_a = events_a[events_a["is_steal"]]
+    claim_a = events_a[~events_a["is_steal"]]
 
     steal_times_a, steal_counts_a = build_counts(steal_a, bin_size)
     claim_times_a, claim_counts_a = build_counts(claim_a, bin_size)
@@ -412,8 +299,8 @@ def create_overlaid_extfrag_timeline(ax, data_a, data_b, labels, bin_size=0.5):
         ax.fill_between(claim_times_a, 0, claim_counts_a, alpha=0.15, color="#e67e22")
 
     # Dataset B - dashed lines
-    steal_b = [e for e in events_b if e.get("is_steal")]
-    claim_b = [e for e in events_b if not e.get("is_steal")]
+    steal_b = events_b[events_b["is_steal"]]
+    claim_b = events_b[~events_b["is_steal"]]
 
     steal_times_b, steal_counts_b = build_counts(steal_b, bin_size)
     claim_times_b, claim_counts_b = build_counts(claim_b, bin_size)
@@ -454,10 +341,10 @@ def create_overlaid_extfrag_timeline(ax, data_a, data_b, labels, bin_size=0.5):
 def create_combined_migration_heatmap(ax, data_a, data_b, labels):
     """Create combined migration pattern heatmap"""
 
-    events_a = [e for e in data_a.get("events", []) if e["event_type"] == "extfrag"]
-    events_b = [e for e in data_b.get("events", []) if e["event_type"] == "extfrag"]
+    events_a = data_a.of_type(EXTFRAG, totals=True)
+    events_b = data_b.of_type(EXTFRAG, totals=True)
 
-    if not events_a and not events_b:
+    if not len(events_a) and not len(events_b):
         ax.text(
             0.5,
             0.5,
@@ -470,19 +357,19 @@ def create_combined_migration_heatmap(ax, data_a, data_b, labels):
         return
 
     # Combine all events to get unified time range and patterns
-    all_events = events_a + events_b
-    times = [e["timestamp"] for e in all_events]
-    min_time, max_time = min(times), max(times)
+    times = np.concatenate(
+        [data_a.of_type(EXTFRAG)["timestamp"], data_b.of_type(EXTFRAG)["timestamp"]]
+    )
+    whole_run = data_a.aggregate or data_b.aggregate
 
     # Create time bins
-    n_bins = min(25, max(15, int((max_time - min_time) / 10)))
-    time_bins = np.linspace(min_time, max_time, n_bins + 1)
+    time_bins = pattern_time_bins(times, whole_run)
     time_centers = (time_bins[:-1] + time_bins[1:]) / 2
 
     # Get all unique patterns from both datasets
-    all_patterns = set()
-    for e in all_events:
-        all_patterns.add(f"{e['migrate_from']}→{e['migrate_to']}")
+    pairs_a, patterns_a = data_a.patterns(events_a)
+    pairs_b, patterns_b = data_b.patterns(events_b)
+    all_patterns = {f"{f}→{t}" for f, t in pairs_a + pairs_b}
 
     # Calculate pattern severities and sort
     pattern_severities = {}
@@ -493,24 +380,22 @@ def create_combined_migration_heatmap(ax, data_a, data_b, labels):
     sorted_patterns = sorted(all_patterns, key=lambda p: (pattern_severities[p], p))
 
     # Create separate heatmaps for A and B
-    heatmap_a = np.zeros((len(sorted_patterns), len(time_centers)))
-    heatmap_b = np.zeros((len(sorted_patterns), len(time_centers)))
-
-    # Fill heatmap A
-    for e in events_a:
-        pattern = f"{e['migrate_from']}→{e['migrate_to']}"
-        pattern_idx = sorted_patterns.index(pattern)
-        bin_idx = np.digitize(e["timestamp"], time_bins) - 1
-        if 0 <= bin_idx < len(time_centers):
-            heatmap_a[pattern_idx, bin_idx] += 1
-
-    # Fill heatmap B
-    for e in events_b:
-        pattern = f"{e['migrate_from']}→{e['migrate_to']}"
-        pattern_idx = sorted_patterns.index(pattern)
-        bin_idx = np.digitize(e["timestamp"], time_bins) - 1
-        if 0 <= bin_idx < len(time_centers):
-            heatmap_b[pattern_idx, bin_idx] += 1
+    pattern_rows = {pattern: i for i, pattern in enumerate(sorted_patterns)}
+
+    def fill_heatmap(events, pairs, patterns):
+        rows = np.array([pattern_rows[f"{f}→{t}"] for f, t in pairs], dtype=np.int64)[
+            patterns
+        ]
+        return bin_counts(
+            rows,
+            len(sorted_patterns),
+            pattern_time_index(events, time_bins, whole_run),
+            len(time_centers),
+            events["count"],
+        )
+
+    heatmap_a = fill_heatmap(events_a, pairs_a, patterns_a)
+    heatmap_b = fill_heatmap(events_b, pairs_b, patterns_b)
 
     # Combine heatmaps: A in upper half of cell, B in lower half
     from matplotlib.colors import LinearSegmentedColormap
@@ -573,7 +458,10 @@ def create_combined_migration_heatmap(ax, data_a, data_b, labels):
     # Set x-axis (time)
     ax.set_xticks(np.arange(len(time_centers)))
     ax.set_xticklabels(
-        [f"{t:.0f}s" for t in time_centers], rotation=45, ha="right", fontsize=8
+        pattern_time_labels(time_centers, whole_run),
+        rotation=45,
+        ha="right",
+        fontsize=8,
     )
 
     # Set y-axis with severity indicators
@@ -654,37 +542,25 @@ def create_comparison_statistics_table(ax, data_a, data_b, labels):
 
     # Calculate metrics
     def calculate_metrics(data):
-        events = data.get("events", [])
-        compact = [
-            e
-            for e in events
-            if e["event_type"] in ["compaction_success", "compaction_failure"]
-        ]
-        extfrag = [e for e in events if e["event_type"] == "extfrag"]
+        extfrag = data.of_type(EXTFRAG, totals=True)
 
-        compact_success = sum(
-            1 for e in compact if e["event_type"] == "compaction_success"
+        compact_success = event_count(data.of_type(COMPACTION_SUCCESS, totals=True))
+        compact = compact_success + event_count(
+            data.of_type(COMPACTION_FAILURE, totals=True)
         )
-        success_rate = (compact_success / len(compact) * 100) if compact else 0
+        success_rate = (compact_success / compact * 100) if compact else 0
 
-        bad = sum(
-            1
-            for e in extfrag
-            if get_migration_severity(e["migrate_from"], e["migrate_to"]) < 0
-        )
-        good = sum(
-            1
-            for e in extfrag
-            if get_migration_severity(e["migrate_from"], e["migrate_to"]) > 0
-        )
+        severities = migration_severities(data, extfrag)
+        bad = event_count(extfrag[severities < 0])
+        good = event_count(extfrag[severities > 0])
 
-        steal = sum(1 for e in extfrag if e.get("is_steal"))
-        claim = len(extfrag) - steal if extfrag else 0
+        steal = event_count(extfrag[extfrag["is_steal"]])
+        claim = event_count(extfrag) - steal
 
         return {
-            "total": len(events),
+            "total": len(data),
             "compact_success_rate": success_rate,
-            "extfrag": len(extfrag),
+            "extfrag": event_count(extfrag),
             "bad_migrations": bad,
             "good_migrations": good,
             "steal": steal,
@@ -817,40 +693,31 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
     ax_migration = fig.add_subplot(gs[2])
 
     # Process events
-    events = data.get("events", [])
-    compact_events = [
-        e
-        for e in events
-        if e["event_type"] in ["compaction_success", "compaction_failure"]
-    ]
-    extfrag_events = [e for e in events if e["event_type"] == "extfrag"]
-
-    success_events = [
-        e for e in compact_events if e["event_type"] == "compaction_success"
-    ]
-    failure_events = [
-        e for e in compact_events if e["event_type"] == "compaction_failure"
-    ]
+    extfrag_events = data.of_type(EXTFRAG)
+    success_events = compaction_points(data, COMPACTION_SUCCESS)
+    failure_events = compaction_points(data, COMPACTION_FAILURE)
+    n_success = event_count(data.of_type(COMPACTION_SUCCESS, totals=True))
+    n_compact = n_success + event_count(data.of_type(COMPACTION_FAILURE, totals=True))
 
     # === COMPACTION GRAPH ===
-    if compact_events:
-        for e in success_events:
-            if e.get("fragmentation_index", 0) <= 1000:  # Cap at 1000
-                ax_compact.scatter(
-                    e["timestamp"],
-                    e.get("fragmentation_index", 0),
-                    s=get_dot_size(e["order"]),
-                    c="#2ecc71",
-                    alpha=0.3,
-                    edgecolors="none",
-                )
+    if n_compact:
+        # Cap at 1000
+        shown = success_events[success_events["fragmentation_index"] <= 1000]
+        if len(shown):
+            ax_compact.scatter(
+                shown["timestamp"],
+                shown["fragmentation_index"],
+                s=get_dot_size(shown["order"]),
+                c="#2ecc71",
+                alpha=0.3,
+                edgecolors="none",
+            )
 
-        for i, e in enumerate(failure_events):
-            y_pos = -50 - (e["order"] * 10)
+        if len(failure_events):
             ax_compact.scatter(
-                e["timestamp"],
-                y_pos,
-                s=get_dot_size(e["order"]),
+                failure_events["timestamp"],
+                -50 - (failure_events["order"] * 10),
+                s=get_dot_size(failure_events["order"]),
                 c="#e74c3c",
                 alpha=0.3,
                 edgecolors="none",
@@ -863,10 +730,10 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
         ax_compact.set_ylim(-200, 1000)
 
         # Add statistics
-        success_rate = (
-            len(success_events) / len(compact_events) * 100 if compact_events else 0
-        )
-        stats_text = f"Success: {len(success_events)}/{len(compact_events)} ({success_rate:.1f}%)"
+        success_rate = n_success / n_compact * 100
+        stats_text = f"Success: {n_success}/{n_compact} ({success_rate:.1f}%)"
+        if data.aggregate:
+            stats_text += "\nFragmentation indexes not recorded in aggregate mode"
         ax_compact.text(
             0.02,
             0.98,
@@ -882,9 +749,9 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
     ax_compact.set_title("Compaction Events Over Time", fontsize=13, fontweight="bold")
 
     # === EXTFRAG TIMELINE ===
-    if extfrag_events:
-        steal_events = [e for e in extfrag_events if e.get("is_steal")]
-        claim_events = [e for e in extfrag_events if not e.get("is_steal")]
+    if len(extfrag_events):
+        steal_events = extfrag_events[extfrag_events["is_steal"]]
+        claim_events = extfrag_events[~extfrag_events["is_steal"]]
 
         steal_times, steal_counts = build_counts(steal_events, bin_size)
         claim_times, claim_counts = build_counts(claim_events, bin_size)
@@ -899,7 +766,7 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
                 linewidth=2,
                 color="#2980b9",
                 alpha=0.8,
-                label=f"Steal ({len(steal_events)})",
+                label=f"Steal ({event_count(steal_events)})",
             )
 
         if claim_times.size > 0:
@@ -912,22 +779,16 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
                 linewidth=2,
                 color="#d35400",
                 alpha=0.8,
-                label=f"Claim ({len(claim_events)})",
+                label=f"Claim ({event_count(claim_events)})",
             )
 
         ax_extfrag.legend(loc="upper right", frameon=True, fontsize=9)
 
         # Add bad/good migration counts
-        bad_migrations = sum(
-            1
-            for e in extfrag_events
-            if get_migration_severity(e["migrate_from"], e["migrate_to"]) < 0
-        )
-        good_migrations = sum(
-            1
-            for e in extfrag_events
-            if get_migration_severity(e["migrate_from"], e["migrate_to"]) > 0
-        )
+        extfrag_totals = data.of_type(EXTFRAG, totals=True)
+        severities = migration_severities(data, extfrag_totals)
+        bad_migrations = event_count(extfrag_totals[severities < 0])
+        good_migrations = event_count(extfrag_totals[severities > 0])
 
         migration_text = f"Bad: {bad_migrations} | Good: {good_migrations}"
         ax_extfrag.text(
@@ -948,7 +809,7 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
     ax_extfrag.grid(True, alpha=0.06, linestyle=":", linewidth=0.5)
 
     # === MIGRATION HEATMAP WITH SEVERITY ===
-    create_single_migration_heatmap(ax_migration, extfrag_events)
+    create_single_migration_heatmap(ax_migration, data)
 
     # Super title with host and kernel info
     title = "Memory Fragmentation Analysis"
@@ -964,8 +825,8 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
         )
         title = f"Memory Fragmentation Analysis\n{hostname}"
 
-    if "kernel_version" in data:
-        title += f"\nKernel: {data['kernel_version']}"
+    if "kernel_version" in data.info:
+        title += f"\nKernel: {data.info['kernel_version']}"
 
     # Adjust y position based on number of lines in title
     title_lines = title.count("\n") + 1
@@ -1000,9 +861,10 @@ def create_single_dashboard(data, output_file=None, bin_size=0.5, input_filename
     return output_file
 
 
-def create_single_migration_heatmap(ax, extfrag_events):
+def create_single_migration_heatmap(ax, data):
     """Create migration heatmap for single dataset with severity indicators"""
-    if not extfrag_events:
+    extfrag_events = data.of_type(EXTFRAG, totals=True)
+    if not len(extfrag_events):
         ax.text(
             0.5,
             0.5,
@@ -1015,34 +877,30 @@ def create_single_migration_heatmap(ax, extfrag_events):
         return
 
     # Get time range and create bins
-    times = [e["timestamp"] for e in extfrag_events]
-    min_time, max_time = min(times), max(times)
-
-    n_bins = min(25, max(15, int((max_time - min_time) / 10)))
-    time_bins = np.linspace(min_time, max_time, n_bins + 1)
+    whole_run = data.aggregate
+    time_bins = pattern_time_bins(data.of_type(EXTFRAG)["timestamp"], whole_run)
     time_centers = (time_bins[:-1] + time_bins[1:]) / 2
 
     # Get patterns and calculate severities
+    pairs, pattern_idx = data.patterns(extfrag_events)
+    counts = extfrag_events["count"]
+    steal = extfrag_events["is_steal"]
+    totals = np.bincount(pattern_idx, counts, minlength=len(pairs)).astype(np.int64)
+    steals = np.bincount(
+        pattern_idx[steal], counts[steal], minlength=len(pairs)
+    ).astype(np.int64)
+
     patterns = {}
-    pattern_events = defaultdict(list)
-
-    for e in extfrag_events:
-        pattern = f"{e['migrate_from']}→{e['migrate_to']}"
-        pattern_events[pattern].append(e)
-        if pattern not in patterns:
-            patterns[pattern] = {
-                "from": e["migrate_from"],
-                "to": e["migrate_to"],
-                "total": 0,
-                "steal": 0,
-                "claim": 0,
-                "severity": get_migration_severity(e["migrate_from"], e["migrate_to"]),
-            }
-        patterns[pattern]["total"] += 1
-        if e.get("is_steal"):
-            patterns[pattern]["steal"] += 1
-        else:
-            patterns[pattern]["claim"] += 1
+    for i, (from_type, to_type) in enumerate(pairs):
+        patterns[f"{from_type}→{to_type}"] = {
+            "from": from_type,
+            "to": to_type,
+            "total": int(totals[i]),
+            "steal": int(steals[i]),
+            "claim": int(totals[i] - steals[i]),
+            "severity": get_migration_severity(from_type, to_type),
+            "index": i,
+        }
 
     # Sort by severity then count
     sorted_patterns = sorted(
@@ -1050,13 +908,16 @@ def create_single_migration_heatmap(ax, extfrag_events):
     )
 
     # Create heatmap data
-    heatmap_data = np.zeros((len(sorted_patterns), len(time_centers)))
-
+    rows = np.empty(len(sorted_patterns), dtype=np.int64)
     for i, pattern in enumerate(sorted_patterns):
-        for e in pattern_events[pattern]:
-            bin_idx = np.digitize(e["timestamp"], time_bins) - 1
-            if 0 <= bin_idx < len(time_centers):
-                heatmap_data[i, bin_idx] += 1
+        rows[patterns[pattern]["index"]] = i
+    heatmap_data = bin_counts(
+        rows[pattern_idx],
+        len(sorted_patterns),
+        pattern_time_index(extfrag_events, time_bins, whole_run),
+        len(time_centers),
+        counts,
+    )
 
     # Plot heatmap
     from matplotlib.colors import LinearSegmentedColormap
@@ -1092,7 +953,10 @@ def create_single_migration_heatmap(ax, extfrag_events):
     # Set x-axis
     ax.set_xticks(np.arange(len(time_centers)))
     ax.set_xticklabels(
-        [f"{t:.0f}s" for t in time_centers], rotation=45, ha="right", fontsize=8
+        pattern_time_labels(time_centers, whole_run),
+        rotation=45,
+        ha="right",
+        fontsize=8,
     )
 
     # Set y-axis with severity indicators
@@ -1182,7 +1046,7 @@ def create_single_migration_heatmap(ax, extfrag_events):
         ax.axvline(j - 0.5, color="gray", linewidth=0.5, alpha=0.3)
 
     # Summary
-    total_events = len(extfrag_events)
+    total_events = event_count(extfrag_events)
     bad_events = sum(
         patterns[p]["total"] for p in patterns if patterns[p]["severity"] < 0
     )
@@ -1249,10 +1113,10 @@ def create_comparison_dashboard(
 
     # Add kernel versions if available
     kernels = []
-    if "kernel_version" in data_a:
-        kernels.append(data_a["kernel_version"])
-    if "kernel_version" in data_b:
-        kernels.append(data_b["kernel_version"])
+    if "kernel_version" in data_a.info:
+        kernels.append(data_a.info["kernel_version"])
+    if "kernel_version" in data_b.info:
+        kernels.append(data_b.info["kernel_version"])
 
     if kernels:
         if len(kernels) == 2 and kernels[0] == kernels[1]:
@@ -1319,8 +1183,8 @@ def main():
     args = parser.parse_args()
 
     try:
-        data_a = load_data(args.input_file)
-        if not data_a.get("events"):
+        data_a = load_events(args.input_file)
+        if not len(data_a):
             print(f"Warning: No events found in {args.input_file}")
             if not args.compare:
                 print("Cannot create visualization without any events")
@@ -1332,15 +1196,15 @@ def main():
     if args.compare:
         # Comparison mode
         try:
-            data_b = load_data(args.compare)
-            if not data_b.get("events"):
+            data_b = load_events(args.compare)
+            if not len(data_b):
                 print(f"Warning: No events found in {args.compare}")
         except Exception as e:
             print(f"Error loading comparison data: {e}")
             sys.exit(1)
 
         # Only proceed if at least one dataset has events
-        if data_a.get("events") or data_b.get("events"):
+        if len(data_a) or len(data_b):
             out = create_comparison_dashboard(
                 data_a,
                 data_b,
@@ -1354,7 +1218,7 @@ def main():
             sys.exit(1)
     else:
         # Single file mode
-        if data_a.get("events"):
+        if len(data_a):
             out = create_single_dashboard(
                 data_a, args.output, args.bin, input_filename=args.input_file
             )
@@ -8,6 +8,8 @@ from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
+from host_sampler import is_sample_file, load_samples
+
 
 def human_format(num):
     if num >= 1_000_000:
@@ -17,8 +19,41 @@ def human_format(num):
     return f"{num:,}"
 
 
+def parse_sample_file(filename):
+    """
+    Load migrate_folio counters from a host_sampler.py file.
+
+    Timestamps are returned as seconds since the epoch.
+    """
+    _, times, columns = load_samples(filename)
+    calls_key = next(
+        (
+            key
+            for key in columns
+            if key.startswith("migrate.") and key.endswith(".calls")
+        ),
+        None,
+    )
+    success_key = calls_key and calls_key[: -len("calls")] + "success"
+    if not calls_key or success_key not in columns:
+        return [], [], []
+
+    timestamps = []
+    calls = []
+    success = []
+    for t, c, s in zip(times, columns[calls_key], columns[success_key]):
+        if c is not None and s is not None:
+            timestamps.append(t)
+            calls.append(c)
+            success.append(s)
+    return timestamps, calls, success
+
+
 def parse_stats_file(filename):
     """Parse the new format stats file with timestamps and migrate_folio data."""
+    if is_sample_file(filename):
+        return parse_sample_file(filename)
+
     timestamps = []
     calls = []
     success = []
@@ -70,30 +105,45 @@ def cumulative_to_interval(cumulative_data):
     return interval_data
 
 
-def find_end_of_activity(interval_data, zero_threshold_hours=1):
+def sample_interval(timestamps, default=60.0):
+    """
+    Median number of seconds between samples.
+
+    Text stats files were always written once a minute, sampler files
+    carry epoch timestamps and may use any interval.
+    """
+    if len(timestamps) < 2 or not isinstance(timestamps[0], float):
+        return default
+    deltas = sorted(b - a for a, b in zip(timestamps, timestamps[1:]))
+    return deltas[len(deltas) // 2] or default
+
+
+def find_end_of_activity(interval_data, zero_threshold_hours=1, interval_seconds=60):
     """
     Find where activity ends by detecting consistent zero values.
 
     The heuristic stops data when there's been no activity (0 migrations per minute)
-    for a continuous period of 1 hour (60 consecutive zero values). This handles
-    cases where stats collection continues long after the workload has completed.
+    for a continuous period of 1 hour (60 consecutive zero values with the
+    default 1 minute interval). This handles cases where stats collection
+    continues long after the workload has completed.
 
     Args:
         interval_data: List of per-interval values
         zero_threshold_hours: Hours of continuous zero activity to detect end (default: 1)
+        interval_seconds: Seconds between samples (default: 60)
 
     Returns:
         Index where to truncate the data, or len(interval_data) if activity continues
     """
-    zero_threshold_minutes = int(zero_threshold_hours * 60)
+    zero_threshold_samples = max(1, int(zero_threshold_hours * 3600 / interval_seconds))
     consecutive_zeros = 0
 
     for i, value in enumerate(interval_data):
         if value == 0:
             consecutive_zeros += 1
-            if consecutive_zeros >= zero_threshold_minutes:
+            if consecutive_zeros >= zero_threshold_samples:
                 # Return the index where zeros started
-                return i - zero_threshold_minutes + 1
+                return i - zero_threshold_samples + 1
         else:
             consecutive_zeros = 0
 
@@ -185,6 +235,8 @@ def plot_folio_migration(stats_files, output_file):
         if not calls_cumulative:
             continue
 
+        interval = sample_interval(timestamps)
+
         # Find where the workload starts (when calls jump up)
         start_idx = find_start_index(calls_cumulative)
 
@@ -197,7 +249,7 @@ def plot_folio_migration(stats_files, output_file):
         success_interval = cumulative_to_interval(success_cumulative)
 
         # Find where activity ends (1 hour of zero activity)
-        end_idx = find_end_of_activity(calls_interval)
+        end_idx = find_end_of_activity(calls_interval, interval_seconds=interval)
 
         # Truncate all data at the end of activity
         calls_interval = calls_interval[:end_idx]
@@ -206,8 +258,10 @@ def plot_folio_migration(stats_files, output_file):
         success_cumulative = success_cumulative[:end_idx]
 
         # Convert to hours from start
-        time_hours = list(range(len(calls_interval)))  # Each entry is 1 minute apart
-        time_hours = [t / 60.0 for t in time_hours]  # Convert to hours
+        time_hours = [i * interval / 3600.0 for i in range(len(calls_interval))]
+
+        # Normalize to calls per minute whatever the sampling interval
+        calls_per_minute = [c * 60.0 / interval for c in calls_interval]
 
         # Calculate success rate per interval
         success_rate = []
@@ -231,7 +285,7 @@ def plot_folio_migration(stats_files, output_file):
         # Plot 2: Migration rate over time (calls per minute)
         ax2.plot(
             time_hours,
-            calls_interval,
+            calls_per_minute,
             label=f"{name}",
             color=color,
             linewidth=linewidth,
@@ -342,7 +396,11 @@ def plot_folio_migration(stats_files, output_file):
 
 def main():
     parser = argparse.ArgumentParser(description="Plot folio migration stats.")
-    parser.add_argument("stats_files", nargs="+", help="List of *.stats.txt files")
+    parser.add_argument(
+        "stats_files",
+        nargs="+",
+        help="List of *.stats.txt or host_sampler.py output files",
+    )
     parser.add_argument(
         "-o",
         "--output",
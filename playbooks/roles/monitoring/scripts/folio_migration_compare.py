@@ -15,12 +15,28 @@ from pathlib import Path
 from datetime import datetime
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "files"))
+from host_sampler import is_sample_file, load_samples  # noqa: E402
+
 
 def parse_stats_file(filename):
     """Parse folio migration stats file to extract cumulative successful migrations."""
     timestamps = []
     success_counts = []
 
+    if is_sample_file(filename):
+        # host_sampler.py output, timestamps are seconds since the epoch
+        _, times, columns = load_samples(filename)
+        key = next(
+            (k for k in columns if k.startswith("migrate.") and k.endswith(".success")),
+            None,
+        )
+        for t, value in zip(times, columns.get(key, [])):
+            if value is not None:
+                timestamps.append(t)
+                success_counts.append(value)
+        return timestamps, success_counts
+
     with open(filename) as f:
         content = f.read()
 
@@ -96,13 +112,16 @@ def generate_comparison_plot(stats_files, output_file, title=None):
         timestamps, success = parse_stats_file(stats_file)
         if success:
             label = get_node_label(stats_file)
-            all_data.append((label, success))
+            all_data.append((label, timestamps, success))
             max_points = max(max_points, len(success))
 
     # Plot each filesystem's data
-    for label, success in all_data:
-        # Create time axis (assuming 1-minute intervals)
-        time_minutes = list(range(len(success)))
+    for label, timestamps, success in all_data:
+        if isinstance(timestamps[0], float):
+            time_minutes = [(t - timestamps[0]) / 60.0 for t in timestamps]
+        else:
+            # Text stats files were written at 1-minute intervals
+            time_minutes = list(range(len(success)))
 
         # Get color for this filesystem
         color = colors.get(label, "#333333")
@@ -6,7 +6,6 @@ Creates multi-panel visualizations showing migration patterns and extfrag events
 """
 
 import os
-import json
 import sys
 import argparse
 import matplotlib.pyplot as plt
@@ -17,16 +16,21 @@ from datetime import datetime
 import numpy as np
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "files"))
+from fragmentation_events import (  # noqa: E402
+    COMPACTION,
+    COMPACTION_FAILURE,
+    COMPACTION_SUCCESS,
+    EXTFRAG,
+    MIGRATION,
+    fixed_bins,
+    load_events,
+)
+
 
 def load_fragmentation_data(filename):
-    """Load fragmentation JSON data."""
-    with open(filename, "r") as f:
-        try:
-            data = json.load(f)
-            return data.get("events", [])
-        except json.JSONDecodeError:
-            print(f"Warning: Could not parse {filename}")
-            return []
+    """Load the fragmentation events of a data file into an EventStore."""
+    return load_events(filename)
 
 
 def extract_all_metrics(events):
@@ -43,47 +47,28 @@ def extract_all_metrics(events):
 
     # Bin events by time windows
     bin_size = 60  # seconds
-    extfrag_bins = {}
-    migration_bins = {}
-    compaction_bins = defaultdict(lambda: {"success": 0, "failed": 0})
-
-    for event in events:
-        if "timestamp" not in event or "event_type" not in event:
-            continue
-
-        timestamp = event["timestamp"]
-        bin_idx = int(timestamp // bin_size) * bin_size
-        event_type = event["event_type"]
-
-        if event_type == "extfrag":
-            extfrag_bins[bin_idx] = extfrag_bins.get(bin_idx, 0) + 1
-
-        elif event_type == "migration":
-            pages = event.get("nr_migrated", 0)
-            migration_bins[bin_idx] = migration_bins.get(bin_idx, 0) + pages
 
-        elif event_type == "compaction":
-            if event.get("status") == "success":
-                compaction_bins[bin_idx]["success"] += 1
-            else:
-                compaction_bins[bin_idx]["failed"] += 1
-
-    # Convert bins to sorted lists
-    if extfrag_bins:
-        metrics["extfrag_times"] = sorted(extfrag_bins.keys())
-        metrics["extfrag_counts"] = [extfrag_bins[t] for t in metrics["extfrag_times"]]
+    extfrag = events.of_type(EXTFRAG)
+    if len(extfrag):
+        times, counts = fixed_bins(extfrag["timestamp"], bin_size, extfrag["count"])
+        metrics["extfrag_times"] = times.tolist()
+        metrics["extfrag_counts"] = counts.tolist()
 
-    if migration_bins:
-        metrics["migration_times"] = sorted(migration_bins.keys())
-        metrics["migration_pages"] = [
-            migration_bins[t] for t in metrics["migration_times"]
-        ]
+    migration = events.of_type(MIGRATION)
+    if len(migration):
+        times, pages = fixed_bins(
+            migration["timestamp"], bin_size, migration["nr_migrated"]
+        )
+        metrics["migration_times"] = times.tolist()
+        metrics["migration_pages"] = pages.tolist()
 
-    if compaction_bins:
-        metrics["compaction_times"] = sorted(compaction_bins.keys())
-        metrics["compaction_success"] = [
-            compaction_bins[t]["success"] for t in metrics["compaction_times"]
-        ]
+    compaction = events.of_type(COMPACTION)
+    if len(compaction):
+        times, success = fixed_bins(
+            compaction["timestamp"], bin_size, compaction["success"].astype(int)
+        )
+        metrics["compaction_times"] = times.tolist()
+        metrics["compaction_success"] = success.tolist()
 
     return metrics
 
@@ -147,7 +132,7 @@ def generate_ab_comparison(data_files, output_file, title=None):
             continue
 
         events = load_fragmentation_data(data_file)
-        if events:
+        if len(events):
             metrics = extract_all_metrics(events)
             metrics["raw_events"] = events  # Keep raw events for fragmentation index
             label = get_node_label(data_file)
@@ -170,9 +155,8 @@ def generate_ab_comparison(data_files, output_file, title=None):
             all_data.append((label, metrics, color))
 
             # Track max time from raw events
-            for event in events:
-                if "timestamp" in event:
-                    max_time = max(max_time, event["timestamp"])
+            if len(events.events):
+                max_time = max(max_time, events.events["timestamp"].max())
 
     if not all_data:
         print("No data found in files")
@@ -185,14 +169,14 @@ def generate_ab_comparison(data_files, output_file, title=None):
     # Panel 1: Fragmentation Index (show actual data points even if mostly useless)
     # Extract fragmentation index points from raw events
     for label, metrics, color in all_data:
-        frag_points = []
-        for event in metrics.get("raw_events", []):
-            if "fragmentation_index" in event and "timestamp" in event:
-                frag_points.append((event["timestamp"], event["fragmentation_index"]))
-
-        if frag_points:
-            times = [p[0] for p in frag_points]
-            indices = [p[1] for p in frag_points]
+        frag_points = metrics["raw_events"].of_type(
+            EXTFRAG, COMPACTION_SUCCESS, COMPACTION_FAILURE
+        )
+
+        # Aggregate mode does not record fragmentation indexes
+        if len(frag_points) and not metrics["raw_events"].aggregate:
+            times = frag_points["timestamp"]
+            indices = frag_points["fragmentation_index"]
             # Use markers to show the data points
             marker = "o" if "Success" in label else "^"
             ax1.scatter(
@@ -225,12 +209,12 @@ def generate_ab_comparison(data_files, output_file, title=None):
 
     for i, (label, metrics, color) in enumerate(all_data):
         # Count events in each time bin
-        event_bins = np.zeros(n_bins)
-        for event in metrics.get("raw_events", []):
-            if event.get("event_type") == "extfrag" and "timestamp" in event:
-                bin_idx = int(event["timestamp"] / bin_size)
-                if bin_idx < n_bins:
-                    event_bins[bin_idx] += 1
+        extfrag = metrics["raw_events"].of_type(EXTFRAG)
+        bin_idx = (extfrag["timestamp"] / bin_size).astype(np.int64)
+        in_range = bin_idx < n_bins
+        event_bins = np.bincount(
+            bin_idx[in_range], extfrag["count"][in_range], minlength=n_bins
+        ).astype(np.int64)
 
         # Plot as bars
         bin_times = np.arange(n_bins) * bin_size
@@ -559,7 +543,7 @@ def generate_migration_focus_plot(data_files, output_file, title=None):
             continue
 
         events = load_fragmentation_data(data_file)
-        if events:
+        if len(events):
             metrics = extract_all_metrics(events)
             label = get_node_label(data_file)
             color = colors[i % len(colors)]
@@ -6,7 +6,6 @@ Generates comparison plots showing fragmentation patterns over time.
 """
 
 import os
-import json
 import sys
 import argparse
 import matplotlib.pyplot as plt
@@ -15,41 +14,24 @@ from pathlib import Path
 from datetime import datetime
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "files"))
+from fragmentation_events import EXTFRAG, fixed_bins, load_events  # noqa: E402
+
 
 def load_fragmentation_data(filename):
-    """Load fragmentation JSON data."""
-    with open(filename, "r") as f:
-        try:
-            data = json.load(f)
-            return data.get("events", [])
-        except json.JSONDecodeError:
-            print(f"Warning: Could not parse {filename}")
-            return []
+    """Load the fragmentation events of a data file into an EventStore."""
+    return load_events(filename)
 
 
 def extract_fragmentation_metrics(events):
     """Extract external fragmentation events over time."""
-    extfrag_times = []
-    extfrag_counts = []
-
     # Bin events by time windows (e.g., 60 second bins)
     bin_size = 60  # seconds
-    extfrag_bins = {}
-
-    for event in events:
-        if "timestamp" in event and "event_type" in event:
-            timestamp = event["timestamp"]
-            bin_idx = int(timestamp // bin_size) * bin_size
-
-            if event["event_type"] == "extfrag":
-                extfrag_bins[bin_idx] = extfrag_bins.get(bin_idx, 0) + 1
-
-    # Convert bins to sorted lists
-    if extfrag_bins:
-        extfrag_times = sorted(extfrag_bins.keys())
-        extfrag_counts = [extfrag_bins[t] for t in extfrag_times]
-
-    return extfrag_times, extfrag_counts
+    extfrag = events.of_type(EXTFRAG)
+    extfrag_times, extfrag_counts = fixed_bins(
+        extfrag["timestamp"], bin_size, extfrag["count"]
+    )
+    return extfrag_times.tolist(), extfrag_counts.tolist()
 
 
 def get_node_label(filename):
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Statistical A/B comparison of baseline and dev nodes.
+
+The compare tools show the raw delta between the mean of the baseline and
+dev results, which can not tell a regression from run to run noise. Given
+the repeated samples of each metric on both sides this module computes:
+
+- a bootstrap confidence interval of the change of the mean, in percent
+  of the baseline
+- a two sided Mann-Whitney U test, exact for small samples without ties
+  and with the tie corrected normal approximation otherwise
+- Benjamini-Hochberg q-values, so testing thousands of metrics at once
+  does not flag a few of them by chance
+- the number of repetitions per side needed to detect a change of the
+  observed size, or of the minimum effect, with the requested power at
+  the significance level corrected for the number of metrics tested
+
+A metric is only flagged as a regression or improvement if its q-value is
+below alpha, its confidence interval excludes zero and the change is at
+least the minimum effect. Metrics which are not significant but would
+need more repetitions to be conclusive are reported as inconclusive.
+
+Metrics with the same number of samples are evaluated together as
+matrices: the bootstrap draws one set of resampling weights shared by all
+metrics of a group and computes the resampled means as one matrix product,
+so thousands of metrics take seconds.
+
+    result = compare(baselines, devs, lower_is_better)
+    result = ab_stats(store.query(workflow="fio-tests"))
+
+The engine needs numpy, ab_stats() and the command line need the results
+store (pandas and pyarrow).
+"""
+
+import argparse
+import functools
+import math
+import re
+import sys
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from results_store import (  # noqa: E402
+    DEFAULT_STORE,
+    dev_pair,
+    STORE_AVAILABLE,
+)
+
+DEFAULT_ALPHA = 0.05
+DEFAULT_POWER = 0.8
+# Minimum change in percent worth flagging
+DEFAULT_MIN_EFFECT = 1.0
+DEFAULT_RESAMPLES = 5000
+DEFAULT_SEED = 0
+
+# Above this many samples in total the exact U distribution is replaced by
+# the normal approximation.
+EXACT_MAX_SAMPLES = 50
+# Limit of the elements of the temporary arrays, per chunk of metrics
+CHUNK_ELEMENTS = 1 << 23
+# Asymptotic relative efficiency of the U test to the t-test
+MWU_EFFICIENCY = 3 / math.pi
+
+VERDICTS = ("regression", "improvement", "inconclusive", "no change")
+
+_TIME_UNITS = {"s", "ms", "us", "ns"}
+_LOWER_IS_BETTER_RE = re.compile(r"lat|time|duration|fail|error")
+
+_normal = NormalDist()
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def lower_is_better(metric: str, unit: str = "") -> bool:
+    """Whether a decrease of the metric is an improvement, e.g. latencies."""
+    return unit in _TIME_UNITS or bool(_LOWER_IS_BETTER_RE.search(metric))
+
+
+@functools.lru_cache(maxsize=None)
+def _u_counts(n1: int, n2: int) -> np.ndarray:
+    """Number of orderings of n1 + n2 distinct samples giving each U."""
+    if n1 == 0 or n2 == 0:
+        return np.ones(1)
+    out = np.zeros(n1 * n2 + 1)
+    # The largest sample is either from the first group and beats all n2
+    # samples of the second one, or from the second group.
+    first = _u_counts(n1 - 1, n2)
+    out[n2 : n2 + len(first)] += first
+    second = _u_counts(n1, n2 - 1)
+    out[: len(second)] += second
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def _u_cdf(n1: int, n2: int) -> np.ndarray:
+    counts = _u_counts(n1, n2)
+    return np.cumsum(counts) / counts.sum()
+
+
+def min_exact_pvalue(n1: int, n2: int) -> float:
+    """The smallest two sided p-value the U test can give for n1 and n2 samples."""
+    if n1 + n2 > EXACT_MAX_SAMPLES:
+        return 0.0
+    return min(1.0, 2 * _u_cdf(n1, n2)[0])
+
+
+def min_runs(alpha: float = DEFAULT_ALPHA) -> int:
+    """Samples per side below which no outcome of the U test is significant."""
+    n = 2
+    while min_exact_pvalue(n, n) >= alpha and 2 * n <= EXACT_MAX_SAMPLES:
+        n += 1
+    return n
+
+
+def _chunks(m: int, per_metric: int):
+    size = max(1, CHUNK_ELEMENTS // max(per_metric, 1))
+    for start in range(0, m, size):
+        yield slice(start, min(start + size, m))
+
+
+def mann_whitney(base: np.ndarray, dev: np.ndarray):
+    """
+    Two sided Mann-Whitney U test of each row of base against the same row
+    of dev, both (metrics, samples) matrices. Returns (U of dev, p-value).
+    """
+    m, n1 = base.shape
+    n2 = dev.shape[1]
+    u = np.empty(m)
+    ties = np.empty(m)
+    n = n1 + n2
+    for chunk in _chunks(m, max(n1 * n2, n * n)):
+        b = base[chunk]
+        d = dev[chunk]
+        u[chunk] = (d[:, :, None] > b[:, None, :]).sum(axis=(1, 2)) + 0.5 * (
+            d[:, :, None] == b[:, None, :]
+        ).sum(axis=(1, 2))
+        both = np.concatenate([b, d], axis=1)
+        # Every member of a group of t ties counts t equal samples, which
+        # sums to t^3 - t over the group.
+        equal = (both[:, :, None] == both[:, None, :]).sum(axis=2)
+        ties[chunk] = (equal.astype(np.float64) ** 2 - 1).sum(axis=1)
+
+    mean = n1 * n2 / 2
+    var = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.clip(np.abs(u - mean) - 0.5, 0, None) / np.sqrt(var)
+    p = np.where(var > 0, _erfc(z / math.sqrt(2)).astype(np.float64), 1.0)
+
+    if n <= EXACT_MAX_SAMPLES:
+        exact = ties == 0
+        if exact.any():
+            cdf = _u_cdf(n2, n1)
+            k = u[exact].astype(np.int64)
+            low = cdf[k]
+            high = 1 - np.where(k > 0, cdf[np.maximum(k - 1, 0)], 0)
+            p[exact] = np.minimum(1.0, 2 * np.minimum(low, high))
+    return u, p
+
+
+def bootstrap_change(
+    base: np.ndarray,
+    dev: np.ndarray,
+    alpha: float = DEFAULT_ALPHA,
+    resamples: int = DEFAULT_RESAMPLES,
+    rng: Optional[np.random.Generator] = None,
+):
+    """
+    Percentile bootstrap confidence interval of the change of the mean of
+    dev over base in percent, for each row of the (metrics, samples)
+    matrices. Returns the (low, high) arrays, NaN for a zero baseline.
+    """
+    rng = rng or np.random.default_rng(DEFAULT_SEED)
+    m, n1 = base.shape
+    n2 = dev.shape[1]
+    # Resampling with replacement is a multinomial weight per sample, the
+    # same weights are used for every metric.
+    wb = rng.multinomial(n1, np.full(n1, 1 / n1), size=resamples).T / n1
+    wd = rng.multinomial(n2, np.full(n2, 1 / n2), size=resamples).T / n2
+    low = np.empty(m)
+    high = np.empty(m)
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    for chunk in _chunks(m, resamples):
+        mb = base[chunk] @ wb
+        md = dev[chunk] @ wd
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (md - mb) / np.abs(mb) * 100
+        change[~np.isfinite(change)] = np.nan
+        low[chunk], high[chunk] = np.percentile(change, q, axis=1)
+    return low, high
+
+
+def benjamini_hochberg(p: np.ndarray) -> np.ndarray:
+    """Benjamini-Hochberg adjusted p-values (q-values)."""
+    p = np.asarray(p, dtype=np.float64)
+    n = len(p)
+    if not n:
+        return p
+    order = np.argsort(p)
+    ranked = p[order] * n / np.arange(1, n + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q = np.empty(n)
+    q[order] = np.minimum(ranked, 1.0)
+    return q
+
+
+def required_samples(
+    base_std: np.ndarray,
+    dev_std: np.ndarray,
+    effect: np.ndarray,
+    alpha: float = DEFAULT_ALPHA,
+    power: float = DEFAULT_POWER,
+) -> np.ndarray:
+    """
+    Samples per side for the U test to detect a change of the means of
+    effect, in the units of the metric, with the given power. The
+    standard deviation of a side with a single sample is NaN, the other
+    side's is used instead, NaN if neither is known.
+    """
+    z = _normal.inv_cdf(1 - alpha / 2) + _normal.inv_cdf(power)
+    var = np.stack([base_std**2, dev_std**2])
+    known = ~np.isnan(var)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.where(known, var, 0).sum(axis=0) / known.sum(axis=0)
+        n = 2 * z**2 * var / effect**2 / MWU_EFFICIENCY
+    n = np.where(var > 0, np.ceil(n), 0)
+    n = np.maximum(n, min_runs(alpha))
+    return np.where(np.isnan(var), np.nan, n)
+
+
+def compare(
+    baselines: Sequence[Sequence[float]],
+    devs: Sequence[Sequence[float]],
+    lower_better: Optional[Sequence[bool]] = None,
+    alpha: float = DEFAULT_ALPHA,
+    power: float = DEFAULT_POWER,
+    min_effect: float = DEFAULT_MIN_EFFECT,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, np.ndarray]:
+    """
+    Compare the baseline and dev samples of many metrics, baselines[i] and
+    devs[i] being the samples of metric i. Returns a dict of arrays, one
+    element per metric:
+
+        n_baseline, n_dev, baseline, dev (means), change_pct,
+        ci_low, ci_high (change_pct confidence interval), p_value, q_value,
+        required_runs (per side), additional_runs, verdict
+    """
+    m = len(baselines)
+    if len(devs) != m:
+        raise ValueError("baselines and devs must have the same length")
+    if lower_better is None:
+        lower_better = np.zeros(m, dtype=bool)
+    lower_better = np.asarray(lower_better, dtype=bool)
+    rng = np.random.default_rng(seed)
+
+    out = {
+        key: np.full(m, np.nan)
+        for key in (
+            "baseline",
+            "dev",
+            "change_pct",
+            "ci_low",
+            "ci_high",
+            "p_value",
+            "required_runs",
+        )
+    }
+    out["n_baseline"] = np.array([len(s) for s in baselines], dtype=np.int64)
+    out["n_dev"] = np.array([len(s) for s in devs], dtype=np.int64)
+    base_std = np.full(m, np.nan)
+    dev_std = np.full(m, np.nan)
+
+    # Evaluate the metrics with the same sample counts together
+    groups: Dict[Any, list] = {}
+    for i, key in enumerate(zip(out["n_baseline"].tolist(), out["n_dev"].tolist())):
+        groups.setdefault(key, []).append(i)
+    for (n1, n2), idx in groups.items():
+        if not n1 or not n2:
+            continue
+        idx = np.array(idx)
+        base = np.array([baselines[i] for i in idx], dtype=np.float64)
+        dev = np.array([devs[i] for i in idx], dtype=np.float64)
+        out["baseline"][idx] = base.mean(axis=1)
+        out["dev"][idx] = dev.mean(axis=1)
+        if n1 > 1:
+            base_std[idx] = base.std(axis=1, ddof=1)
+        if n2 > 1:
+            dev_std[idx] = dev.std(axis=1, ddof=1)
+        if n1 > 1 and n2 > 1:
+            out["ci_low"][idx], out["ci_high"][idx] = bootstrap_change(
+                base, dev, alpha, resamples, rng
+            )
+        _, out["p_value"][idx] = mann_whitney(base, dev)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["change_pct"] = (out["dev"] - out["baseline"]) / np.abs(out["baseline"])
+    out["change_pct"] *= 100
+    out["change_pct"][~np.isfinite(out["change_pct"])] = np.nan
+
+    tested = ~np.isnan(out["p_value"])
+    out["q_value"] = np.full(m, np.nan)
+    out["q_value"][tested] = benjamini_hochberg(out["p_value"][tested])
+
+    # Size of the change to detect: the observed one, at least the
+    # minimum effect. The runs are sized for the Bonferroni level, which
+    # bounds the q-value of a metric by its p-value times the number of
+    # metrics tested.
+    effect = np.maximum(
+        np.abs(out["dev"] - out["baseline"]),
+        np.abs(out["baseline"]) * min_effect / 100,
+    )
+    out["required_runs"] = required_samples(
+        base_std, dev_std, effect, alpha / max(tested.sum(), 1), power
+    )
+    have = np.minimum(out["n_baseline"], out["n_dev"])
+    out["additional_runs"] = np.maximum(out["required_runs"] - have, 0)
+
+    significant = (
+        (out["q_value"] < alpha)
+        & ((out["ci_low"] > 0) | (out["ci_high"] < 0))
+        & (np.abs(out["change_pct"]) >= min_effect)
+    )
+    worse = np.where(lower_better, out["change_pct"] > 0, out["change_pct"] < 0)
+    # Constant and identical samples on both sides need no more runs
+    same = (base_std == 0) & (dev_std == 0) & (out["dev"] == out["baseline"])
+    out["additional_runs"][same] = 0
+    verdict = np.full(m, "inconclusive", dtype=object)
+    verdict[~significant & (out["additional_runs"] == 0)] = "no change"
+    verdict[significant & worse] = "regression"
+    verdict[significant & ~worse] = "improvement"
+    out["verdict"] = verdict
+    return out
+
+
+def ab_stats(
+    df,
+    by: Sequence[str] = ("workflow", "fs", "test", "metric", "unit"),
+    **kwargs,
+):
+    """
+    Compare each dev host with its baseline host in a results store query,
+    every matching row being one sample, by default per workflow,
+    filesystem, test and metric. kwargs are passed to compare(). Returns a
+    DataFrame with the columns of compare().
+    """
+    import pandas as pd
+
+    by = list(by)
+    samples = df.groupby(by + ["host"], observed=True)["value"].agg(list)
+    samples = samples.reset_index()
+    dev = samples[samples["host"].map(dev_pair).notna()].copy()
+    dev["baseline_host"] = dev["host"].map(dev_pair)
+    merged = dev.merge(
+        samples.rename(columns={"host": "baseline_host"}),
+        on=by + ["baseline_host"],
+        suffixes=("_dev", "_baseline"),
+    ).rename(columns={"host": "dev_host"})
+    if merged.empty:
+        return pd.DataFrame()
+
+    lower = [
+        lower_is_better(metric, unit)
+        for metric, unit in zip(
+            merged["metric"], merged.get("unit", pd.Series([""] * len(merged)))
+        )
+    ]
+    result = compare(
+        [np.asarray(v, dtype=np.float64) for v in merged["value_baseline"]],
+        [np.asarray(v, dtype=np.float64) for v in merged["value_dev"]],
+        lower,
+        **kwargs,
+    )
+    out = merged[by + ["baseline_host", "dev_host"]].reset_index(drop=True)
+    for key in (
+        "n_baseline",
+        "n_dev",
+        "baseline",
+        "dev",
+        "change_pct",
+        "ci_low",
+        "ci_high",
+        "p_value",
+        "q_value",
+        "required_runs",
+        "additional_runs",
+        "verdict",
+    ):
+        out[key] = result[key]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Statistical comparison of baseline and dev results"
+    )
+    parser.add_argument(
+        "--store",
+        default=str(DEFAULT_STORE),
+        help=f"Results store directory (default: {DEFAULT_STORE})",
+    )
+    for column in ("workflow", "host", "kernel", "fs", "run", "test", "metric"):
+        parser.add_argument(f"--{column}", action="append")
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help=f"Significance level (default: {DEFAULT_ALPHA})",
+    )
+    parser.add_argument(
+        "--power",
+        type=float,
+        default=DEFAULT_POWER,
+        help=f"Power for the required runs (default: {DEFAULT_POWER})",
+    )
+    parser.add_argument(
+        "--min-effect",
+        type=float,
+        default=DEFAULT_MIN_EFFECT,
+        help=f"Smallest change in percent to flag (default: {DEFAULT_MIN_EFFECT})",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=DEFAULT_RESAMPLES,
+        help=f"Bootstrap resamples (default: {DEFAULT_RESAMPLES})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Show all metrics, not only the regressions",
+    )
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    args = parser.parse_args()
+
+    if not STORE_AVAILABLE:
+        print("Error: the results store needs pandas and pyarrow", file=sys.stderr)
+        return 1
+    from results_store import ResultsStore, _filters, _print_df
+
+    df = ResultsStore(args.store).query(**_filters(args))
+    if df.empty:
+        print("No matching results", file=sys.stderr)
+        return 1
+    result = ab_stats(
+        df,
+        alpha=args.alpha,
+        power=args.power,
+        min_effect=args.min_effect,
+        resamples=args.resamples,
+        seed=args.seed,
+    )
+    if result.empty:
+        print("No baseline and dev host pairs in the results", file=sys.stderr)
+        return 1
+
+    counts = result["verdict"].value_counts()
+    print(
+        ", ".join(f"{counts.get(v, 0)} {v}" for v in VERDICTS)
+        + f" of {len(result)} metrics",
+        file=sys.stderr,
+    )
+    if not args.all:
+        result = result[result["verdict"] == "regression"]
+        if result.empty:
+            print("No significant regressions", file=sys.stderr)
+            return 0
+    _print_df(result, args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Shared catalog client for the cloud provider REST APIs.
+
+Generating the Kconfig files for a provider needs several catalog
+endpoints (instance types, images, locations, availability), and the
+generators used to fetch them one blocking request at a time, each
+refetching data another generator had already fetched. The client:
+
+- fetches a set of endpoints concurrently with fetch_all(), over a pool
+  of HTTPS connections kept alive across requests
+- memoizes responses for the lifetime of the process, so every generator
+  shares one response per endpoint
+- persists responses with their ETag and Last-Modified headers under
+  ~/.cache/kdevops/cloud-catalog/. Within the TTL a response is reused
+  without any request, after it the request is made conditional and a
+  304 reuses the cached body. If the API can not be reached the cached
+  response is used instead of the hardcoded defaults.
+
+Only the catalog endpoints given to the client go through the cache,
+anything else, such as instances, SSH keys or spot availability, is
+fetched on every request. Live endpoints, whose responses include current
+capacity, are shared within the process but never persisted, so they are
+neither reused across runs nor served stale.
+"""
+
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_JOBS = 8
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kdevops", "cloud-catalog")
+
+# Seconds a cached catalog response is used without revalidating it when
+# generating Kconfig files, override with KDEVOPS_CLOUD_CATALOG_TTL.
+KCONFIG_CATALOG_TTL = int(os.environ.get("KDEVOPS_CLOUD_CATALOG_TTL", "300"))
+
+
+class CatalogClient:
+    """
+    Client for the GET endpoints of one provider API.
+
+    Args:
+        name: Provider name, used for the cache file
+        base_url: API base URL, e.g. "https://cloud.lambdalabs.com/api/v1"
+        get_token: Returns the bearer token, called on first use
+        refresh_token: Returns a new token after a 401, optional
+        timeout: Timeout of each request in seconds
+        cache_dir: Directory for the on-disk cache, None to disable it
+        catalog_endpoints: Read only endpoints which may be cached
+        live_endpoints: Endpoints memoized for the process only
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        get_token: Callable[[], Optional[str]],
+        refresh_token: Optional[Callable[[], Optional[str]]] = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        cache_dir: Optional[str] = CACHE_DIR,
+        catalog_endpoints: Iterable[str] = (),
+        live_endpoints: Iterable[str] = (),
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        url = urllib.parse.urlsplit(self.base_url)
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.base_path = url.path
+        self.timeout = timeout
+        self.catalog_endpoints = frozenset(catalog_endpoints)
+        self.live_endpoints = frozenset(live_endpoints)
+        self._get_token = get_token
+        self._refresh_token = refresh_token
+        self._token = None
+        self._token_loaded = False
+        self._lock = threading.Lock()
+        # Idle keep-alive connections
+        self._pool = []
+        # endpoint -> response data, for the lifetime of the process
+        self._memo = {}
+        self.cache_path = None
+        if cache_dir:
+            # Keyed on the base URL so a stub server never shares the cache
+            # of the real API.
+            url_hash = hashlib.sha1(self.base_url.encode()).hexdigest()[:12]
+            self.cache_path = os.path.join(cache_dir, f"{name}-{url_hash}.json")
+        self._cache = self._load_cache()
+
+    def _load_cache(self) -> Dict:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION:
+            return {}
+        return cache.get("endpoints", {})
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = json.dumps({"version": CACHE_VERSION, "endpoints": self._cache})
+        tmp = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"Failed to save {self.cache_path}: {e}", file=sys.stderr)
+
+    def _token_value(self) -> Optional[str]:
+        with self._lock:
+            if not self._token_loaded:
+                self._token = self._get_token()
+                self._token_loaded = True
+            return self._token
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _request(self, endpoint: str, headers: Dict[str, str]):
+        """Returns (status, reason, response, body)."""
+        path = self.base_path + endpoint
+        with self._lock:
+            conn = self._pool.pop() if self._pool else None
+        # An idle connection may have been closed by the server since its
+        # last use, retry once on a new connection.
+        for attempt in range(2):
+            if conn is None:
+                conn = self._connect()
+            reuse = False
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                reuse = not response.will_close
+            except (http.client.HTTPException, OSError) as e:
+                # A timeout is not a stale connection, don't wait again.
+                if attempt or isinstance(e, socket.timeout):
+                    raise
+                continue
+            finally:
+                if reuse:
+                    with self._lock:
+                        self._pool.append(conn)
+                else:
+                    conn.close()
+                    conn = None
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return response.status, response.reason, response, body
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            conn.close()
+
+    def _fetch(self, endpoint: str, ttl: int, cache: bool = True) -> Optional[Dict]:
+        cached = None
+        if cache:
+            with self._lock:
+                cached = self._cache.get(endpoint)
+        if cached and ttl > 0 and time.time() - cached["fetched"] < ttl:
+            return cached["data"]
+
+        token = self._token_value()
+        if not token:
+            return None
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+            "User-Agent": "kdevops/1.0",
+        }
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            status, reason, response, body = self._request(endpoint, headers)
+            if status == 401 and self._refresh_token:
+                with self._lock:
+                    # Concurrent requests rejected with the same token
+                    # only refresh it once.
+                    if self._token == token:
+                        self._token = self._refresh_token()
+                    token = self._token
+                if token:
+                    headers["Authorization"] = f"Bearer {token}"
+                    status, reason, response, body = self._request(endpoint, headers)
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Connection error making API request: {e}", file=sys.stderr)
+            return self._stale(endpoint, cached)
+
+        if status == 304 and cached:
+            with self._lock:
+                cached["fetched"] = time.time()
+            return cached["data"]
+        if status != 200:
+            print(f"HTTP Error {status}: {reason}", file=sys.stderr)
+            return self._stale(endpoint, cached)
+        try:
+            data = json.loads(body.decode())
+        except ValueError as e:
+            print(f"Error decoding API response: {e}", file=sys.stderr)
+            return self._stale(endpoint, cached)
+
+        if not cache:
+            return data
+        with self._lock:
+            self._cache[endpoint] = {
+                "etag": response.getheader("ETag"),
+                "last_modified": response.getheader("Last-Modified"),
+                "fetched": time.time(),
+                "data": data,
+            }
+        return data
+
+    def _stale(self, endpoint: str, cached: Optional[Dict]) -> Optional[Dict]:
+        if not cached:
+            return None
+        age = int(time.time() - cached["fetched"])
+        print(
+            f"Using cached {self.name} {endpoint} response from {age}s ago",
+            file=sys.stderr,
+        )
+        return cached["data"]
+
+    def _get(self, endpoint: str, ttl: int, fresh: bool = False) -> Optional[Dict]:
+        live = endpoint in self.live_endpoints
+        if not live and endpoint not in self.catalog_endpoints:
+            return self._fetch(endpoint, 0, cache=False)
+        if not fresh:
+            with self._lock:
+                if endpoint in self._memo:
+                    return self._memo[endpoint]
+        if live:
+            data = self._fetch(endpoint, 0, cache=False)
+        else:
+            data = self._fetch(endpoint, 0 if fresh else ttl)
+        if data is not None:
+            with self._lock:
+                self._memo[endpoint] = data
+        return data
+
+    def get(self, endpoint: str, ttl: int = 0, fresh: bool = False) -> Optional[Dict]:
+        """
+        GET an endpoint. Catalog endpoints are memoized for the process and
+        persisted, and a persisted response younger than ttl seconds is
+        used without a request. Live endpoints are only memoized. With
+        fresh a catalog or live endpoint is requested again even if
+        memoized or younger than ttl, a persisted response is revalidated
+        with a conditional request.
+        """
+        data = self._get(endpoint, ttl, fresh)
+        if endpoint in self.catalog_endpoints:
+            self._save_cache()
+        return data
+
+    def fetch_all(
+        self, endpoints: Iterable[str], ttl: int = 0, jobs: int = DEFAULT_JOBS
+    ) -> Dict[str, Optional[Dict]]:
+        """Fetch all endpoints concurrently, returns {endpoint: data}."""
+        endpoints = list(dict.fromkeys(endpoints))
+        if not endpoints:
+            return {}
+        # Resolve the token once, not from every worker.
+        self._token_value()
+        with ThreadPoolExecutor(max_workers=min(jobs, len(endpoints))) as executor:
+            results = dict(
+                zip(endpoints, executor.map(lambda e: self._get(e, ttl), endpoints))
+            )
+        if self.catalog_endpoints.intersection(endpoints):
+            self._save_cache()
+        return results
@@ -26,9 +26,16 @@ from datacrunch_credentials import (
     get_credentials,
     get_api_key as get_api_key_from_credentials,
 )
+from cloud_catalog import CatalogClient, KCONFIG_CATALOG_TTL
 
 DATACRUNCH_API_BASE = "https://api.datacrunch.io/v1"
 
+# Read only endpoints describing what can be provisioned, their responses
+# are shared by all generators and cached on disk.
+CATALOG_ENDPOINTS = ["/instance-types", "/images", "/locations"]
+
+_catalog_clients = {}
+
 # Cache for OAuth2 access token
 _access_token_cache = None
 
@@ -105,12 +112,50 @@ def get_access_token(
     return None
 
 
+def get_catalog_client(access_token: Optional[str] = None) -> CatalogClient:
+    """
+    Return the process wide API client. Without an access token one is
+    obtained on first use, and refreshed if the API rejects it.
+    """
+    client = _catalog_clients.get(access_token)
+    if client is None:
+        if access_token is None:
+            get_token = get_access_token
+            refresh_token = lambda: get_access_token(force_refresh=True)
+        else:
+            get_token = lambda: access_token
+            refresh_token = None
+        client = CatalogClient(
+            "datacrunch",
+            DATACRUNCH_API_BASE,
+            get_token,
+            refresh_token=refresh_token,
+            timeout=DEFAULT_TIMEOUT,
+            catalog_endpoints=CATALOG_ENDPOINTS,
+        )
+        _catalog_clients[access_token] = client
+    return client
+
+
+def prefetch_catalog(
+    endpoints: Optional[List[str]] = None, ttl: int = KCONFIG_CATALOG_TTL
+) -> None:
+    """
+    Fetch the catalog endpoints concurrently, reusing cached responses up
+    to ttl seconds old. Later requests for them are served from memory.
+    """
+    get_catalog_client().fetch_all(endpoints or CATALOG_ENDPOINTS, ttl=ttl)
+
+
 def make_api_request(
     endpoint: str, access_token: Optional[str] = None
 ) -> Optional[Dict]:
     """
     Make a GET request to DataCrunch API.
 
+    Catalog endpoints are memoized for the process and cached on disk,
+    see cloud_catalog.
+
     Args:
         endpoint: API endpoint (e.g., "/instances")
         access_token: OAuth2 access token (if None, will get one)
@@ -118,47 +163,7 @@ def make_api_request(
     Returns:
         JSON response as dict, or None on error
     """
-    if access_token is None:
-        access_token = get_access_token()
-
-    if not access_token:
-        return None
-
-    url = f"{DATACRUNCH_API_BASE}{endpoint}"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "User-Agent": "kdevops/1.0",
-    }
-
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=DEFAULT_TIMEOUT) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}", file=sys.stderr)
-        # If 401, token might be expired, retry once with fresh token
-        if e.code == 401:
-            access_token = get_access_token(force_refresh=True)
-            if access_token:
-                try:
-                    req = urllib.request.Request(
-                        url,
-                        headers={**headers, "Authorization": f"Bearer {access_token}"},
-                    )
-                    with urllib.request.urlopen(
-                        req, timeout=DEFAULT_TIMEOUT
-                    ) as response:
-                        return json.loads(response.read().decode())
-                except Exception:
-                    pass
-        return None
-    except (socket.timeout, urllib.error.URLError) as e:
-        print(f"Connection error making API request: {e}", file=sys.stderr)
-        return None
-    except Exception as e:
-        print(f"Error making API request: {e}", file=sys.stderr)
-        return None
+    return get_catalog_client(access_token).get(endpoint)
 
 
 def make_api_post(
@@ -269,6 +274,88 @@ def get_instance_availability() -> Optional[Dict]:
     return make_api_request("/instance-availability")
 
 
+class CapacityMatrix:
+    """
+    Spot and on-demand availability of every instance type in every
+    location, from one concurrent sweep of the API.
+
+    Spot availability is reported per location by /instance-availability.
+    On-demand instances are deployable in every location, so any instance
+    type listed by /instance-types is considered available on-demand in
+    all locations; actual capacity is only known at deploy time.
+    """
+
+    def __init__(
+        self,
+        locations: List[str],
+        spot: Dict[str, List[str]],
+        instance_types: List[str],
+    ):
+        self.locations = locations
+        # location -> instance types with spot capacity
+        self.spot = spot
+        # instance types which can be deployed on-demand
+        self.instance_types = instance_types
+
+    def by_location(self, on_demand: bool = False) -> Dict[str, List[str]]:
+        """Map each location to the instance types available in it."""
+        if on_demand:
+            return {loc: list(self.instance_types) for loc in self.locations}
+        return {loc: list(types) for loc, types in self.spot.items() if types}
+
+    def locations_for(self, instance_type: str, on_demand: bool = False) -> List[str]:
+        """Locations where instance_type is available, in API order."""
+        if on_demand:
+            if instance_type in self.instance_types:
+                return list(self.locations)
+            return []
+        return [loc for loc, types in self.spot.items() if instance_type in types]
+
+    def first_location(
+        self, instance_type: str, on_demand: bool = False
+    ) -> Optional[str]:
+        locations = self.locations_for(instance_type, on_demand)
+        return locations[0] if locations else None
+
+    def restrict(self, location: str) -> "CapacityMatrix":
+        """Return the matrix for a single location."""
+        return CapacityMatrix(
+            [loc for loc in self.locations if loc == location],
+            {loc: types for loc, types in self.spot.items() if loc == location},
+            self.instance_types,
+        )
+
+
+def get_capacity_matrix(access_token: Optional[str] = None) -> Optional[CapacityMatrix]:
+    """
+    Fetch spot availability, instance types and locations concurrently,
+    with a single access token, and return them as a CapacityMatrix.
+    Returns None if the API could not be queried.
+    """
+    responses = get_catalog_client(access_token).fetch_all(
+        ["/instance-availability", "/instance-types", "/locations"]
+    )
+    availability = responses["/instance-availability"]
+    instance_types = responses["/instance-types"]
+    locations = responses["/locations"]
+    if availability is None or instance_types is None or locations is None:
+        return None
+
+    spot = {}
+    for loc_data in availability:
+        location_code = loc_data.get("location_code", "UNKNOWN")
+        spot[location_code] = list(loc_data.get("availabilities", []))
+    if isinstance(instance_types, dict):
+        instance_types = instance_types.get("instance_types", [])
+    if isinstance(locations, dict):
+        locations = locations.get("locations", [])
+    return CapacityMatrix(
+        [loc.get("code", "UNKNOWN") for loc in locations],
+        spot,
+        [it["instance_type"] for it in instance_types if it.get("instance_type")],
+    )
+
+
 def main():
     """Test the API library."""
     print("DataCrunch API Library Test")
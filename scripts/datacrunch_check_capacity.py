@@ -10,15 +10,12 @@ is available, helping users avoid 503 errors when provisioning.
 import argparse
 import configparser
 import json
+import os
 import sys
 from pathlib import Path
 
-try:
-    import requests
-except ImportError:
-    sys.stderr.write("Error: requests module not installed\n")
-    sys.stderr.write("Install with: pip install requests\n")
-    sys.exit(1)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from datacrunch_api import get_access_token, get_capacity_matrix
 
 
 def load_credentials(creds_file="~/.datacrunch/credentials"):
@@ -67,133 +64,56 @@ def load_credentials(creds_file="~/.datacrunch/credentials"):
 
 def get_oauth_token(client_id, client_secret):
     """Get OAuth2 access token from DataCrunch API."""
-    try:
-        response = requests.post(
-            "https://api.datacrunch.io/v1/oauth2/token",
-            data={
-                "grant_type": "client_credentials",
-                "client_id": client_id,
-                "client_secret": client_secret,
-            },
-            timeout=30,
-        )
-        response.raise_for_status()
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        sys.stderr.write(f"Error getting OAuth token: {e}\n")
+    token = get_access_token(client_id, client_secret)
+    if not token:
+        sys.stderr.write("Error getting OAuth token\n")
         sys.exit(1)
-
-
-def check_availability(token, instance_type=None, location=None, on_demand=False):
-    """Check instance availability across all or specific locations."""
-    try:
-        headers = {"Authorization": f"Bearer {token}"}
-
-        if on_demand:
-            # For on-demand, check instance-types endpoint which shows what's deployable
-            response = requests.get(
-                "https://api.datacrunch.io/v1/instance-types",
-                headers=headers,
-                timeout=30,
+    return token
+
+
+def availability_results(matrix, instance_type=None, location=None, on_demand=False):
+    """
+    Return the availability of instance_type, or of all H100 instances,
+    from a CapacityMatrix in the format printed by this script.
+    """
+    if location:
+        matrix = matrix.restrict(location)
+
+    results = []
+    if instance_type:
+        for loc_code in matrix.locations_for(instance_type, on_demand):
+            results.append(
+                {
+                    "location": loc_code,
+                    "instance_type": instance_type,
+                    "available": True,
+                }
             )
-            response.raise_for_status()
-            instance_types_data = response.json()
+        return results
 
-            # Also get locations to map availability
-            loc_response = requests.get(
-                "https://api.datacrunch.io/v1/locations",
-                headers=headers,
-                timeout=30,
+    # Show all H100 instances (default), for on-demand all instance types
+    # if there are no H100 ones
+    for loc_code, instances in matrix.by_location(on_demand).items():
+        h100_instances = [it for it in instances if "H100" in it]
+        if on_demand and not h100_instances:
+            h100_instances = instances
+        if h100_instances:
+            results.append(
+                {
+                    "location": loc_code,
+                    "instances": h100_instances,
+                }
             )
-            loc_response.raise_for_status()
-            locations_data = loc_response.json()
+    return results
 
-            # Build results - on-demand instances are generally available in all locations
-            results = []
-            location_codes = [loc.get("code", "UNKNOWN") for loc in locations_data]
-
-            # Get all available instance types
-            all_instance_types = [
-                it.get("instance_type")
-                for it in instance_types_data
-                if it.get("instance_type")
-            ]
-
-            if instance_type:
-                # Check if specific instance type exists
-                if instance_type in all_instance_types:
-                    # Instance type exists - report as available in all locations
-                    # (actual availability determined at deploy time)
-                    for loc_code in location_codes:
-                        results.append(
-                            {
-                                "location": loc_code,
-                                "instance_type": instance_type,
-                                "available": True,
-                            }
-                        )
-            else:
-                # Show all H100 instances (or all instances for capacity map)
-                # Return results grouped by location like spot does
-                h100_instances = [it for it in all_instance_types if "H100" in it]
-                instances_to_report = (
-                    h100_instances if h100_instances else all_instance_types
-                )
-                for loc_code in location_codes:
-                    results.append(
-                        {
-                            "location": loc_code,
-                            "instances": instances_to_report,
-                        }
-                    )
 
-            return results
-
-        # Spot instance availability check (original behavior)
-        params = {}
-        if location:
-            params["locationCode"] = location
-
-        response = requests.get(
-            "https://api.datacrunch.io/v1/instance-availability",
-            headers=headers,
-            params=params,
-            timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        results = []
-        for loc_data in data:
-            location_code = loc_data.get("location_code", "UNKNOWN")
-            availabilities = loc_data.get("availabilities", [])
-
-            # If specific instance type requested, filter to that
-            if instance_type:
-                if instance_type in availabilities:
-                    results.append(
-                        {
-                            "location": location_code,
-                            "instance_type": instance_type,
-                            "available": True,
-                        }
-                    )
-            else:
-                # Show all H100 instances (default)
-                h100_instances = [a for a in availabilities if "H100" in a]
-                if h100_instances:
-                    results.append(
-                        {
-                            "location": location_code,
-                            "instances": h100_instances,
-                        }
-                    )
-
-        return results
-
-    except requests.exceptions.RequestException as e:
-        sys.stderr.write(f"Error checking availability: {e}\n")
+def check_availability(token, instance_type=None, location=None, on_demand=False):
+    """Check instance availability across all or specific locations."""
+    matrix = get_capacity_matrix(token)
+    if matrix is None:
+        sys.stderr.write("Error checking availability\n")
         sys.exit(1)
+    return availability_results(matrix, instance_type, location, on_demand)
 
 
 def main():
@@ -10,16 +10,12 @@ to lower tiers if necessary.
 """
 
 import argparse
-import json
 import os
-import subprocess
 import sys
 from typing import List, Dict, Optional
 
-# Get the directory containing this script
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CAPACITY_CHECKER = os.path.join(SCRIPT_DIR, "datacrunch_check_capacity.py")
-
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from datacrunch_api import CapacityMatrix, get_capacity_matrix
 
 # GPU tier definitions from highest to lowest performance
 GPU_TIERS = {
@@ -80,45 +76,25 @@ TIER_GROUPS = {
 }
 
 
-def get_all_available_capacity(on_demand: bool = False) -> Dict[str, List[str]]:
+def get_all_available_capacity(
+    on_demand: bool = False, matrix: Optional[CapacityMatrix] = None
+) -> Dict[str, List[str]]:
     """
     Get all available GPU capacity across all regions.
 
     Args:
         on_demand: If True, check on-demand/dynamic pricing availability instead of spot
+        matrix: Capacity matrix to use instead of querying the API
 
     Returns:
         Dictionary mapping location to list of available instance types
         Example: {"FIN-02": ["1H100.80S.30V", "1H100.80S.32V"], "ICE-01": ["1H100.80S.32V"]}
     """
-    try:
-        cmd = [CAPACITY_CHECKER, "--json"]
-        if on_demand:
-            cmd.append("--on-demand")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-
-        if result.returncode != 0:
-            return {}
-
-        data = json.loads(result.stdout)
-
-        # Convert from list of dicts to location -> instance types mapping
-        capacity_map = {}
-        for location_data in data:
-            location = location_data.get("location")
-            instances = location_data.get("instances", [])
-            if location and instances:
-                capacity_map[location] = instances
-
-        return capacity_map
-
-    except (subprocess.SubprocessError, json.JSONDecodeError, FileNotFoundError):
+    if matrix is None:
+        matrix = get_capacity_matrix()
+    if matrix is None:
         return {}
+    return matrix.by_location(on_demand)
 
 
 def check_instance_availability(
@@ -140,34 +116,22 @@ def check_instance_availability(
     return None
 
 
-def check_instance_on_demand(instance_type: str) -> Optional[str]:
+def check_instance_on_demand(
+    instance_type: str, matrix: Optional[CapacityMatrix]
+) -> Optional[str]:
     """
     Check if a specific instance type is available for on-demand deployment.
 
     Args:
         instance_type: The instance type to check (e.g., "1A100.40S.22V")
+        matrix: Capacity matrix of all locations
 
     Returns:
         The location where the instance can be deployed, or None if not available
     """
-    try:
-        result = subprocess.run(
-            [
-                CAPACITY_CHECKER,
-                "--instance-type",
-                instance_type,
-                "--on-demand",
-                "--pick-first",
-            ],
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip()
-    except (subprocess.SubprocessError, FileNotFoundError):
-        pass
-    return None
+    if matrix is None:
+        return None
+    return matrix.first_location(instance_type, on_demand=True)
 
 
 def select_instance_from_tiers(
@@ -200,8 +164,11 @@ def select_instance_from_tiers(
             )
         return None
 
-    # Get all available spot capacity across all regions once
-    capacity_map = get_all_available_capacity(on_demand)
+    # Get spot and on-demand capacity across all regions once
+    matrix = get_capacity_matrix()
+    if matrix is None and verbose:
+        print("Error: could not query DataCrunch availability", file=sys.stderr)
+    capacity_map = get_all_available_capacity(on_demand, matrix) if matrix else {}
 
     if verbose and capacity_map:
         print("Available capacity across all regions:", file=sys.stderr)
@@ -256,7 +223,7 @@ def select_instance_from_tiers(
             if (
                 not on_demand
             ):  # Only check on-demand if not already explicitly checking it
-                location = check_instance_on_demand(instance_type)
+                location = check_instance_on_demand(instance_type, matrix)
                 if location:
                     if verbose:
                         print(f"✓ AVAILABLE (on-demand) in {location}", file=sys.stderr)
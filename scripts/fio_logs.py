@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Time series analysis of fio interval logs.
+
+The fio graphing scripts only read the end of run summary JSON, while fio
+also writes per interval logs with --write_bw_log, --write_iops_log,
+--write_lat_log and --write_hist_log:
+
+    <prefix>_bw.<job>.log           time (ms), KiB/s, ddir, bs, offset[, prio]
+    <prefix>_iops.<job>.log         time (ms), I/Os, ddir, bs, offset[, prio]
+    <prefix>_{lat,slat,clat}.<job>.log  time (ms), latency (ns), ddir, ...
+    <prefix>_clat_hist.<job>.log    time (ms), ddir, bs, latency bin counts...
+
+A multi-hour run at a fine interval gives logs far larger than what
+pandas should hold in memory, so logs are memory mapped and parsed a
+chunk at a time, and every chunk is immediately reduced into a fixed
+number of time bins:
+
+- bw and iops logs into the mean of each bin, summed over the jobs
+- latency logs and histogram logs into a (time, latency) heatmap with
+  logarithmic latency bins, from which percentiles over time are derived
+
+The reduced series are used to find steady state windows, windows in
+which the range and the least squares slope of the values are within a
+percentage of their mean (the SNIA PTS criteria), and to plot bandwidth
+and IOPS over time and latency heatmaps.
+
+    ./scripts/fio_logs.py workflows/fio-tests/results/<host>/... -o graphs
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bytes of a log parsed at once
+CHUNK_BYTES = 16 << 20
+# Time bins of the reduced series
+DEFAULT_MAX_POINTS = 2000
+# Steady state window: at least 60s, at least 1/20 of the run by default
+MIN_STEADY_WINDOW = 60
+STEADY_WINDOW_FRACTION = 20
+MIN_WINDOW_POINTS = 5
+# SNIA PTS steady state criteria, in percent of the window mean
+DEFAULT_MAX_RANGE_PCT = 20.0
+DEFAULT_MAX_SLOPE_PCT = 10.0
+# Latency bins of the heatmaps: 100ns to 100s, 10 bins per decade
+LATENCY_EDGES_NS = np.logspace(2, 11, 91)
+HEATMAP_PERCENTILES = (50, 99, 99.9)
+
+DDIR_NAMES = ("read", "write", "trim")
+RATE_KINDS = ("bw", "iops")
+LATENCY_KINDS = ("lat", "slat", "clat", "clat_hist")
+KIND_UNITS = {"bw": "KiB/s", "iops": "IOPS"}
+
+# fio latency histograms: FIO_IO_U_PLAT_BITS and the bin counts of fio 3
+# (29 groups) and older releases (19 groups), before --log_hist_coarseness
+PLAT_BITS = 6
+PLAT_NR = (29 << PLAT_BITS, 19 << PLAT_BITS)
+# Columns before the bins of a histogram log: time, ddir and bs, and the
+# offset and priority of newer fio releases
+HIST_LEADING_COLUMNS = range(3, 6)
+
+LOG_RE = re.compile(
+    r"^(?P<prefix>.+)_(?P<kind>clat_hist|bw|iops|slat|clat|lat)"
+    r"(?:\.(?P<job>\d+))?\.log$"
+)
+
+
+def parse_log_name(path) -> Optional[Dict[str, str]]:
+    """The prefix, kind and job of a fio log file name, None for other files."""
+    match = LOG_RE.match(Path(path).name)
+    return match.groupdict() if match else None
+
+
+def _parse(data: bytes, columns: int, line: int = 1) -> np.ndarray:
+    """
+    The complete lines of data, the first one being line of the log, as a
+    (rows, columns) array. Raises ValueError for a line with a different
+    number of columns or a value which is not a number.
+    """
+    # A log still being written may end with a partial line
+    data = data[: data.rfind(b"\n") + 1]
+    if not data:
+        return np.zeros((0, columns))
+    raw = np.frombuffer(data, dtype=np.uint8)
+    commas = np.cumsum(raw == ord(","))[raw == ord("\n")]
+    widths = np.diff(commas, prepend=0) + 1
+    bad = np.flatnonzero(widths != columns)
+    if len(bad):
+        raise ValueError(
+            f"line {line + bad[0]} has {widths[bad[0]]} columns instead of {columns}"
+        )
+    values = np.fromstring(data[:-1].replace(b"\n", b","), sep=",")
+    if len(values) != len(widths) * columns:
+        raise ValueError(f"lines {line} to {line + len(widths) - 1} hold non numbers")
+    return values.reshape(len(widths), columns)
+
+
+def read_chunks(path, chunk_bytes: int = CHUNK_BYTES) -> Iterator[np.ndarray]:
+    """
+    Yield the rows of a fio log as (rows, columns) float arrays, parsing
+    about chunk_bytes of the file at a time. Raises ValueError when the
+    lines of the log do not all have the number of columns of the first.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = mm.find(b"\n")
+            columns = mm[: first if first >= 0 else size].count(b",") + 1
+            start = 0
+            line = 1
+            while start < size:
+                end = min(start + chunk_bytes, size)
+                if end < size:
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline < 0:
+                        newline = mm.find(b"\n", end)
+                    end = size if newline < 0 else newline + 1
+                try:
+                    rows = _parse(mm[start:end], columns, line)
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+                start = end
+                line += len(rows)
+                if len(rows):
+                    yield rows
+
+
+def log_span(path) -> Dict[str, float]:
+    """
+    The time of the last entry of a log and the logging interval, both in
+    ms, without reading the whole log.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return {"end_ms": 0.0, "interval_ms": 0.0}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            last = mm.rfind(b"\n", 0, size - 1) + 1
+            end_ms = float(mm[last:size].split(b",", 1)[0] or 0)
+            head = mm[: min(size, 1 << 16)]
+    times = [float(line.split(b",", 1)[0]) for line in head.splitlines()[:-1]]
+    steps = np.diff(np.unique(times))
+    return {
+        "end_ms": end_ms,
+        "interval_ms": float(np.median(steps)) if len(steps) else 0.0,
+    }
+
+
+def bin_width(paths: Sequence, max_points: int = DEFAULT_MAX_POINTS) -> int:
+    """
+    Width of the time bins in ms reducing the logs to at most max_points
+    bins, never finer than the logging interval.
+    """
+    spans = [log_span(p) for p in paths]
+    end = max((s["end_ms"] for s in spans), default=0)
+    interval = max((s["interval_ms"] for s in spans), default=0)
+    return max(1, int(math.ceil(max(end / max_points, interval))))
+
+
+class Series:
+    """
+    A bw, iops or latency log reduced into time bins: values[ddir] is the
+    mean of each bin, NaN for bins without samples.
+    """
+
+    def __init__(self, kind: str, bin_ms: int, values: Dict[str, np.ndarray]):
+        self.kind = kind
+        self.bin_ms = bin_ms
+        self.values = values
+
+    @property
+    def times(self) -> np.ndarray:
+        """Center of each bin in seconds."""
+        nbins = max((len(v) for v in self.values.values()), default=0)
+        return (np.arange(nbins) + 0.5) * self.bin_ms / 1000
+
+
+def _bin_sums(rows, ddir_col, value_col, bin_ms, nbins):
+    rows = rows[rows[:, ddir_col] < len(DDIR_NAMES)]
+    bins = np.minimum((rows[:, 0] // bin_ms).astype(np.int64), nbins - 1)
+    flat = rows[:, ddir_col].astype(np.int64) * nbins + bins
+    size = len(DDIR_NAMES) * nbins
+    count = np.bincount(flat, minlength=size)
+    total = np.bincount(flat, weights=rows[:, value_col], minlength=size)
+    return count.reshape(-1, nbins), total.reshape(-1, nbins)
+
+
+def load_series(
+    paths: Sequence, kind: str, bin_ms: int, chunk_bytes: int = CHUNK_BYTES
+) -> Series:
+    """
+    Reduce the logs of the jobs of one bw, iops or latency log into time
+    bins of bin_ms. Bandwidth and IOPS are summed over the jobs, latencies
+    averaged over all samples.
+    """
+    end = max(log_span(p)["end_ms"] for p in paths)
+    nbins = int(end // bin_ms) + 1
+    shape = (len(DDIR_NAMES), nbins)
+    count = np.zeros(shape)
+    total = np.zeros(shape)
+    for path in paths:
+        job_count = np.zeros(shape)
+        job_total = np.zeros(shape)
+        for rows in read_chunks(path, chunk_bytes):
+            c, t = _bin_sums(rows, 2, 1, bin_ms, nbins)
+            job_count += c
+            job_total += t
+        if kind in RATE_KINDS:
+            # Sum of the mean of each job
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = job_total / job_count
+            total += np.nan_to_num(mean)
+            count = np.maximum(count, job_count > 0)
+        else:
+            total += job_total
+            count += job_count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+    values = {name: mean[d] for d, name in enumerate(DDIR_NAMES) if count[d].any()}
+    return Series(kind, bin_ms, values)
+
+
+def _plat_stride(bins: int) -> Optional[int]:
+    """fio histogram bins per log bin, None if no fio histogram has bins."""
+    for plat_nr in PLAT_NR:
+        stride = plat_nr // bins if bins > 0 else 0
+        if stride and plat_nr % bins == 0 and stride & (stride - 1) == 0:
+            return stride
+    return None
+
+
+def hist_bins(columns: int) -> int:
+    """The number of latency bins of a histogram log with columns columns."""
+    for leading in HIST_LEADING_COLUMNS:
+        if _plat_stride(columns - leading):
+            return columns - leading
+    raise ValueError(f"Unknown fio histogram log with {columns} columns")
+
+
+def plat_values(bins: int) -> np.ndarray:
+    """
+    Latency in ns at the middle of each bin of a fio histogram log with
+    the given number of bins.
+    """
+    stride = _plat_stride(bins)
+    if not stride:
+        raise ValueError(f"Unknown fio histogram with {bins} bins")
+    idx = np.arange(bins) * stride + stride // 2
+    error_bits = np.maximum((idx >> PLAT_BITS) - 1, 0)
+    base = np.left_shift(1, error_bits + PLAT_BITS)
+    k = idx % (1 << PLAT_BITS)
+    values = base + (k + 0.5) * np.left_shift(1, error_bits)
+    return np.where(idx < (2 << PLAT_BITS), idx, values).astype(np.float64)
+
+
+class Heatmap:
+    """
+    Latency samples of a log counted per time bin and latency bin:
+    counts[ddir] is a (time bins, latency bins) matrix over latency_edges
+    in ns.
+    """
+
+    def __init__(self, kind: str, bin_ms: int, counts: Dict[str, np.ndarray]):
+        self.kind = kind
+        self.bin_ms = bin_ms
+        self.counts = counts
+        self.latency_edges = LATENCY_EDGES_NS
+
+    @property
+    def time_edges(self) -> np.ndarray:
+        nbins = max((len(c) for c in self.counts.values()), default=0)
+        return np.arange(nbins + 1) * self.bin_ms / 1000
+
+    def percentiles(
+        self, ddir: str, pcts: Sequence[float] = HEATMAP_PERCENTILES
+    ) -> np.ndarray:
+        """
+        Latency in ns at each percentile for each time bin, (time bins,
+        percentiles), the upper edge of the latency bin holding it.
+        """
+        counts = self.counts[ddir]
+        cumulative = np.cumsum(counts, axis=1)
+        total = cumulative[:, -1:]
+        out = np.full((len(counts), len(pcts)), np.nan)
+        for i, pct in enumerate(pcts):
+            idx = (cumulative < total * pct / 100).sum(axis=1)
+            idx = np.minimum(idx, counts.shape[1] - 1)
+            out[:, i] = np.where(total[:, 0] > 0, self.latency_edges[idx + 1], np.nan)
+        return out
+
+
+def load_heatmap(
+    paths: Sequence, kind: str, bin_ms: int, chunk_bytes: int = CHUNK_BYTES
+) -> Heatmap:
+    """
+    Reduce the latency or histogram logs of the jobs of one log into a
+    heatmap with time bins of bin_ms.
+    """
+    edges = LATENCY_EDGES_NS
+    nlat = len(edges) - 1
+    end = max(log_span(p)["end_ms"] for p in paths)
+    nbins = int(end // bin_ms) + 1
+    counts = np.zeros((len(DDIR_NAMES), nbins, nlat))
+    for path in paths:
+        to_latency_bins = None
+        ddir_col = 1 if kind == "clat_hist" else 2
+        for rows in read_chunks(path, chunk_bytes):
+            rows = rows[rows[:, ddir_col] < len(DDIR_NAMES)]
+            bins = np.minimum((rows[:, 0] // bin_ms).astype(np.int64), nbins - 1)
+            ddirs = rows[:, ddir_col].astype(np.int64)
+            if kind == "clat_hist":
+                if to_latency_bins is None:
+                    plat = hist_bins(rows.shape[1])
+                    lat = np.clip(
+                        np.digitize(plat_values(plat), edges) - 1, 0, nlat - 1
+                    )
+                    to_latency_bins = np.zeros((len(lat), nlat))
+                    to_latency_bins[np.arange(len(lat)), lat] = 1
+                np.add.at(counts, (ddirs, bins), rows[:, -plat:] @ to_latency_bins)
+            else:
+                lat = np.clip(np.digitize(rows[:, 1], edges) - 1, 0, nlat - 1)
+                flat = (ddirs * nbins + bins) * nlat + lat
+                counts += np.bincount(flat, minlength=counts.size).reshape(counts.shape)
+    return Heatmap(
+        kind,
+        bin_ms,
+        {name: counts[d] for d, name in enumerate(DDIR_NAMES) if counts[d].any()},
+    )
+
+
+def steady_windows(
+    values: np.ndarray,
+    window: int,
+    max_range_pct: float = DEFAULT_MAX_RANGE_PCT,
+    max_slope_pct: float = DEFAULT_MAX_SLOPE_PCT,
+) -> np.ndarray:
+    """
+    Whether the window of window points starting at each point is steady:
+    the range of its values is within max_range_pct of their mean and the
+    excursion of their least squares line over the window is within
+    max_slope_pct of the mean. Windows with missing values are not steady.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window < 2 or len(values) < window:
+        return np.zeros(0, dtype=bool)
+    view = sliding_window_view(values, window)
+    mean = view.mean(axis=1)
+    spread = view.max(axis=1) - view.min(axis=1)
+    x = np.arange(window) - (window - 1) / 2
+    excursion = np.abs(view @ x / (x @ x)) * (window - 1)
+    with np.errstate(invalid="ignore"):
+        return (
+            (spread <= np.abs(mean) * max_range_pct / 100)
+            & (excursion <= np.abs(mean) * max_slope_pct / 100)
+            & (mean != 0)
+        )
+
+
+def steady_state(
+    times: np.ndarray,
+    values: np.ndarray,
+    window: int,
+    max_range_pct: float = DEFAULT_MAX_RANGE_PCT,
+    max_slope_pct: float = DEFAULT_MAX_SLOPE_PCT,
+) -> Dict:
+    """
+    Steady state of a series: the first steady window and all the spans
+    covered by steady windows, in the units of times.
+    """
+    steady = steady_windows(values, window, max_range_pct, max_slope_pct)
+    result = {"window_points": window, "first": None, "spans": []}
+    if not steady.any():
+        return result
+    step = times[1] - times[0] if len(times) > 1 else 0
+    starts = np.flatnonzero(steady)
+    first = starts[0]
+    view = values[first : first + window]
+    result["first"] = {
+        "start": round(float(times[first] - step / 2), 3),
+        "end": round(float(times[first + window - 1] + step / 2), 3),
+        "mean": float(view.mean()),
+        "range_pct": float((view.max() - view.min()) / abs(view.mean()) * 100),
+    }
+    # Consecutive steady windows form one span
+    breaks = np.flatnonzero(np.diff(starts) > 1)
+    for lo, hi in zip(
+        np.concatenate([[0], breaks + 1]), np.concatenate([breaks, [len(starts) - 1]])
+    ):
+        result["spans"].append(
+            [
+                round(float(times[starts[lo]] - step / 2), 3),
+                round(float(times[starts[hi] + window - 1] + step / 2), 3),
+            ]
+        )
+    return result
+
+
+def plot_series(series: Series, output: str, steady: Dict[str, Dict], title: str):
+    """Plot each direction of a series over time, shading the steady spans."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(16, 6))
+    times = series.times
+    for ddir, values in series.values.items():
+        (line,) = ax.plot(times[: len(values)], values, linewidth=1, label=ddir)
+        for start, end in steady.get(ddir, {}).get("spans", []):
+            ax.axvspan(start, end, color=line.get_color(), alpha=0.1)
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel(KIND_UNITS.get(series.kind, "Latency (ns)"))
+    ax.set_title(f"{title} (steady state shaded)")
+    ax.set_ylim(bottom=0)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(output, dpi=150)
+    plt.close(fig)
+
+
+def plot_heatmap(heatmap: Heatmap, output: str, title: str):
+    """Plot the latency heatmap of each direction with its percentiles."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    ddirs = list(heatmap.counts)
+    fig, axes = plt.subplots(len(ddirs), 1, figsize=(16, 5 * len(ddirs)), squeeze=False)
+    times = heatmap.time_edges
+    lat_us = heatmap.latency_edges / 1000
+    for ax, ddir in zip(axes[:, 0], ddirs):
+        counts = heatmap.counts[ddir]
+        rows = np.flatnonzero(counts.sum(axis=0))
+        lo, hi = rows[0], rows[-1] + 2
+        mesh = ax.pcolormesh(
+            times,
+            lat_us[lo:hi],
+            np.ma.masked_equal(counts[:, lo : hi - 1].T, 0),
+            norm=LogNorm(),
+            cmap="viridis",
+            shading="flat",
+        )
+        fig.colorbar(mesh, ax=ax, label="I/Os")
+        centers = (times[:-1] + times[1:]) / 2
+        pcts = heatmap.percentiles(ddir) / 1000
+        for i, pct in enumerate(HEATMAP_PERCENTILES):
+            ax.plot(centers, pcts[:, i], linewidth=1, label=f"p{pct:g}")
+        ax.set_yscale("log")
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Latency (us)")
+        ax.set_title(f"{title} {ddir}")
+        ax.legend(loc="upper right")
+    plt.tight_layout()
+    plt.savefig(output, dpi=150)
+    plt.close(fig)
+
+
+def find_logs(paths: Sequence) -> Dict[tuple, List[Path]]:
+    """
+    The fio logs of the given files and directories grouped by (prefix,
+    kind), each group holding the logs of all jobs.
+    """
+    groups: Dict[tuple, List[Path]] = {}
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.log")) if path.is_dir() else [path]
+        for f in files:
+            info = parse_log_name(f)
+            if info and f.stat().st_size:
+                groups.setdefault((info["prefix"], info["kind"]), []).append(f)
+    return groups
+
+
+def analyze(
+    paths: Sequence,
+    output_dir: Optional[str] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    steady_window: Optional[float] = None,
+    max_range_pct: float = DEFAULT_MAX_RANGE_PCT,
+    max_slope_pct: float = DEFAULT_MAX_SLOPE_PCT,
+) -> Dict[str, Dict]:
+    """
+    Reduce all logs found in paths, find the steady state of the bw and
+    iops logs and, with an output_dir, plot them. Returns the summary of
+    each log keyed by <prefix>_<kind>.
+    """
+    summary = {}
+    for (prefix, kind), files in sorted(find_logs(paths).items()):
+        name = f"{Path(prefix).name}_{kind}"
+        bin_ms = bin_width(files, max_points)
+        entry = {"kind": kind, "jobs": len(files), "bin_ms": bin_ms}
+        if kind in RATE_KINDS:
+            series = load_series(files, kind, bin_ms)
+            entry["duration_s"] = float(len(series.times) * bin_ms / 1000)
+            window_s = steady_window or max(
+                MIN_STEADY_WINDOW, entry["duration_s"] / STEADY_WINDOW_FRACTION
+            )
+            window = max(MIN_WINDOW_POINTS, int(round(window_s * 1000 / bin_ms)))
+            steady = {}
+            for ddir, values in series.values.items():
+                steady[ddir] = steady_state(
+                    series.times, values, window, max_range_pct, max_slope_pct
+                )
+                entry[ddir] = {
+                    "mean": float(np.nanmean(values)),
+                    "min": float(np.nanmin(values)),
+                    "max": float(np.nanmax(values)),
+                    "steady_state": steady[ddir],
+                }
+            if output_dir:
+                plot_series(
+                    series, os.path.join(output_dir, f"{name}.png"), steady, name
+                )
+        else:
+            heatmap = load_heatmap(files, kind, bin_ms)
+            entry["duration_s"] = float(heatmap.time_edges[-1])
+            for ddir, counts in heatmap.counts.items():
+                total = counts.sum(axis=0, keepdims=True)
+                overall = Heatmap(kind, bin_ms, {ddir: total}).percentiles(ddir)[0]
+                entry[ddir] = {
+                    "samples": int(total.sum()),
+                    "percentiles_us": {
+                        f"p{pct:g}": float(value / 1000)
+                        for pct, value in zip(HEATMAP_PERCENTILES, overall)
+                    },
+                }
+            if output_dir and heatmap.counts:
+                plot_heatmap(
+                    heatmap, os.path.join(output_dir, f"{name}_heatmap.png"), name
+                )
+        summary[name] = entry
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze fio bw, iops, latency and histogram interval logs"
+    )
+    parser.add_argument("paths", nargs="+", help="fio log files or directories")
+    parser.add_argument(
+        "-o", "--output-dir", help="Write graphs and fio_logs_summary.json here"
+    )
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        default=DEFAULT_MAX_POINTS,
+        help=f"Time bins per log (default: {DEFAULT_MAX_POINTS})",
+    )
+    parser.add_argument(
+        "--steady-window",
+        type=float,
+        help=f"Steady state window in seconds (default: 1/{STEADY_WINDOW_FRACTION} "
+        f"of the run, at least {MIN_STEADY_WINDOW}s)",
+    )
+    parser.add_argument(
+        "--max-range-pct",
+        type=float,
+        default=DEFAULT_MAX_RANGE_PCT,
+        help="Maximum range in a steady window, percent of its mean",
+    )
+    parser.add_argument(
+        "--max-slope-pct",
+        type=float,
+        default=DEFAULT_MAX_SLOPE_PCT,
+        help="Maximum slope excursion in a steady window, percent of its mean",
+    )
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    try:
+        summary = analyze(
+            args.paths,
+            args.output_dir,
+            args.max_points,
+            args.steady_window,
+            args.max_range_pct,
+            args.max_slope_pct,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not summary:
+        print("No fio logs found", file=sys.stderr)
+        return 1
+
+    for name, entry in summary.items():
+        for ddir in DDIR_NAMES:
+            stats = entry.get(ddir)
+            if not stats:
+                continue
+            if "steady_state" in stats:
+                first = stats["steady_state"]["first"]
+                steady = (
+                    f"steady from {first['start']:.0f}s at {first['mean']:.0f}"
+                    if first
+                    else "never steady"
+                )
+                print(f"{name} {ddir}: mean {stats['mean']:.0f}, {steady}")
+            else:
+                pcts = ", ".join(
+                    f"{k} {v:.1f}us" for k, v in stats["percentiles_us"].items()
+                )
+                print(f"{name} {ddir}: {pcts}")
+
+    if args.output_dir:
+        path = os.path.join(args.output_dir, "fio_logs_summary.json")
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Graphs and summary saved to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,7 @@ from datacrunch_api import (
     list_instance_types,
     list_images,
     list_locations,
+    prefetch_catalog,
 )
 
 
@@ -307,6 +308,21 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    # Fetch everything the generators need in one round of requests
+    endpoints = {
+        "instances": "/instance-types",
+        "images": "/images",
+        "locations": "/locations",
+    }
+    if api_key:
+        prefetch_catalog(
+            [
+                endpoint
+                for kind, endpoint in endpoints.items()
+                if args.type in ["all", kind]
+            ]
+        )
+
     if args.type in ["all", "instances"]:
         print("Generating instance types Kconfig...")
         kconfig = generate_instance_types_kconfig()
@@ -12,27 +12,19 @@ import urllib.error
 import urllib.request
 import socket
 import re
-from typing import List, Union, Dict
+import string
+import functools
+import glob
+import hashlib
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union, Dict, Optional
 
-
-def popen(
-    cmd: list[str], environ: dict[str, str] = {}, comm: bool = True
-) -> dict[str, object]:
-    try:
-        logging.debug(f"{' '.join(cmd)}")
-        p = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environ
-        )
-        if comm:
-            stdout, stderr = p.communicate()
-            if stdout:
-                logging.debug(stdout.decode("utf-8"))
-            if stderr:
-                logging.debug(stderr.decode("utf-8"))
-            logging.debug(f"Return code: {p.returncode}")
-        return {"process": p, "stdout": stdout.decode("utf-8")}
-    except subprocess.CalledProcessError as exc:
-        sys.exit(exc.returncode)
+LS_REMOTE_TIMEOUT = 120
+CACHE_TTL = 3600
+MIRROR_DIR = "/mirror"
+RELEASES_URL = "https://www.kernel.org/releases.json"
+DEFAULT_PORTS = {"http": 80, "https": 443, "git": 9418, "ssh": 22}
 
 
 def parser():
@@ -41,7 +33,6 @@ def parser():
     parser.add_argument(
         "--output",
         help="output file",
-        required=True,
     )
     parser.add_argument(
         "--force", action="store_true", help="always generate output file"
@@ -49,7 +40,6 @@ def parser():
     parser.add_argument(
         "--prefix",
         help="the Kconfig CONFIG prefix to use (e.g. BOOTLINUX_TREE_LINUS)",
-        required=True,
     )
     parser.add_argument(
         "--extra",
@@ -101,6 +91,69 @@ def parser():
         help="project version for User-Agent request",
         required=True,
     )
+    batch = subparsers.add_parser(
+        "batch", help="generate the Kconfig files of all trees of a manifest"
+    )
+    batch.add_argument(
+        "--manifest",
+        help="yaml manifest of the trees, static refs are read from static/ next to it",
+        required=True,
+    )
+    batch.add_argument(
+        "--output-dir",
+        help="directory of the generated Kconfig.<tree> files",
+        required=True,
+    )
+    batch.add_argument(
+        "--refs",
+        type=int,
+        default=0,
+        help="number of references, 0 to only use the static references",
+    )
+    batch.add_argument(
+        "--tree",
+        action="append",
+        help="only generate this tree, can be repeated",
+    )
+    batch.add_argument(
+        "--kreleases",
+        action="store_true",
+        help="use kernel.org/releases.json for the trees with a moniker",
+    )
+    batch.add_argument(
+        "--pname",
+        help="project name for User-Agent request",
+    )
+    batch.add_argument(
+        "--pversion",
+        help="project version for User-Agent request",
+    )
+    batch.add_argument(
+        "--mirror-dir",
+        default=MIRROR_DIR,
+        help="linux-mirror clones to query instead of the upstream repositories",
+    )
+    batch.add_argument(
+        "--cache-dir",
+        default=os.path.join(
+            os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+            "kdevops",
+            "refs",
+        ),
+        help="cache of the upstream references",
+    )
+    batch.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=CACHE_TTL,
+        help="seconds the cached references are valid, 0 disables the cache",
+    )
+    batch.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="number of repositories queried concurrently",
+    )
     return parser
 
 
@@ -230,33 +283,129 @@ def ref_generator(args, reflist, extraconfs) -> None:
             f.write("\nendif # !HAVE_{}_USER_REFS\n".format(args.prefix))
 
 
-def remote(args) -> List:
-    heads = popen(
-        [
-            "git",
-            "-c",
-            "versionsort.suffix=-",
-            "ls-remote",
-            "--sort=-version:refname",
-            "--heads",
-            args.repo,
-            args.filter_heads,
-        ]
-    )
-    tags = popen(
-        [
-            "git",
-            "-c",
-            "versionsort.suffix=-",
-            "ls-remote",
-            "--sort=-version:refname",
-            "--tags",
-            args.repo,
-            args.filter_tags,
-        ]
-    )
+def ls_remote(repo, timeout=LS_REMOTE_TIMEOUT) -> str:
+    """Heads and tags of a repository, newest version first."""
+    cmd = [
+        "git",
+        "-c",
+        "versionsort.suffix=-",
+        "ls-remote",
+        "--sort=-version:refname",
+        "--heads",
+        "--tags",
+        repo,
+    ]
+    logging.debug(" ".join(cmd))
+    try:
+        p = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"git ls-remote {repo} timed out")
+    if p.returncode != 0:
+        raise RuntimeError(f"git ls-remote {repo} failed: {p.stderr.strip()}")
+    return p.stdout
+
+
+_WILDMATCH_CLASSES = {
+    "alnum": "a-zA-Z0-9",
+    "alpha": "a-zA-Z",
+    "blank": " \\t",
+    "cntrl": "\\x00-\\x1f\\x7f",
+    "digit": "0-9",
+    "graph": "!-~",
+    "lower": "a-z",
+    "print": " -~",
+    "punct": re.escape(string.punctuation),
+    "space": " \\t\\n\\r\\f\\v",
+    "upper": "A-Z",
+    "xdigit": "0-9a-fA-F",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _wildmatch_re(pattern):
+    """
+    Regular expression of a git wildmatch() pattern as git-ls-remote
+    matches it: * and ? also match a slash, [!...] and [^...] negate, POSIX
+    [:classes:] and backslash escapes are supported. A pattern with an
+    unterminated bracket matches nothing.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        if c == "\\" and i < len(pattern):
+            out.append(re.escape(pattern[i]))
+            i += 1
+        elif c == "*":
+            out.append(".*")
+        elif c == "?":
+            out.append(".")
+        elif c == "[":
+            negate = i < len(pattern) and pattern[i] in "!^"
+            if negate:
+                i += 1
+            items = []
+            # A ] right after the opening bracket is a member
+            start = i
+            while i < len(pattern) and (pattern[i] != "]" or i == start):
+                if pattern.startswith("[:", i):
+                    end = pattern.find(":]", i + 2)
+                    if end >= 0 and pattern[i + 2 : end] in _WILDMATCH_CLASSES:
+                        items.append(_WILDMATCH_CLASSES[pattern[i + 2 : end]])
+                        i = end + 2
+                        continue
+                if pattern[i] == "\\" and i + 1 < len(pattern):
+                    i += 1
+                first = re.escape(pattern[i])
+                i += 1
+                if pattern.startswith("-", i) and i + 1 < len(pattern):
+                    if pattern[i + 1] != "]":
+                        i += 1
+                        if pattern[i] == "\\" and i + 1 < len(pattern):
+                            i += 1
+                        first += "-" + re.escape(pattern[i])
+                        i += 1
+                items.append(first)
+            if i >= len(pattern):
+                return re.compile("(?!)")
+            i += 1
+            out.append(("[^" if negate else "[") + "".join(items) + "]")
+        else:
+            out.append(re.escape(c))
+    return re.compile("".join(out), re.DOTALL)
+
+
+def _ref_matches(ref, pattern) -> bool:
+    # git-ls-remote patterns match the tail of the ref name, from its start
+    # or from a slash
+    return bool(_wildmatch_re("*/" + pattern).fullmatch("/" + ref))
+
+
+def split_refs(output, filter_heads="*", filter_tags="*") -> List:
+    """
+    Split ls_remote() output into the heads and the tags matching the
+    filters, as two filtered git-ls-remote calls would list them.
+    """
+    heads = []
+    tags = []
+    for line in output.splitlines():
+        ref = line.split("\t")[-1]
+        if ref.startswith("refs/heads/") and _ref_matches(ref, filter_heads):
+            heads.append(line)
+        elif ref.startswith("refs/tags/") and _ref_matches(ref, filter_tags):
+            tags.append(line)
+    return ["\n".join(heads), "\n".join(tags)]
 
-    return [heads["stdout"], tags["stdout"]]
+
+def remote(args) -> List:
+    return split_refs(ls_remote(args.repo), args.filter_heads, args.filter_tags)
 
 
 def gitref_getreflist(args, reflist, extraconfs):
@@ -303,7 +452,11 @@ def gitref(args) -> None:
     extraconfs = _get_extraconfs(args)
     if _check_connection("git.kernel.org", 80):
         reflist = []
-        refstr = remote(args)
+        try:
+            refstr = remote(args)
+        except RuntimeError as e:
+            logging.warning(e)
+            return
         for rl in refstr:
             _refs = gitref_getreflist(args, rl, extraconfs)
             for r in _refs:
@@ -311,37 +464,221 @@ def gitref(args) -> None:
         ref_generator(args, reflist, extraconfs)
 
 
+def fetch_releases(pname, pversion) -> Dict:
+    req = urllib.request.Request(
+        RELEASES_URL,
+        headers={"User-Agent": f"{pname}/{pversion} (kdevops@lists.linux.dev)"},
+    )
+    with urllib.request.urlopen(req, timeout=30) as url:
+        return json.load(url)
+
+
+def kreleases_getreflist(data, moniker) -> List[str]:
+    reflist = []
+    for release in data["releases"]:
+        if release["moniker"] == moniker:
+            # Check if release.json is aa.bb.cc type
+            if re.compile(r"^\d+\.\d+(\.\d+|-rc\d+)?$").match(release["version"]):
+                reflist.append("v" + release["version"])
+            else:
+                reflist.append(release["version"])
+    return reflist
+
+
 def kreleases(args) -> None:
     """Get the latest kernel releases from kernel.org/releases.json"""
 
     reflist = []
     if _check_connection("kernel.org", 80):
-        _url = "https://www.kernel.org/releases.json"
-        req = urllib.request.Request(
-            _url,
-            headers={
-                "User-Agent": f"{args.pname}/{args.pversion} (kdevops@lists.linux.dev)"
-            },
-        )
         try:
-            with urllib.request.urlopen(req) as url:
-                data = json.load(url)
-
-                for release in data["releases"]:
-                    if release["moniker"] == args.moniker:
-                        # Check if release.json is aa.bb.cc type
-                        if re.compile(r"^\d+\.\d+(\.\d+|-rc\d+)?$").match(
-                            release["version"]
-                        ):
-                            reflist.append("v" + release["version"])
-                        else:
-                            reflist.append(release["version"])
+            data = fetch_releases(args.pname, args.pversion)
+            reflist = kreleases_getreflist(data, args.moniker)
         except urllib.error.URLError as e:
-            logging.warning(f"Failed to fetch {_url}: {e}")
+            logging.warning(f"Failed to fetch {RELEASES_URL}: {e}")
 
     ref_generator(args, reflist, _get_extraconfs(args))
 
 
+def _cache_file(cache_dir, key) -> str:
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def cache_get(cache_dir, ttl, key):
+    """Cached data of key if younger than ttl seconds, None otherwise."""
+    if ttl <= 0:
+        return None
+    try:
+        with open(_cache_file(cache_dir, key)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("key") != key or time.time() - entry.get("time", 0) > ttl:
+        return None
+    logging.debug(f"Using cached {key}")
+    return entry["data"]
+
+
+def cache_put(cache_dir, ttl, key, data) -> None:
+    if ttl <= 0:
+        return
+    path = _cache_file(cache_dir, key)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"key": key, "time": time.time(), "data": data}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f"Could not cache {key} in {cache_dir}: {e}")
+
+
+def _normalize_url(url) -> str:
+    url = url.rstrip("/")
+    return url[: -len(".git")] if url.endswith(".git") else url
+
+
+def find_mirrors(mirror_dir) -> Dict[str, str]:
+    """Upstream URL of each linux-mirror clone under mirror_dir to its path."""
+    mirrors: Dict[str, str] = {}
+    if not mirror_dir or not os.path.isdir(mirror_dir):
+        return mirrors
+    configs = glob.glob(os.path.join(mirror_dir, "*.git", "config"))
+    configs += glob.glob(os.path.join(mirror_dir, "*", "*.git", "config"))
+    for config in configs:
+        p = subprocess.run(
+            ["git", "config", "--file", config, "--get", "remote.origin.url"],
+            capture_output=True,
+            text=True,
+        )
+        if p.returncode == 0 and p.stdout.strip():
+            mirrors[_normalize_url(p.stdout.strip())] = os.path.dirname(config)
+    return mirrors
+
+
+@functools.lru_cache(maxsize=None)
+def _host_reachable(host, port) -> bool:
+    return _check_connection(host, port)
+
+
+def _reachable(repo) -> bool:
+    url = urllib.parse.urlparse(repo)
+    if not url.hostname:
+        # local path or file:// URL
+        return True
+    return _host_reachable(url.hostname, url.port or DEFAULT_PORTS.get(url.scheme, 80))
+
+
+def query_remote(args, repo, mirrors) -> str:
+    """
+    ls_remote() of a repository through its linux-mirror clone when there
+    is one, otherwise through the cache.
+    """
+    mirror = mirrors.get(_normalize_url(repo))
+    if mirror:
+        try:
+            return ls_remote(mirror)
+        except RuntimeError as e:
+            logging.warning(f"{e}, using {repo}")
+    output = cache_get(args.cache_dir, args.cache_ttl, repo)
+    if output is not None:
+        return output
+    if not _reachable(repo):
+        raise RuntimeError(f"{repo} is not reachable")
+    output = ls_remote(repo)
+    cache_put(args.cache_dir, args.cache_ttl, repo, output)
+    return output
+
+
+def query_releases(args) -> Optional[Dict]:
+    data = cache_get(args.cache_dir, args.cache_ttl, RELEASES_URL)
+    if data is not None:
+        return data
+    if not _check_connection("kernel.org", 80):
+        return None
+    try:
+        data = fetch_releases(args.pname, args.pversion)
+    except urllib.error.URLError as e:
+        logging.warning(f"Failed to fetch {RELEASES_URL}: {e}")
+        return None
+    cache_put(args.cache_dir, args.cache_ttl, RELEASES_URL, data)
+    return data
+
+
+def _batch_jobs(args) -> List[argparse.Namespace]:
+    """The gitref or kreleases arguments of each tree of the manifest to generate."""
+    with open(args.manifest, mode="rt") as f:
+        trees = yaml.safe_load(f)["trees"]
+    if args.tree:
+        unknown = set(args.tree) - {tree["name"] for tree in trees}
+        if unknown:
+            raise ValueError(f"Unknown trees in {args.manifest}: {sorted(unknown)}")
+        trees = [tree for tree in trees if tree["name"] in args.tree]
+
+    static_dir = os.path.join(os.path.dirname(args.manifest), "static")
+    jobs = []
+    for tree in trees:
+        extra = os.path.join(static_dir, "{}.yaml".format(tree["name"]))
+        job = argparse.Namespace(
+            cmd="gitref",
+            prefix=tree["prefix"],
+            output=os.path.join(args.output_dir, "Kconfig.{}".format(tree["name"])),
+            extra=extra if os.path.exists(extra) else None,
+            repo=tree["repo"],
+            filter_heads=tree.get("filter_heads", "*"),
+            filter_tags=tree.get("filter_tags", "*"),
+            refs=args.refs,
+        )
+        if args.kreleases and tree.get("moniker"):
+            # Like the kreleases command, only refresh these once a day
+            if not args.force and not check_file_date(job.output):
+                logging.debug(f"{job.output} already updated")
+                continue
+            job.cmd = "kreleases"
+            job.moniker = tree["moniker"]
+            job.refs = 0
+        jobs.append(job)
+    return jobs
+
+
+def batch(args) -> None:
+    """
+    Generate the Kconfig files of the trees of a manifest. Each repository
+    is queried once with git-ls-remote, all of them concurrently, and
+    trees only using static references are not queried at all.
+    """
+    jobs = _batch_jobs(args)
+    repos = {job.repo for job in jobs if job.cmd == "gitref" and job.refs != 0}
+    mirrors = find_mirrors(args.mirror_dir) if repos else {}
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        releases = None
+        if any(job.cmd == "kreleases" for job in jobs):
+            releases = executor.submit(query_releases, args)
+        futures = {
+            repo: executor.submit(query_remote, args, repo, mirrors) for repo in repos
+        }
+        if releases is not None:
+            releases = releases.result()
+
+    for job in jobs:
+        extraconfs = _get_extraconfs(job)
+        reflist = []
+        if job.cmd == "kreleases" and releases is not None:
+            reflist = kreleases_getreflist(releases, job.moniker)
+        elif job.repo in futures:
+            try:
+                refstr = split_refs(
+                    futures[job.repo].result(), job.filter_heads, job.filter_tags
+                )
+            except RuntimeError as e:
+                # Keep the previous file, as gitref does without a connection
+                logging.warning(e)
+                continue
+            for rl in refstr:
+                reflist.extend(gitref_getreflist(job, rl, extraconfs))
+        ref_generator(job, reflist, extraconfs)
+
+
 def main() -> None:
     """Kconfig choice generator for git refereces"""
     log = logging.getLogger()
@@ -351,11 +688,17 @@ def main() -> None:
     if args.debug:
         log.setLevel(logging.DEBUG)
 
-    if not args.force and not check_file_date(args.output):
-        logging.debug("File already updated")
-        return
-
-    cmd_disp = {"gitref": gitref, "kreleases": kreleases}
+    if args.cmd == "batch":
+        if args.kreleases and not (args.pname and args.pversion):
+            p.error("batch --kreleases requires --pname and --pversion")
+    else:
+        if not args.output or not args.prefix:
+            p.error("--output and --prefix are required")
+        if not args.force and not check_file_date(args.output):
+            logging.debug("File already updated")
+            return
+
+    cmd_disp = {"gitref": gitref, "kreleases": kreleases, "batch": batch}
 
     cmd_disp[args.cmd](args)
 
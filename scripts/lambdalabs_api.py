@@ -8,55 +8,80 @@ Provides low-level API access for Lambda Labs cloud services.
 Used by lambda-cli and other kdevops components.
 """
 
-import json
 import os
 import sys
-import urllib.request
-import urllib.error
 from typing import Dict, List, Optional, Tuple
 
 # Import our credentials module
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from lambdalabs_credentials import get_api_key as get_api_key_from_credentials
+from cloud_catalog import CatalogClient, KCONFIG_CATALOG_TTL
 
 LAMBDALABS_API_BASE = "https://cloud.lambdalabs.com/api/v1"
 
+# Read only endpoints describing what can be provisioned, their responses
+# are shared by all generators and cached on disk.
+CATALOG_ENDPOINTS = ["/images"]
+
+# /instance-types also reports the regions with capacity available right
+# now, its response is shared by all generators but never cached on disk,
+# so stale capacity is never reported.
+LIVE_ENDPOINTS = ["/instance-types"]
+
+_catalog_clients = {}
+
 
 def get_api_key() -> Optional[str]:
     """Get Lambda Labs API key from credentials file or environment variable."""
     return get_api_key_from_credentials()
 
 
-def make_api_request(endpoint: str, api_key: str) -> Optional[Dict]:
-    """Make a request to Lambda Labs API."""
-    url = f"{LAMBDALABS_API_BASE}{endpoint}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "User-Agent": "kdevops/1.0",
-    }
+def get_catalog_client(api_key: str) -> CatalogClient:
+    """Return the process wide API client for api_key."""
+    client = _catalog_clients.get(api_key)
+    if client is None:
+        client = CatalogClient(
+            "lambdalabs",
+            LAMBDALABS_API_BASE,
+            lambda: api_key,
+            catalog_endpoints=CATALOG_ENDPOINTS,
+            live_endpoints=LIVE_ENDPOINTS,
+        )
+        _catalog_clients[api_key] = client
+    return client
 
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}", file=sys.stderr)
-        return None
-    except Exception as e:
-        print(f"Error making API request: {e}", file=sys.stderr)
-        return None
 
+def prefetch_catalog(api_key: str, ttl: int = KCONFIG_CATALOG_TTL) -> None:
+    """
+    Fetch all catalog and live endpoints concurrently, reusing cached
+    catalog responses up to ttl seconds old. Later requests for them are
+    served from memory.
+    """
+    get_catalog_client(api_key).fetch_all(CATALOG_ENDPOINTS + LIVE_ENDPOINTS, ttl=ttl)
 
-def get_instance_types_with_capacity(api_key: str) -> Tuple[Dict, Dict[str, List[str]]]:
+
+def make_api_request(
+    endpoint: str, api_key: str, fresh: bool = False
+) -> Optional[Dict]:
+    """Make a request to Lambda Labs API."""
+    return get_catalog_client(api_key).get(endpoint, fresh=fresh)
+
+
+def get_instance_types_with_capacity(
+    api_key: str, fresh: bool = False
+) -> Tuple[Dict, Dict[str, List[str]]]:
     """
     Get available instance types from Lambda Labs with capacity information.
 
+    Args:
+        fresh: Request the capacity again even if this process already did,
+            to check it right before provisioning
+
     Returns:
         Tuple of (instance_types_data, capacity_map)
         where capacity_map is {instance_type: [list of regions with capacity]}
     """
-    response = make_api_request("/instance-types", api_key)
+    response = make_api_request("/instance-types", api_key, fresh=fresh)
     if not response or "data" not in response:
         return {}, {}
 
@@ -542,6 +567,8 @@ def main():
         )
         api_key = ""  # Will trigger fallback behavior
 
+    prefetch_catalog(api_key)
+
     if command == "instance-types":
         print(generate_instance_types_kconfig(api_key))
     elif command == "regions":
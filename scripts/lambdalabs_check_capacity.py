@@ -39,7 +39,7 @@ def check_availability(instance_type=None, json_output=False, pick_first=False):
         return 1
 
     try:
-        _, capacity_map = get_instance_types_with_capacity(api_key)
+        _, capacity_map = get_instance_types_with_capacity(api_key, fresh=True)
     except Exception as e:
         sys.stderr.write(f"Error: Failed to fetch instance availability: {e}\n")
         return 1
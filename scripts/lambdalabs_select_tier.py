@@ -116,7 +116,7 @@ def get_capacity_map(api_key: str) -> Dict[str, List[str]]:
         Dictionary mapping instance_type to list of available regions
         Example: {"gpu_1x_h100_sxm5": ["us-west-1", "us-east-1"]}
     """
-    _, capacity_map = get_instance_types_with_capacity(api_key)
+    _, capacity_map = get_instance_types_with_capacity(api_key, fresh=True)
     return capacity_map
 
 
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Shared HTML report writer for kdevops workflow reports.
+
+Reports used to inline every PNG as base64 into one HTML string, which
+made reports for large fleets hundreds of megabytes in size, slow to
+build and slow to open. ReportWriter instead:
+
+  - streams the HTML to disk as it is produced
+  - stores every image once in an assets directory next to the report,
+    named after the hash of its content, so identical images are shared
+    and unchanged images are not rewritten on the next run
+  - references downscaled thumbnails with lazy loading from the report,
+    linking to the full size image
+
+For archiving, single_file=True keeps the old behaviour of a single
+self-contained HTML file with the images embedded as data URIs.
+
+Thumbnails need Pillow, which is always installed with matplotlib. The
+full size image is referenced directly when Pillow is not available.
+"""
+
+import base64
+import hashlib
+import html
+import io
+import os
+from pathlib import Path
+
+try:
+    from PIL import Image
+
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+THUMB_WIDTH = 800
+# Image.Quantize.FASTOCTREE, the only method which handles transparency
+FASTOCTREE = 2
+
+
+class ReportWriter:
+    """
+    Write an HTML report incrementally.
+
+    Use as a context manager; the report is written to a temporary file
+    and only renamed into place once complete:
+
+        with ReportWriter(path) as report:
+            report.write("<html>...")
+            report.write(report.img_tag(png_path_or_bytes, alt="chart"))
+    """
+
+    def __init__(
+        self,
+        html_path,
+        single_file=False,
+        assets_dir="assets",
+        thumb_width=THUMB_WIDTH,
+    ):
+        self.html_path = Path(html_path)
+        self.single_file = single_file
+        self.assets_name = assets_dir
+        self.assets_path = self.html_path.parent / assets_dir
+        self.thumb_width = thumb_width
+        self._tmp_path = self.html_path.with_name(f".{self.html_path.name}.tmp")
+        self._f = None
+        # digest -> (full url, thumbnail url)
+        self._images = {}
+
+    def __enter__(self):
+        self.html_path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self._tmp_path, "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        if exc_type is not None:
+            self._tmp_path.unlink(missing_ok=True)
+            return False
+        os.replace(self._tmp_path, self.html_path)
+        if not self.single_file:
+            self.prune_assets()
+        return False
+
+    def write(self, text):
+        self._f.write(text)
+
+    def _store(self, name, data):
+        path = self.assets_path / name
+        if path.exists():
+            return
+        self.assets_path.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _thumbnail(self, data, digest):
+        """Store a downscaled copy of data, returning its name or None."""
+        if not HAS_PIL:
+            return None
+        name = f"{digest}.w{self.thumb_width}.png"
+        if (self.assets_path / name).exists():
+            return name
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= self.thumb_width:
+                return None
+            height = max(1, round(image.height * self.thumb_width / image.width))
+            thumb = image.convert("RGBA").resize(
+                (self.thumb_width, height), Image.LANCZOS
+            )
+            # Plots are mostly flat colours, a palette keeps them small.
+            thumb = thumb.quantize(colors=256, method=FASTOCTREE)
+            out = io.BytesIO()
+            thumb.save(out, format="PNG", optimize=True)
+        if out.tell() >= len(data):
+            return None
+        self._store(name, out.getvalue())
+        return name
+
+    def image(self, source):
+        """
+        Add a PNG image given as a path or as bytes.
+
+        Returns (full size URL, thumbnail URL) relative to the report, or
+        None if a path was given which cannot be read.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        else:
+            try:
+                with open(source, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        urls = self._images.get(digest)
+        if urls is not None:
+            return urls
+
+        if self.single_file:
+            uri = "data:image/png;base64," + base64.b64encode(data).decode()
+            urls = (uri, uri)
+        else:
+            name = f"{digest}.png"
+            self._store(name, data)
+            try:
+                thumb = self._thumbnail(data, digest) or name
+            except OSError:
+                thumb = name
+            urls = (f"{self.assets_name}/{name}", f"{self.assets_name}/{thumb}")
+        self._images[digest] = urls
+        return urls
+
+    def img_tag(self, source, alt="", style="", link=True):
+        """
+        Return an <img> tag for source, or "" if it cannot be read.
+
+        The tag shows the thumbnail, is lazily loaded and, unless link is
+        False or the report is a single file, links to the full image.
+        """
+        urls = self.image(source)
+        if urls is None:
+            return ""
+        full, thumb = urls
+        style_attr = f' style="{style}"' if style else ""
+        tag = (
+            f'<img src="{thumb}" alt="{html.escape(alt)}" loading="lazy" '
+            f'decoding="async"{style_attr}>'
+        )
+        if link and not self.single_file:
+            tag = (
+                f'<a href="{full}" target="_blank" '
+                f'title="Click for full-size image">{tag}</a>'
+            )
+        return tag
+
+    def prune_assets(self):
+        """Remove assets no longer referenced by this report."""
+        if not self.assets_path.is_dir():
+            return
+        used = set()
+        for full, thumb in self._images.values():
+            used.add(os.path.basename(full))
+            used.add(os.path.basename(thumb))
+        for path in self.assets_path.iterdir():
+            if path.is_file() and path.name not in used:
+                path.unlink()
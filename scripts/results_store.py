@@ -0,0 +1,944 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Columnar store of the results of all workflows.
+
+Every workflow writes its own JSON or text results under
+workflows/<workflow>/results and every analyzer parses them again on each
+run, so comparing results across workflows, hosts or kernels needs one
+bespoke parser per workflow. This module normalizes the results of all
+workflows into one long table of metrics:
+
+    workflow host kernel fs | run source test metric value unit step
+
+stored as Parquet files partitioned by workflow, host, kernel and
+filesystem configuration (workflow=fio-tests/host=.../kernel=.../fs=...),
+so a query only reads the partitions it selects. A metric sampled over
+time or iterations has one row per sample with its time or iteration in
+step, scalar metrics have a NaN step.
+
+Ingestion is incremental: an index of the ingested result files keyed on
+their size and mtime is kept in the store, and only new or changed files
+are parsed again, in parallel. Every ingest goes into a run, named after
+the modification time of the oldest result file unless given with --run,
+so a results directory populated again by the next run is ingested into a
+new run and the results of the previous one are kept. Within a run, the
+rows of a file are replaced when it changes. The data of files which are
+removed from the results directory is kept too, so the store keeps the
+history of the results directories which are cleaned up before every run.
+
+Queries return pandas DataFrames:
+
+    store = ResultsStore()
+    store.ingest("fio-tests")
+    df = store.query(workflow="fio-tests", metric="read_iops")
+    ab_compare(df)            # baseline vs -dev hosts
+    trend(df)                 # per kernel statistics
+
+The store needs pyarrow and pandas.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    STORE_AVAILABLE = True
+except ImportError:
+    STORE_AVAILABLE = False
+
+TOPDIR = Path(__file__).resolve().parents[1]
+DEFAULT_STORE = Path(
+    os.environ.get("KDEVOPS_RESULTS_STORE", TOPDIR / "workflows" / "results-store")
+)
+
+# Bump when a parser or the layout of the store changes, every result
+# file is ingested again.
+STORE_VERSION = 1
+INDEX_FILE = "index.json"
+DATA_DIR = "data"
+RUN_FORMAT = "%Y%m%dT%H%M%SZ"
+
+PARTITION_COLUMNS = ("workflow", "host", "kernel", "fs")
+ROW_COLUMNS = ("run", "source", "test", "metric", "value", "unit", "step")
+COLUMNS = PARTITION_COLUMNS + ROW_COLUMNS
+
+UNKNOWN = "unknown"
+DEFAULT_FS = "default"
+
+_FS_RE = re.compile(r"(?:^|-)((?:xfs|ext4|btrfs|bcachefs|tmpfs|nfs)(?:-[\w]+)*)")
+_KERNEL_FILE = "last-kernel.txt"
+
+
+def fs_from_host(host: str) -> str:
+    """
+    The filesystem configuration encoded in a host name by the kdevops
+    node generation, e.g. "xfs-16k" for "debian13-fio-tests-xfs-16k-dev".
+    """
+    if host.endswith("-dev"):
+        host = host[: -len("-dev")]
+    match = _FS_RE.search(host)
+    return match.group(1) if match else DEFAULT_FS
+
+
+def _row(test, metric, value, unit="", step=None, **partition) -> Dict[str, Any]:
+    row = {
+        "test": str(test),
+        "metric": metric,
+        "value": float(value),
+        "unit": unit,
+        "step": math.nan if step is None else float(step),
+    }
+    row.update({k: str(v) for k, v in partition.items() if v})
+    return row
+
+
+def _load_json(path: Path):
+    with open(path, "r", errors="replace") as f:
+        return json.load(f)
+
+
+def _import_from(directory: Path, module: str):
+    """Import a parser module of a workflow's scripts directory."""
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
+    return __import__(module)
+
+
+# Parsers, one per workflow. A parser returns the rows of one result file,
+# with the partition columns it can tell from the file; the host defaults
+# to the first directory under the results directory, the kernel to the
+# kernel named by a last-kernel.txt and the filesystem to the one encoded
+# in the host name.
+
+
+def parse_ai(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """AI workflow results_<host>_<iteration>.json"""
+    data = _load_json(path)
+    system_info = data.get("system_info", {})
+    host = system_info.get("hostname")
+    partition = {
+        "host": host,
+        "kernel": system_info.get("kernel_version"),
+        "fs": fs_from_host(host) if host else None,
+    }
+    if partition["fs"] == DEFAULT_FS:
+        partition["fs"] = data.get("filesystem") or DEFAULT_FS
+    rows = []
+
+    insert = data.get("insert_performance", {})
+    if "vectors_per_second" in insert:
+        rows.append(
+            _row(
+                "insert",
+                "vectors_per_second",
+                insert["vectors_per_second"],
+                "vectors/s",
+                **partition,
+            )
+        )
+        rows.append(
+            _row(
+                "insert", "time", insert.get("total_time_seconds", 0), "s", **partition
+            )
+        )
+        if "flush_time_seconds" in insert:
+            rows.append(
+                _row(
+                    "insert",
+                    "flush_time",
+                    insert["flush_time_seconds"],
+                    "s",
+                    **partition,
+                )
+            )
+        for window in insert.get("throughput_timeline", []):
+            rows.append(
+                _row(
+                    "insert",
+                    "vectors_per_second_timeline",
+                    window["vectors_per_second"],
+                    "vectors/s",
+                    step=window["time_seconds"],
+                    **partition,
+                )
+            )
+
+    index = data.get("index_performance", {})
+    if "creation_time_seconds" in index:
+        rows.append(
+            _row(
+                f"index/{index.get('index_type', UNKNOWN)}",
+                "creation_time",
+                index["creation_time_seconds"],
+                "s",
+                **partition,
+            )
+        )
+
+    for topk, batches in data.get("query_performance", {}).items():
+        for batch, perf in batches.items():
+            test = f"query/{topk}/{batch}"
+            rows.append(
+                _row(test, "qps", perf.get("queries_per_second", 0), "1/s", **partition)
+            )
+            rows.append(
+                _row(
+                    test,
+                    "latency_avg",
+                    perf.get("average_time_seconds", 0) * 1000,
+                    "ms",
+                    **partition,
+                )
+            )
+
+    recall = data.get("recall_performance", {})
+    for point in recall.get("sweep", []):
+        test = f"recall@{recall.get('topk')}/{point.get('param')}={point.get('value')}"
+        rows.append(_row(test, "recall", point.get("recall", 0), "", **partition))
+        rows.append(
+            _row(test, "qps", point.get("queries_per_second", 0), "1/s", **partition)
+        )
+        for pct, value in point.get("latency_ms", {}).items():
+            rows.append(_row(test, f"latency_{pct}", value, "ms", **partition))
+    return rows
+
+
+_FIO_NAME_RE = re.compile(r"results_(.+)_bs(\w+)_iodepth(\d+)_jobs(\d+)\.json$")
+
+
+def parse_fio(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """fio-tests results_<pattern>_bs<bs>_iodepth<n>_jobs<n>.json"""
+    match = _FIO_NAME_RE.search(path.name)
+    if not match:
+        return []
+    data = _load_json(path)
+    test = "{}/bs{}/iodepth{}/jobs{}".format(*match.groups())
+    rows = []
+    for direction in ("read", "write"):
+        iops = bw = 0.0
+        lat = []
+        p99 = []
+        for job in data.get("jobs", []):
+            stats = job.get(direction, {})
+            if not stats.get("io_bytes"):
+                continue
+            iops += stats.get("iops", 0)
+            bw += stats.get("bw", 0)
+            lat.append(stats.get("lat_ns", {}).get("mean", 0))
+            pcts = stats.get("clat_ns", {}).get("percentile", {})
+            if "99.000000" in pcts:
+                p99.append(pcts["99.000000"])
+        if not lat:
+            continue
+        rows.append(_row(test, f"{direction}_iops", iops, "1/s"))
+        rows.append(_row(test, f"{direction}_bw", bw / 1024, "MiB/s"))
+        rows.append(_row(test, f"{direction}_lat_mean", max(lat) / 1000, "us"))
+        if p99:
+            rows.append(_row(test, f"{direction}_clat_p99", max(p99) / 1000, "us"))
+    return rows
+
+
+_WARP_NAME_RE = re.compile(r"warp_benchmark_(.+)_\d[\d_-]*\.json$")
+
+
+def parse_warp(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """MinIO warp_benchmark_<host>_<timestamp>.json"""
+    warp_parser = _import_from(
+        TOPDIR / "workflows" / "minio" / "scripts", "warp_parser"
+    )
+    data = warp_parser.parse_warp_file(path)
+    match = _WARP_NAME_RE.search(path.name)
+    host = match.group(1) if match else None
+    partition = {"host": host, "fs": fs_from_host(host) if host else None}
+    rows = []
+    sections = {"total": data.get("total", {})}
+    sections.update(data.get("by_op_type") or data.get("operations") or {})
+    for name, section in sections.items():
+        if not isinstance(section, dict):
+            continue
+        series = warp_parser.throughput_series(section)
+        for segment, seg in enumerate(series):
+            rows.append(
+                _row(
+                    name,
+                    "throughput_timeline",
+                    seg["bytes_per_sec"] / (1 << 20),
+                    "MiB/s",
+                    step=segment,
+                    **partition,
+                )
+            )
+        if series:
+            rows.append(
+                _row(
+                    name,
+                    "throughput",
+                    sum(s["bytes_per_sec"] for s in series) / len(series) / (1 << 20),
+                    "MiB/s",
+                    **partition,
+                )
+            )
+            rows.append(
+                _row(
+                    name,
+                    "objects_per_second",
+                    sum(s["obj_per_sec"] for s in series) / len(series),
+                    "1/s",
+                    **partition,
+                )
+            )
+        for pct, value in warp_parser.latency_percentiles(section).items():
+            rows.append(_row(name, f"latency_p{pct}", value, "ms", **partition))
+    return rows
+
+
+def parse_build_linux(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """build-linux build_times_<host>.json"""
+    builds = _load_json(path)
+    host = path.stem[len("build_times_") :]
+    rows = []
+    for build in builds:
+        rows.append(
+            _row(
+                "build",
+                "success",
+                bool(build.get("success")),
+                step=build.get("iteration"),
+                host=host,
+            )
+        )
+        if build.get("success"):
+            rows.append(
+                _row(
+                    "build",
+                    "duration",
+                    build.get("duration", 0),
+                    "s",
+                    step=build.get("iteration"),
+                    host=host,
+                )
+            )
+    return rows
+
+
+_SYSBENCH_RE = re.compile(r"\[\s*(\d+)s\s*\].*?tps:\s*([\d.]+)")
+
+
+def parse_sysbench(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """sysbench <host>/sysbench_tps.txt"""
+    with open(path, "r", errors="replace") as f:
+        samples = _SYSBENCH_RE.findall(f.read())
+    rows = [_row("oltp", "tps_timeline", tps, "1/s", step=t) for t, tps in samples]
+    if samples:
+        tps = sorted(float(v) for _, v in samples)
+        rows.append(_row("oltp", "tps", sum(tps) / len(tps), "1/s"))
+        rows.append(_row("oltp", "tps_min", tps[0], "1/s"))
+    return rows
+
+
+def parse_nfstest(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """nfstest <kernel>/<test group>/nfstest*.log"""
+    parser = _import_from(
+        TOPDIR / "workflows" / "nfstest" / "scripts", "parse_nfstest_results"
+    )
+    results = parser.parse_test_log(str(path))
+    # The logs of all hosts are collected into the directory of the kernel
+    partition = {"kernel": rel.parts[0] if len(rel.parts) > 2 else None}
+    partition["host"] = "all"
+    suite = results.get("test_suite") or UNKNOWN
+    rows = []
+    for test in results["tests"]:
+        name = f"{suite}/{test['name'] or test['description']}"
+        rows.append(_row(name, "passed", test["status"] == "passed", **partition))
+        rows.append(_row(name, "duration", test["duration"], "s", **partition))
+    summary = results["summary"]
+    rows.append(_row(suite, "failed", summary["failed"], **partition))
+    rows.append(_row(suite, "total_time", summary["total_time"], "s", **partition))
+    return rows
+
+
+def parse_pynfs(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """pynfs <kernel>/<kernel>-v<version>.json"""
+    data = _load_json(path)
+    kernel = rel.parts[-2] if len(rel.parts) > 1 else None
+    version = path.stem.rsplit("-", 1)[-1]
+    partition = {"kernel": kernel, "host": "all"}
+    rows = []
+    for case in data.get("testcase", []):
+        if case.get("skipped"):
+            continue
+        name = f"{version}/{case.get('classname')}/{case.get('code')}"
+        failed = "failure" in case or "error" in case
+        rows.append(_row(name, "passed", not failed, **partition))
+        rows.append(_row(name, "time", float(case.get("time", 0)), "s", **partition))
+    for key in ("tests", "failures", "errors", "skipped"):
+        rows.append(_row(version, key, data.get(key, 0), **partition))
+    return rows
+
+
+def parse_reboot_limit(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """reboot-limit [regular|kexec/]<host>/systemctl-analyze.txt"""
+    boot_stats = _import_from(
+        TOPDIR / "scripts" / "workflows" / "demos" / "reboot-limit", "boot_stats"
+    )
+    times = boot_stats.load_boot_times(path)
+    if rel.parts[0] in ("regular", "kexec"):
+        mode, host = rel.parts[0], rel.parts[1]
+    else:
+        mode, host = "reboot", rel.parts[0]
+    rows = []
+    for boot, row in enumerate(times.tolist()):
+        for column, value in zip(boot_stats.COLUMNS, row):
+            rows.append(_row(mode, f"{column}_time", value, "s", step=boot, host=host))
+    return rows
+
+
+_MMTESTS_RE = re.compile(
+    r"^(\w+)\s+(\S+)\s+([\d.]+)\s+\(\s*[-+\d.]+%\)\s+([\d.]+)\s+\(\s*[-+\d.]+%\)"
+)
+
+
+def parse_mmtests(path: Path, rel: Path) -> List[Dict[str, Any]]:
+    """mmtests compare-kernels comparison.txt of the baseline and dev kernel"""
+    rows = []
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            match = _MMTESTS_RE.match(line.strip())
+            if not match:
+                continue
+            stat, test, baseline, dev = match.groups()
+            rows.append(_row(test, stat.lower(), baseline, host="baseline"))
+            rows.append(_row(test, stat.lower(), dev, host="dev"))
+    return rows
+
+
+class Workflow:
+    """
+    How to find and parse the results of a workflow.
+
+    Args:
+        results_dir: Results directory relative to the top directory
+        patterns: Glob patterns of the result files in the results
+            directory, searched recursively
+        parser: Returns the rows of a result file given its path and its
+            path relative to the results directory
+    """
+
+    def __init__(
+        self,
+        results_dir: str,
+        patterns: Sequence[str],
+        parser: Callable[[Path, Path], List[Dict[str, Any]]],
+    ):
+        self.results_dir = results_dir
+        self.patterns = tuple(patterns)
+        self.parser = parser
+
+    def sources(self, results_dir: Path) -> List[Path]:
+        found = set()
+        for pattern in self.patterns:
+            for path in results_dir.rglob(pattern):
+                # last-run is archived into a directory named after the
+                # kernel once complete, only the archive is ingested.
+                rel = path.relative_to(results_dir)
+                if "last-run" not in rel.parts and path.is_file():
+                    found.add(path)
+        return sorted(found)
+
+
+WORKFLOWS = {
+    "ai": Workflow("workflows/ai/results", ["results_*.json"], parse_ai),
+    "fio-tests": Workflow("workflows/fio-tests/results", ["results_*.json"], parse_fio),
+    "minio": Workflow("workflows/minio/results", ["warp_benchmark_*.json"], parse_warp),
+    "build-linux": Workflow(
+        "workflows/build-linux/results", ["build_times_*.json"], parse_build_linux
+    ),
+    "sysbench": Workflow(
+        "workflows/sysbench/results", ["sysbench_tps.txt"], parse_sysbench
+    ),
+    "nfstest": Workflow("workflows/nfstest/results", ["*.log"], parse_nfstest),
+    "pynfs": Workflow("workflows/pynfs/results", ["*-v*.json"], parse_pynfs),
+    "reboot-limit": Workflow(
+        "workflows/demos/reboot-limit/results",
+        ["systemctl-analyze.txt"],
+        parse_reboot_limit,
+    ),
+    "mmtests": Workflow("workflows/mmtests/results", ["comparison.txt"], parse_mmtests),
+}
+
+
+def _parse_worker(args):
+    workflow, path, rel = args
+    try:
+        return WORKFLOWS[workflow].parser(Path(path), Path(rel)), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _kernel_of(results_dir: Path, rel: Path) -> str:
+    """The kernel named by the closest last-kernel.txt of a result file"""
+    directory = results_dir / rel.parent
+    while True:
+        try:
+            kernel = (directory / _KERNEL_FILE).read_text().strip()
+            if kernel:
+                return kernel
+        except OSError:
+            pass
+        if directory == results_dir or results_dir not in directory.parents:
+            return UNKNOWN
+        directory = directory.parent
+
+
+def _quote(value: str) -> str:
+    return urllib.parse.quote(value, safe="")
+
+
+def run_id(sources: Sequence[Path]) -> str:
+    """
+    The default run of result files: the UTC modification time of the
+    oldest one. Results added to a results directory keep its run, a
+    results directory populated again gets a new one.
+    """
+    if not sources:
+        return UNKNOWN
+    oldest = min(path.stat().st_mtime for path in sources)
+    return datetime.datetime.fromtimestamp(oldest, datetime.timezone.utc).strftime(
+        RUN_FORMAT
+    )
+
+
+class ResultsStore:
+    """
+    Results of all workflows in a directory of Parquet files.
+
+    Args:
+        path: Directory of the store, created on the first ingest
+        topdir: kdevops top directory the workflow results directories
+            are relative to
+    """
+
+    def __init__(self, path=DEFAULT_STORE, topdir=TOPDIR):
+        if not STORE_AVAILABLE:
+            raise ImportError(
+                "The results store needs pyarrow and pandas, "
+                "install with: pip install pyarrow pandas"
+            )
+        self.path = Path(path)
+        self.topdir = Path(topdir)
+        self.index_path = self.path / INDEX_FILE
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != STORE_VERSION:
+            return {}
+        return index.get("sources", {})
+
+    def _save_index(self):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": STORE_VERSION, "sources": self._index}, f)
+        os.replace(tmp, self.index_path)
+
+    def _remove_parts(self, entry: Dict[str, Any]):
+        for part in entry.get("parts", []):
+            try:
+                os.unlink(self.path / part)
+            except FileNotFoundError:
+                pass
+
+    def _write_parts(self, key: str, rows: List[Dict[str, Any]]) -> List[str]:
+        """Write the rows of one source, one file per partition."""
+        if not rows:
+            return []
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        parts = []
+        for values, group in df.groupby(list(PARTITION_COLUMNS), sort=False):
+            part_dir = Path(DATA_DIR).joinpath(
+                *(f"{col}={_quote(v)}" for col, v in zip(PARTITION_COLUMNS, values))
+            )
+            part = str(part_dir / f"{digest}.parquet")
+            os.makedirs(self.path / part_dir, exist_ok=True)
+            table = pa.Table.from_pandas(
+                group[list(ROW_COLUMNS)], schema=_ROW_SCHEMA, preserve_index=False
+            )
+            tmp = f"{self.path / part}.{os.getpid()}.tmp"
+            pq.write_table(table, tmp)
+            os.replace(tmp, self.path / part)
+            parts.append(part)
+        return parts
+
+    def ingest(
+        self,
+        workflow: str,
+        results_dir=None,
+        run: Optional[str] = None,
+        jobs: Optional[int] = None,
+        force: bool = False,
+        host: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ingest the new and changed result files of a workflow into a run,
+        by default the run_id() of the result files. The host of the rows
+        whose parser does not name one defaults to the first directory
+        under the results directory. Returns the run and the number of
+        files parsed, unchanged and failed.
+        """
+        spec = WORKFLOWS[workflow]
+        results_dir = Path(results_dir or self.topdir / spec.results_dir).resolve()
+        counts = {"run": run or UNKNOWN, "parsed": 0, "unchanged": 0, "failed": 0}
+        if not results_dir.is_dir():
+            return counts
+
+        sources = spec.sources(results_dir)
+        if run is None:
+            run = counts["run"] = run_id(sources)
+        todo = []
+        for path in sources:
+            rel = path.relative_to(results_dir)
+            key = f"{workflow}:{run}:{path}"
+            st = path.stat()
+            stamp = [st.st_size, st.st_mtime_ns]
+            entry = self._index.get(key)
+            if not force and entry and entry["stamp"] == stamp:
+                counts["unchanged"] += 1
+                continue
+            todo.append((key, stamp, path, rel))
+
+        args = [(workflow, str(path), str(rel)) for _, _, path, rel in todo]
+        if len(args) > 1 and jobs != 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                outcomes = list(executor.map(_parse_worker, args, chunksize=8))
+        else:
+            outcomes = [_parse_worker(a) for a in args]
+
+        for (key, stamp, path, rel), (rows, error) in zip(todo, outcomes):
+            if error is not None:
+                print(f"Error parsing {path}: {error}", file=sys.stderr)
+                counts["failed"] += 1
+                continue
+            default_host = host or (rel.parts[0] if len(rel.parts) > 1 else UNKNOWN)
+            kernel = None
+            for row in rows:
+                row["workflow"] = workflow
+                row["run"] = run
+                row["source"] = str(rel)
+                row.setdefault("host", default_host)
+                if "kernel" not in row:
+                    if kernel is None:
+                        kernel = _kernel_of(results_dir, rel)
+                    row["kernel"] = kernel
+                row.setdefault("fs", fs_from_host(row["host"]))
+            if key in self._index:
+                self._remove_parts(self._index[key])
+            self._index[key] = {"stamp": stamp, "parts": self._write_parts(key, rows)}
+            counts["parsed"] += 1
+
+        if todo:
+            self._save_index()
+        return counts
+
+    def dataset(self):
+        """The pyarrow dataset of the store, for queries this API lacks."""
+        return ds.dataset(
+            self.path / DATA_DIR,
+            format="parquet",
+            partitioning=ds.partitioning(_PARTITION_SCHEMA, flavor="hive"),
+        )
+
+    def query(
+        self, columns: Optional[Sequence[str]] = None, **filters
+    ) -> "pd.DataFrame":
+        """
+        Rows matching all filters, given as column=value or
+        column=[values], e.g. query(workflow="ai", metric=["qps", "recall"]).
+        """
+        if not (self.path / DATA_DIR).is_dir():
+            return pd.DataFrame(columns=list(columns or COLUMNS))
+        expr = None
+        for column, value in filters.items():
+            if column not in COLUMNS:
+                raise ValueError(f"Unknown column {column}")
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            term = ds.field(column).isin(values)
+            expr = term if expr is None else expr & term
+        table = self.dataset().to_table(columns=list(columns or COLUMNS), filter=expr)
+        return table.to_pandas()
+
+    def workflows(self) -> List[str]:
+        """Workflows with results in the store"""
+        data = self.path / DATA_DIR
+        if not data.is_dir():
+            return []
+        return sorted(
+            urllib.parse.unquote(p.name.split("=", 1)[1])
+            for p in data.iterdir()
+            if p.name.startswith("workflow=")
+        )
+
+
+if STORE_AVAILABLE:
+    _PARTITION_SCHEMA = pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS])
+    _ROW_SCHEMA = pa.schema(
+        [
+            ("run", pa.string()),
+            ("source", pa.string()),
+            ("test", pa.string()),
+            ("metric", pa.string()),
+            ("value", pa.float64()),
+            ("unit", pa.string()),
+            ("step", pa.float64()),
+        ]
+    )
+
+
+def dev_pair(host: str) -> Optional[str]:
+    """The baseline host of a dev host, None for a baseline host."""
+    if host.endswith("-dev"):
+        return host[: -len("-dev")]
+    if host == "dev":
+        return "baseline"
+    return None
+
+
+def ab_compare(
+    df: "pd.DataFrame", by: Sequence[str] = ("workflow", "fs", "test", "metric")
+) -> "pd.DataFrame":
+    """
+    Compare each dev host with its baseline host, by default per workflow,
+    filesystem, test and metric. Samples over steps and runs are averaged.
+    Returns the baseline and dev means, the delta and the delta in percent
+    of the baseline.
+    """
+    by = list(by)
+    means = df.groupby(by + ["host"], observed=True)["value"].mean().reset_index()
+    dev = means[means["host"].map(dev_pair).notna()].copy()
+    dev["baseline_host"] = dev["host"].map(dev_pair)
+    merged = dev.merge(
+        means.rename(columns={"host": "baseline_host"}),
+        on=by + ["baseline_host"],
+        suffixes=("_dev", "_baseline"),
+    )
+    merged = merged.rename(
+        columns={
+            "host": "dev_host",
+            "value_dev": "dev",
+            "value_baseline": "baseline",
+        }
+    )
+    merged["delta"] = merged["dev"] - merged["baseline"]
+    merged["delta_pct"] = (
+        merged["delta"] / merged["baseline"].where(merged["baseline"] != 0) * 100
+    )
+    return merged[
+        by + ["baseline_host", "dev_host", "baseline", "dev", "delta", "delta_pct"]
+    ]
+
+
+def kernel_sort_key(kernel: str):
+    """Sort kernel releases by version, 6.9 before 6.10 and -rc before the release."""
+    parts = re.split(r"(\d+)", kernel)
+    key = []
+    for part in parts:
+        if part.isdigit():
+            key.append((1, int(part), ""))
+        elif part:
+            # "-rc" sorts before the end of the string, i.e. the release
+            key.append((0 if part.startswith("-rc") else 2, 0, part))
+    key.append((1, -1, ""))
+    return key
+
+
+def trend(
+    df: "pd.DataFrame",
+    over: str = "kernel",
+    by: Sequence[str] = ("workflow", "host", "fs", "test", "metric"),
+) -> "pd.DataFrame":
+    """
+    Statistics of each metric per value of over, by default per kernel,
+    ordered by kernel version.
+    """
+    by = list(by)
+    stats = (
+        df.groupby(by + [over], observed=True)["value"]
+        .agg(["count", "mean", "std", "min", "max"])
+        .reset_index()
+    )
+    if over == "kernel":
+        order = sorted(stats["kernel"].unique(), key=kernel_sort_key)
+        stats["kernel"] = pd.Categorical(
+            stats["kernel"], categories=order, ordered=True
+        )
+        stats = stats.sort_values(by + ["kernel"])
+        stats["kernel"] = stats["kernel"].astype(str)
+    return stats.reset_index(drop=True)
+
+
+def plot_trend(stats: "pd.DataFrame", output: str, over: str = "kernel"):
+    """Plot the mean of each series of trend() over over."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    series_cols = [
+        c
+        for c in stats.columns
+        if c not in (over, "count", "mean", "std", "min", "max")
+    ]
+    for key, group in stats.groupby(series_cols, observed=True, sort=False):
+        label = " ".join(str(k) for k in (key if isinstance(key, tuple) else (key,)))
+        ax.errorbar(
+            group[over],
+            group["mean"],
+            yerr=group["std"].fillna(0),
+            marker="o",
+            capsize=3,
+            label=label,
+        )
+    ax.set_xlabel(over)
+    ax.set_ylabel("mean")
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize=7)
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(output, dpi=150)
+    plt.close(fig)
+
+
+def _filters(args) -> Dict[str, Any]:
+    return {
+        column: getattr(args, column)
+        for column in ("workflow", "host", "kernel", "fs", "run", "test", "metric")
+        if getattr(args, column, None)
+    }
+
+
+def _print_df(df: "pd.DataFrame", fmt: str):
+    if fmt == "csv":
+        df.to_csv(sys.stdout, index=False)
+    elif fmt == "json":
+        print(df.to_json(orient="records"))
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(df.to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest and query the results of kdevops workflows"
+    )
+    parser.add_argument(
+        "--store",
+        default=str(DEFAULT_STORE),
+        help=f"Store directory (default: {DEFAULT_STORE})",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Ingest new and changed results")
+    ingest.add_argument(
+        "workflows",
+        nargs="*",
+        help=f"Workflows to ingest, all by default: {', '.join(sorted(WORKFLOWS))}",
+    )
+    ingest.add_argument(
+        "--results-dir", help="Results directory, for a single workflow"
+    )
+    ingest.add_argument(
+        "--run",
+        help="Run label (default: the modification time of the oldest result file)",
+    )
+    ingest.add_argument(
+        "--host", help="Host of the results, for a single host results directory"
+    )
+    ingest.add_argument("-j", "--jobs", type=int, help="Parallel parsers")
+    ingest.add_argument(
+        "--force", action="store_true", help="Parse unchanged files again"
+    )
+
+    for name, help_text in (
+        ("query", "Print the matching rows"),
+        ("compare", "Compare dev hosts with their baseline hosts"),
+        ("trend", "Print per kernel statistics"),
+    ):
+        cmd = sub.add_parser(name, help=help_text)
+        for column in ("workflow", "host", "kernel", "fs", "run", "test", "metric"):
+            cmd.add_argument(f"--{column}", action="append")
+        cmd.add_argument("--format", choices=["table", "csv", "json"], default="table")
+        if name == "trend":
+            cmd.add_argument("--plot", help="Write a trend plot to this file")
+
+    args = parser.parse_args()
+    try:
+        store = ResultsStore(args.store)
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "ingest":
+        workflows = args.workflows or sorted(WORKFLOWS)
+        unknown = set(workflows) - set(WORKFLOWS)
+        if unknown:
+            parser.error(f"Unknown workflows: {', '.join(sorted(unknown))}")
+        if args.results_dir and len(workflows) != 1:
+            parser.error("--results-dir needs a single workflow")
+        if args.host and not args.results_dir:
+            parser.error("--host needs --results-dir")
+        for workflow in workflows:
+            counts = store.ingest(
+                workflow,
+                args.results_dir,
+                args.run,
+                args.jobs,
+                args.force,
+                args.host,
+            )
+            print(
+                f"{workflow} run {counts['run']}: {counts['parsed']} parsed, "
+                f"{counts['unchanged']} unchanged, {counts['failed']} failed"
+            )
+        return 0
+
+    df = store.query(**_filters(args))
+    if df.empty:
+        print("No matching results", file=sys.stderr)
+        return 1
+    if args.command == "compare":
+        df = ab_compare(df)
+    elif args.command == "trend":
+        df = trend(df)
+        if args.plot:
+            plot_trend(df, args.plot)
+            print(f"Trend plot saved to {args.plot}", file=sys.stderr)
+    _print_df(df, args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
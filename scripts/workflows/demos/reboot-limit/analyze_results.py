@@ -7,25 +7,31 @@ Analyze and visualize reboot-limit workflow results.
 This script parses systemd-analyze output and generates graphs showing:
 - Boot time trends across reboots
 - Individual component times (kernel, initrd, userspace)
-- Statistical analysis of boot performance
+- Statistical analysis of boot performance: percentiles, boot time drift
+  and change-points over the boot index
 """
 
 import os
 import sys
-import re
+import json
 import argparse
-import statistics
 from pathlib import Path
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Tuple, Optional
+
+import boot_stats
+from boot_stats import KERNEL, INITRD, USERSPACE, TOTAL
 
 
 class RebootLimitAnalyzer:
     """Analyzes reboot-limit workflow results."""
 
-    def __init__(self, results_dir: str):
+    def __init__(self, results_dir: str, trend_window: int = 50, min_segment: int = 10):
         self.results_dir = Path(results_dir)
+        self.trend_window = trend_window
+        self.min_segment = min_segment
         self.hosts_data: Dict[str, Dict] = {}
         self.comparison_mode = False
         self.regular_data: Dict[str, Dict] = {}
@@ -40,35 +46,14 @@ class RebootLimitAnalyzer:
 
         Returns dict with times in seconds or None if parse fails.
         """
-        # Pattern for systemd-analyze output
-        pattern = r"Startup finished in ([\d.]+)s \(kernel\) \+ ([\d.]+)s \(initrd\) \+ ([\d.]+)s \(userspace\) = ([\d.]+)s"
-
-        # Alternative pattern without initrd (for systems without initrd)
-        pattern_no_initrd = r"Startup finished in ([\d.]+)s \(kernel\) \+ ([\d.]+)s \(userspace\) = ([\d.]+)s"
-
-        match = re.search(pattern, line)
-        if match:
-            return {
-                "kernel": float(match.group(1)),
-                "initrd": float(match.group(2)),
-                "userspace": float(match.group(3)),
-                "total": float(match.group(4)),
-            }
-
-        match = re.search(pattern_no_initrd, line)
-        if match:
-            return {
-                "kernel": float(match.group(1)),
-                "initrd": 0.0,
-                "userspace": float(match.group(2)),
-                "total": float(match.group(3)),
-            }
-
-        return None
+        times = boot_stats.parse_boot_times(line)
+        if not len(times):
+            return None
+        return dict(zip(boot_stats.COLUMNS, times[0].tolist()))
 
     def load_host_data(self, host_dir: Path) -> Dict:
         """Load and parse data for a single host."""
-        data = {"boot_count": 0, "boot_times": []}
+        data = {"boot_count": 0, "boot_times": boot_stats.empty_boot_times()}
 
         # Read boot count
         count_file = host_dir / "reboot-count.txt"
@@ -81,11 +66,7 @@ class RebootLimitAnalyzer:
         # Read systemd-analyze results
         analyze_file = host_dir / "systemctl-analyze.txt"
         if analyze_file.exists():
-            with open(analyze_file, "r") as f:
-                for line in f:
-                    parsed = self.parse_systemd_analyze_line(line.strip())
-                    if parsed:
-                        data["boot_times"].append(parsed)
+            data["boot_times"] = boot_stats.load_boot_times(analyze_file)
 
         return data
 
@@ -114,17 +95,28 @@ class RebootLimitAnalyzer:
                 if item.is_dir():
                     self.hosts_data[item.name] = self.load_host_data(item)
 
-    def calculate_statistics(self, times: List[float]) -> Dict[str, float]:
-        """Calculate statistical measures for a list of times."""
-        if not times:
-            return {}
+    def calculate_statistics(self, times) -> Dict[str, float]:
+        """Calculate statistical measures for an array of times."""
+        return boot_stats.summarize(times)
+
+    def analyze_host(self, data: Dict) -> Dict:
+        """Percentiles, drift and change-points for one host's boot times."""
+        return boot_stats.analyze(
+            data["boot_times"], window=self.trend_window, min_size=self.min_segment
+        )
 
+    def analysis_report(self) -> Dict:
+        """Full analysis of every host and mode, suitable for JSON output."""
+        if self.comparison_mode:
+            return {
+                mode: {host: self.analyze_host(d) for host, d in sorted(data.items())}
+                for mode, data in (
+                    ("regular", self.regular_data),
+                    ("kexec", self.kexec_data),
+                )
+            }
         return {
-            "min": min(times),
-            "max": max(times),
-            "mean": statistics.mean(times),
-            "median": statistics.median(times),
-            "stdev": statistics.stdev(times) if len(times) > 1 else 0,
+            host: self.analyze_host(d) for host, d in sorted(self.hosts_data.items())
         }
 
     def plot_boot_times(self, output_file: str = "reboot_limit_analysis.png"):
@@ -154,15 +146,14 @@ class RebootLimitAnalyzer:
 
         for idx, (host, data) in enumerate(self.hosts_data.items()):
             boot_times = data["boot_times"]
-            if not boot_times:
+            if not len(boot_times):
                 continue
 
             # Extract time series
-            boot_numbers = list(range(1, len(boot_times) + 1))
-            kernel_times = [bt["kernel"] for bt in boot_times]
-            initrd_times = [bt["initrd"] for bt in boot_times]
-            userspace_times = [bt["userspace"] for bt in boot_times]
-            total_times = [bt["total"] for bt in boot_times]
+            boot_numbers = np.arange(1, len(boot_times) + 1)
+            kernel_times = boot_times[:, KERNEL]
+            initrd_times = boot_times[:, INITRD]
+            total_times = boot_times[:, TOTAL]
 
             # Plot 1: Stacked area chart of boot components
             ax1 = axes[idx, 0]
@@ -170,13 +161,13 @@ class RebootLimitAnalyzer:
             ax1.fill_between(
                 boot_numbers,
                 kernel_times,
-                [k + i for k, i in zip(kernel_times, initrd_times)],
+                kernel_times + initrd_times,
                 alpha=0.7,
                 label="Initrd",
             )
             ax1.fill_between(
                 boot_numbers,
-                [k + i for k, i in zip(kernel_times, initrd_times)],
+                kernel_times + initrd_times,
                 total_times,
                 alpha=0.7,
                 label="Userspace",
@@ -222,6 +213,21 @@ class RebootLimitAnalyzer:
                         label=f"±1 StdDev: {stats['stdev']:.2f}s",
                     )
 
+            # Rolling p5-p95 band and detected change-points
+            window = min(self.trend_window, len(total_times))
+            bands = boot_stats.percentile_bands(total_times, window, (5, 95))
+            if bands.shape[1] > 1:
+                ax2.fill_between(
+                    boot_numbers[window - 1 :],
+                    bands[0],
+                    bands[1],
+                    alpha=0.15,
+                    color="purple",
+                    label=f"Rolling p5-p95 ({window} boots)",
+                )
+            for point in boot_stats.change_points(total_times, self.min_segment):
+                ax2.axvline(x=point + 1, color="k", linestyle=":", alpha=0.6)
+
             ax2.set_xlabel("Boot Number")
             ax2.set_ylabel("Time (seconds)")
             ax2.set_title(f"{host}: Total Boot Time Analysis")
@@ -269,21 +275,22 @@ class RebootLimitAnalyzer:
         all_hosts = sorted(set(self.regular_data.keys()) | set(self.kexec_data.keys()))
 
         for host in all_hosts:
-            regular_data = self.regular_data.get(host, {"boot_times": []})
-            kexec_data = self.kexec_data.get(host, {"boot_times": []})
+            regular_data = self.regular_data.get(host, {})
+            kexec_data = self.kexec_data.get(host, {})
 
-            regular_times = regular_data.get("boot_times", [])
-            kexec_times = kexec_data.get("boot_times", [])
+            regular_times = regular_data.get(
+                "boot_times", boot_stats.empty_boot_times()
+            )
+            kexec_times = kexec_data.get("boot_times", boot_stats.empty_boot_times())
 
             # Add host data to combined arrays
-            if regular_times:
-                regular_totals = [bt["total"] for bt in regular_times]
+            if len(regular_times):
+                regular_totals = regular_times[:, TOTAL]
                 all_regular_times.extend(regular_totals)
                 host_labels.extend([f"{host}-regular"] * len(regular_totals))
 
-            if kexec_times:
-                kexec_totals = [bt["total"] for bt in kexec_times]
-                all_kexec_times.extend(kexec_totals)
+            if len(kexec_times):
+                all_kexec_times.extend(kexec_times[:, TOTAL])
 
         # Create single comprehensive comparison plot
         fig, ax = plt.subplots(1, 1, figsize=(12, 8))
@@ -438,8 +445,9 @@ class RebootLimitAnalyzer:
             print(f"Host: {host}")
             print(f"Total boots: {data['boot_count']}")
 
-            if data["boot_times"]:
-                total_times = [bt["total"] for bt in data["boot_times"]]
+            boot_times = data["boot_times"]
+            if len(boot_times):
+                total_times = boot_times[:, TOTAL]
                 stats = self.calculate_statistics(total_times)
 
                 print(f"\nBoot time statistics:")
@@ -451,20 +459,45 @@ class RebootLimitAnalyzer:
                     print(f"  Median: {stats['median']:.2f}s")
                     print(f"  StdDev: {stats['stdev']:.2f}s")
                     print(f"  Range: {stats['max'] - stats['min']:.2f}s")
+                    print(
+                        f"  Percentiles: p5 {stats['p5']:.2f}s, p95 {stats['p95']:.2f}s, "
+                        f"p99 {stats['p99']:.2f}s"
+                    )
 
                 # Component breakdown
-                kernel_times = [bt["kernel"] for bt in data["boot_times"]]
-                initrd_times = [bt["initrd"] for bt in data["boot_times"]]
-                userspace_times = [bt["userspace"] for bt in data["boot_times"]]
-
+                means = boot_times.mean(axis=0)
                 print(f"\nComponent averages:")
-                print(f"  Kernel: {statistics.mean(kernel_times):.2f}s")
-                if any(t > 0 for t in initrd_times):
-                    print(f"  Initrd: {statistics.mean(initrd_times):.2f}s")
-                print(f"  Userspace: {statistics.mean(userspace_times):.2f}s")
+                print(f"  Kernel: {means[KERNEL]:.2f}s")
+                if (boot_times[:, INITRD] > 0).any():
+                    print(f"  Initrd: {means[INITRD]:.2f}s")
+                print(f"  Userspace: {means[USERSPACE]:.2f}s")
+
+                self.print_trend(self.analyze_host(data))
             else:
                 print("  No boot time data available")
 
+    def print_trend(self, analysis: Dict):
+        """Print boot time drift and change-points for one host/mode."""
+        trend = analysis["trend"]
+        if not trend:
+            return
+        print(f"\n  Boot time drift:")
+        print(f"    Slope: {trend['slope'] * 1000:.3f}ms per boot")
+        print(f"    Drift over run: {trend['drift']:+.2f}s")
+        print(
+            f"    Max rolling slope ({self.trend_window} boots): "
+            f"{analysis['max_rolling_slope'] * 1000:.3f}ms per boot"
+        )
+        points = analysis["change_points"]
+        if points:
+            means = analysis["segment_means"]
+            print(
+                f"  Change-points (boot index): {', '.join(str(p + 1) for p in points)}"
+            )
+            print(f"    Segment means: {', '.join(f'{m:.2f}s' for m in means)}")
+        else:
+            print(f"  No change-points detected")
+
     def print_comparison_summary(self):
         """Print summary for comparison mode analysis."""
         all_hosts = set(self.regular_data.keys()) | set(self.kexec_data.keys())
@@ -474,16 +507,15 @@ class RebootLimitAnalyzer:
             print(f"Host: {host} - COMPARISON ANALYSIS")
             print(f"{'=' * 80}")
 
-            regular_data = self.regular_data.get(
-                host, {"boot_times": [], "boot_count": 0}
-            )
-            kexec_data = self.kexec_data.get(host, {"boot_times": [], "boot_count": 0})
+            empty = {"boot_times": boot_stats.empty_boot_times(), "boot_count": 0}
+            regular_data = self.regular_data.get(host, empty)
+            kexec_data = self.kexec_data.get(host, empty)
 
             print(f"\nREGULAR REBOOT RESULTS:")
             print(f"  Total boots: {regular_data['boot_count']}")
 
-            if regular_data["boot_times"]:
-                regular_total_times = [bt["total"] for bt in regular_data["boot_times"]]
+            if len(regular_data["boot_times"]):
+                regular_total_times = regular_data["boot_times"][:, TOTAL]
                 regular_stats = self.calculate_statistics(regular_total_times)
 
                 print(f"  Samples analyzed: {len(regular_total_times)}")
@@ -493,6 +525,11 @@ class RebootLimitAnalyzer:
                     print(
                         f"  Range: {regular_stats['max'] - regular_stats['min']:.2f}s"
                     )
+                    print(
+                        f"  p50/p95/p99: {regular_stats['p50']:.2f}s / "
+                        f"{regular_stats['p95']:.2f}s / {regular_stats['p99']:.2f}s"
+                    )
+                self.print_trend(self.analyze_host(regular_data))
             else:
                 print("  No boot time data available")
                 regular_stats = None
@@ -500,8 +537,8 @@ class RebootLimitAnalyzer:
             print(f"\nKEXEC REBOOT RESULTS:")
             print(f"  Total boots: {kexec_data['boot_count']}")
 
-            if kexec_data["boot_times"]:
-                kexec_total_times = [bt["total"] for bt in kexec_data["boot_times"]]
+            if len(kexec_data["boot_times"]):
+                kexec_total_times = kexec_data["boot_times"][:, TOTAL]
                 kexec_stats = self.calculate_statistics(kexec_total_times)
 
                 print(f"  Samples analyzed: {len(kexec_total_times)}")
@@ -509,6 +546,11 @@ class RebootLimitAnalyzer:
                     print(f"  Mean: {kexec_stats['mean']:.2f}s")
                     print(f"  StdDev: {kexec_stats['stdev']:.2f}s")
                     print(f"  Range: {kexec_stats['max'] - kexec_stats['min']:.2f}s")
+                    print(
+                        f"  p50/p95/p99: {kexec_stats['p50']:.2f}s / "
+                        f"{kexec_stats['p95']:.2f}s / {kexec_stats['p99']:.2f}s"
+                    )
+                self.print_trend(self.analyze_host(kexec_data))
             else:
                 print("  No boot time data available")
                 kexec_stats = None
@@ -558,6 +600,23 @@ def main():
     parser.add_argument(
         "--no-plot", action="store_true", help="Skip plotting, only show summary"
     )
+    parser.add_argument(
+        "--trend-window",
+        type=int,
+        default=50,
+        help="Boots per window for rolling percentiles and drift (default: 50)",
+    )
+    parser.add_argument(
+        "--min-segment",
+        type=int,
+        default=10,
+        help="Minimum boots between detected change-points (default: 10)",
+    )
+    parser.add_argument(
+        "--json",
+        metavar="FILE",
+        help="Also write the full statistical analysis as JSON to FILE",
+    )
 
     args = parser.parse_args()
 
@@ -567,7 +626,9 @@ def main():
         sys.exit(1)
 
     # Create analyzer and load data
-    analyzer = RebootLimitAnalyzer(args.results_dir)
+    analyzer = RebootLimitAnalyzer(
+        args.results_dir, trend_window=args.trend_window, min_segment=args.min_segment
+    )
     analyzer.load_all_data()
 
     # Check if we have data (either single mode or comparison mode)
@@ -595,6 +656,11 @@ def main():
     # Print summary
     analyzer.print_summary()
 
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(analyzer.analysis_report(), f, indent=2)
+        print(f"\nSaved analysis to {args.json}")
+
     # Generate plots
     if not args.no_plot:
         try:
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Vectorized boot time loading and statistics for the reboot-limit workflow.
+
+Boot times are held as float arrays of shape (boots, 4) with the columns
+listed in COLUMNS, in boot order. All statistics operate on whole arrays
+with numpy so hosts with thousands of boots are analyzed in milliseconds.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+COLUMNS = ("kernel", "initrd", "userspace", "total")
+KERNEL, INITRD, USERSPACE, TOTAL = range(len(COLUMNS))
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+# The initrd component is missing on systems booted without an initrd.
+_STARTUP_RE = re.compile(
+    r"Startup finished in ([\d.]+)s \(kernel\) \+ "
+    r"(?:([\d.]+)s \(initrd\) \+ )?"
+    r"([\d.]+)s \(userspace\) = ([\d.]+)s"
+)
+
+
+def empty_boot_times() -> np.ndarray:
+    """An array with no boots, for hosts without systemd-analyze data."""
+    return np.empty((0, len(COLUMNS)))
+
+
+def parse_boot_times(text: str) -> np.ndarray:
+    """Parse all systemd-analyze startup lines in text into a (N, 4) array."""
+    matches = _STARTUP_RE.findall(text)
+    if not matches:
+        return empty_boot_times()
+    raw = np.array(matches)
+    raw[raw == ""] = "0"
+    return raw.astype(np.float64)
+
+
+def load_boot_times(analyze_file: Path) -> np.ndarray:
+    """Load a systemctl-analyze.txt file into a (N, 4) array."""
+    with open(analyze_file, "r", errors="replace") as f:
+        return parse_boot_times(f.read())
+
+
+def summarize(
+    times: np.ndarray, percentiles: Sequence[int] = DEFAULT_PERCENTILES
+) -> Dict[str, float]:
+    """Return min/max/mean/median/stdev and percentiles of a 1-D array."""
+    times = np.asarray(times, dtype=np.float64)
+    if times.size == 0:
+        return {}
+    stats = {
+        "min": float(times.min()),
+        "max": float(times.max()),
+        "mean": float(times.mean()),
+        "median": float(np.median(times)),
+        "stdev": float(times.std(ddof=1)) if times.size > 1 else 0.0,
+    }
+    for p, value in zip(percentiles, np.percentile(times, percentiles)):
+        stats[f"p{p}"] = float(value)
+    return stats
+
+
+def percentile_bands(
+    times: np.ndarray, window: int, percentiles: Sequence[int] = (5, 50, 95)
+) -> np.ndarray:
+    """
+    Rolling percentiles over boot index.
+
+    Returns an array of shape (len(percentiles), N - window + 1) where
+    column i covers boots i .. i + window - 1.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if times.size < window or window < 1:
+        return np.empty((len(percentiles), 0))
+    windows = sliding_window_view(times, window)
+    return np.percentile(windows, percentiles, axis=1)
+
+
+def linear_trend(times: np.ndarray) -> Dict[str, float]:
+    """Least squares fit of boot time against boot index."""
+    times = np.asarray(times, dtype=np.float64)
+    if times.size < 2:
+        return {}
+    x = np.arange(times.size, dtype=np.float64)
+    slope, intercept = np.polyfit(x, times, 1)
+    return {
+        "slope": float(slope),
+        "intercept": float(intercept),
+        "drift": float(slope * (times.size - 1)),
+    }
+
+
+def rolling_slope(times: np.ndarray, window: int) -> np.ndarray:
+    """
+    Least squares slope (seconds per boot) over each window of boots.
+
+    Uses running sums so the cost is O(N) regardless of the window size.
+    Element i covers boots i .. i + window - 1.
+    """
+    y = np.asarray(times, dtype=np.float64)
+    n = y.size
+    if window < 2 or n < window:
+        return np.empty(0)
+    k = np.arange(n, dtype=np.float64)
+    cs_y = np.concatenate(([0.0], np.cumsum(y)))
+    cs_ky = np.concatenate(([0.0], np.cumsum(k * y)))
+    start = np.arange(n - window + 1, dtype=np.float64)
+    sum_y = cs_y[window:] - cs_y[:-window]
+    # Sum of local_index * y, with local_index = k - start.
+    sum_xy = (cs_ky[window:] - cs_ky[:-window]) - start * sum_y
+    sum_x = window * (window - 1) / 2.0
+    sum_xx = (window - 1) * window * (2 * window - 1) / 6.0
+    return (window * sum_xy - sum_x * sum_y) / (window * sum_xx - sum_x**2)
+
+
+def _noise_variance(y: np.ndarray) -> float:
+    """Robust noise variance estimate from first differences (MAD)."""
+    if y.size < 3:
+        return float(np.var(y))
+    mad = np.median(np.abs(np.diff(y) - np.median(np.diff(y))))
+    sigma = mad / (0.6745 * np.sqrt(2.0))
+    return float(sigma**2) if sigma > 0 else float(np.var(y))
+
+
+def change_points(
+    times: np.ndarray, min_size: int = 10, penalty: Optional[float] = None
+) -> List[int]:
+    """
+    Detect shifts in mean boot time by binary segmentation.
+
+    Returns the sorted boot indices where a new segment starts. A split
+    is accepted when it reduces the squared error by more than penalty,
+    which defaults to a BIC style 2 * sigma^2 * log(N) with sigma
+    estimated robustly from the boot to boot differences.
+    """
+    y = np.asarray(times, dtype=np.float64)
+    n = y.size
+    if n < 2 * min_size:
+        return []
+    if penalty is None:
+        penalty = 2.0 * _noise_variance(y) * np.log(n)
+
+    cs = np.concatenate(([0.0], np.cumsum(y)))
+    cs2 = np.concatenate(([0.0], np.cumsum(y * y)))
+
+    def cost(a, b):
+        length = b - a
+        s = cs[b] - cs[a]
+        return (cs2[b] - cs2[a]) - s * s / length
+
+    found = []
+    segments = [(0, n)]
+    while segments:
+        a, b = segments.pop()
+        if b - a < 2 * min_size:
+            continue
+        splits = np.arange(a + min_size, b - min_size + 1)
+        gains = cost(a, b) - cost(a, splits) - cost(splits, b)
+        best = int(np.argmax(gains))
+        if gains[best] <= penalty:
+            continue
+        t = int(splits[best])
+        found.append(t)
+        segments.append((a, t))
+        segments.append((t, b))
+    return sorted(found)
+
+
+def segment_means(times: np.ndarray, points: Sequence[int]) -> List[float]:
+    """Mean boot time of each segment delimited by change points."""
+    y = np.asarray(times, dtype=np.float64)
+    return [float(seg.mean()) for seg in np.split(y, list(points)) if seg.size]
+
+
+def analyze(
+    boot_times: np.ndarray, window: int = 50, min_size: int = 10
+) -> Dict[str, object]:
+    """Full statistics for the total boot time column of one host/mode."""
+    total = boot_times[:, TOTAL] if boot_times.size else np.empty(0)
+    points = change_points(total, min_size=min_size)
+    slopes = rolling_slope(total, min(window, total.size))
+    return {
+        "samples": int(total.size),
+        "total": summarize(total),
+        "components": {
+            name: summarize(boot_times[:, idx]) if boot_times.size else {}
+            for idx, name in enumerate(COLUMNS[:TOTAL])
+        },
+        "trend": linear_trend(total),
+        "max_rolling_slope": float(np.abs(slopes).max()) if slopes.size else 0.0,
+        "change_points": points,
+        "segment_means": segment_means(total, points) if total.size else [],
+    }
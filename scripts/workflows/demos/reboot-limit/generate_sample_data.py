@@ -3,16 +3,29 @@
 
 """
 Generate sample reboot-limit data for testing the visualization.
-This is only for testing purposes.
+This is only for testing purposes. Use large --boots counts to benchmark
+analyze_results.py.
 """
 
+import argparse
 import os
 import random
 from pathlib import Path
 
 
-def generate_sample_data(results_dir: str, num_hosts: int = 2, num_boots: int = 50):
-    """Generate sample systemd-analyze data for testing."""
+def generate_sample_data(
+    results_dir: str,
+    num_hosts: int = 2,
+    num_boots: int = 50,
+    shift_at: int = 0,
+    shift: float = 0.0,
+):
+    """
+    Generate sample systemd-analyze data for testing.
+
+    If shift_at is set, every boot from that index on is slowed down by
+    shift seconds, which gives the change-point detection something to find.
+    """
     results_path = Path(results_dir)
 
     for i in range(num_hosts):
@@ -52,6 +65,9 @@ def generate_sample_data(results_dir: str, num_hosts: int = 2, num_boots: int =
                     userspace_base + random.uniform(-0.5, 0.5) + spike * 0.5
                 )
 
+                if shift_at and boot >= shift_at:
+                    userspace_time += shift
+
                 total_time = kernel_time + initrd_time + userspace_time
 
                 line = f"Startup finished in {kernel_time:.3f}s (kernel) + {initrd_time:.3f}s (initrd) + {userspace_time:.3f}s (userspace) = {total_time:.3f}s\n"
@@ -60,14 +76,41 @@ def generate_sample_data(results_dir: str, num_hosts: int = 2, num_boots: int =
         print(f"Generated sample data for {host_name}")
 
 
-if __name__ == "__main__":
-    import sys
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate sample reboot-limit data for testing"
+    )
+    parser.add_argument(
+        "results_dir",
+        nargs="?",
+        default="workflows/demos/reboot-limit/results",
+        help="Path to results directory (default: workflows/demos/reboot-limit/results)",
+    )
+    parser.add_argument("--hosts", type=int, default=2, help="Number of hosts")
+    parser.add_argument("--boots", type=int, default=50, help="Boots per host")
+    parser.add_argument(
+        "--comparison",
+        action="store_true",
+        help="Generate regular/ and kexec/ data for comparison mode",
+    )
+    parser.add_argument(
+        "--shift-at", type=int, default=0, help="Boot index of a boot time shift"
+    )
+    parser.add_argument(
+        "--shift", type=float, default=1.0, help="Size of the shift in seconds"
+    )
+    args = parser.parse_args()
+
+    print(f"Generating sample data in {args.results_dir}")
+    dirs = [args.results_dir]
+    if args.comparison:
+        dirs = [os.path.join(args.results_dir, m) for m in ("regular", "kexec")]
+    for results_dir in dirs:
+        generate_sample_data(
+            results_dir, args.hosts, args.boots, args.shift_at, args.shift
+        )
+    print("Sample data generation complete")
 
-    if len(sys.argv) > 1:
-        results_dir = sys.argv[1]
-    else:
-        results_dir = "workflows/demos/reboot-limit/results"
 
-    print(f"Generating sample data in {results_dir}")
-    generate_sample_data(results_dir)
-    print("Sample data generation complete")
+if __name__ == "__main__":
+    main()
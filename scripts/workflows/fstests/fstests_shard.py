@@ -0,0 +1,304 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+# Runtime aware fstests sharding for kdevops
+#
+# Splits the tests of one fstests section across several guests so that
+# each guest runs for about the same time, using the per test runtimes
+# recorded in check.time files of prior runs, and merges the results of
+# the shards back into a single section result.
+#
+# Example usage:
+#
+# Write the shard of the hosts testing xfs_crc, dev hosts get the same
+# tests as their baseline host:
+# ./fstests_shard.py split --section xfs_crc --hostfile hosts \
+#     --output-dir workflows/fstests/shards
+#
+# Split an explicit test list in 4 and print one LIMIT_TESTS line per shard:
+# ./fstests_shard.py split --section xfs_crc --tests tests.txt -n 4
+#
+# Merge the results of the shards:
+# ./fstests_shard.py merge merged/xfs_crc shard0/xfs_crc shard1/xfs_crc
+
+from lib import fstests
+import sys, os
+import argparse
+import re
+import shutil
+import xml.etree.ElementTree as ET
+
+TEST_NAME = re.compile(r"^\w+/\d+$")
+
+# Files of a section result directory merged instead of copied
+MERGED_FILES = ["check.time", "check.log", "result.xml"]
+
+
+def read_tests(path):
+    if path == "-":
+        lines = sys.stdin.read().split()
+    else:
+        with open(path, "r") as f:
+            lines = f.read().split()
+    return [test for test in lines if TEST_NAME.match(test)]
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return "%dh%02dm%02ds" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def split(args):
+    config = {}
+    if os.path.isfile(args.dotconfig):
+        config = fstests.get_config(args.dotconfig)
+
+    soak_duration = args.soak_duration
+    if soak_duration is None:
+        soak_duration = int(config.get("CONFIG_FSTESTS_SOAK_DURATION", "0").strip('"'))
+
+    names = []
+    # A/B testing compares the same tests on both kernels, so dev guests
+    # get the shard of their baseline guest instead of a shard of their own.
+    mirrors = {}
+    if args.hosts:
+        names = args.hosts.split(",")
+    elif args.hostfile:
+        if not config:
+            sys.stderr.write("%s is needed to map hosts to sections\n" % args.dotconfig)
+            return 1
+        dev_hosts = []
+        for host in fstests.get_hosts(args.hostfile, args.hostsection):
+            section = fstests.get_section(host, config)
+            if section == args.section:
+                names.append(host)
+            elif section == args.section + "_dev":
+                dev_hosts.append(host)
+        for host in dev_hosts:
+            if host.removesuffix("-dev") in names:
+                mirrors[host] = host.removesuffix("-dev")
+            else:
+                names.append(host)
+        if not names:
+            sys.stderr.write(
+                "No hosts in %s test section %s\n" % (args.hostfile, args.section)
+            )
+            return 1
+    else:
+        names = ["shard-%d" % idx for idx in range(args.shards)]
+
+    checktimes = fstests.load_checktimes(args.results, args.section)
+    if args.tests:
+        tests = read_tests(args.tests)
+    else:
+        tests = sorted(checktimes)
+    if not tests:
+        sys.stderr.write("No tests to shard for section %s\n" % args.section)
+        return 1
+
+    unknown = len([test for test in tests if test not in checktimes])
+    shards = fstests.shard_tests(
+        tests, len(names), checktimes, soak_duration, args.default_runtime
+    )
+
+    sys.stderr.write(
+        "Section %s: %d tests, %d without prior runtime, soak duration %ds\n"
+        % (args.section, len(tests), unknown, soak_duration)
+    )
+    for name, (total, shard) in zip(names, shards):
+        sys.stderr.write(
+            "%25s  %5d tests  %s\n" % (name, len(shard), format_duration(total))
+        )
+
+    for dev, baseline in mirrors.items():
+        sys.stderr.write("%25s  same tests as %s\n" % (dev, baseline))
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        by_name = dict(zip(names, shards))
+        for dev, baseline in mirrors.items():
+            by_name[dev] = by_name[baseline]
+        for name, (total, shard) in by_name.items():
+            path = os.path.join(args.output_dir, name)
+            with open(path + ".tmp", "w") as f:
+                f.write("".join(test + "\n" for test in shard))
+            os.replace(path + ".tmp", path)
+    else:
+        for total, shard in shards:
+            sys.stdout.write(" ".join(shard) + "\n")
+    return 0
+
+
+def merge_checktime(dest, sources):
+    times = {}
+    for src in sources:
+        path = os.path.join(src, "check.time")
+        if not os.path.isfile(path):
+            continue
+        with open(path, "r") as f:
+            for line in f:
+                elems = line.split()
+                if len(elems) == 2:
+                    times[elems[0]] = elems[1]
+    if times:
+        with open(os.path.join(dest, "check.time"), "w") as f:
+            for test in sorted(times):
+                f.write("%s %s\n" % (test, times[test]))
+
+
+def merge_checklog(dest, sources):
+    logs = [
+        os.path.join(src, "check.log")
+        for src in sources
+        if os.path.isfile(os.path.join(src, "check.log"))
+    ]
+    if not logs:
+        return
+    with open(os.path.join(dest, "check.log"), "w") as out:
+        for log in logs:
+            with open(log, "r") as f:
+                shutil.copyfileobj(f, out)
+
+
+def merge_xunit(dest, sources):
+    merged = None
+    testcases = []
+    for src in sources:
+        path = os.path.join(src, "result.xml")
+        if not os.path.isfile(path):
+            continue
+        suite = ET.parse(path).getroot()
+        if suite.tag != "testsuite":
+            suite = suite.find("testsuite")
+        cases = suite.findall("testcase")
+        for case in cases:
+            suite.remove(case)
+        testcases += cases
+        if merged is None:
+            merged = suite
+    if merged is None:
+        return
+
+    testcases.sort(key=lambda case: case.get("name", ""))
+    merged.extend(testcases)
+    merged.set("tests", str(len(testcases)))
+    merged.set(
+        "failures", str(len([c for c in testcases if c.find("failure") is not None]))
+    )
+    merged.set(
+        "errors", str(len([c for c in testcases if c.find("error") is not None]))
+    )
+    merged.set(
+        "skipped", str(len([c for c in testcases if c.find("skipped") is not None]))
+    )
+    merged.set("time", str(sum(int(float(c.get("time", "0"))) for c in testcases)))
+    ET.ElementTree(merged).write(
+        os.path.join(dest, "result.xml"), encoding="utf-8", xml_declaration=True
+    )
+
+
+def merge(args):
+    for src in args.sources:
+        if not os.path.isdir(src):
+            sys.stderr.write("%s is not a directory\n" % src)
+            return 1
+    os.makedirs(args.dest, exist_ok=True)
+
+    # Per test files (*.out.bad, *.full, *.dmesg) only exist in the shard
+    # which ran the test, so they are simply copied over.
+    for src in args.sources:
+        for root, dirs, files in os.walk(src):
+            rel = os.path.relpath(root, src)
+            for fname in files:
+                if rel == "." and fname in MERGED_FILES:
+                    continue
+                os.makedirs(os.path.join(args.dest, rel), exist_ok=True)
+                shutil.copy2(
+                    os.path.join(root, fname), os.path.join(args.dest, rel, fname)
+                )
+
+    merge_checktime(args.dest, args.sources)
+    merge_checklog(args.dest, args.sources)
+    merge_xunit(args.dest, args.sources)
+    return 0
+
+
+def _main():
+    topdir = os.path.abspath(os.path.dirname(__file__) + "/../../../")
+    parser = argparse.ArgumentParser(description="fstests runtime aware sharding")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = subparsers.add_parser(
+        "split", help="Split the tests of a section into balanced shards"
+    )
+    split_parser.add_argument(
+        "--section", required=True, help="fstests section to shard, ie: xfs_crc"
+    )
+    split_parser.add_argument(
+        "--tests",
+        help="File with the tests to shard, - for stdin. Defaults to all tests "
+        "with a prior runtime for the section.",
+    )
+    split_parser.add_argument(
+        "-n",
+        "--shards",
+        type=int,
+        default=2,
+        help="Number of shards when no hosts are given (default: 2)",
+    )
+    split_parser.add_argument(
+        "--hosts", help="Comma separated hosts, one shard is created per host"
+    )
+    split_parser.add_argument(
+        "--hostfile", help="Ansible hostfile, use all hosts testing the section"
+    )
+    split_parser.add_argument(
+        "--hostsection",
+        default="all",
+        help="The name of the section to read hosts from (default: all)",
+    )
+    split_parser.add_argument(
+        "--results",
+        default=topdir + "/workflows/fstests/results",
+        help="Directory searched for check.time files",
+    )
+    split_parser.add_argument(
+        "--dotconfig",
+        default=topdir + "/.config",
+        help="kdevops .config, used for the soak duration",
+    )
+    split_parser.add_argument(
+        "--soak-duration",
+        type=int,
+        help="SOAK_DURATION in seconds (default: CONFIG_FSTESTS_SOAK_DURATION)",
+    )
+    split_parser.add_argument(
+        "--default-runtime",
+        type=int,
+        help="Seconds assumed for tests without history "
+        "(default: median of known runtimes)",
+    )
+    split_parser.add_argument(
+        "--output-dir",
+        help="Write one test list per shard, named after the host, into this "
+        "directory instead of printing them",
+    )
+
+    merge_parser = subparsers.add_parser(
+        "merge", help="Merge the section results of all shards"
+    )
+    merge_parser.add_argument("dest", help="Merged section result directory")
+    merge_parser.add_argument(
+        "sources", nargs="+", help="Section result directories of each shard"
+    )
+
+    args = parser.parse_args()
+    if args.command == "split":
+        if args.shards < 1:
+            parser.error("--shards must be at least 1")
+        return split(args)
+    return merge(args)
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -6,19 +6,30 @@
 # Example usage:
 #
 # ./fstests_watchdog.py kdevops/hosts all
+#
+# Keep watching all hosts, updating the table in place and the state in a
+# JSON file other tools can read:
+#
+# ./fstests_watchdog.py --follow --status-file status.json kdevops/hosts all
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from lib import kssh
 from lib import fstests
 from lib import systemd_remote
+from lib import crash_decode
 from lib.crash import KernelCrashWatchdog
 import sys, os, grp
+import json
+import logging
+import threading
+import time
 import configparser
 import argparse
 from itertools import chain
 
 
-def print_fstest_host_status(host, verbose, use_remote, use_ssh, basedir, config):
+def get_fstest_host_status(host, use_remote, use_ssh, basedir, config, reset_host=True):
     if "CONFIG_DEVCONFIG_ENABLE_SYSTEMD_JOURNAL_REMOTE" in config and not use_ssh:
         configured_kernel = None
         if "CONFIG_WORKFLOW_LINUX_DISTRO" in config:
@@ -47,7 +58,7 @@ def print_fstest_host_status(host, verbose, use_remote, use_ssh, basedir, config
         kernel = kssh.get_uname(host).rstrip()
 
     section = fstests.get_section(host, config)
-    (last_test, last_test_time, current_time_str, delta_seconds, stall_suspect) = (
+    last_test, last_test_time, current_time_str, delta_seconds, stall_suspect = (
         fstests.get_fstest_host(
             use_remote, use_ssh, host, basedir, kernel, section, config
         )
@@ -127,7 +138,7 @@ def print_fstest_host_status(host, verbose, use_remote, use_ssh, basedir, config
             pass  # If SSH fails, keep the None values
 
     checktime = fstests.get_checktime(host, basedir, kernel, section, last_test)
-    percent_done = (delta_seconds * 100 / checktime) if checktime > 0 else 0
+    percent_done = ((delta_seconds or 0) * 100 / checktime) if checktime > 0 else 0
 
     stall_str = "OK"
     if stall_suspect:
@@ -138,7 +149,7 @@ def print_fstest_host_status(host, verbose, use_remote, use_ssh, basedir, config
 
     crash_state = "OK"
     watchdog = KernelCrashWatchdog(
-        host_name=host, decode_crash=True, reset_host=True, save_warnings=True
+        host_name=host, decode_crash=True, reset_host=reset_host, save_warnings=True
     )
     crash_file, warning_file = watchdog.check_and_reset_host()
     if crash_file:
@@ -146,36 +157,225 @@ def print_fstest_host_status(host, verbose, use_remote, use_ssh, basedir, config
     elif warning_file:
         crash_state = "WARNING"
 
+    soak_duration_seconds = int(
+        config.get("CONFIG_FSTESTS_SOAK_DURATION", "0").strip('"')
+    )
+    uses_soak = fstests.fstests_test_uses_soak_duration(last_test or "")
+
+    return {
+        "host": host,
+        "kernel": kernel,
+        "section": section,
+        "last_test": last_test,
+        "last_test_time": last_test_time,
+        "current_time": current_time_str,
+        "delta_seconds": delta_seconds or 0,
+        "checktime": checktime or 0,
+        "percent_done": percent_done,
+        "soaking": uses_soak and soak_duration_seconds != 0,
+        "stall_suspect": stall_suspect,
+        "stall_status": stall_str,
+        "crash_status": crash_state,
+    }
+
+
+def format_host_status(status):
+    soaking_str = "(soak)" if status["soaking"] else ""
+    percent_done_str = "%.0f%% %s" % (status["percent_done"], soaking_str)
+    return (
+        f"{status['host']:>25}  {status['last_test'] or 'None':>15}  "
+        f"{percent_done_str:>15}  {status['delta_seconds']:>12}  "
+        f"{status['checktime']:>17}  {status['stall_status']:>13}  "
+        f"{status['kernel']:<38}  {status['crash_status']:<10}"
+    )
+
+
+def print_fstest_host_status(status, verbose):
     if not verbose:
-        soak_duration_seconds = int(
-            config.get("CONFIG_FSTESTS_SOAK_DURATION", "0").strip('"')
-        )
-        uses_soak = fstests.fstests_test_uses_soak_duration(last_test or "")
-        is_soaking = uses_soak and soak_duration_seconds != 0
-        soaking_str = "(soak)" if is_soaking else ""
-        percent_done_str = "%.0f%% %s" % (percent_done, soaking_str)
-        if delta_seconds is None:
-            delta_seconds = 0
-        if checktime is None:
-            checktime = 0
-        sys.stdout.write(
-            f"{host:>25}  {last_test or 'None':>15}  {percent_done_str:>15}  "
-            f"{delta_seconds:>12}  {checktime:>17}  {stall_str:>13}  "
-            f"{kernel:<38}  {crash_state:<10}\n"
-        )
+        sys.stdout.write(format_host_status(status) + "\n")
         return
 
-    sys.stdout.write("Host               : %s\n" % (host))
-    sys.stdout.write("Last    test       : %s\n" % (last_test))
-    sys.stdout.write("Last    test   time: %s\n" % (last_test_time))
-    sys.stdout.write("Current system time: %s\n" % (current_time_str))
+    delta_seconds = status["delta_seconds"]
+    sys.stdout.write("Host               : %s\n" % (status["host"]))
+    sys.stdout.write("Last    test       : %s\n" % (status["last_test"]))
+    sys.stdout.write("Last    test   time: %s\n" % (status["last_test_time"]))
+    sys.stdout.write("Current system time: %s\n" % (status["current_time"]))
     sys.stdout.write("Delta: %d total second\n" % (delta_seconds))
     sys.stdout.write("\t%d minutes\n" % (delta_seconds / 60))
     sys.stdout.write("\t%d seconds\n" % (delta_seconds % 60))
     sys.stdout.write(
-        "Timeout-status: %s\n" % ("POSSIBLE-STALL" if stall_suspect else "OK")
+        "Timeout-status: %s\n" % ("POSSIBLE-STALL" if status["stall_suspect"] else "OK")
     )
-    sys.stdout.write("Crash-status  : %s\n" % crash_state)
+    sys.stdout.write("Crash-status  : %s\n" % status["crash_status"])
+
+
+def write_status_file(path, statuses, journal_method, soak_duration_seconds):
+    """Atomically write the state of all hosts as JSON for other tools."""
+    state = {
+        "updated": datetime.now().isoformat(timespec="seconds"),
+        "journal_method": journal_method,
+        "soak_duration": soak_duration_seconds,
+        "hosts": statuses,
+    }
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+class TableView:
+    """
+    The host table on a terminal. Rows are redrawn in place, and only when
+    they change, with a line below them for the last log message. When not
+    writing to a terminal changed rows are printed as new lines instead.
+    """
+
+    def __init__(self, hosts, header):
+        self.hosts = hosts
+        self.rows = {host: "%25s  polling..." % host for host in hosts}
+        self.tty = sys.stdout.isatty()
+        self.lock = threading.Lock()
+        sys.stdout.write(header)
+        if self.tty:
+            for host in hosts:
+                sys.stdout.write(self.rows[host] + "\n")
+            sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    def _redraw(self, up, line):
+        # The cursor sits on the line below the message line.
+        sys.stdout.write("\033[%dA\r\033[2K%s\033[%dB\r" % (up, line, up))
+        sys.stdout.flush()
+
+    def update(self, host, row):
+        with self.lock:
+            if self.rows[host] == row:
+                return
+            self.rows[host] = row
+            if not self.tty:
+                sys.stdout.write(row + "\n")
+                sys.stdout.flush()
+                return
+            self._redraw(len(self.hosts) - self.hosts.index(host) + 1, row)
+
+    def message(self, line):
+        with self.lock:
+            if not self.tty:
+                sys.stderr.write(line + "\n")
+                return
+            self._redraw(1, line)
+
+
+class TableViewLogHandler(logging.Handler):
+    """Show log records on the message line of a TableView."""
+
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+
+    def emit(self, record):
+        try:
+            self.view.message(self.format(record).splitlines()[0])
+        except Exception:
+            self.handleError(record)
+
+
+def follow(hosts, args, basedir, config, header, journal_method, soak_duration_seconds):
+    """
+    Poll all hosts concurrently until interrupted. Each host is polled on
+    its own schedule, every --interval seconds, backing off exponentially
+    up to --max-interval while polling it fails.
+    """
+    view = TableView(hosts, header)
+    # Log records written to the terminal would scroll the table away.
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    if view.tty:
+        handler = TableViewLogHandler(view)
+        handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        root.handlers = [handler]
+    statuses = {}
+    failures = {host: 0 for host in hosts}
+    next_poll = {host: time.monotonic() for host in hosts}
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        try:
+            while True:
+                now = time.monotonic()
+                for host in hosts:
+                    if host not in pending.values() and next_poll[host] <= now:
+                        future = executor.submit(
+                            get_fstest_host_status,
+                            host,
+                            args.use_systemd_remote,
+                            args.use_ssh,
+                            basedir,
+                            config,
+                            args.reset_host,
+                        )
+                        pending[future] = host
+
+                timeout = max(
+                    0.1,
+                    min(
+                        [next_poll[h] for h in hosts if h not in pending.values()]
+                        or [now + args.interval]
+                    )
+                    - now,
+                )
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host = pending.pop(future)
+                    try:
+                        status = future.result()
+                    except (Exception, SystemExit) as e:
+                        status = None
+                        error = str(e) or type(e).__name__
+                    # A host which has not started a test yet is idle, not
+                    # failing to respond, unless reading its journal timed out.
+                    if status is None or (
+                        status["stall_status"] == "Timeout"
+                        and (
+                            status["last_test"] is not None
+                            or status["kernel"] == "Timeout"
+                        )
+                    ):
+                        failures[host] += 1
+                    else:
+                        failures[host] = 0
+                    delay = min(
+                        args.max_interval, args.interval * (2 ** failures[host])
+                    )
+                    next_poll[host] = time.monotonic() + delay
+                    if status is None:
+                        status = dict(statuses.get(host, {"host": host}))
+                        status["error"] = error
+                        row = "%25s  poll failed, retrying in %ds: %s" % (
+                            host,
+                            delay,
+                            error,
+                        )
+                    else:
+                        row = format_host_status(status)
+                    status["polled"] = datetime.now().isoformat(timespec="seconds")
+                    status["next_poll_seconds"] = delay
+                    status["failed_polls"] = failures[host]
+                    statuses[host] = status
+                    view.update(host, row)
+                    if args.status_file:
+                        write_status_file(
+                            args.status_file,
+                            statuses,
+                            journal_method,
+                            soak_duration_seconds,
+                        )
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            sys.stdout.write("\n")
+        finally:
+            root.handlers = saved_handlers
 
 
 def _main():
@@ -215,7 +415,48 @@ def _main():
         action="store_const",
         help="Force to only use ssh for journals.",
     )
+    parser.add_argument(
+        "--follow",
+        const=True,
+        default=False,
+        action="store_const",
+        help="Keep polling the hosts and update the table in place.",
+    )
+    parser.add_argument(
+        "--reset-host",
+        const=True,
+        default=False,
+        action="store_const",
+        help="Reset crashed hosts with --follow, which otherwise only reports "
+        "them. Hosts are always reset without --follow.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=30,
+        help="Seconds between polls of a host with --follow (default: 30)",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=int,
+        default=600,
+        help="Longest backoff in seconds for hosts failing to respond with "
+        "--follow (default: 600)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Hosts probed concurrently (default: 8)",
+    )
+    parser.add_argument(
+        "--status-file",
+        type=str,
+        help="Also write the state of all hosts to this JSON file",
+    )
     args = parser.parse_args()
+    if args.follow and args.verbose:
+        parser.error("--verbose can not be used with --follow")
 
     if not os.path.isfile(args.hostfile):
         sys.stdout.write("%s does not exist\n" % (args.hostfile))
@@ -247,15 +488,11 @@ def _main():
             sys.exit(1)
 
     hosts = fstests.get_hosts(args.hostfile, args.hostsection)
-    sys.stdout.write(
+    header = (
         f"{'Hostname':>25}  {'Test-name':>15}  {'Completion %':>15}  "
         f"{'runtime(s)':>12}  {'last-runtime(s)':>17}  {'Stall-status':>13}  "
         f"{'Kernel':<38}  {'Crash-status':<10}\n"
     )
-    for h in hosts:
-        print_fstest_host_status(
-            h, args.verbose, args.use_systemd_remote, args.use_ssh, basedir, config
-        )
 
     soak_duration_seconds = int(
         config.get("CONFIG_FSTESTS_SOAK_DURATION", "0").strip('"')
@@ -264,9 +501,48 @@ def _main():
     if "CONFIG_DEVCONFIG_ENABLE_SYSTEMD_JOURNAL_REMOTE" in config and not args.use_ssh:
         journal_method = "systemd-journal-remote"
 
+    if args.follow:
+        sys.stdout.write("%25s%20s\n" % ("Journal-method", "Soak-duration(s)"))
+        sys.stdout.write("%25s%20d\n\n" % (journal_method, soak_duration_seconds))
+        follow(
+            hosts,
+            args,
+            basedir,
+            config,
+            header,
+            journal_method,
+            soak_duration_seconds,
+        )
+        crash_decode.wait_for_pending_decodes()
+        return 0
+
+    # Probe all hosts concurrently, but print them in order.
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        statuses = list(
+            executor.map(
+                lambda h: get_fstest_host_status(
+                    h, args.use_systemd_remote, args.use_ssh, basedir, config
+                ),
+                hosts,
+            )
+        )
+    if not args.verbose:
+        sys.stdout.write(header)
+    for status in statuses:
+        print_fstest_host_status(status, args.verbose)
+    if args.status_file:
+        write_status_file(
+            args.status_file,
+            {status["host"]: status for status in statuses},
+            journal_method,
+            soak_duration_seconds,
+        )
+
     sys.stdout.write("\n%25s%20s\n" % ("Journal-method", "Soak-duration(s)"))
     sys.stdout.write("%25s%20d\n" % (journal_method, soak_duration_seconds))
+    crash_decode.wait_for_pending_decodes()
+    return 0
 
 
 if __name__ == "__main__":
-    ret = _main()
+    sys.exit(_main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Benchmark the kernel log scanning of the crash watchdog over recorded
+console logs, journal dumps or saved journal-*.crash files.
+
+For each log the throughput in MB/s of normalizing it, detecting crashes
+and corruption and extracting the kernel snippet is reported. Unless
+--no-reference is given the snippet is also extracted with the original
+per line, per pattern scan, to check both agree and to show the speedup.
+
+Example usage:
+
+./crash_scan_bench.py crashes/*/journal-*.crash console.log
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from lib import crash
+from lib.crash import KernelCrashWatchdog
+
+
+def reference_normalize(log_content):
+    clean_lines = []
+    for line in log_content.splitlines():
+        clean = re.sub(r"^[A-Z][a-z]{2}\s+\d+\s+\d{2}:\d{2}:\d{2}\s+[\w\-.]+", "", line)
+        clean_lines.append(clean.strip())
+    return clean_lines
+
+
+def reference_extract(lines, context_patterns, ignore_patterns):
+    """The scan extract_kernel_snippet() used to do, returns the line index."""
+    benign_regexes = [re.compile(p) for p in ignore_patterns]
+    for pattern in context_patterns:
+        for i, line in enumerate(lines):
+            if re.search(pattern, line):
+                if any(p.search(line) for p in benign_regexes):
+                    continue
+                return i
+    return -1
+
+
+def best_time(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        crash.normalize_text.cache_clear()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def mb_per_sec(size, seconds):
+    if seconds <= 0:
+        return float("inf")
+    return size / seconds / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crash log scanning")
+    parser.add_argument("logs", nargs="+", help="Console or journal log files")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per measurement, the best is reported (default: 3)",
+    )
+    parser.add_argument(
+        "--no-reference",
+        action="store_true",
+        help="Do not run the original scan for comparison",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        watchdog = KernelCrashWatchdog(
+            host_name="bench", output_dir=tmpdir, reset_host=False
+        )
+    context_patterns = (
+        watchdog.CRASH_PATTERNS
+        + watchdog.FILESYSTEM_CORRUPTION_PATTERNS
+        + watchdog.WARNINGS
+    )
+    ignore_patterns = watchdog.BENIGN_WARNINGS
+
+    sys.stdout.write(
+        f"{'Log':<40} {'MB':>8} {'normalize':>10} {'detect':>10} "
+        f"{'extract':>10} {'reference':>10} {'speedup':>8}\n"
+    )
+    mismatches = 0
+    total_size = 0
+    total_time = 0.0
+    for path in args.logs:
+        with open(path, "r", errors="replace") as f:
+            text = f.read()
+        size = len(text.encode())
+        total_size += size
+
+        t_norm, lines = best_time(
+            lambda: watchdog.normalize_kernel_snippet(text), args.repeat
+        )
+        normalized = "\n".join(lines)
+        t_detect, _ = best_time(
+            lambda: (
+                watchdog.detect_crash(normalized),
+                watchdog.detect_filesystem_corruption(normalized),
+            ),
+            args.repeat,
+        )
+        t_extract, (snippet, key_line) = best_time(
+            lambda: watchdog.extract_kernel_snippet(
+                text, context_patterns, ignore_patterns
+            ),
+            args.repeat,
+        )
+        total_time += t_extract
+
+        reference = "-"
+        speedup = "-"
+        if not args.no_reference:
+            t_ref, ref_idx = best_time(
+                lambda: reference_extract(
+                    reference_normalize(text), context_patterns, ignore_patterns
+                ),
+                1,
+            )
+            ref_key = (
+                reference_normalize(text)[ref_idx].strip() if ref_idx >= 0 else None
+            )
+            if ref_key != key_line:
+                mismatches += 1
+                sys.stderr.write(
+                    f"{path}: key line differs\n  new: {key_line}\n  ref: {ref_key}\n"
+                )
+            reference = f"{mb_per_sec(size, t_ref):.1f}"
+            speedup = f"{t_ref / t_extract:.1f}x" if t_extract else "-"
+
+        name = path if len(path) <= 40 else "..." + path[-37:]
+        sys.stdout.write(
+            f"{name:<40} {size / 1e6:>8.2f} {mb_per_sec(size, t_norm):>10.1f} "
+            f"{mb_per_sec(len(normalized), t_detect):>10.1f} "
+            f"{mb_per_sec(size, t_extract):>10.1f} {reference:>10} {speedup:>8}\n"
+        )
+
+    sys.stdout.write(
+        f"\nextract_kernel_snippet: {total_size / 1e6:.2f} MB at "
+        f"{mb_per_sec(total_size, total_time):.1f} MB/s (throughput in MB/s)\n"
+    )
+    if mismatches:
+        sys.stderr.write(f"{mismatches} logs gave a different key line\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
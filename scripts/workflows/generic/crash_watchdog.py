@@ -17,6 +17,7 @@ import yaml
 from datetime import datetime, timedelta
 from pathlib import Path
 from lib.crash import KernelCrashWatchdog
+from lib import crash_decode
 
 # Configure logging
 logging.basicConfig(
@@ -207,6 +208,9 @@ Examples:
             run_crash_watchdog_all_hosts(args)
         )
 
+    # Crash logs are decoded in the background while hosts are reset
+    crash_decode.wait_for_pending_decodes()
+
     if warnings_detected:
         logger.warning("Kernel warnings detected in one or more hosts")
 
@@ -21,6 +21,10 @@ import getpass
 import hashlib
 import qrcode
 import io
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from lib import crash_decode
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +35,90 @@ logger = logging.getLogger("crash_watchdog")
 EXTRA_VARS_FILE = "extra_vars.yaml"
 REMOTE_JOURNAL_DIR = "/var/log/journal/remote"
 
+# Leading timestamp and hostname of journal lines, ie: 'Oct 01 23:30:21 host'.
+# [^\S\n] is \s without newlines so the whole log is normalized in one pass.
+JOURNAL_PREFIX_RE = re.compile(
+    r"^[A-Z][a-z]{2}[^\S\n]+\d+[^\S\n]+\d{2}:\d{2}:\d{2}[^\S\n]+[\w\-.]+", re.M
+)
+
+REGEX_META = set(".^$*+?{}[]|()\\")
+
+
+def literal_prefix(pattern):
+    """
+    Return the literal text every match of pattern starts with, or "" if
+    there is none. Used to find candidate matches with str.find(), which
+    is much faster than running the regex over the whole log.
+    """
+    if "|" in pattern:
+        return ""
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                c = pattern[i + 1]
+                i += 1
+            else:
+                break
+        elif c in REGEX_META:
+            break
+        prefix.append(c)
+        i += 1
+    # A quantifier makes the last literal character optional.
+    if i < len(pattern) and pattern[i] in "*?{" and prefix:
+        prefix.pop()
+    return "".join(prefix)
+
+
+class PatternSet:
+    """
+    A list of regular expressions compiled once, in priority order.
+
+    Patterns must not match across lines. Each pattern is looked up
+    through its literal prefix with str.find() and only verified with the
+    regex where the prefix occurs.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        self.regexes = [re.compile(p) for p in self.patterns]
+        self.prefixes = [literal_prefix(p) for p in self.patterns]
+
+    def finditer(self, idx, text):
+        """Yield the start offsets of matches of pattern idx in text."""
+        regex = self.regexes[idx]
+        prefix = self.prefixes[idx]
+        if not prefix:
+            for m in regex.finditer(text):
+                yield m.start()
+            return
+        pos = text.find(prefix)
+        while pos != -1:
+            if regex.match(text, pos):
+                yield pos
+            pos = text.find(prefix, pos + 1)
+
+    def search(self, text):
+        """True if any pattern matches text."""
+        for idx in range(len(self.patterns)):
+            for _ in self.finditer(idx, text):
+                return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def pattern_set(patterns):
+    """Return the PatternSet for a tuple of patterns, compiled only once."""
+    return PatternSet(patterns)
+
+
+@lru_cache(maxsize=4)
+def normalize_text(text):
+    """Strip journal timestamps and hostnames, returning a tuple of lines."""
+    return tuple(line.strip() for line in JOURNAL_PREFIX_RE.sub("", text).splitlines())
+
 
 class KernelCrashWatchdog:
     CRASH_PATTERNS = [
@@ -252,6 +340,11 @@ class KernelCrashWatchdog:
         "xfs/798",
     ]
 
+    CRASH_SET = pattern_set(tuple(CRASH_PATTERNS))
+    WARNING_SET = pattern_set(tuple(WARNINGS))
+    BENIGN_SET = pattern_set(tuple(BENIGN_WARNINGS))
+    FILESYSTEM_CORRUPTION_SET = pattern_set(tuple(FILESYSTEM_CORRUPTION_PATTERNS))
+
     def __init__(
         self,
         host_name=None,
@@ -313,15 +406,9 @@ class KernelCrashWatchdog:
         # Allow both string or list inputs
         if isinstance(log_content, list):
             log_content = "\n".join(log_content)
-        # Strip timestamps + hostnames from all lines
-        clean_lines = []
-        for line in log_content.splitlines():
-            # Remove leading timestamps and hostnames (e.g., 'Oct 01 23:30:21 host kernel: ...')
-            clean = re.sub(
-                r"^[A-Z][a-z]{2}\s+\d+\s+\d{2}:\d{2}:\d{2}\s+[\w\-.]+", "", line
-            )
-            clean_lines.append(clean.strip())
-        return clean_lines
+        # Strip timestamps + hostnames from all lines, the result is cached
+        # as the same log is often normalized more than once.
+        return list(normalize_text(log_content))
 
     def get_qr_ascii(self, content, invert=True):
         """Return the ASCII QR code as a string."""
@@ -681,18 +768,12 @@ class KernelCrashWatchdog:
     def detect_crash(self, log_content):
         if not log_content:
             return False
-        for pattern in self.CRASH_PATTERNS:
-            if re.search(pattern, log_content):
-                return True
-        return False
+        return self.CRASH_SET.search(log_content)
 
     def detect_filesystem_corruption(self, log_content):
         if not log_content:
             return False
-        for pattern in self.FILESYSTEM_CORRUPTION_PATTERNS:
-            if re.search(pattern, log_content):
-                return True
-        return False
+        return self.FILESYSTEM_CORRUPTION_SET.search(log_content)
 
     def infer_fstests_state(self, log_content):
         current_test = None
@@ -720,12 +801,8 @@ class KernelCrashWatchdog:
         for test, logs in self.test_logs.items():
             if test in self.INTENTIONAL_CORRUPTION_TESTS:
                 self.intentional_corruption_tests_seen.add(test)
-            else:
-                for pattern in self.FILESYSTEM_CORRUPTION_PATTERNS:
-                    for line in logs:
-                        if re.search(pattern, line):
-                            self.unexpected_corrupting_tests.add(test)
-                            break
+            elif self.FILESYSTEM_CORRUPTION_SET.search("\n".join(logs)):
+                self.unexpected_corrupting_tests.add(test)
 
         self.is_an_fstests = bool(self.test_logs)
         if self.test_logs:
@@ -746,23 +823,23 @@ class KernelCrashWatchdog:
         if self.full_log:
             return log_content, None
 
-        benign_regexes = None
-        if ignore_patterns:
-            benign_regexes = [re.compile(p) for p in ignore_patterns]
-
         lines = self.normalize_kernel_snippet(log_content)
+        text = "\n".join(lines)
+        # Offsets in text where each line starts, to map matches to lines.
+        line_starts = list(accumulate((len(line) + 1 for line in lines), initial=0))
+
+        context_set = pattern_set(tuple(context_patterns))
+        benign_set = pattern_set(tuple(ignore_patterns)) if ignore_patterns else None
+
+        # The first line matching the first pattern in priority order wins.
         issue_line_idx = -1
-        issue_pattern = None
-
-        for pattern in context_patterns:
-            for i, line in enumerate(lines):
-                if re.search(pattern, line):
-                    if ignore_patterns and benign_regexes:
-                        if any(p.search(line) for p in benign_regexes):
-                            continue
-                    issue_line_idx = i
-                    issue_pattern = pattern
-                    break
+        for idx in range(len(context_set.patterns)):
+            for pos in context_set.finditer(idx, text):
+                i = bisect_right(line_starts, pos) - 1
+                if benign_set and benign_set.search(lines[i]):
+                    continue
+                issue_line_idx = i
+                break
             if issue_line_idx != -1:
                 break
 
@@ -776,12 +853,12 @@ class KernelCrashWatchdog:
 
         return f"{crash_context}\n\nconsole line number: {end_idx}", key_log_line
 
-    def decode_log_output(self, log_file):
+    def _crash_decoder(self):
         if not self.decode_crash:
-            return
+            return None
 
         if not self.topdir_path:
-            return
+            return None
 
         decode_script = os.path.join(
             self.topdir_path, "linux/scripts/decode_stacktrace.sh"
@@ -790,25 +867,30 @@ class KernelCrashWatchdog:
 
         if not (os.path.exists(decode_script) and os.path.exists(vmlinux_path)):
             logger.info("Skipping crash decode: required files not found")
-            return
+            return None
 
-        try:
-            logger.info("Decoding crash log with decode_stacktrace.sh...")
-            base, ext = os.path.splitext(log_file)
-            decoded_file = f"{base}.decoded{ext}"
-            with open(log_file, "r") as log_input, open(
-                decoded_file, "w"
-            ) as log_output:
-                subprocess.run(
-                    [decode_script, vmlinux_path],
-                    stdin=log_input,
-                    stdout=log_output,
-                    stderr=subprocess.STDOUT,
-                    check=True,
-                )
-            logger.info(f"Decoded kernel log saved to: {decoded_file}")
-        except subprocess.SubprocessError as e:
-            logger.warning(f"Failed to decode kernel log output: {e}")
+        return crash_decode.get_decoder(vmlinux_path, decode_script)
+
+    def decode_log_output(self, log_file):
+        """Decode log_file and return the decoded file path, None on failure."""
+        decoder = self._crash_decoder()
+        if decoder is None:
+            return None
+        logger.info("Decoding crash log...")
+        return decoder.decode_logged(log_file)
+
+    def decode_log_output_async(self, log_file):
+        """
+        Queue log_file for decoding in the background so the host reset is
+        not delayed. Returns a Future for the decoded file path, or None if
+        there is nothing to decode with. Use
+        crash_decode.wait_for_pending_decodes() to wait for all of them.
+        """
+        decoder = self._crash_decoder()
+        if decoder is None:
+            return None
+        logger.info(f"Queued crash log {log_file} for decoding")
+        return decoder.submit(log_file)
 
     def save_log(self, kernel_snippet, context, key_line=None):
         if not kernel_snippet or not key_line:
@@ -1041,7 +1123,7 @@ class KernelCrashWatchdog:
         # This can be a crash or an unexpected filesystem corruption
         log_file = self.save_log(kernel_snippet, issue_context, key_log_line)
         if log_file:  # Only decode and reset if we actually saved a new crash
-            self.decode_log_output(log_file)
+            self.decode_log_output_async(log_file)
             self.reset_host_now()
             self.wait_for_ssh()
 
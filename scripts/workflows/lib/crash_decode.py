@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+
+"""
+Asynchronous kernel crash decoding with a persistent symbol cache.
+
+decode_stacktrace.sh runs addr2line against vmlinux for every frame of
+every crash, and the watchdog used to wait for it before resetting the
+host. This module resolves "func+0xoff/0xlen" frames of the built-in
+kernel image itself:
+
+  - frames are resolved once per vmlinux build-id and cached on disk
+    under ~/.cache/kdevops/crash-decode/<build-id>.json, so frames
+    repeated across crashes never hit addr2line again
+  - cache misses of a crash file are resolved with a single nm pass
+    and a single batched addr2line call
+  - decoding runs in a worker pool so callers can carry on with the
+    host reset while crashes are decoded in the background
+
+Frames from modules are left as they are, as decode_stacktrace.sh does
+when only given vmlinux. If binutils are not available the original
+decode_stacktrace.sh is used instead.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger("crash_watchdog")
+
+CACHE_DIR = Path.home() / ".cache" / "kdevops" / "crash-decode"
+
+# func+0x1a/0x40 optionally followed by a [module] tag
+FRAME_RE = re.compile(r"([\w.$]+)\+(0x[0-9a-f]+)/(0x[0-9a-f]+)(\s+\[\w+\])?")
+
+NT_GNU_BUILD_ID = 3
+SHT_NOTE = 7
+
+
+def _parse_notes(data, endian):
+    """Return the GNU build-id from the contents of an ELF note section."""
+    offset = 0
+    while offset + 12 <= len(data):
+        namesz, descsz, ntype = struct.unpack_from(endian + "III", data, offset)
+        offset += 12
+        name = data[offset : offset + namesz]
+        offset += (namesz + 3) & ~3
+        desc = data[offset : offset + descsz]
+        offset += (descsz + 3) & ~3
+        if ntype == NT_GNU_BUILD_ID and name.rstrip(b"\0") == b"GNU":
+            return desc.hex()
+    return None
+
+
+def elf_build_id(path):
+    """
+    Read the GNU build-id of an ELF file by walking its section headers.
+
+    Falls back to a size and mtime based identifier for ELF files built
+    without a build-id note. Returns None if path is not an ELF file.
+    """
+    with open(path, "rb") as f:
+        ident = f.read(16)
+        if ident[:4] != b"\x7fELF":
+            return None
+        is64 = ident[4] == 2
+        endian = "<" if ident[5] == 1 else ">"
+        if is64:
+            f.seek(0x28)
+            (shoff,) = struct.unpack(endian + "Q", f.read(8))
+            f.seek(0x3A)
+        else:
+            f.seek(0x20)
+            (shoff,) = struct.unpack(endian + "I", f.read(4))
+            f.seek(0x2E)
+        shentsize, shnum = struct.unpack(endian + "HH", f.read(4))
+        for idx in range(shnum):
+            f.seek(shoff + idx * shentsize)
+            header = f.read(shentsize)
+            if is64:
+                _, sh_type, _, _, sh_offset, sh_size = struct.unpack_from(
+                    endian + "IIQQQQ", header
+                )
+            else:
+                _, sh_type, _, _, sh_offset, sh_size = struct.unpack_from(
+                    endian + "IIIIII", header
+                )
+            if sh_type != SHT_NOTE:
+                continue
+            f.seek(sh_offset)
+            build_id = _parse_notes(f.read(sh_size), endian)
+            if build_id:
+                return build_id
+    st = os.stat(path)
+    return f"nobuildid-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+class SymbolCache:
+    """
+    Resolved frames of one vmlinux build, persisted as JSON. Without a
+    build id the frames are only kept in memory, as there is no key that
+    tells the cache entries of different images apart.
+    """
+
+    def __init__(self, build_id, cache_dir=CACHE_DIR):
+        self.path = Path(cache_dir) / f"{build_id}.json" if build_id else None
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.dirty = False
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self.frames = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, frame):
+        with self.lock:
+            return self.frames.get(frame)
+
+    def update(self, resolved):
+        with self.lock:
+            self.frames.update(resolved)
+            self.dirty = self.dirty or bool(resolved)
+
+    def save(self):
+        with self.lock:
+            if not self.dirty or self.path is None:
+                return
+            # Merge with entries other watchdog processes may have added.
+            try:
+                with open(self.path, "r") as f:
+                    on_disk = json.load(f)
+                on_disk.update(self.frames)
+                self.frames = on_disk
+            except (OSError, ValueError):
+                pass
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp, "w") as f:
+                    json.dump(self.frames, f)
+                os.replace(tmp, self.path)
+                self.dirty = False
+            except OSError as e:
+                logger.warning(f"Failed to save symbol cache {self.path}: {e}")
+
+
+class CrashDecoder:
+    """
+    Decode crash logs against one vmlinux in a background worker pool.
+
+    Use submit() to queue a crash file; the decoded output is written
+    next to it as <base>.decoded<ext>, matching decode_stacktrace.sh usage.
+    """
+
+    def __init__(self, vmlinux, decode_script=None, workers=2, cache_dir=CACHE_DIR):
+        self.vmlinux = vmlinux
+        self.decode_script = decode_script
+        self.strip_prefix = os.path.dirname(os.path.abspath(vmlinux)) + os.sep
+        try:
+            self.build_id = elf_build_id(vmlinux)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Failed to read the build id of {vmlinux}: {e}")
+            self.build_id = None
+        self.cache = SymbolCache(self.build_id, cache_dir)
+        self.use_binutils = bool(shutil.which("nm") and shutil.which("addr2line"))
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="crash-decode"
+        )
+        self._symbols = None
+        self._symbols_lock = threading.Lock()
+
+    def symbols(self):
+        """Map of text symbol name to [(address, size)], loaded once with nm."""
+        with self._symbols_lock:
+            if self._symbols is None:
+                result = subprocess.run(
+                    ["nm", "-S", "--defined-only", self.vmlinux],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                symbols = {}
+                for line in result.stdout.splitlines():
+                    fields = line.split()
+                    if len(fields) != 4 or fields[2] not in "tTwW":
+                        continue
+                    symbols.setdefault(fields[3], []).append(
+                        (int(fields[0], 16), int(fields[1], 16))
+                    )
+                self._symbols = symbols
+            return self._symbols
+
+    def frame_address(self, name, offset, length):
+        """Address of a frame, using the symbol size to pick among duplicates."""
+        candidates = self.symbols().get(name)
+        if not candidates:
+            return None
+        for address, size in candidates:
+            if size == length:
+                return address + offset
+        return candidates[0][0] + offset
+
+    def _clean_path(self, location):
+        if location.startswith(self.strip_prefix):
+            return location[len(self.strip_prefix) :]
+        return location
+
+    def resolve(self, frames):
+        """Resolve frame strings to source locations, using the cache first."""
+        resolved = {}
+        misses = {}
+        for frame in frames:
+            cached = self.cache.get(frame)
+            if cached is not None:
+                resolved[frame] = cached
+                continue
+            name, rest = frame.split("+", 1)
+            offset, length = rest.split("/", 1)
+            address = self.frame_address(name, int(offset, 16), int(length, 16))
+            if address is None:
+                resolved[frame] = ""
+            else:
+                misses[f"0x{address:x}"] = frame
+
+        if misses:
+            # -a prints each queried address before its (inlined) frames
+            result = subprocess.run(
+                ["addr2line", "-a", "-f", "-i", "-e", self.vmlinux]
+                + list(misses.keys()),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            chains = {}
+            current = None
+            lines = result.stdout.splitlines()
+            idx = 0
+            while idx < len(lines):
+                line = lines[idx]
+                if line.startswith("0x"):
+                    current = f"0x{int(line, 16):x}"
+                    chains[current] = []
+                    idx += 1
+                    continue
+                if current is None:
+                    idx += 1
+                    continue
+                func = line
+                location = lines[idx + 1] if idx + 1 < len(lines) else "??:0"
+                chains[current].append((func, self._clean_path(location)))
+                idx += 2
+            new = {}
+            for address, frame in misses.items():
+                chain = chains.get(address, [])
+                if not chain or chain[0][1].startswith("??"):
+                    new[frame] = ""
+                    continue
+                # addr2line lists the innermost inlined function first
+                text = chain[0][1]
+                if len(chain) > 1:
+                    text = " ".join(
+                        [chain[0][1]] + [f"({func} {loc})" for func, loc in chain[1:]]
+                    )
+                new[frame] = text
+            self.cache.update(new)
+            resolved.update(new)
+        return resolved
+
+    def decode_text(self, text):
+        """Annotate every built-in kernel frame in text with its source location."""
+        frames = {
+            m.group(0)
+            for m in FRAME_RE.finditer(text)
+            if not m.group(4)  # module frames need the module object
+        }
+        resolved = self.resolve(frames) if frames else {}
+
+        def annotate(m):
+            location = resolved.get(m.group(0)) if not m.group(4) else None
+            if not location:
+                return m.group(0)
+            return f"{m.group(0)} {location}"
+
+        return FRAME_RE.sub(annotate, text)
+
+    def decode_file(self, log_file):
+        """Decode log_file into <base>.decoded<ext> and return its path."""
+        base, ext = os.path.splitext(log_file)
+        decoded_file = f"{base}.decoded{ext}"
+        if not self.use_binutils:
+            with open(log_file, "r") as log_input, open(
+                decoded_file, "w"
+            ) as log_output:
+                subprocess.run(
+                    [self.decode_script, self.vmlinux],
+                    stdin=log_input,
+                    stdout=log_output,
+                    stderr=subprocess.STDOUT,
+                    check=True,
+                )
+            return decoded_file
+
+        with open(log_file, "r", errors="replace") as f:
+            text = f.read()
+        decoded = self.decode_text(text)
+        with open(decoded_file, "w") as f:
+            f.write(decoded)
+        self.cache.save()
+        return decoded_file
+
+    def decode_logged(self, log_file):
+        """decode_file() logging failures instead of raising, None on failure."""
+        try:
+            decoded_file = self.decode_file(log_file)
+            logger.info(f"Decoded kernel log saved to: {decoded_file}")
+            return decoded_file
+        except (
+            OSError,
+            subprocess.SubprocessError,
+            ValueError,
+            KeyError,
+            IndexError,
+            struct.error,
+        ) as e:
+            # A truncated vmlinux or unexpected nm/addr2line output must not
+            # take the worker down with it.
+            logger.warning(f"Failed to decode kernel log output {log_file}: {e}")
+            return None
+
+    def submit(self, log_file):
+        """Queue log_file for decoding, returning a Future for the decoded path."""
+        return self.executor.submit(self.decode_logged, log_file)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_decoders = {}
+_decoders_lock = threading.Lock()
+
+
+def get_decoder(vmlinux, decode_script=None):
+    """Return the process wide decoder for vmlinux, creating it on first use."""
+    key = os.path.realpath(vmlinux)
+    with _decoders_lock:
+        decoder = _decoders.get(key)
+        if decoder is None:
+            decoder = CrashDecoder(vmlinux, decode_script)
+            _decoders[key] = decoder
+        return decoder
+
+
+def wait_for_pending_decodes():
+    """Block until all queued crash decodes have finished."""
+    with _decoders_lock:
+        decoders = list(_decoders.values())
+        _decoders.clear()
+    for decoder in decoders:
+        decoder.shutdown(wait=True)
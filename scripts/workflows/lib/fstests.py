@@ -5,6 +5,9 @@ from lib import systemd_remote
 import sys, os
 import configparser
 import argparse
+import heapq
+import re
+import statistics
 from itertools import chain
 
 
@@ -216,6 +219,86 @@ def get_checktime(host, basedir, kernel, section, last_test):
     return 0
 
 
+CHECKTIME_LINE = re.compile(r"^(\w+/\d+)\s+(\d+)$")
+
+# Runtime assumed for tests never seen before when no history exists at all.
+DEFAULT_TEST_RUNTIME = 30
+
+
+def load_checktimes(results_dir, section=None):
+    """
+    Collect historical test runtimes from all check.time files under
+    results_dir, optionally only those for the given section. A test
+    seen in several runs gets the median of its runtimes, so a single
+    slow or crashed run does not skew it.
+    """
+    samples = {}
+    for root, dirs, files in os.walk(results_dir):
+        if "check.time" not in files:
+            continue
+        if section and os.path.basename(root) != section:
+            continue
+        with open(os.path.join(root, "check.time"), "r") as f:
+            for line in f:
+                m = CHECKTIME_LINE.match(line.strip())
+                if m:
+                    samples.setdefault(m.group(1), []).append(int(m.group(2)))
+    return {test: statistics.median(times) for test, times in samples.items()}
+
+
+def default_test_runtime(checktimes):
+    """Runtime assumed for tests without history, the median of the known ones."""
+    if checktimes:
+        return statistics.median(checktimes.values())
+    return DEFAULT_TEST_RUNTIME
+
+
+def estimate_test_runtime(test, checktimes, soak_duration=0, default=None):
+    """
+    Expected runtime in seconds of a test. Tests without history use
+    default, which falls back to the median of all known runtimes. Tests
+    using SOAK_DURATION run for at least that long, whatever soak
+    duration was used when their history was recorded.
+    """
+    runtime = checktimes.get(test)
+    if runtime is None:
+        if default is None:
+            default = default_test_runtime(checktimes)
+        runtime = default
+    if soak_duration and fstests_test_uses_soak_duration(test):
+        runtime = max(runtime, soak_duration)
+    return runtime
+
+
+def shard_tests(tests, shards, checktimes, soak_duration=0, default=None):
+    """
+    Split tests into shards of balanced expected runtime using longest
+    processing time first scheduling: tests are taken longest first and
+    each goes to the shard with the least runtime so far. Returns a list
+    of (expected seconds, tests) per shard, tests kept in fstests order.
+    """
+    if shards < 1:
+        raise FstestsError("Number of shards must be at least 1")
+    if default is None:
+        default = default_test_runtime(checktimes)
+    weights = {
+        test: estimate_test_runtime(test, checktimes, soak_duration, default)
+        for test in tests
+    }
+    heap = [(0, idx) for idx in range(shards)]
+    assigned = [[] for _ in range(shards)]
+    totals = [0] * shards
+    for test in sorted(weights, key=lambda t: (-weights[t], t)):
+        total, idx = heapq.heappop(heap)
+        assigned[idx].append(test)
+        totals[idx] = total + weights[test]
+        heapq.heappush(heap, (totals[idx], idx))
+    order = {test: pos for pos, test in enumerate(tests)}
+    return [
+        (totals[idx], sorted(assigned[idx], key=order.get)) for idx in range(shards)
+    ]
+
+
 def get_config(dotconfig):
     config = configparser.ConfigParser(
         allow_no_value=True, strict=False, interpolation=None
@@ -1,7 +1,36 @@
 # SPDX-License-Identifier: copyleft-next-0.3.1
 
-import subprocess, os, sys
+# Follow the kernel messages of hosts in journals uploaded with
+# systemd-journal-remote.
+#
+# The journals of long soak runs grow to gigabytes, so instead of grepping
+# them from scratch on every watchdog query a JournalFollower per host keeps
+# the journal cursor of the last entry it read, along with the last test
+# started for each test suite, the kernel version and their timestamps.
+# Each query only reads the entries added since. Like journalctl -k, only
+# the last boot in the journal is followed, the state is reset when the host
+# reboots. The state is saved under ~/.cache/kdevops/journal-follower/ so it
+# also carries over between watchdog invocations.
+#
+# The python systemd module is used to read the journals if available,
+# otherwise journalctl is.
+
+import subprocess, os, sys, json
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    from systemd import journal
+
+    HAS_SYSTEMD = True
+except ImportError:
+    HAS_SYSTEMD = False
+
+SUITES = ["fstests", "blktests"]
+STATE_VERSION = 2
+STATE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "kdevops", "journal-follower"
+)
 
 
 class SystemdError(Exception):
@@ -19,6 +48,7 @@ class TimeoutExpired(SystemdError):
         return "timeout"
 
 
+@lru_cache(maxsize=None)
 def get_host_ip(host):
     try:
         result = subprocess.run(
@@ -28,7 +58,7 @@ def get_host_ip(host):
             if line.startswith("hostname "):
                 return line.split()[1]
     except subprocess.SubprocessError as e:
-        logger.warning(f"Failed to resolve IP for {host}: {e}")
+        sys.stderr.write("Failed to resolve IP for %s: %s\n" % (host, e))
     return None
 
 
@@ -50,102 +80,260 @@ def get_extra_journals(remote_path, host):
     return extra_journals
 
 
-def get_uname(remote_path, host, configured_kernel):
-    ip = get_host_ip(host)
-    extra_journals = get_extra_journals(remote_path, host)
-    fpath = remote_path + "remote-" + ip + ".journal"
-    grep = "Linux version"
-    grep_str = '"Linux version"'
-    cmd = ["journalctl", "--no-pager", "-n 1", "-k", "-g", grep, "--file", fpath]
-    cmd = cmd + extra_journals
-    cmd_verbose = [
-        "journalctl",
-        "--no-pager",
-        "-n 1",
-        "-k",
-        "-g",
-        grep_str,
-        "--file",
-        fpath,
-    ]
-    cmd_verbose = cmd_verbose + extra_journals
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        close_fds=True,
-        universal_newlines=True,
-    )
-    data = None
-    try:
-        data = process.communicate(timeout=120)
-    except subprocess.TimeoutExpired:
-        return "Timeout"
-    else:
-        process.wait()
-        if process.returncode != 0:
-            if configured_kernel is None:
-                sys.stderr.write("\nProcess returned non-zero")
-                sys.stderr.write("\nCommand used:\n%s\n\n" % " ".join(cmd_verbose))
-            return configured_kernel
-        last_line = data[0].strip()
-        if grep not in last_line:
-            sys.stderr.write("\nThe string %s was not found in the journal." % grep_str)
-            sys.stderr.write("\nCommand used:\n%s\n\n" % " ".join(cmd_verbose))
+def _message(value):
+    # journalctl -o json encodes messages which are not valid UTF-8 as
+    # arrays of bytes.
+    if isinstance(value, list):
+        return bytes(value).decode("utf-8", "replace")
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return value or ""
+
+
+class JournalFollower:
+    """
+    Incrementally read the kernel messages of one host's remote journal.
+
+    Call update() to read the entries added since the last call, then use
+    kernel, last_test() and the timestamps in state.
+    """
+
+    def __init__(self, remote_path, host, state_dir=STATE_DIR):
+        self.remote_path = remote_path
+        self.host = host
+        self.ip = get_host_ip(host)
+        # Example: /var/log/journal/remote/remote-line-xfs-reflink.journal
+        self.journal = remote_path + "remote-" + str(self.ip) + ".journal"
+        self.state_path = os.path.join(state_dir, host + ".json")
+        self.state = self._load_state()
+
+    def _new_state(self):
+        return {
+            "version": STATE_VERSION,
+            "journal": self.journal,
+            "journal_id": self._journal_id(),
+            "cursor": None,
+            "boot_id": None,
+            # realtime timestamps are in microseconds
+            "last_entry_usec": None,
+            "kernel": None,
+            "kernel_usec": None,
+            "tests": {},
+        }
+
+    def _journal_id(self):
+        # A journal recreated for a new bring up with the same IP must not
+        # be read from an old cursor.
+        try:
+            st = os.stat(self.journal)
+        except OSError:
             return None
-        if len(last_line.split(grep)) <= 1:
-            sys.stderr.write(
-                "\nThe string %s could not be used to split the line." % grep_str
-            )
-            sys.stderr.write("\nCommand used:\n%s\n\n" % " ".join(cmd_verbose))
+        return "%d-%d" % (st.st_dev, st.st_ino)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return self._new_state()
+        if (
+            state.get("version") != STATE_VERSION
+            or state.get("journal") != self.journal
+            or state.get("journal_id") != self._journal_id()
+        ):
+            return self._new_state()
+        return state
+
+    def _save_state(self):
+        tmp = "%s.%d.tmp" % (self.state_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            sys.stderr.write("Failed to save %s: %s\n" % (self.state_path, e))
+
+    def journal_files(self):
+        # get_extra_journals() returns journalctl --file arguments
+        return [self.journal] + get_extra_journals(self.remote_path, self.host)[1::2]
+
+    @property
+    def kernel(self):
+        return self.state["kernel"]
+
+    def last_test(self, suite):
+        """Last test line such as "xfs/040 at 2023-12-17 23:52:14", or None."""
+        test = self.state["tests"].get(suite)
+        if test is None:
             return None
-        kernel_line = last_line.split(grep)[1].strip()
-        if len(last_line.split()) <= 1:
-            sys.stderr.write(
-                "\nThe string %s was used but could not find kernel version." % grep_str
+        return test["line"]
+
+    def _set_boot(self, boot_id):
+        # Kernel version and tests of a previous boot no longer apply.
+        if boot_id == self.state["boot_id"]:
+            return
+        self.state["boot_id"] = boot_id
+        self.state["kernel"] = None
+        self.state["kernel_usec"] = None
+        self.state["tests"] = {}
+
+    def _process(self, message, usec):
+        if message.startswith("Linux version"):
+            fields = message.split("Linux version")[1].split()
+            if fields:
+                self.state["kernel"] = fields[0].strip()
+                self.state["kernel_usec"] = usec
+            return
+        for suite in SUITES:
+            run_string = "run " + suite
+            if run_string not in message or "at " not in message:
+                continue
+            self.state["tests"][suite] = {
+                "line": message.split(run_string)[1].strip(),
+                "usec": usec,
+            }
+
+    def _read_entry(self, entry):
+        usec = int(entry["__REALTIME_TIMESTAMP"].timestamp() * 1000000)
+        self._process(_message(entry.get("MESSAGE")), usec)
+        self.state["cursor"] = entry["__CURSOR"]
+        self.state["last_entry_usec"] = usec
+
+    def _update_reader(self):
+        reader = journal.Reader(files=self.journal_files())
+        reader.add_match(_TRANSPORT="kernel")
+        # Follow the last boot, as journalctl -k does.
+        reader.seek_tail()
+        last = reader.get_previous()
+        if not last or "_BOOT_ID" not in last:
+            return True
+        boot_id = last["_BOOT_ID"].hex
+        self._set_boot(boot_id)
+        reader.this_boot(boot_id)
+        cursor = self.state["cursor"]
+        if not cursor:
+            reader.seek_head()
+        else:
+            reader.seek_cursor(cursor)
+            # The entry at the cursor was already read, unless the cursor
+            # is gone and the closest entry was picked instead.
+            entry = reader.get_next()
+            if entry and entry.get("__CURSOR") != cursor:
+                self._read_entry(entry)
+        for entry in reader:
+            self._read_entry(entry)
+        return True
+
+    def _update_journalctl(self):
+        cmd = ["journalctl", "--no-pager", "-k", "-o", "json"]
+        cmd += ["--output-fields=MESSAGE,_BOOT_ID"]
+        if self.state["cursor"]:
+            cmd += ["--after-cursor", self.state["cursor"]]
+        cmd += ["--file", self.journal] + get_extra_journals(
+            self.remote_path, self.host
+        )
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+        )
+        try:
+            output, _ = process.communicate(timeout=120)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return "Timeout"
+        lines = output.splitlines()
+        if not lines:
+            return process.returncode == 0
+        # -k only prints the last boot, so all entries share its boot ID.
+        self._set_boot(json.loads(lines[0]).get("_BOOT_ID"))
+        for line in lines:
+            # Only a few messages matter, avoid decoding all others. Messages
+            # which are not valid UTF-8 are arrays of bytes and need to be
+            # decoded first.
+            if (
+                b"run " not in line
+                and b"Linux version" not in line
+                and b'"MESSAGE":[' not in line
+            ):
+                continue
+            entry = json.loads(line)
+            self._process(
+                _message(entry.get("MESSAGE")),
+                int(entry["__REALTIME_TIMESTAMP"]),
             )
-            sys.stderr.write("\nCommand used:\n%s\n\n" % " ".join(cmd_verbose))
-            return None
-        kernel = kernel_line.split()[0].strip()
+        entry = json.loads(lines[-1])
+        self.state["cursor"] = entry["__CURSOR"]
+        self.state["last_entry_usec"] = int(entry["__REALTIME_TIMESTAMP"])
+        return True
+
+    def update(self):
+        """
+        Read the entries added since the last update. Returns True on
+        success, False if the journal could not be read and "Timeout" if
+        reading it timed out.
+        """
+        if not os.path.isfile(self.journal):
+            return False
+        if self.state["journal_id"] != self._journal_id():
+            self.state = self._new_state()
+        if HAS_SYSTEMD:
+            try:
+                ret = self._update_reader()
+            except OSError:
+                ret = False
+        else:
+            ret = self._update_journalctl()
+        if ret is True:
+            self._save_state()
+        return ret
+
+
+_followers = {}
+
+
+def get_follower(remote_path, host):
+    """Return the process wide follower for host, creating it on first use."""
+    key = (remote_path, host)
+    follower = _followers.get(key)
+    if follower is None:
+        follower = JournalFollower(remote_path, host)
+        _followers[key] = follower
+    return follower
+
 
-        return kernel
+def get_uname(remote_path, host, configured_kernel):
+    follower = get_follower(remote_path, host)
+    ret = follower.update()
+    if ret == "Timeout":
+        return "Timeout"
+    if not ret:
+        if configured_kernel is None:
+            sys.stderr.write("\nCould not read the journal %s\n\n" % follower.journal)
+        return configured_kernel
+    if follower.kernel is None:
+        sys.stderr.write(
+            '\nThe string "Linux version" was not found in the journal %s\n\n'
+            % follower.journal
+        )
+        return None
+    return follower.kernel
 
 
 # Returns something like "xfs/040 at 2023-12-17 23:52:14"
 def get_test(remote_path, host, suite):
-    ip = get_host_ip(host)
-    if suite not in ["fstests", "blktests"]:
+    if suite not in SUITES:
         return None
-    # Example: /var/log/journal/remote/remote-line-xfs-reflink.journal
-    fpath = remote_path + "remote-" + ip + ".journal"
-    extra_journals = get_extra_journals(remote_path, host)
-    run_string = "run " + suite
-    cmd = ["journalctl", "--no-pager", "-n 1", "-k", "-g", run_string, "--file", fpath]
-    cmd = cmd + extra_journals
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        close_fds=True,
-        universal_newlines=True,
-    )
-    data = None
-    try:
-        data = process.communicate(timeout=120)
-    except subprocess.TimeoutExpired:
+    follower = get_follower(remote_path, host)
+    ret = follower.update()
+    if ret == "Timeout":
         return "Timeout"
-    else:
-        process.wait()
-        if process.returncode != 0:
-            return None
-        last_line = data[0].strip()
-        if "at " not in last_line:
-            return None
-        if len(last_line.split("at ")) <= 1:
-            return None
-        test_line = last_line.split(run_string)[1].strip()
-
-        return test_line
+    if not ret:
+        return None
+    return follower.last_test(suite)
 
 
 def get_last_fstest(remote_path, host):
@@ -0,0 +1,120 @@
+"""Unit tests for the AnalysisCache of workflows/ai/scripts/analyze_results.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(
+    os.path.join(HERE, "..", "..", "workflows", "ai", "scripts")
+)
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from analyze_results import AnalysisCache  # noqa: E402
+
+LOGGER = logging.getLogger("test_analysis_cache")
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.results_dir = os.path.join(self.tmp.name, "results")
+        os.makedirs(self.results_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_result(self, name, data):
+        path = os.path.join(self.results_dir, name)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def cache(self):
+        return AnalysisCache(self.cache_dir, LOGGER)
+
+    def cache_files(self, subdir):
+        directory = os.path.join(self.cache_dir, "v2", subdir)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def test_results_are_parsed_once_per_digest(self):
+        a = self.write_result("results_a.json", {"qps": 1})
+        b = self.write_result("results_b.json", {"qps": 1})
+        cache = self.cache()
+        self.assertEqual(cache.load_result(a), ({"qps": 1}, True))
+        # Same content, same digest
+        self.assertEqual(cache.load_result(b), ({"qps": 1}, False))
+        cache.save()
+        self.assertEqual(len(self.cache_files("results")), 1)
+
+        cache = self.cache()
+        self.assertEqual(cache.load_result(a), ({"qps": 1}, False))
+        self.write_result("results_a.json", {"qps": 22})
+        self.assertEqual(cache.load_result(a), ({"qps": 22}, True))
+        cache.save()
+        self.assertEqual(len(self.cache_files("results")), 2)
+
+    def test_results_of_removed_files_are_dropped(self):
+        a = self.write_result("results_a.json", {"qps": 1})
+        b = self.write_result("results_b.json", {"qps": 2})
+        cache = self.cache()
+        cache.load_result(a)
+        cache.load_result(b)
+        cache.save()
+        os.unlink(b)
+        self.cache().save()
+        self.assertEqual(len(self.cache_files("results")), 1)
+        self.assertEqual(self.cache().load_result(a), ({"qps": 1}, False))
+
+    def test_system_info_of_earlier_boots_is_evicted(self):
+        calls = []
+
+        def collect():
+            calls.append(1)
+            return {"hostname": "node"}
+
+        key = ("node", "boot1", self.results_dir)
+        self.assertEqual(self.cache().system_info(key, collect), {"hostname": "node"})
+        self.assertEqual(self.cache().system_info(key, collect), {"hostname": "node"})
+        self.assertEqual(len(calls), 1)
+        other = ("other", "boot9", self.results_dir)
+        self.cache().system_info(other, collect)
+        self.assertEqual(len(self.cache_files("system-info")), 2)
+
+        self.cache().system_info(("node", "boot2", self.results_dir), collect)
+        self.assertEqual(len(calls), 3)
+        # boot1 of node is gone, the other node is kept
+        self.assertEqual(len(self.cache_files("system-info")), 2)
+        self.cache().system_info(other, collect)
+        self.assertEqual(len(calls), 3)
+
+    def test_system_info_of_removed_results_dirs_is_evicted(self):
+        gone = os.path.join(self.tmp.name, "gone")
+        os.makedirs(gone)
+        self.cache().system_info(("node", "boot1", gone), dict)
+        os.rmdir(gone)
+        self.cache().system_info(("node", "boot1", self.results_dir), dict)
+        self.assertEqual(len(self.cache_files("system-info")), 1)
+
+    def test_disabled_cache(self):
+        a = self.write_result("results_a.json", {"qps": 1})
+        cache = AnalysisCache(None, LOGGER)
+        self.assertEqual(cache.load_result(a), ({"qps": 1}, True))
+        self.assertEqual(cache.load_result(a), ({"qps": 1}, True))
+        cache.save()
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Unit tests for scripts/workflows/lib/crash_decode.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts", "workflows", "lib"))
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+
+import crash_decode  # noqa: E402
+
+HAVE_TOOLCHAIN = all(shutil.which(tool) for tool in ("gcc", "nm", "addr2line"))
+
+SOURCE = """\
+int crash_target(int x)
+{
+	return x * 3 + 1;
+}
+
+void _start(void)
+{
+	crash_target(2);
+	for (;;)
+		;
+}
+"""
+# Lines of crash_target() in SOURCE
+TARGET_LINES = range(1, 5)
+
+
+class DecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def decoder(self, vmlinux):
+        decoder = crash_decode.CrashDecoder(vmlinux, cache_dir=self.cache_dir)
+        self.addCleanup(decoder.shutdown)
+        return decoder
+
+
+@unittest.skipUnless(HAVE_TOOLCHAIN, "needs gcc, nm and addr2line")
+class ElfDecodeTest(DecoderTestCase):
+    """Decode frames against a tiny object built with debug info."""
+
+    def setUp(self):
+        super().setUp()
+        source = os.path.join(self.tmp.name, "crash.c")
+        with open(source, "w") as f:
+            f.write(SOURCE)
+        self.vmlinux = os.path.join(self.tmp.name, "vmlinux")
+        try:
+            subprocess.run(
+                [
+                    "gcc",
+                    "-g",
+                    "-O0",
+                    "-nostdlib",
+                    "-static",
+                    "-Wl,--build-id",
+                    "-o",
+                    self.vmlinux,
+                    source,
+                ],
+                cwd=self.tmp.name,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            self.skipTest(f"cannot build a test object: {e.stderr.decode()}")
+        nm = subprocess.run(
+            ["nm", "-S", self.vmlinux], capture_output=True, text=True, check=True
+        )
+        for line in nm.stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 4 and fields[3] == "crash_target":
+                self.size = int(fields[1], 16)
+                break
+        else:
+            self.skipTest("no sized crash_target symbol")
+        self.frame = f"crash_target+0x4/0x{self.size:x}"
+
+    def test_build_id(self):
+        readelf = subprocess.run(
+            ["readelf", "-n", self.vmlinux], capture_output=True, text=True
+        )
+        build_id = crash_decode.elf_build_id(self.vmlinux)
+        self.assertFalse(build_id.startswith("nobuildid-"))
+        self.assertIn(f"Build ID: {build_id}", readelf.stdout)
+
+    def test_frame_resolves_to_file_and_line(self):
+        decoder = self.decoder(self.vmlinux)
+        text = f"RIP: 0010:{self.frame}\n ? unknown_func+0x0/0x10\n"
+        decoded = decoder.decode_text(text)
+        match = re.search(
+            rf"RIP: 0010:{re.escape(self.frame)} crash\.c:(\d+)\n", decoded
+        )
+        self.assertIsNotNone(match, decoded)
+        self.assertIn(int(match.group(1)), TARGET_LINES)
+        # Unknown symbols are left alone
+        self.assertIn(" ? unknown_func+0x0/0x10\n", decoded)
+
+    def test_module_frames_are_left_alone(self):
+        decoder = self.decoder(self.vmlinux)
+        text = f"{self.frame} [some_module]\n"
+        self.assertEqual(decoder.decode_text(text), text)
+
+    def test_cache_is_reused(self):
+        decoder = self.decoder(self.vmlinux)
+        log = os.path.join(self.tmp.name, "crash.log")
+        with open(log, "w") as f:
+            f.write(f"{self.frame}\n")
+        decoded_file = decoder.decode_file(log)
+        self.assertEqual(decoded_file, os.path.join(self.tmp.name, "crash.decoded.log"))
+        with open(decoded_file) as f:
+            location = f.read().split()[1]
+        self.assertTrue(location.startswith("crash.c:"), location)
+
+        # A new decoder of the same build must not need binutils
+        cached = self.decoder(self.vmlinux)
+        with mock.patch.object(
+            crash_decode.subprocess, "run", side_effect=AssertionError
+        ):
+            self.assertEqual(
+                cached.resolve({self.frame}),
+                {self.frame: location},
+            )
+
+
+class Addr2lineOutputTest(DecoderTestCase):
+    """Parse mocked nm and addr2line output, no toolchain needed."""
+
+    NM = "ffffffff81000000 0000000000000040 T do_crash\n"
+    ADDR2LINE = (
+        "0xffffffff81000010\n"
+        "inlined_helper\n"
+        "/build/linux/mm/helper.h:12\n"
+        "do_crash\n"
+        "/build/linux/mm/crash.c:34\n"
+    )
+
+    def run_tools(self, args, **kwargs):
+        stdout = self.NM if args[0] == "nm" else self.ADDR2LINE
+        return subprocess.CompletedProcess(args, 0, stdout=stdout)
+
+    def test_inlined_chain(self):
+        # No vmlinux to read a build id from, the frames stay in memory
+        with self.assertLogs("crash_watchdog", level="WARNING"):
+            decoder = crash_decode.CrashDecoder(
+                "/build/linux/vmlinux", cache_dir=self.cache_dir
+            )
+        self.addCleanup(decoder.shutdown)
+        with mock.patch.object(crash_decode.subprocess, "run", self.run_tools):
+            resolved = decoder.resolve({"do_crash+0x10/0x40"})
+        self.assertEqual(
+            resolved,
+            {"do_crash+0x10/0x40": "mm/helper.h:12 (do_crash mm/crash.c:34)"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
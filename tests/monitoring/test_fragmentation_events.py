@@ -0,0 +1,273 @@
+"""Unit tests for the monitoring role's fragmentation_events.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FILES_DIR = os.path.abspath(
+    os.path.join(HERE, "..", "..", "playbooks", "roles", "monitoring", "files")
+)
+if FILES_DIR not in sys.path:
+    sys.path.insert(0, FILES_DIR)
+
+import fragmentation_events as fe  # noqa: E402
+
+RAW_EVENTS = [
+    {
+        "timestamp": 0.5,
+        "event_type": "extfrag",
+        "order": 3,
+        "fallback_order": 5,
+        "migrate_from": "MOVABLE",
+        "migrate_to": "UNMOVABLE",
+        "is_steal": True,
+        "node": 1,
+        "fragmentation_index": 400,
+    },
+    {
+        "timestamp": 1.25,
+        "event_type": "compaction_success",
+        "order": 2,
+        "fragmentation_index": 100,
+        "zone": "Normal",
+        "node": 0,
+    },
+    {
+        "timestamp": 2.0,
+        "event_type": "extfrag",
+        "order": 0,
+        "fallback_order": 2,
+        "migrate_from": "RECLAIMABLE",
+        "migrate_to": "MOVABLE",
+        "is_steal": False,
+        "node": 0,
+        "fragmentation_index": 0,
+    },
+    {"timestamp": 3.0, "event_type": "compaction_failure", "order": 4},
+    # Not an event, dropped
+    {"timestamp": 4.0},
+]
+
+
+def aggregate_file():
+    return {
+        "metadata": {"mode": "aggregate", "sample_rate": 0},
+        "kernel_version": "6.18.0",
+        "events": [],
+        "statistics": {},
+        "aggregates": {
+            "bucket_seconds": 1.0,
+            "sample_rate": 0,
+            "extfrag": [
+                {
+                    "order": 0,
+                    "migrate_from": "MOVABLE",
+                    "migrate_to": "UNMOVABLE",
+                    "node": 0,
+                    "is_steal": True,
+                    "count": 3,
+                },
+                {
+                    "order": 4,
+                    "migrate_from": "RECLAIMABLE",
+                    "migrate_to": "MOVABLE",
+                    "node": 1,
+                    "is_steal": True,
+                    "count": 1,
+                },
+                {
+                    "order": 9,
+                    "migrate_from": "MOVABLE",
+                    "migrate_to": "RECLAIMABLE",
+                    "node": 0,
+                    "is_steal": False,
+                    "count": 2,
+                },
+            ],
+            "compaction": [{"order": 2, "success": 1, "failure": 2}],
+            "timeline": [
+                {
+                    "timestamp": 0.0,
+                    "extfrag_steal": 4,
+                    "extfrag_claim": 0,
+                    "compaction_success": 1,
+                    "compaction_failure": 0,
+                },
+                {
+                    "timestamp": 5.0,
+                    "extfrag_steal": 0,
+                    "extfrag_claim": 2,
+                    "compaction_success": 0,
+                    "compaction_failure": 2,
+                },
+            ],
+        },
+    }
+
+
+class EventStoreTest(unittest.TestCase):
+    def test_from_json(self):
+        store = fe.EventStore.from_json({"kernel_version": "6.1", "events": RAW_EVENTS})
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.info, {"kernel_version": "6.1"})
+        events = store.events
+        self.assertEqual(
+            events["type"].tolist(),
+            [
+                fe.EXTFRAG,
+                fe.COMPACTION_SUCCESS,
+                fe.EXTFRAG,
+                fe.COMPACTION_FAILURE,
+            ],
+        )
+        self.assertEqual(events["order"].tolist(), [3, 2, 0, 4])
+        self.assertEqual(events["is_steal"].tolist(), [True, False, False, False])
+        self.assertEqual(
+            [store.migrate_types[c] for c in events["migrate_from"]],
+            ["MOVABLE", "", "RECLAIMABLE", ""],
+        )
+        pairs, index = store.patterns(store.of_type(fe.EXTFRAG))
+        self.assertEqual(pairs, [("MOVABLE", "UNMOVABLE"), ("RECLAIMABLE", "MOVABLE")])
+        self.assertEqual(index.tolist(), [0, 1])
+
+    def test_sidecar_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fragmentation_data.json")
+            with open(path, "w") as f:
+                json.dump({"kernel_version": "6.1", "events": RAW_EVENTS}, f)
+            first = fe.load_events(path)
+            self.assertTrue(os.path.exists(path + fe.SIDECAR_SUFFIX))
+            # Change the event types without changing the size or the
+            # modification time, the sidecar must still be used.
+            st = os.stat(path)
+            with open(path, "r+") as f:
+                content = f.read()
+                f.seek(0)
+                f.write(content.replace("extfrag", "EXTFRAG"))
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            cached = fe.load_events(path)
+            np.testing.assert_array_equal(cached.events, first.events)
+            self.assertEqual(cached.migrate_types, first.migrate_types)
+            self.assertEqual(cached.info, first.info)
+
+    def test_sidecar_invalidated_by_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fragmentation_data.json")
+            with open(path, "w") as f:
+                json.dump({"events": RAW_EVENTS}, f)
+            self.assertEqual(len(fe.load_events(path)), 4)
+            with open(path, "w") as f:
+                json.dump({"events": RAW_EVENTS[:2]}, f)
+            self.assertEqual(len(fe.load_events(path)), 2)
+
+
+class BinningTest(unittest.TestCase):
+    def test_histogram_weights(self):
+        times = np.array([0.5, 0.75, 2.5])
+        _, counts = fe.histogram(times, 1.0)
+        self.assertEqual(counts.tolist(), [2, 1])
+        _, counts = fe.histogram(times, 1.0, np.array([3, 1, 5]))
+        self.assertEqual(counts.tolist(), [4, 5])
+
+    def test_bin_counts_weights(self):
+        rows = np.array([0, 1, 1, 0])
+        cols = np.array([0, 1, 1, -1])
+        self.assertEqual(fe.bin_counts(rows, 2, cols, 2).tolist(), [[1, 0], [0, 2]])
+        self.assertEqual(
+            fe.bin_counts(rows, 2, cols, 2, np.array([2, 3, 4, 5])).tolist(),
+            [[2, 0], [0, 7]],
+        )
+
+
+class AggregateTest(unittest.TestCase):
+    def test_counts_come_from_the_aggregates(self):
+        store = fe.EventStore.from_json(aggregate_file())
+        self.assertTrue(store.aggregate)
+        self.assertNotIn("aggregates", store.info)
+        self.assertEqual(len(store), 9)
+        # One row per bucket and event type, at the middle of the bucket
+        extfrag = store.of_type(fe.EXTFRAG)
+        self.assertEqual(extfrag["timestamp"].tolist(), [0.5, 5.5])
+        self.assertEqual(extfrag["is_steal"].tolist(), [True, False])
+        self.assertEqual(extfrag["count"].tolist(), [4, 2])
+        self.assertEqual(extfrag["order"].tolist(), [-1, -1])
+        self.assertEqual(
+            store.of_type(fe.COMPACTION_FAILURE)["timestamp"].tolist(), [5.5]
+        )
+        self.assertTrue(np.all(np.diff(store.events["timestamp"]) >= 0))
+
+    def test_totals_come_from_the_pattern_counts(self):
+        store = fe.EventStore.from_json(aggregate_file())
+        extfrag = store.of_type(fe.EXTFRAG, totals=True)
+        self.assertTrue(np.all(np.isnan(extfrag["timestamp"])))
+        self.assertEqual(extfrag["order"].tolist(), [0, 4, 9])
+        self.assertEqual(extfrag["node"].tolist(), [0, 1, 0])
+        self.assertEqual(extfrag["count"].tolist(), [3, 1, 2])
+        pairs, index = store.patterns(extfrag)
+        self.assertEqual(
+            [pairs[i] for i in index],
+            [
+                ("MOVABLE", "UNMOVABLE"),
+                ("RECLAIMABLE", "MOVABLE"),
+                ("MOVABLE", "RECLAIMABLE"),
+            ],
+        )
+        failure = store.of_type(fe.COMPACTION_FAILURE, totals=True)
+        self.assertEqual(failure["order"].tolist(), [2])
+        self.assertEqual(fe.event_count(failure), 2)
+        self.assertEqual(
+            fe.event_count(store.of_type(fe.COMPACTION_SUCCESS, totals=True)), 1
+        )
+
+    def test_rows_do_not_grow_with_the_counts(self):
+        data = aggregate_file()
+        data["aggregates"]["extfrag"][0]["count"] = 10**9
+        data["aggregates"]["timeline"][0]["extfrag_steal"] = 10**9
+        store = fe.EventStore.from_json(data)
+        self.assertEqual(len(store.events), 4)
+        self.assertEqual(len(store.totals), 5)
+        self.assertEqual(len(store), 10**9 + 6)
+
+    def test_sidecar_keeps_the_totals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fragmentation_data.json")
+            with open(path, "w") as f:
+                json.dump(aggregate_file(), f)
+            first = fe.load_events(path)
+            cached = fe.load_events(path)
+            self.assertTrue(cached.aggregate)
+            np.testing.assert_array_equal(cached.events, first.events)
+            # NaN timestamps, compare the bytes
+            self.assertEqual(cached.totals.tobytes(), first.totals.tobytes())
+
+    def test_file_without_aggregates_is_refused(self):
+        data = aggregate_file()
+        del data["aggregates"]
+        with self.assertRaises(ValueError):
+            fe.EventStore.from_json(data)
+
+    def test_truncated_file_is_refused(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fragmentation_data.json")
+            data = aggregate_file()
+            data["events"] = RAW_EVENTS[:1]
+            content = json.dumps(data, indent=2)
+            with open(path, "w") as f:
+                f.write(content[: content.index('"aggregates"') + 40])
+            with self.assertRaises(ValueError):
+                fe.load_events(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
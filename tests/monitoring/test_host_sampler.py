@@ -0,0 +1,121 @@
+"""Unit tests for the monitoring role's host_sampler.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FILES_DIR = os.path.abspath(
+    os.path.join(HERE, "..", "..", "playbooks", "roles", "monitoring", "files")
+)
+if FILES_DIR not in sys.path:
+    sys.path.insert(0, FILES_DIR)
+
+import host_sampler  # noqa: E402
+
+
+class ColumnEncodingTest(unittest.TestCase):
+    def roundtrip(self, values):
+        encoded = json.loads(json.dumps(host_sampler.encode_column(values)))
+        return encoded, host_sampler.decode_column(encoded, len(values))
+
+    def test_constant_column_is_a_scalar(self):
+        encoded, decoded = self.roundtrip([7, 7, 7])
+        self.assertEqual(encoded, 7)
+        self.assertEqual(decoded, [7, 7, 7])
+
+    def test_counter_column_is_delta_encoded(self):
+        encoded, decoded = self.roundtrip([100, 105, 105, 230])
+        self.assertEqual(encoded, {"d": [100, 5, 0, 125]})
+        self.assertEqual(decoded, [100, 105, 105, 230])
+
+    def test_floats_and_gaps_stay_plain(self):
+        for values in ([0.5, 0.25, 1.0], [None, 3, 4], [None, None]):
+            encoded, decoded = self.roundtrip(values)
+            self.assertEqual(encoded, values)
+            self.assertEqual(decoded, values)
+
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "samples.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_blocks_load_back_aligned(self):
+        header = {"format": host_sampler.FORMAT, "version": 2, "interval": 1}
+        writer = host_sampler.ColumnWriter(self.path, header)
+        writer.add(1.0, {"a": 1, "b": 0.5})
+        writer.add(2.0, {"a": 3, "b": 0.5})
+        writer.flush()
+        # "c" only appears in the second block, "b" disappears in it
+        writer.add(3.0, {"a": 3, "c": 10})
+        writer.add(4.0, {"a": 4, "c": 12})
+        writer.close()
+
+        self.assertTrue(host_sampler.is_sample_file(self.path))
+        loaded, times, columns = host_sampler.load_samples(self.path)
+        self.assertEqual(loaded["version"], 2)
+        self.assertEqual(times, [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(columns["a"], [1, 3, 3, 4])
+        self.assertEqual(columns["b"], [0.5, 0.5, None, None])
+        self.assertEqual(columns["c"], [None, None, 10, 12])
+
+    def test_version_1_files_and_truncated_blocks(self):
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"format": host_sampler.FORMAT, "version": 1}) + "\n")
+            f.write(json.dumps({"time": [1, 2], "columns": {"a": [5, 6]}}) + "\n")
+            f.write('{"time": [3, 4], "colu')
+        _, times, columns = host_sampler.load_samples(self.path)
+        self.assertEqual(times, [1, 2])
+        self.assertEqual(columns["a"], [5, 6])
+
+
+class ParserTest(unittest.TestCase):
+    def test_buddyinfo(self):
+        row = {}
+        host_sampler.parse_buddyinfo(
+            "Node 0, zone   Normal   10  4  1\n", "buddyinfo", row
+        )
+        self.assertEqual(
+            row,
+            {
+                "buddyinfo.node0.Normal.o0": 10,
+                "buddyinfo.node0.Normal.o1": 4,
+                "buddyinfo.node0.Normal.o2": 1,
+            },
+        )
+
+    def test_pressure(self):
+        row = {}
+        host_sampler.parse_pressure(
+            "some avg10=1.50 avg60=0.00 avg300=0.00 total=42\n", "pressure.io", row
+        )
+        self.assertEqual(row["pressure.io.some.avg10"], 1.5)
+        self.assertEqual(row["pressure.io.some.total"], 42)
+
+    def test_diskstats_skips_loop_devices(self):
+        row = {}
+        host_sampler.parse_diskstats(
+            "   7  0 loop0 1 0 2 0 0 0 0 0 0 0 0\n"
+            " 259  0 nvme0n1 10 1 80 5 20 2 160 9 0 12 14\n",
+            "diskstats",
+            row,
+        )
+        self.assertNotIn("diskstats.loop0.reads", row)
+        self.assertEqual(row["diskstats.nvme0n1.reads"], 10)
+        self.assertEqual(row["diskstats.nvme0n1.weighted_io_ms"], 14)
+
+
+if __name__ == "__main__":
+    unittest.main()
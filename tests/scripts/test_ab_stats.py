@@ -0,0 +1,142 @@
+"""Unit tests for scripts/ab_stats.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+
+The expected p-values and q-values are the ones of R's wilcox.test() and
+p.adjust(method = "BH").
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts"))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import ab_stats  # noqa: E402
+
+
+def mann_whitney(base, dev):
+    u, p = ab_stats.mann_whitney(
+        np.array([base], dtype=np.float64), np.array([dev], dtype=np.float64)
+    )
+    return u[0], p[0]
+
+
+class MannWhitneyTest(unittest.TestCase):
+    def test_u_distribution(self):
+        # The 20 orderings of 3 + 3 samples by U
+        np.testing.assert_array_equal(
+            ab_stats._u_counts(3, 3), [1, 1, 2, 3, 3, 3, 3, 2, 1, 1]
+        )
+        self.assertEqual(ab_stats._u_counts(4, 5).sum(), 126)
+
+    def test_exact(self):
+        # wilcox.test(c(4, 5, 6), c(1, 2, 3)): W = 9, p-value = 0.1
+        u, p = mann_whitney([1, 2, 3], [4, 5, 6])
+        self.assertEqual(u, 9)
+        self.assertAlmostEqual(p, 0.1)
+        # The same test with the groups swapped
+        u, p = mann_whitney([4, 5, 6], [1, 2, 3])
+        self.assertEqual(u, 0)
+        self.assertAlmostEqual(p, 0.1)
+        # wilcox.test(c(2, 4, 6), c(1, 3, 5)): W = 6, p-value = 0.7
+        u, p = mann_whitney([1, 3, 5], [2, 4, 6])
+        self.assertEqual(u, 6)
+        self.assertAlmostEqual(p, 0.7)
+        # wilcox.test(6:10, 1:5): W = 25, p-value = 0.007937
+        u, p = mann_whitney([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+        self.assertEqual(u, 25)
+        self.assertAlmostEqual(p, 2 / 252)
+        # Unequal sizes, wilcox.test(c(3, 5), c(1, 2, 4)): W = 5, p-value = 0.4
+        u, p = mann_whitney([1, 2, 4], [3, 5])
+        self.assertEqual(u, 5)
+        self.assertAlmostEqual(p, 0.4)
+
+    def test_ties_use_the_normal_approximation(self):
+        # wilcox.test(c(2, 3, 3, 4), c(1, 2, 2, 3), exact = FALSE):
+        # W = 13, p-value = 0.172
+        u, p = mann_whitney([1, 2, 2, 3], [2, 3, 3, 4])
+        self.assertEqual(u, 13)
+        self.assertAlmostEqual(p, 0.1720337, places=6)
+        # All samples equal
+        self.assertEqual(mann_whitney([1, 1], [1, 1]), (2, 1.0))
+
+    def test_rows_are_independent(self):
+        base = np.array([[1, 3, 5], [1, 2, 3], [1, 2, 2]], dtype=np.float64)
+        dev = np.array([[2, 4, 6], [4, 5, 6], [2, 3, 3]], dtype=np.float64)
+        u, p = ab_stats.mann_whitney(base, dev)
+        for i in range(len(base)):
+            self.assertEqual((u[i], p[i]), mann_whitney(base[i], dev[i]))
+
+    def test_min_runs(self):
+        self.assertAlmostEqual(ab_stats.min_exact_pvalue(3, 3), 0.1)
+        self.assertAlmostEqual(ab_stats.min_exact_pvalue(4, 4), 2 / 70)
+        self.assertEqual(ab_stats.min_runs(0.05), 4)
+        self.assertEqual(ab_stats.min_runs(0.2), 3)
+
+
+class BenjaminiHochbergTest(unittest.TestCase):
+    def test_known_values(self):
+        # p.adjust(c(0.01, 0.04, 0.03, 0.005), "BH")
+        np.testing.assert_allclose(
+            ab_stats.benjamini_hochberg([0.01, 0.04, 0.03, 0.005]),
+            [0.02, 0.04, 0.04, 0.02],
+        )
+        # p.adjust(c(0.01, 0.02, 0.03, 0.04, 0.05), "BH")
+        np.testing.assert_allclose(
+            ab_stats.benjamini_hochberg([0.01, 0.02, 0.03, 0.04, 0.05]), [0.05] * 5
+        )
+        # p.adjust(c(0.9, 0.8, 0.001), "BH")
+        np.testing.assert_allclose(
+            ab_stats.benjamini_hochberg([0.9, 0.8, 0.001]), [0.9, 0.9, 0.003]
+        )
+        self.assertEqual(len(ab_stats.benjamini_hochberg([])), 0)
+
+
+class CompareTest(unittest.TestCase):
+    def test_verdicts(self):
+        result = ab_stats.compare(
+            [
+                [10, 10.2, 9.9, 10.1, 10, 9.8],
+                [10, 10.2, 9.9, 10.1, 10, 9.8],
+                [5, 5, 5, 5],
+                [10, 10.2],
+            ],
+            [
+                [12, 12.1, 11.9, 12.2, 12, 11.8],
+                [12, 12.1, 11.9, 12.2, 12, 11.8],
+                [5, 5, 5, 5],
+                [10.1, 10.3],
+            ],
+            [True, False, False, False],
+        )
+        self.assertEqual(
+            result["verdict"].tolist(),
+            ["regression", "improvement", "no change", "inconclusive"],
+        )
+        np.testing.assert_allclose(result["change_pct"][:3], [20, 20, 0])
+        self.assertTrue(result["ci_low"][0] > 0)
+        self.assertEqual(result["additional_runs"][2], 0)
+        self.assertGreater(result["additional_runs"][3], 0)
+        # BH over the three tested metrics with a p-value
+        np.testing.assert_allclose(
+            result["q_value"], ab_stats.benjamini_hochberg(result["p_value"])
+        )
+
+    def test_lower_is_better(self):
+        self.assertTrue(ab_stats.lower_is_better("read_lat_mean"))
+        self.assertTrue(ab_stats.lower_is_better("duration", "s"))
+        self.assertTrue(ab_stats.lower_is_better("creation", "ms"))
+        self.assertFalse(ab_stats.lower_is_better("read_iops", "1/s"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Unit tests for scripts/cloud_catalog.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import time
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts"))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import cloud_catalog  # noqa: E402
+
+CATALOG = "/instance-types"
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.reason = "OK" if status == 200 else "Not Modified"
+        self.will_close = False
+        self.body = body
+        self.headers = headers or {}
+
+    def getheader(self, name):
+        return self.headers.get(name)
+
+    def read(self):
+        return self.body
+
+
+class FakeConnection:
+    """Fails with error, or answers with response."""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.closed = False
+        self.requests = []
+
+    def request(self, method, path, headers):
+        self.requests.append((method, path, dict(headers)))
+        if self.error:
+            raise self.error
+
+    def getresponse(self):
+        return self.response
+
+    def close(self):
+        self.closed = True
+
+
+class CatalogClientTest(unittest.TestCase):
+    def client(self, *connections):
+        client = cloud_catalog.CatalogClient(
+            "test",
+            "https://api.example.com/v1",
+            lambda: "token",
+            cache_dir=None,
+            catalog_endpoints=[CATALOG],
+        )
+        pending = list(connections)
+        client._connect = lambda: pending.pop(0)
+        return client
+
+    def test_timeout_closes_the_connection(self):
+        conn = FakeConnection(error=socket.timeout("timed out"))
+        client = self.client(conn)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertIsNone(client.get(CATALOG))
+        self.assertTrue(conn.closed)
+        self.assertEqual(client._pool, [])
+
+    def test_stale_connection_is_retried(self):
+        stale = FakeConnection(error=ConnectionResetError())
+        body = json.dumps({"data": 1}).encode()
+        fresh = FakeConnection(FakeResponse(200, body))
+        client = self.client(stale, fresh)
+        self.assertEqual(client.get(CATALOG), {"data": 1})
+        self.assertTrue(stale.closed)
+        self.assertFalse(fresh.closed)
+        self.assertEqual(client._pool, [fresh])
+
+    def test_fresh_revalidates_within_ttl(self):
+        conn = FakeConnection(FakeResponse(304))
+        client = self.client(conn)
+        client._cache[CATALOG] = {
+            "etag": '"v1"',
+            "last_modified": None,
+            "fetched": time.time(),
+            "data": {"data": 1},
+        }
+        self.assertEqual(client.get(CATALOG, ttl=300), {"data": 1})
+        self.assertEqual(conn.requests, [])
+        self.assertEqual(client.get(CATALOG, ttl=300, fresh=True), {"data": 1})
+        self.assertEqual(len(conn.requests), 1)
+        self.assertEqual(conn.requests[0][2]["If-None-Match"], '"v1"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Unit tests for scripts/fio_logs.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts"))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import fio_logs  # noqa: E402
+
+FIO3_BINS = 29 << fio_logs.PLAT_BITS
+
+
+class LogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_log(self, name, lines, end="\n"):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + end)
+        return path
+
+
+class PlatValuesTest(unittest.TestCase):
+    def test_fio3_bins(self):
+        # plat_idx_to_val() of fio's stat.c
+        values = fio_logs.plat_values(FIO3_BINS)
+        self.assertEqual(len(values), FIO3_BINS)
+        np.testing.assert_array_equal(values[:128], np.arange(128))
+        self.assertEqual(values[128], 129)
+        self.assertEqual(values[191], 255)
+        self.assertEqual(values[192], 258)
+        self.assertEqual(values[256], 516)
+        self.assertTrue(np.all(np.diff(values) > 0))
+
+    def test_coarse_bins(self):
+        # --log_hist_coarseness=1 merges pairs of bins, the value is the one
+        # of the second bin of the pair
+        values = fio_logs.plat_values(FIO3_BINS // 2)
+        full = fio_logs.plat_values(FIO3_BINS)
+        np.testing.assert_array_equal(values, full[1::2])
+        # Older fio releases with 19 groups
+        self.assertEqual(len(fio_logs.plat_values(19 << fio_logs.PLAT_BITS)), 1216)
+
+    def test_unknown_bins(self):
+        for bins in (0, 100, FIO3_BINS + 1, FIO3_BINS * 2):
+            with self.assertRaises(ValueError):
+                fio_logs.plat_values(bins)
+
+    def test_hist_bins(self):
+        self.assertEqual(fio_logs.hist_bins(FIO3_BINS + 3), FIO3_BINS)
+        # With the offset column of newer fio releases
+        self.assertEqual(fio_logs.hist_bins(FIO3_BINS + 4), FIO3_BINS)
+        self.assertEqual(fio_logs.hist_bins(29 + 3), 29)
+        self.assertEqual(fio_logs.hist_bins(19 + 5), 19)
+        with self.assertRaises(ValueError):
+            fio_logs.hist_bins(100)
+
+
+class SteadyWindowsTest(unittest.TestCase):
+    def test_constant(self):
+        steady = fio_logs.steady_windows(np.full(10, 50.0), 5)
+        np.testing.assert_array_equal(steady, [True] * 6)
+
+    def test_too_short(self):
+        self.assertEqual(len(fio_logs.steady_windows(np.ones(4), 5)), 0)
+        self.assertEqual(len(fio_logs.steady_windows(np.ones(4), 1)), 0)
+
+    def test_range(self):
+        values = [100.0] * 5 + [200.0] * 5
+        steady = fio_logs.steady_windows(values, 5)
+        np.testing.assert_array_equal(steady, [True] + [False] * 4 + [True])
+        # 100 to 119 is within 20% of the mean, 100 to 125 is not
+        self.assertTrue(fio_logs.steady_windows([100, 119, 100, 119], 4, 20, 100)[0])
+        self.assertFalse(fio_logs.steady_windows([100, 125, 100, 125], 4, 20, 100)[0])
+
+    def test_slope(self):
+        # The least squares line rises by 4 over the window, 3.9% of the mean
+        ramp = 100.0 + np.arange(5)
+        self.assertTrue(fio_logs.steady_windows(ramp, 5, max_slope_pct=4)[0])
+        self.assertFalse(fio_logs.steady_windows(ramp, 5, max_slope_pct=3.5)[0])
+
+    def test_missing_and_zero_values(self):
+        values = [10.0, 10.0, np.nan, 10.0, 10.0, 10.0, 10.0]
+        steady = fio_logs.steady_windows(values, 3)
+        np.testing.assert_array_equal(steady, [False, False, False, True, True])
+        self.assertFalse(fio_logs.steady_windows(np.zeros(5), 5)[0])
+
+
+class ReadChunksTest(LogTestCase):
+    def test_chunks(self):
+        lines = [f"{t}, {t * 10}, {t % 2}, 4096, 0" for t in range(1, 200)]
+        path = self.write_log("job_bw.1.log", lines)
+        whole = np.concatenate(list(fio_logs.read_chunks(path)))
+        self.assertEqual(whole.shape, (199, 5))
+        np.testing.assert_array_equal(whole[:, 1], np.arange(1, 200) * 10)
+        chunks = list(fio_logs.read_chunks(path, chunk_bytes=64))
+        self.assertGreater(len(chunks), 1)
+        np.testing.assert_array_equal(np.concatenate(chunks), whole)
+
+    def test_partial_last_line(self):
+        path = self.write_log("job_bw.1.log", ["1, 10, 0, 4096, 0", "2, 2"], end="")
+        rows = np.concatenate(list(fio_logs.read_chunks(path)))
+        np.testing.assert_array_equal(rows, [[1, 10, 0, 4096, 0]])
+
+    def test_column_mismatch(self):
+        lines = [f"{t}, 10, 0, 4096, 0" for t in range(1, 50)]
+        # Same total number of values, but misaligned rows
+        lines[20] = "21, 10, 0, 4096, 0, 1"
+        lines[30] = "31, 10, 0, 4096"
+        path = self.write_log("job_bw.1.log", lines)
+        for chunk_bytes in (fio_logs.CHUNK_BYTES, 100):
+            with self.assertRaisesRegex(ValueError, "line 21 has 6 columns"):
+                list(fio_logs.read_chunks(path, chunk_bytes))
+
+    def test_not_a_number(self):
+        path = self.write_log("job_bw.1.log", ["1, 10, 0, 4096, 0", "2, x, 0, 4096, 0"])
+        with self.assertRaises(ValueError):
+            list(fio_logs.read_chunks(path))
+
+
+class LoadTest(LogTestCase):
+    def test_rate_series_sum_jobs(self):
+        paths = [
+            self.write_log(
+                f"job_bw.{job}.log",
+                [f"{t * 1000}, {100 * job}, 0, 4096, 0" for t in range(1, 11)],
+            )
+            for job in (1, 2)
+        ]
+        series = fio_logs.load_series(paths, "bw", 1000)
+        self.assertEqual(list(series.values), ["read"])
+        np.testing.assert_array_equal(series.values["read"][1:], [300.0] * 10)
+
+    def test_heatmap_of_histogram_with_offset_column(self):
+        counts = np.zeros(FIO3_BINS, dtype=np.int64)
+        counts[1000] = 7
+        row = ", ".join(map(str, counts))
+        path = self.write_log(
+            "job_clat_hist.1.log",
+            [f"1000, 1, 4096, 0, {row}", f"2000, 1, 4096, 0, {row}"],
+        )
+        heatmap = fio_logs.load_heatmap([path], "clat_hist", 1000)
+        self.assertEqual(list(heatmap.counts), ["write"])
+        write = heatmap.counts["write"]
+        self.assertEqual(write.sum(), 14)
+        lat = fio_logs.plat_values(FIO3_BINS)[1000]
+        expected = np.digitize(lat, fio_logs.LATENCY_EDGES_NS) - 1
+        self.assertEqual(write.sum(axis=0)[expected], 14)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Unit tests for the ref filtering of scripts/generate_refs.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+
+split_refs() filters one unfiltered git-ls-remote listing the way
+filtered git-ls-remote calls would, which is checked against git itself
+on a temporary repository.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts"))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import generate_refs  # noqa: E402
+
+HEADS = ["master", "next", "for/next", "stable/linux-6.1.y", "mmastermind"]
+TAGS = ["v5.15", "v6.1.1", "v6.9", "v6.10-rc1", "v6.10", "next-20240101"]
+ANNOTATED_TAGS = ["v6.11"]
+
+PATTERNS = [
+    "*",
+    "master",
+    "ster",
+    "next",
+    "*/next",
+    "heads/*",
+    "refs/heads/m*",
+    "stable/*",
+    "refs/tags/v6.9",
+    "v6.11",
+    "v6.*",
+    "v6.?",
+    "v?.1?",
+    "*-rc*",
+    "**",
+    "v[56].*",
+    "v[5-6].1*",
+    "v[!5].*",
+    "v[^5].*",
+    "v[]6].*",
+    "v[!]].*",
+    "v6.1[-0]*",
+    "v[[:digit:]].1*",
+    "[[:alpha:]]*",
+    "*[[:punct:]]rc*",
+    "[[:upper:]]*",
+    "[[:foo:]]*",
+    "v6.1\\0*",
+    "v6.1[",
+    "[",
+]
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "kdevops",
+    "GIT_AUTHOR_EMAIL": "kdevops@example.com",
+    "GIT_COMMITTER_NAME": "kdevops",
+    "GIT_COMMITTER_EMAIL": "kdevops@example.com",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, **GIT_ENV},
+    ).stdout
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class SplitRefsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.repo = cls.tmp.name
+        git("init", "-q", cls.repo)
+        git("commit", "-q", "--allow-empty", "-m", "initial", cwd=cls.repo)
+        git("branch", "-M", "master", cwd=cls.repo)
+        for head in HEADS[1:]:
+            git("branch", head, cwd=cls.repo)
+        for tag in TAGS:
+            git("tag", tag, cwd=cls.repo)
+        for tag in ANNOTATED_TAGS:
+            git("tag", "-a", "-m", tag, tag, cwd=cls.repo)
+        cls.output = generate_refs.ls_remote(cls.repo)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def ls_remote(self, kind, pattern):
+        return git(
+            "-c",
+            "versionsort.suffix=-",
+            "ls-remote",
+            "--sort=-version:refname",
+            f"--{kind}",
+            self.repo,
+            pattern,
+        ).strip()
+
+    def test_unfiltered(self):
+        heads, tags = generate_refs.split_refs(self.output)
+        self.assertEqual(len(heads.splitlines()), len(HEADS))
+        # The annotated tag is listed peeled too
+        self.assertEqual(len(tags.splitlines()), len(TAGS) + 2 * len(ANNOTATED_TAGS))
+
+    def test_patterns_match_like_git(self):
+        for pattern in PATTERNS:
+            with self.subTest(pattern=pattern):
+                heads, tags = generate_refs.split_refs(self.output, pattern, pattern)
+                self.assertEqual(heads, self.ls_remote("heads", pattern))
+                self.assertEqual(tags, self.ls_remote("tags", pattern))
+
+    def test_version_order(self):
+        _, tags = generate_refs.split_refs(self.output, filter_tags="v*")
+        names = [line.split("/")[-1] for line in tags.splitlines()]
+        self.assertEqual(
+            names,
+            ["v6.11^{}", "v6.11", "v6.10", "v6.10-rc1", "v6.9", "v6.1.1", "v5.15"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""Unit tests for scripts/results_store.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+
+The store needs pandas and pyarrow, the tests are skipped without them.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "scripts"))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import results_store as rs  # noqa: E402
+
+STORE_REQUIRED = unittest.skipUnless(
+    rs.STORE_AVAILABLE, "the results store needs pandas and pyarrow"
+)
+
+# 2026-01-01T00:00:00Z and one day later
+DAY1 = 1767225600
+DAY2 = DAY1 + 86400
+
+
+def fio_result(read_iops=0.0, write_iops=0.0):
+    jobs = [{}]
+    for direction, iops in (("read", read_iops), ("write", write_iops)):
+        if iops:
+            jobs[0][direction] = {
+                "io_bytes": 4096,
+                "iops": iops,
+                "bw": 2048,
+                "lat_ns": {"mean": 250000},
+                "clat_ns": {"percentile": {"99.000000": 900000}},
+            }
+    return {"jobs": jobs}
+
+
+class RunIdTest(unittest.TestCase):
+    def test_oldest_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, mtime in (("a", DAY2), ("b", DAY1 + 3661)):
+                path = os.path.join(tmp, name)
+                open(path, "w").close()
+                os.utime(path, (mtime, mtime))
+                paths.append(rs.Path(path))
+            self.assertEqual(rs.run_id(paths), "20260101T010101Z")
+            self.assertEqual(rs.run_id([]), rs.UNKNOWN)
+
+
+@STORE_REQUIRED
+class ResultsStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.results_dir = os.path.join(self.tmp.name, "results")
+        self.store = rs.ResultsStore(os.path.join(self.tmp.name, "store"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_result(self, rel, data, mtime=DAY1):
+        path = os.path.join(self.results_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def ingest(self, **kwargs):
+        return self.store.ingest("fio-tests", self.results_dir, jobs=1, **kwargs)
+
+    def test_ingest_and_query(self):
+        self.write_result(
+            "debian13-fio-tests-xfs-16k/results_randread_bs4k_iodepth1_jobs1.json",
+            fio_result(read_iops=1000),
+        )
+        self.write_result(
+            "debian13-fio-tests-xfs-16k-dev/results_randwrite_bs4k_iodepth1_jobs1.json",
+            fio_result(write_iops=2000),
+        )
+        counts = self.ingest()
+        self.assertEqual(
+            counts,
+            {"run": "20260101T000000Z", "parsed": 2, "unchanged": 0, "failed": 0},
+        )
+
+        df = self.store.query(metric=["read_iops", "write_iops"])
+        self.assertEqual(len(df), 2)
+        row = df[df["metric"] == "read_iops"].iloc[0]
+        self.assertEqual(row["host"], "debian13-fio-tests-xfs-16k")
+        self.assertEqual(row["fs"], "xfs-16k")
+        self.assertEqual(row["kernel"], rs.UNKNOWN)
+        self.assertEqual(row["run"], "20260101T000000Z")
+        self.assertEqual(row["test"], "randread/bs4k/iodepth1/jobs1")
+        self.assertEqual(row["value"], 1000)
+
+        read = self.store.query(workflow="fio-tests", metric="read_lat_mean")
+        self.assertEqual(read["value"].tolist(), [250.0])
+        self.assertEqual(read["unit"].tolist(), ["us"])
+        self.assertEqual(self.store.workflows(), ["fio-tests"])
+        with self.assertRaises(ValueError):
+            self.store.query(iops=1)
+
+    def test_ingest_is_incremental(self):
+        name = "host/results_randread_bs4k_iodepth1_jobs1.json"
+        self.write_result(name, fio_result(read_iops=1000))
+        self.write_result(
+            "host/results_randread_bs8k_iodepth1_jobs1.json",
+            fio_result(read_iops=500),
+            mtime=DAY1 + 60,
+        )
+        self.assertEqual(self.ingest()["parsed"], 2)
+        self.assertEqual(self.ingest()["unchanged"], 2)
+
+        # A result rewritten within the run replaces its rows
+        self.write_result(
+            "host/results_randread_bs8k_iodepth1_jobs1.json",
+            fio_result(read_iops=600),
+            mtime=DAY1 + 120,
+        )
+        counts = self.ingest()
+        self.assertEqual((counts["parsed"], counts["unchanged"]), (1, 1))
+        df = self.store.query(metric="read_iops")
+        self.assertEqual(sorted(df["value"].tolist()), [600, 1000])
+
+    def test_new_run_keeps_the_previous_one(self):
+        name = "host/results_randread_bs4k_iodepth1_jobs1.json"
+        self.write_result(name, fio_result(read_iops=1000))
+        first = self.ingest()["run"]
+        # The results directory is cleaned up and populated by the next run
+        self.write_result(name, fio_result(read_iops=1100), mtime=DAY2)
+        second = self.ingest()["run"]
+        self.assertEqual((first, second), ("20260101T000000Z", "20260102T000000Z"))
+
+        df = self.store.query(metric="read_iops")
+        self.assertEqual(
+            sorted(zip(df["run"], df["value"])), [(first, 1000), (second, 1100)]
+        )
+        self.assertEqual(len(self.store.query(metric="read_iops", run=second)), 1)
+
+    def test_explicit_run_and_host(self):
+        self.write_result(
+            "1/results_randread_bs4k_iodepth1_jobs1.json", fio_result(read_iops=1)
+        )
+        self.write_result(
+            "2/results_randread_bs4k_iodepth1_jobs1.json", fio_result(read_iops=3)
+        )
+        counts = self.ingest(run="tuning", host="debian13-fio-tests-ext4")
+        self.assertEqual(counts["run"], "tuning")
+        df = self.store.query(metric="read_iops")
+        self.assertEqual(set(df["host"]), {"debian13-fio-tests-ext4"})
+        self.assertEqual(set(df["fs"]), {"ext4"})
+        self.assertEqual(set(df["run"]), {"tuning"})
+        self.assertEqual(
+            sorted(df["source"]),
+            [
+                "1/results_randread_bs4k_iodepth1_jobs1.json",
+                "2/results_randread_bs4k_iodepth1_jobs1.json",
+            ],
+        )
+
+    def test_parse_errors_are_counted(self):
+        path = self.write_result("host/results_randread_bs4k_iodepth1_jobs1.json", {})
+        with open(path, "w") as f:
+            f.write("{")
+        counts = self.ingest()
+        self.assertEqual((counts["parsed"], counts["failed"]), (0, 1))
+
+    def test_ab_compare(self):
+        for host, iops in (("node-xfs", 1000), ("node-xfs-dev", 1100)):
+            self.write_result(
+                f"{host}/results_randread_bs4k_iodepth1_jobs1.json",
+                fio_result(read_iops=iops),
+            )
+        result = rs.ab_compare(self.store.query(metric="read_iops"))
+        self.assertEqual(len(result), 0)
+        self.ingest()
+        result = rs.ab_compare(self.store.query(metric="read_iops"))
+        self.assertEqual(len(result), 1)
+        row = result.iloc[0]
+        self.assertEqual(
+            (row["baseline_host"], row["dev_host"]), ("node-xfs", "node-xfs-dev")
+        )
+        self.assertAlmostEqual(row["delta_pct"], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Unit tests for workflows/steady_state/scripts/analyze_steady_state.py.
+
+Run with:
+
+    cd kdevops
+    python3 -m unittest discover -s tests -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(
+    os.path.join(HERE, "..", "..", "workflows", "steady_state", "scripts")
+)
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import analyze_steady_state as ass  # noqa: E402
+
+GIB = 1 << 30
+
+
+def steady_result(time_to_steady_state_s, from_first_window=False, **extra):
+    result = {
+        "rounds": 60,
+        "steady": True,
+        "time_to_steady_state_s": time_to_steady_state_s,
+        "from_first_window": from_first_window,
+    }
+    result.update(extra)
+    return result
+
+
+class DurationTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(ass.parse_duration("6h"), 21600)
+        self.assertEqual(ass.parse_duration("30m"), 1800)
+        self.assertEqual(ass.parse_duration(" 90 "), 90)
+        self.assertEqual(ass.parse_duration("1.5d"), 129600)
+        with self.assertRaises(ValueError):
+            ass.parse_duration("6 hours")
+
+    def test_format(self):
+        self.assertEqual(ass.format_duration(3600), "1h")
+        self.assertEqual(ass.format_duration(1125), "19m")
+        self.assertEqual(ass.format_duration(5400), "90m")
+        self.assertEqual(ass.format_duration(0), "1m")
+
+
+class SuggestTest(unittest.TestCase):
+    def setUp(self):
+        self.settings = dict(ass.DEFAULT_SETTINGS)
+
+    def suggest(self, tests, passes=None):
+        return ass.suggest(tests, self.settings, 300, passes)
+
+    def test_ss_dur_is_clamped_to_the_runtime(self):
+        suggestions, notes = self.suggest(
+            {"ss_iops": steady_result(3600), "ss_bw": steady_result(1800)}
+        )
+        self.assertEqual(suggestions["ssd_steady_state_runtime"], "75m")
+        for key in (
+            "ssd_steady_state_iops_mean_dur",
+            "ssd_steady_state_iops_slope_dur",
+            "ssd_steady_state_bw_mean_dur",
+            "ssd_steady_state_bw_slope_dur",
+        ):
+            self.assertEqual(suggestions[key], "75m")
+        self.assertNotIn("ssd_steady_state_prefill_loop", suggestions)
+        self.assertIn("runtime can be reduced", notes[0])
+
+    def test_ss_dur_is_not_below_the_time_to_steady_state(self):
+        self.settings["ssd_steady_state_iops_mean_dur"] = "30m"
+        self.settings["ssd_steady_state_iops_slope_dur"] = "75m"
+        suggestions, _ = self.suggest({"ss_iops": steady_result(3600)})
+        self.assertEqual(suggestions["ssd_steady_state_iops_mean_dur"], "1h")
+        # Already the suggested runtime
+        self.assertNotIn("ssd_steady_state_iops_slope_dur", suggestions)
+
+    def test_prefill_loop_is_capped(self):
+        suggestions, notes = self.suggest({"ss_iops": steady_result(3600)}, 5.3)
+        self.assertEqual(
+            suggestions["ssd_steady_state_prefill_loop"], ass.MAX_PREFILL_LOOP
+        )
+        self.assertIn("5.3 device capacities", notes[-1])
+
+        self.settings["ssd_steady_state_prefill_loop"] = ass.MAX_PREFILL_LOOP
+        suggestions, notes = self.suggest({"ss_iops": steady_result(3600)}, 5.3)
+        self.assertNotIn("ssd_steady_state_prefill_loop", suggestions)
+        self.assertIn("5.3 device capacities", notes[-1])
+
+        self.settings["ssd_steady_state_prefill_loop"] = 2
+        suggestions, _ = self.suggest({"ss_iops": steady_result(3600)}, 1.5)
+        self.assertEqual(suggestions["ssd_steady_state_prefill_loop"], 3)
+        suggestions, _ = self.suggest({"ss_iops": steady_result(3600)}, 0.5)
+        self.assertNotIn("ssd_steady_state_prefill_loop", suggestions)
+
+    def test_steady_from_the_first_window(self):
+        suggestions, _ = self.suggest(
+            {"ss_iops": steady_result(300, from_first_window=True)}, 3
+        )
+        self.assertEqual(suggestions["ssd_steady_state_prefill_loop"], 1)
+
+    def test_not_steady(self):
+        tests = {"ss_iops": {"rounds": 360, "steady": False}, "ss_bw": None}
+        suggestions, _ = self.suggest(tests)
+        self.assertEqual(suggestions["ssd_steady_state_runtime"], "12h")
+        self.assertEqual(suggestions["ssd_steady_state_prefill_loop"], 3)
+        self.settings["ssd_steady_state_prefill_loop"] = ass.MAX_PREFILL_LOOP
+        suggestions, _ = self.suggest(tests)
+        self.assertNotIn("ssd_steady_state_prefill_loop", suggestions)
+
+    def test_nothing_measured(self):
+        self.assertEqual(self.suggest({"ss_iops": None, "ss_bw": None}), ({}, []))
+
+
+class AnalyzeHostTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.host_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_log(self, name, value_at):
+        with open(self.host_dir / name, "w") as f:
+            for t in range(1, 1201):
+                f.write(f"{t * 1000}, {value_at(t)}, 1, 4096, 0\n")
+
+    def test_converges_after_the_first_rounds(self):
+        # Falling from 3000 IOPS for 10 minutes, then 1000 IOPS at 4 MiB/s
+        self.write_log(
+            "ss_iops_iops.1.log", lambda t: 3000 - 3 * t if t < 600 else 1000
+        )
+        self.write_log("ss_iops_bw.1.log", lambda t: 4096)
+        with open(self.host_dir / ass.PREFILL_FILE, "w") as f:
+            json.dump(
+                {
+                    "global options": {"size": str(GIB)},
+                    "jobs": [{"write": {"io_bytes": GIB}}],
+                },
+                f,
+            )
+
+        result = ass.analyze_host(
+            self.host_dir, dict(ass.DEFAULT_SETTINGS), 60, 5, 20, 10
+        )
+        self.assertIsNone(result["tests"]["ss_bw"])
+        iops = result["tests"]["ss_iops"]
+        self.assertEqual(iops["source"], "logs")
+        # The last, partial round is dropped
+        self.assertEqual(iops["rounds"], 20)
+        self.assertEqual(iops["steady_round"], 10)
+        self.assertEqual(iops["time_to_steady_state_s"], 900)
+        self.assertEqual(iops["steady_mean"], 1000)
+        self.assertFalse(iops["from_first_window"])
+        written = 15 * 60 * 4096 * 1024
+        self.assertEqual(iops["written_before_steady_bytes"], written)
+        self.assertEqual(result["capacities_before_steady"], written / GIB)
+        self.assertEqual(
+            result["suggestions"],
+            {
+                "ssd_steady_state_runtime": "19m",
+                "ssd_steady_state_iops_mean_dur": "19m",
+                "ssd_steady_state_iops_slope_dur": "19m",
+                "ssd_steady_state_prefill_loop": ass.MAX_PREFILL_LOOP,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,12 +9,13 @@ showing performance characteristics of the AI workload testing.
 
 import json
 import glob
+import hashlib
 import os
 import sys
 import argparse
 import subprocess
 import platform
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from datetime import datetime
 
@@ -30,9 +31,161 @@ except ImportError as e:
     print(f"Warning: Graphing libraries not available: {e}")
     print("Install with: pip install pandas matplotlib seaborn numpy")
 
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kdevops", "ai-results")
+
+
+class AnalysisCache:
+    """
+    On-disk cache shared by analysis runs, under v<CACHE_VERSION>/ in the
+    cache directory:
+
+    - results/<digest>.json: a parsed result file, by content digest. The
+      results are fetched again before every report, so an unchanged file
+      only costs a stat, or reading it to compute its digest if it was
+      fetched again. Only new result files are parsed.
+    - files.json: the size, modification time and digest of the result
+      files, only rewritten when it changes.
+    - system-info/<key hash>.json: the system information of one node,
+      boot and results directory. Entries of earlier boots of the node and
+      of removed results directories can not be used again and are evicted.
+    """
+
+    def __init__(self, cache_dir: Optional[str], logger: logging.Logger):
+        self.logger = logger
+        self.dir = os.path.join(cache_dir, f"v{CACHE_VERSION}") if cache_dir else None
+        self.files = {}
+        self.files_changed = False
+        if self.dir:
+            self.files = self._read(os.path.join(self.dir, "files.json")) or {}
+            # Version 1 kept everything in a single file
+            self._remove(os.path.join(cache_dir, "cache.json"))
+
+    def _read(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, data: Any):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"Could not save analysis cache {path}: {e}")
+
+    def _entries(self, subdir: str) -> List[str]:
+        """Paths of the cache files in subdir"""
+        directory = os.path.join(self.dir, subdir)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        return [os.path.join(directory, n) for n in names if n.endswith(".json")]
+
+    def _remove(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def save(self):
+        """Write the file index, dropping result sets no longer on disk"""
+        if not self.dir:
+            return
+        files = {
+            path: entry for path, entry in self.files.items() if os.path.exists(path)
+        }
+        if self.files_changed or len(files) != len(self.files):
+            self._write(os.path.join(self.dir, "files.json"), files)
+        self.files = files
+        self.files_changed = False
+
+        digests = {entry["digest"] for entry in files.values()}
+        for path in self._entries("results"):
+            if os.path.basename(path)[: -len(".json")] not in digests:
+                self._remove(path)
+
+    def _evict_system_info(self, node: str, boot_id: str):
+        for path in self._entries("system-info"):
+            entry = self._read(path)
+            if entry is not None:
+                entry_node, entry_boot_id, results_dir = entry["key"]
+                earlier_boot = entry_node == node and entry_boot_id != boot_id
+                if not earlier_boot and os.path.isdir(results_dir):
+                    continue
+            self._remove(path)
+
+    def system_info(
+        self, key: Optional[Tuple[str, str, str]], collect
+    ) -> Dict[str, Any]:
+        """
+        Cached system information of the (node, boot ID, results directory)
+        key, collect() is called on a miss
+        """
+        if key is None or not self.dir:
+            return collect()
+        self._evict_system_info(key[0], key[1])
+        name = hashlib.sha256("\0".join(key).encode()).hexdigest()
+        path = os.path.join(self.dir, "system-info", f"{name}.json")
+        entry = self._read(path)
+        if entry is not None and entry["key"] == list(key):
+            self.logger.info("Using cached system information")
+            return entry["info"]
+        info = collect()
+        self._write(path, {"key": list(key), "info": info})
+        return info
+
+    def _load_digest(self, digest: str) -> Optional[Dict[str, Any]]:
+        if not self.dir:
+            return None
+        return self._read(os.path.join(self.dir, "results", f"{digest}.json"))
+
+    def load_result(self, file_path: str) -> Tuple[Dict[str, Any], bool]:
+        """Returns the parsed result file and whether it was parsed now"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        entry = self.files.get(path)
+        if (
+            entry
+            and entry["size"] == st.st_size
+            and entry["mtime_ns"] == st.st_mtime_ns
+        ):
+            cached = self._load_digest(entry["digest"])
+            if cached is not None:
+                return cached, False
+
+        with open(path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        self.files[path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "digest": digest,
+        }
+        self.files_changed = True
+        cached = self._load_digest(digest)
+        if cached is not None:
+            return cached, False
+
+        data = json.loads(content)
+        if self.dir:
+            self._write(os.path.join(self.dir, "results", f"{digest}.json"), data)
+        return data, True
+
 
 class ResultsAnalyzer:
-    def __init__(self, results_dir: str, output_dir: str, config: Dict[str, Any]):
+    def __init__(
+        self,
+        results_dir: str,
+        output_dir: str,
+        config: Dict[str, Any],
+        cache_dir: Optional[str] = CACHE_DIR,
+    ):
         self.results_dir = results_dir
         self.output_dir = output_dir
         self.config = config
@@ -47,8 +200,21 @@ class ResultsAnalyzer:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
 
+        self.cache = AnalysisCache(cache_dir, self.logger)
+
         # Collect system information for DUT details
-        self.system_info = self._collect_system_info()
+        self.system_info = self.cache.system_info(
+            self._system_info_key(), self._collect_system_info
+        )
+
+    def _system_info_key(self) -> Optional[Tuple[str, str, str]]:
+        """Cache key of the system information, None if it can't be cached"""
+        try:
+            with open("/proc/sys/kernel/random/boot_id", "r") as f:
+                boot_id = f.read().strip()
+        except OSError:
+            return None
+        return platform.node(), boot_id, os.path.realpath(self.results_dir)
 
     def _collect_system_info(self) -> Dict[str, Any]:
         """Collect system information for DUT details in HTML report"""
@@ -301,17 +467,20 @@ class ResultsAnalyzer:
 
             self.logger.info(f"Found {len(result_files)} result files")
 
+            new_results = 0
             for file_path in result_files:
                 try:
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                        data["_file"] = os.path.basename(file_path)
-                        self.results_data.append(data)
+                    data, parsed = self.cache.load_result(file_path)
+                    data["_file"] = os.path.basename(file_path)
+                    self.results_data.append(data)
+                    new_results += parsed
                 except Exception as e:
                     self.logger.error(f"Error loading {file_path}: {e}")
+            self.cache.save()
 
             self.logger.info(
-                f"Successfully loaded {len(self.results_data)} result sets"
+                f"Successfully loaded {len(self.results_data)} result sets "
+                f"({new_results} new, {len(self.results_data) - new_results} cached)"
             )
             return len(self.results_data) > 0
 
@@ -369,6 +538,43 @@ class ResultsAnalyzer:
                 report.append(
                     f"  Insert rate range: {np.min(insert_rates):.2f} - {np.max(insert_rates):.2f} vectors/sec"
                 )
+                insert_perf = first_result.get("insert_performance", {})
+                batch_latency = insert_perf.get("batch_latency_ms")
+                if batch_latency:
+                    report.append(
+                        f"  Batch latency ({insert_perf.get('insert_threads', 1)} inserters, "
+                        f"batch size {insert_perf.get('batch_size', 'N/A')}): "
+                        f"p50 {batch_latency['p50']:.2f}ms, "
+                        f"p95 {batch_latency['p95']:.2f}ms, "
+                        f"p99 {batch_latency['p99']:.2f}ms"
+                    )
+                flush_times = [
+                    r["insert_performance"]["flush_time_seconds"]
+                    for r in self.results_data
+                    if "flush_time_seconds" in r.get("insert_performance", {})
+                ]
+                if flush_times:
+                    report.append(
+                        f"  Average flush time: {np.mean(flush_times):.2f} seconds"
+                    )
+                seal_times = [
+                    r["insert_performance"]["seal_time_seconds"]
+                    for r in self.results_data
+                    if r.get("insert_performance", {}).get("seal_time_seconds")
+                    is not None
+                ]
+                if seal_times:
+                    report.append(
+                        f"  Average segment seal time: {np.mean(seal_times):.2f} seconds"
+                    )
+                timeline = insert_perf.get("throughput_timeline", [])
+                if insert_perf.get("mode") == "sustained" and timeline:
+                    rates = [w["vectors_per_second"] for w in timeline]
+                    report.append(
+                        f"  Sustained insert over {insert_perf.get('duration_seconds')}s: "
+                        f"first window {rates[0]:.2f}, last window {rates[-1]:.2f}, "
+                        f"min {np.min(rates):.2f} vectors/sec"
+                    )
                 report.append("")
 
             # Index performance summary
@@ -403,12 +609,94 @@ class ResultsAnalyzer:
                             )
                     break  # Only show first result for summary
 
+            # Recall sweep summary
+            recall_curves = self._recall_curves()
+            if recall_curves:
+                report.append("")
+                report.append("RECALL VS QPS:")
+                for label, curve in sorted(recall_curves.items()):
+                    report.append(f"  {label} (recall@{curve['topk']}):")
+                    frontier = {
+                        id(point) for point in self._pareto_frontier(curve["points"])
+                    }
+                    for point in curve["points"]:
+                        marker = "*" if id(point) in frontier else " "
+                        report.append(
+                            f"   {marker}{curve['param']}={point['value']}: "
+                            f"recall {point['recall']:.4f}, "
+                            f"{point['qps']:.2f} QPS, "
+                            f"p50/p95/p99 {point['p50']:.2f}/{point['p95']:.2f}/"
+                            f"{point['p99']:.2f}ms"
+                        )
+                report.append("  (* on the recall-vs-QPS Pareto frontier)")
+
             return "\n".join(report)
 
         except Exception as e:
             self.logger.error(f"Error generating summary report: {e}")
             return f"Error generating summary: {e}"
 
+    def _recall_curves(self) -> Dict[str, Dict[str, Any]]:
+        """Recall sweep points averaged over the iterations of each node
+        and filesystem configuration, keyed by "<config> <hostname>"."""
+        curves = {}
+        for result in self.results_data:
+            recall_perf = result.get("recall_performance", {})
+            if not recall_perf.get("sweep"):
+                continue
+            hostname, is_dev = self._extract_node_info(result)
+            fs_type, block_size, config_key = self._extract_filesystem_config(result)
+            label = f"{config_key} {hostname}"
+            curve = curves.setdefault(
+                label,
+                {
+                    "is_dev": is_dev,
+                    "topk": recall_perf.get("topk"),
+                    "param": recall_perf.get("search_param"),
+                    "samples": {},
+                },
+            )
+            for point in recall_perf["sweep"]:
+                latency = point.get("latency_ms", {})
+                curve["samples"].setdefault(point.get("value"), []).append(
+                    (
+                        point.get("recall", 0),
+                        point.get("queries_per_second", 0),
+                        latency.get("p50", 0),
+                        latency.get("p95", 0),
+                        latency.get("p99", 0),
+                    )
+                )
+
+        for curve in curves.values():
+            samples = curve.pop("samples")
+            curve["points"] = []
+            for value in sorted(samples, key=lambda v: (v is None, v)):
+                recall, qps, p50, p95, p99 = np.mean(samples[value], axis=0)
+                curve["points"].append(
+                    {
+                        "value": value,
+                        "recall": recall,
+                        "qps": qps,
+                        "p50": p50,
+                        "p95": p95,
+                        "p99": p99,
+                    }
+                )
+        return curves
+
+    @staticmethod
+    def _pareto_frontier(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Points not beaten in both recall and QPS by another point,
+        ordered by recall"""
+        frontier = []
+        best_qps = -1.0
+        for point in sorted(points, key=lambda p: (-p["recall"], -p["qps"])):
+            if point["qps"] > best_qps:
+                frontier.append(point)
+                best_qps = point["qps"]
+        return frontier[::-1]
+
     def generate_html_report(self) -> str:
         """Generate comprehensive HTML report with DUT details and test configuration"""
         try:
@@ -822,6 +1110,11 @@ class ResultsAnalyzer:
             html.append(
                 "            <li><strong>Filesystem Comparison:</strong> Side-by-side comparison of filesystem performance</li>"
             )
+            recall_curves = self._recall_curves()
+            if recall_curves:
+                html.append(
+                    "            <li><strong>Recall vs QPS:</strong> Pareto curves of search recall against throughput and p99 latency across the search parameter sweep</li>"
+                )
             html.append("        </ul>")
             html.append(
                 "        <p><em>Note: Graphs are generated as separate PNG files in the same directory as this report.</em></p>"
@@ -842,9 +1135,38 @@ class ResultsAnalyzer:
             html.append(
                 "            <img src='filesystem_comparison.png' alt='Filesystem Comparison' style='max-width: 100%; height: auto; margin-bottom: 20px;'>"
             )
+            if recall_curves:
+                html.append(
+                    "            <img src='recall_pareto.png' alt='Recall vs QPS' style='max-width: 100%; height: auto; margin-bottom: 20px;'>"
+                )
             html.append("        </div>")
             html.append("    </div>")
 
+            if recall_curves:
+                html.append("    <div class='section'>")
+                html.append("        <h2>🎯 Recall vs Performance</h2>")
+                html.append(
+                    "        <p>Recall is measured against exact neighbors computed by brute force, queries are searched one at a time. Rows marked ★ are on the recall-vs-QPS Pareto frontier.</p>"
+                )
+                for label, curve in sorted(recall_curves.items()):
+                    frontier = {
+                        id(point) for point in self._pareto_frontier(curve["points"])
+                    }
+                    html.append(
+                        f"        <h3>{label} ({'Dev' if curve['is_dev'] else 'Baseline'})</h3>"
+                    )
+                    html.append("        <table>")
+                    html.append(
+                        f"            <tr><th>{curve['param'] or 'Search'}</th><th>Recall@{curve['topk']}</th><th>QPS</th><th>p50 (ms)</th><th>p95 (ms)</th><th>p99 (ms)</th></tr>"
+                    )
+                    for point in curve["points"]:
+                        marker = " ★" if id(point) in frontier else ""
+                        html.append(
+                            f"            <tr><td>{point['value']}{marker}</td><td>{point['recall']:.4f}</td><td>{point['qps']:.2f}</td><td>{point['p50']:.2f}</td><td>{point['p95']:.2f}</td><td>{point['p99']:.2f}</td></tr>"
+                        )
+                    html.append("        </table>")
+                html.append("    </div>")
+
             html.append("    <div class='section'>")
             html.append("        <h2>📝 Notes</h2>")
             html.append("        <ul>")
@@ -903,6 +1225,9 @@ class ResultsAnalyzer:
             # Graph 5: Multi-filesystem Comparison (if applicable)
             self._plot_filesystem_comparison()
 
+            # Graph 6: Recall vs QPS Pareto curves (if measured)
+            self._plot_recall_pareto()
+
             self.logger.info("Graphs generated successfully")
             return True
 
@@ -1621,6 +1946,85 @@ class ResultsAnalyzer:
             )
             plt.close()
 
+    def _plot_recall_pareto(self):
+        """Plot recall against QPS and p99 latency of the search parameter
+        sweep of each node, with the Pareto frontier of each curve"""
+        curves = self._recall_curves()
+        if not curves:
+            return
+
+        fig, (ax_qps, ax_p99) = plt.subplots(1, 2, figsize=(18, 8))
+        baseline_colors = plt.cm.Greens(np.linspace(0.5, 0.9, len(curves)))
+        dev_colors = plt.cm.Blues(np.linspace(0.5, 0.9, len(curves)))
+
+        for idx, (label, curve) in enumerate(
+            sorted(curves.items(), key=lambda x: (x[1]["is_dev"], x[0]))
+        ):
+            color = dev_colors[idx] if curve["is_dev"] else baseline_colors[idx]
+            points = curve["points"]
+            recall = [p["recall"] for p in points]
+            frontier = self._pareto_frontier(points)
+
+            ax_qps.plot(
+                recall,
+                [p["qps"] for p in points],
+                "o",
+                color=color,
+                alpha=0.5,
+            )
+            ax_qps.plot(
+                [p["recall"] for p in frontier],
+                [p["qps"] for p in frontier],
+                "o-",
+                color=color,
+                linewidth=2,
+                label=f"{label} ({'Dev' if curve['is_dev'] else 'Baseline'})",
+            )
+            for p in points:
+                if p["value"] is not None:
+                    ax_qps.annotate(
+                        f"{curve['param']}={p['value']}",
+                        (p["recall"], p["qps"]),
+                        textcoords="offset points",
+                        xytext=(4, 4),
+                        fontsize=7,
+                        color=color,
+                    )
+
+            ax_p99.plot(
+                recall,
+                [p["p99"] for p in points],
+                "s-",
+                color=color,
+                linewidth=2,
+                label=f"{label} ({'Dev' if curve['is_dev'] else 'Baseline'})",
+            )
+
+        topk = next(iter(curves.values()))["topk"]
+        ax_qps.set_title("Recall vs QPS (Pareto frontier)")
+        ax_qps.set_xlabel(f"Recall@{topk}")
+        ax_qps.set_ylabel("Queries/Second (log)")
+        ax_qps.set_yscale("log")
+        ax_qps.grid(True, alpha=0.3)
+        ax_qps.legend(fontsize=8)
+
+        ax_p99.set_title("Recall vs p99 Latency")
+        ax_p99.set_xlabel(f"Recall@{topk}")
+        ax_p99.set_ylabel("p99 Latency (ms, Lower is Better)")
+        ax_p99.grid(True, alpha=0.3)
+        ax_p99.legend(fontsize=8)
+
+        plt.suptitle("Milvus Search Recall vs Performance", fontsize=16, y=1.02)
+        plt.tight_layout()
+        output_file = os.path.join(
+            self.output_dir,
+            f"recall_pareto.{self.config.get('graph_format', 'png')}",
+        )
+        plt.savefig(
+            output_file, dpi=self.config.get("graph_dpi", 300), bbox_inches="tight"
+        )
+        plt.close()
+
     def analyze(self) -> bool:
         """Run complete analysis"""
         self.logger.info("Starting results analysis...")
@@ -1673,6 +2077,16 @@ def main():
         "--output-dir", required=True, help="Directory for analysis output"
     )
     parser.add_argument("--config", help="Analysis configuration file (JSON)")
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Directory of the analysis cache (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Collect system information and parse all results again",
+    )
 
     args = parser.parse_args()
 
@@ -1692,7 +2106,8 @@ def main():
             print(f"Error loading config file: {e}")
 
     # Run analysis
-    analyzer = ResultsAnalyzer(args.results_dir, args.output_dir, config)
+    cache_dir = None if args.no_cache else args.cache_dir
+    analyzer = ResultsAnalyzer(args.results_dir, args.output_dir, config, cache_dir)
     success = analyzer.analyze()
 
     return 0 if success else 1
@@ -10,9 +10,10 @@ import argparse
 from pathlib import Path
 import statistics
 from datetime import datetime
-import base64
 from io import BytesIO
 
+from report_writer import ReportWriter
+
 # Try to import matplotlib, but make it optional
 try:
     import matplotlib
@@ -138,6 +139,14 @@ def load_all_results(results_dir):
     return summaries, timings, monitoring
 
 
+def figure_png():
+    """Render the current figure to PNG bytes and close it."""
+    buffer = BytesIO()
+    plt.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    plt.close()
+    return buffer.getvalue()
+
+
 def create_build_time_comparison_chart(summaries):
     """Create a bar chart comparing average build times across hosts."""
     if not MATPLOTLIB_AVAILABLE:
@@ -198,14 +207,7 @@ def create_build_time_comparison_chart(summaries):
     # Adjust layout to prevent overlapping labels
     plt.subplots_adjust(bottom=0.15, top=0.95, left=0.1, right=0.95)
 
-    # Convert to base64 for embedding in HTML
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-
-    return image_base64
+    return figure_png()
 
 
 def create_build_time_distribution(timings):
@@ -243,14 +245,7 @@ def create_build_time_distribution(timings):
     # Adjust layout to prevent overlapping labels
     plt.subplots_adjust(bottom=0.15, top=0.95, left=0.1, right=0.95)
 
-    # Convert to base64
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-
-    return image_base64
+    return figure_png()
 
 
 def create_build_timeline(timings):
@@ -286,14 +281,7 @@ def create_build_timeline(timings):
     # Adjust layout to prevent overlapping labels
     plt.subplots_adjust(bottom=0.15, top=0.95, left=0.1, right=0.95)
 
-    # Convert to base64
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-
-    return image_base64
+    return figure_png()
 
 
 def create_success_rate_chart(summaries):
@@ -342,27 +330,58 @@ def create_success_rate_chart(summaries):
     # Adjust layout to prevent overlapping labels
     plt.subplots_adjust(bottom=0.15, top=0.95, left=0.1, right=0.95)
 
-    # Convert to base64
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
+    return figure_png()
+
+
+MONITORING_IMG_STYLE = "max-width: 100%; border-radius: 5px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); cursor: pointer;"
 
-    return image_base64
 
+def write_plot_grid(report, title, plots, min_width, caption, label, capitalize=False):
+    """Write a grid of linked plot thumbnails to the report."""
+    heading_style = ' style="text-transform: capitalize;"' if capitalize else ""
+    report.write(f"""
+            <h3>{title}</h3>
+            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax({min_width}px, 1fr)); gap: 20px; margin: 20px 0;">
+        """)
 
-def generate_monitoring_section(results_dir, monitoring):
-    """Generate HTML section for monitoring data."""
+    for plot_path in plots:
+        img = report.img_tag(
+            plot_path, alt=label(plot_path), style=MONITORING_IMG_STYLE
+        )
+        if img:
+            report.write(f"""
+                <div style="text-align: center;">
+                    <h4{heading_style}>{label(plot_path)}</h4>
+                    {img}
+                    <p style="font-size: 0.8em; color: #718096; margin-top: 5px;">Click image for full size</p>
+                </div>
+                """)
+        else:
+            # Fallback to file link if the image cannot be read
+            report.write(f"""
+                <div style="text-align: center;">
+                    <h4{heading_style}>{label(plot_path)}</h4>
+                    <a href="file://{plot_path.absolute()}" style="color: #007bff;">View plot</a>
+                </div>
+                """)
+
+    report.write(f"""
+            </div>
+            <p style="margin-top: 10px; color: #718096;">{caption}</p>
+        """)
+
+
+def generate_monitoring_section(report, results_dir, monitoring):
+    """Write the HTML section for monitoring data to the report."""
     if not monitoring:
-        return ""
+        return
 
     monitoring_path = Path(results_dir) / "monitoring"
 
-    html = """
+    report.write("""
         <div class="section">
             <h2 class="section-title">📊 System Monitoring Data</h2>
-    """
+    """)
 
     # Check for folio migration plots
     folio_plots = sorted(monitoring_path.glob("*_folio_migration_plot.png"))
@@ -372,168 +391,62 @@ def generate_monitoring_section(results_dir, monitoring):
 
     # Add folio migration plots if available
     if folio_plots:
-        html += """
-            <h3>Folio Migration Analysis</h3>
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 20px; margin: 20px 0;">
-        """
-
-        for plot_path in folio_plots:
-            hostname = plot_path.stem.replace("_folio_migration_plot", "").replace(
+        write_plot_grid(
+            report,
+            "Folio Migration Analysis",
+            folio_plots,
+            400,
+            "These plots show folio migration patterns during kernel builds.",
+            lambda p: p.stem.replace("_folio_migration_plot", "").replace(
                 "lpc-build-linux-", ""
-            )
-            # Read image and convert to base64
-            try:
-                with open(plot_path, "rb") as f:
-                    image_base64 = base64.b64encode(f.read()).decode()
-                html += f"""
-                <div style="text-align: center;">
-                    <h4>{hostname}</h4>
-                    <a href="monitoring/{plot_path.name}" target="_blank" title="Click for full-size image">
-                        <img src="data:image/png;base64,{image_base64}" style="max-width: 100%; border-radius: 5px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); cursor: pointer;" />
-                    </a>
-                    <p style="font-size: 0.8em; color: #718096; margin-top: 5px;">Click image for full size</p>
-                </div>
-                """
-            except Exception:
-                # Fallback to file link if embedding fails
-                html += f"""
-                <div style="text-align: center;">
-                    <h4>{hostname}</h4>
-                    <a href="file://{plot_path.absolute()}" style="color: #007bff;">View folio migration plot</a>
-                </div>
-                """
-
-        html += """
-            </div>
-            <p style="margin-top: 10px; color: #718096;">These plots show folio migration patterns during kernel builds.</p>
-        """
+            ),
+        )
 
     # Add folio migration comparison charts right after individual plots
     if folio_comparison_plots:
-        html += """
-            <h3>Folio Migration Comparisons</h3>
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(600px, 1fr)); gap: 20px; margin: 20px 0;">
-        """
-
-        for plot_path in folio_comparison_plots:
-            # Extract comparison name from filename
-            comparison_name = plot_path.stem.replace("folio_comparison_", "").replace(
-                "_", " "
-            )
-            # Read image and convert to base64
-            try:
-                with open(plot_path, "rb") as f:
-                    image_base64 = base64.b64encode(f.read()).decode()
-                html += f"""
-                <div style="text-align: center;">
-                    <h4 style="text-transform: capitalize;">{comparison_name}</h4>
-                    <a href="monitoring/{plot_path.name}" target="_blank" title="Click for full-size image">
-                        <img src="data:image/png;base64,{image_base64}" style="max-width: 100%; border-radius: 5px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); cursor: pointer;" />
-                    </a>
-                    <p style="font-size: 0.8em; color: #718096; margin-top: 5px;">Click image for full size</p>
-                </div>
-                """
-            except Exception:
-                # Fallback to file link if embedding fails
-                html += f"""
-                <div style="text-align: center;">
-                    <h4 style="text-transform: capitalize;">{comparison_name}</h4>
-                    <a href="file://{plot_path.absolute()}" style="color: #007bff;">View comparison plot</a>
-                </div>
-                """
-
-        html += """
-            </div>
-            <p style="margin-top: 10px; color: #718096;">These charts compare cumulative successful folio migrations across different filesystem configurations. Each line represents a different filesystem with distinct colors.</p>
-        """
+        write_plot_grid(
+            report,
+            "Folio Migration Comparisons",
+            folio_comparison_plots,
+            600,
+            "These charts compare cumulative successful folio migrations across different filesystem configurations. Each line represents a different filesystem with distinct colors.",
+            lambda p: p.stem.replace("folio_comparison_", "").replace("_", " "),
+            capitalize=True,
+        )
 
     # Check for fragmentation plots and comparison charts
     frag_plots = []
+    frag_comparison_plots = []
     frag_dir = monitoring_path / "fragmentation"
     if frag_dir.exists():
         frag_plots = sorted(frag_dir.glob("*_fragmentation_plot.png"))
+        frag_comparison_plots = sorted(frag_dir.glob("comparison_*.png"))
 
     # Add fragmentation plots if available
     if frag_plots:
-        html += """
-            <h3>Memory Fragmentation Analysis</h3>
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 20px; margin: 20px 0;">
-        """
-
-        for plot_path in frag_plots:
-            hostname = plot_path.stem.replace("_fragmentation_plot", "").replace(
+        write_plot_grid(
+            report,
+            "Memory Fragmentation Analysis",
+            frag_plots,
+            400,
+            "These plots show memory fragmentation patterns during kernel builds.",
+            lambda p: p.stem.replace("_fragmentation_plot", "").replace(
                 "lpc-build-linux-", ""
-            )
-            # Read image and convert to base64
-            try:
-                with open(plot_path, "rb") as f:
-                    image_base64 = base64.b64encode(f.read()).decode()
-                html += f"""
-                <div style="text-align: center;">
-                    <h4>{hostname}</h4>
-                    <a href="monitoring/fragmentation/{plot_path.name}" target="_blank" title="Click for full-size image">
-                        <img src="data:image/png;base64,{image_base64}" style="max-width: 100%; border-radius: 5px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); cursor: pointer;" />
-                    </a>
-                    <p style="font-size: 0.8em; color: #718096; margin-top: 5px;">Click image for full size</p>
-                </div>
-                """
-            except Exception:
-                # Fallback to file link if embedding fails
-                html += f"""
-                <div style="text-align: center;">
-                    <h4>{hostname}</h4>
-                    <a href="file://{plot_path.absolute()}" style="color: #007bff;">View fragmentation plot</a>
-                </div>
-                """
-
-        html += """
-            </div>
-            <p style="margin-top: 10px; color: #718096;">These plots show memory fragmentation patterns during kernel builds.</p>
-        """
-
-    # Check for fragmentation comparison charts
-    frag_comparison_plots = []
-    if frag_dir.exists():
-        frag_comparison_plots = sorted(frag_dir.glob("comparison_*.png"))
+            ),
+        )
 
     # Add fragmentation comparison charts if available
     if frag_comparison_plots:
-        html += """
-            <h3>Memory Fragmentation Comparisons</h3>
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(500px, 1fr)); gap: 20px; margin: 20px 0;">
-        """
-
-        for plot_path in frag_comparison_plots:
-            # Extract comparison name from filename (e.g., "xfs_4k_vs_16k" from "comparison_xfs_4k_vs_16k.png")
-            comparison_name = plot_path.stem.replace("comparison_", "").replace(
-                "_", " "
-            )
-            # Read image and convert to base64
-            try:
-                with open(plot_path, "rb") as f:
-                    image_base64 = base64.b64encode(f.read()).decode()
-                html += f"""
-                <div style="text-align: center;">
-                    <h4 style="text-transform: capitalize;">{comparison_name}</h4>
-                    <a href="monitoring/fragmentation/{plot_path.name}" target="_blank" title="Click for full-size image">
-                        <img src="data:image/png;base64,{image_base64}" style="max-width: 100%; border-radius: 5px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); cursor: pointer;" />
-                    </a>
-                    <p style="font-size: 0.8em; color: #718096; margin-top: 5px;">Click image for full size</p>
-                </div>
-                """
-            except Exception:
-                # Fallback to file link if embedding fails
-                html += f"""
-                <div style="text-align: center;">
-                    <h4 style="text-transform: capitalize;">{comparison_name}</h4>
-                    <a href="file://{plot_path.absolute()}" style="color: #007bff;">View comparison plot</a>
-                </div>
-                """
-
-        html += """
-            </div>
-            <p style="margin-top: 10px; color: #718096;">These charts compare memory fragmentation between different filesystem configurations.</p>
-        """
+        # e.g., "xfs 4k vs 16k" from "comparison_xfs_4k_vs_16k.png"
+        write_plot_grid(
+            report,
+            "Memory Fragmentation Comparisons",
+            frag_comparison_plots,
+            500,
+            "These charts compare memory fragmentation between different filesystem configurations.",
+            lambda p: p.stem.replace("comparison_", "").replace("_", " "),
+            capitalize=True,
+        )
 
     # If no plots are available, show a message
     if (
@@ -542,18 +455,40 @@ def generate_monitoring_section(results_dir, monitoring):
         and not frag_comparison_plots
         and not folio_comparison_plots
     ):
-        html += """
+        report.write("""
             <div style="text-align: center; padding: 40px; color: #718096; font-style: italic;">
                 No monitoring plots found. Ensure monitoring is enabled during builds.
             </div>
-        """
+        """)
+
+    report.write("</div>")
 
-    html += "</div>"
-    return html
 
+def chart_html(report, png):
+    """HTML for a chart section, or a placeholder without matplotlib."""
+    if not png:
+        return "<div class='no-data'>Graph generation requires matplotlib</div>"
+    return f"<div class='chart-container'><div class='chart'>{report.img_tag(png)}</div></div>"
 
-def generate_html_report(results_dir, summaries, timings, monitoring=None):
-    """Generate an HTML report with embedded graphs."""
+
+def generate_html_report(
+    results_dir, summaries, timings, monitoring=None, single_file=False
+):
+    """
+    Generate the HTML report.
+
+    Images are stored once under content hash names in an assets
+    directory next to the report, unless single_file is set in which
+    case they are embedded into the report.
+    """
+    report_path = Path(results_dir) / "build_performance_report.html"
+    with ReportWriter(report_path, single_file=single_file) as report:
+        write_html_report(report, results_dir, summaries, timings, monitoring)
+    return report_path
+
+
+def write_html_report(report, results_dir, summaries, timings, monitoring):
+    """Stream the HTML report to a ReportWriter."""
 
     # Generate graphs
     comparison_chart = create_build_time_comparison_chart(summaries)
@@ -583,7 +518,7 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
     else:
         overall_avg = overall_median = overall_stdev = overall_min = overall_max = 0
 
-    html_content = f"""<!DOCTYPE html>
+    report.write(f"""<!DOCTYPE html>
 <html>
 <head>
     <title>Linux Kernel Build Performance Report</title>
@@ -750,22 +685,22 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
 
         <div class="section">
             <h2 class="section-title">📊 Build Time Comparison</h2>
-            {"<div class='chart-container'><div class='chart'><img src='data:image/png;base64," + comparison_chart + "' /></div></div>" if comparison_chart else "<div class='no-data'>Graph generation requires matplotlib</div>"}
+            {chart_html(report, comparison_chart)}
         </div>
 
         <div class="section">
             <h2 class="section-title">📈 Build Time Distribution</h2>
-            {"<div class='chart-container'><div class='chart'><img src='data:image/png;base64," + distribution_chart + "' /></div></div>" if distribution_chart else "<div class='no-data'>Graph generation requires matplotlib</div>"}
+            {chart_html(report, distribution_chart)}
         </div>
 
         <div class="section">
             <h2 class="section-title">📉 Build Time Timeline</h2>
-            {"<div class='chart-container'><div class='chart'><img src='data:image/png;base64," + timeline_chart + "' /></div></div>" if timeline_chart else "<div class='no-data'>Graph generation requires matplotlib</div>"}
+            {chart_html(report, timeline_chart)}
         </div>
 
         <div class="section">
             <h2 class="section-title">✅ Success Rates</h2>
-            {"<div class='chart-container'><div class='chart'><img src='data:image/png;base64," + success_chart + "' /></div></div>" if success_chart else "<div class='no-data'>Graph generation requires matplotlib</div>"}
+            {chart_html(report, success_chart)}
         </div>
 
         <div class="section">
@@ -787,7 +722,7 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
                     </tr>
                 </thead>
                 <tbody>
-"""
+""")
 
     for hostname in sorted(summaries.keys()):
         data = summaries[hostname]
@@ -819,7 +754,7 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
 
         # Handle completely failed hosts
         if data["successful_builds"] == 0 and "failure_reason" in data:
-            html_content += f"""
+            report.write(f"""
                     <tr style="background-color: #ffe6e6;">
                         <td><strong>{hostname.replace('lpc-build-linux-', '')}</strong></td>
                         <td>{fs_type}</td>
@@ -831,9 +766,9 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
                             <strong>All builds failed:</strong> {data['failure_reason']}
                         </td>
                     </tr>
-"""
+""")
         else:
-            html_content += f"""
+            report.write(f"""
                     <tr>
                         <td><strong>{hostname.replace('lpc-build-linux-', '')}</strong></td>
                         <td>{fs_type}</td>
@@ -847,9 +782,9 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
                         <td>{stats['max']:.2f}</td>
                         <td>{stats.get('stddev', 0):.2f}</td>
                     </tr>
-"""
+""")
 
-    html_content += f"""
+    report.write(f"""
                 </tbody>
             </table>
         </div>
@@ -887,64 +822,35 @@ def generate_html_report(results_dir, summaries, timings, monitoring=None):
                 </tr>
             </table>
         </div>
+""")
 
-        {generate_monitoring_section(results_dir, monitoring) if monitoring else ""}
+    generate_monitoring_section(report, results_dir, monitoring)
 
+    report.write("""
     </div>
 </body>
-</html>"""
-
-    # Save HTML report
-    report_path = Path(results_dir) / "build_performance_report.html"
-    with open(report_path, "w") as f:
-        f.write(html_content)
-
-    return report_path
+</html>""")
 
 
 def consolidate_html_output(results_dir):
-    """Create HTML directory with embedded report and PNG files for full-size viewing."""
+    """Create HTML directory with the report and its image assets."""
     import shutil
 
     html_dir = Path(results_dir) / "html"
     html_dir.mkdir(exist_ok=True)
 
-    # Copy the main HTML report (which has everything embedded as base64)
     src_html = Path(results_dir) / "build_performance_report.html"
     if src_html.exists():
         shutil.copy2(src_html, html_dir / "index.html")
 
-    # Copy monitoring PNG files if they exist
-    monitoring_path = Path(results_dir) / "monitoring"
-    if monitoring_path.exists():
-        # Create monitoring subdirectory in HTML folder
-        html_monitoring = html_dir / "monitoring"
-        html_monitoring.mkdir(exist_ok=True)
-
-        # Copy folio migration plots
-        for plot in monitoring_path.glob("*_folio_migration_plot.png"):
-            shutil.copy2(plot, html_monitoring / plot.name)
-
-        # Copy folio comparison plots
-        for plot in monitoring_path.glob("folio_comparison_*.png"):
-            shutil.copy2(plot, html_monitoring / plot.name)
-
-        # Copy fragmentation plots
-        frag_dir = monitoring_path / "fragmentation"
-        if frag_dir.exists():
-            html_frag = html_monitoring / "fragmentation"
-            html_frag.mkdir(exist_ok=True)
-
-            for plot in frag_dir.glob("*_fragmentation_plot.png"):
-                shutil.copy2(plot, html_frag / plot.name)
-
-            # Copy all comparison plots (including new A/B comparisons)
-            for plot in frag_dir.glob("comparison_*.png"):
-                shutil.copy2(plot, html_frag / plot.name)
-
-            # Copy migration analysis plots
-            for plot in frag_dir.glob("migration_analysis_*.png"):
-                shutil.copy2(plot, html_frag / plot.name)
+    # Images are referenced from the assets directory, both the lazily
+    # loaded thumbnails and the full size images they link to.
+    src_assets = Path(results_dir) / "assets"
+    html_assets = html_dir / "assets"
+    if html_assets.exists():
+        shutil.rmtree(html_assets)
+    if src_assets.exists():
+        shutil.copytree(src_assets, html_assets)
 
     # Calculate total size
     total_size = sum(f.stat().st_size for f in html_dir.rglob("*") if f.is_file())
@@ -954,8 +860,8 @@ def consolidate_html_output(results_dir):
     png_count = len(list(html_dir.rglob("*.png")))
 
     print(f"\n📦 Consolidated HTML output: {html_dir}")
-    print(f"   Main report: index.html (self-contained with embedded images)")
-    print(f"   PNG files: {png_count} (for full-size viewing)")
+    print(f"   Main report: index.html")
+    print(f"   PNG files: {png_count} (thumbnails and full-size images)")
     print(f"   Total size: {size_mb:.1f} MB")
     print(f"\n   To share results, copy entire directory: {html_dir}/")
 
@@ -968,6 +874,11 @@ def main():
     )
     parser.add_argument("results_dir", help="Directory containing result files")
     parser.add_argument("--no-html", action="store_true", help="Skip HTML generation")
+    parser.add_argument(
+        "--single-file",
+        action="store_true",
+        help="Embed images into a self-contained HTML file, for archiving",
+    )
     args = parser.parse_args()
 
     results_dir = Path(args.results_dir)
@@ -988,7 +899,9 @@ def main():
 
     if not args.no_html:
         print("Generating HTML report...")
-        report_path = generate_html_report(results_dir, summaries, timings, monitoring)
+        report_path = generate_html_report(
+            results_dir, summaries, timings, monitoring, args.single_file
+        )
         print(f"✅ HTML report generated: {report_path}")
         print(f"   Open in browser: file://{report_path.absolute()}")
 
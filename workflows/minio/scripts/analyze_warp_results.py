@@ -4,7 +4,6 @@
 Analyze MinIO Warp benchmark results and generate reports with visualizations.
 """
 
-import json
 import glob
 import os
 import sys
@@ -15,30 +14,14 @@ import matplotlib.patches as mpatches
 import numpy as np
 from typing import Dict, List, Any
 
+import warp_parser
+
 
 def load_warp_results(results_dir: Path) -> List[Dict[str, Any]]:
     """Load all Warp JSON result files from the results directory."""
-    results = []
-    json_files = list(results_dir.glob("warp_benchmark_*.json"))
-
-    for json_file in sorted(json_files):
-        try:
-            with open(json_file, "r") as f:
-                content = f.read()
-                # Find where the JSON starts (after any terminal output)
-                json_start = content.find("{")
-                if json_start >= 0:
-                    json_content = content[json_start:]
-                    data = json.loads(json_content)
-                    data["_filename"] = json_file.name
-                    data["_filepath"] = str(json_file)
-                    results.append(data)
-                    print(f"Loaded: {json_file.name}")
-                else:
-                    print(f"No JSON found in {json_file}")
-        except Exception as e:
-            print(f"Error loading {json_file}: {e}")
-
+    results = warp_parser.load_warp_results(results_dir)
+    for data in results:
+        print(f"Loaded: {data['_filename']}")
     return results
 
 
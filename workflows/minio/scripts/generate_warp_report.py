@@ -4,7 +4,6 @@
 Generate graphs and HTML report from MinIO Warp benchmark results
 """
 
-import json
 import os
 import sys
 import glob
@@ -13,22 +12,22 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from pathlib import Path
 
+import warp_parser
+
 
 def parse_warp_json(json_file):
     """Parse Warp benchmark JSON output"""
-    with open(json_file, "r") as f:
-        content = f.read()
-        # Find the JSON object in the output (skip any non-JSON prefix)
-        json_start = content.find("{")
-        if json_start == -1:
-            raise ValueError(f"No JSON found in {json_file}")
-        json_content = content[json_start:]
-        return json.loads(json_content)
+    parsed = warp_parser.parse_warp_files([json_file])
+    if str(json_file) not in parsed:
+        raise ValueError(f"Could not parse {json_file}")
+    return parsed[str(json_file)]
 
 
 def generate_throughput_graph(data, output_dir, filename_prefix):
     """Generate throughput over time graph"""
-    segments = data["total"]["throughput"]["segmented"]["segments"]
+    segments = warp_parser.throughput_series(data["total"])
+    if not segments:
+        return None
 
     # Extract timestamps and throughput values
     times = []
@@ -232,9 +231,13 @@ def generate_html_report(json_files, output_dir):
     <p class="timestamp">Generated: {timestamp}</p>
 """
 
-    for json_file in sorted(json_files, reverse=True):
+    json_files = sorted(json_files, reverse=True)
+    parsed = warp_parser.parse_warp_files(json_files)
+    for json_file in json_files:
         try:
-            data = parse_warp_json(json_file)
+            data = parsed.get(str(json_file))
+            if data is None:
+                continue
             filename = os.path.basename(json_file)
             filename_prefix = filename.replace(".json", "")
 
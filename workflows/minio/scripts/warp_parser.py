@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+"""
+Incremental parser for MinIO Warp benchmark output.
+
+Warp result files start with terminal noise followed by one large JSON
+document. Long runs produce very large per-host and per-client breakdowns
+which none of our reports use. Instead of reading the whole file and
+json.loads()'ing it, this module scans the document in fixed size chunks
+and only decodes the sections the reports need (totals, per-operation
+throughput segments and latency figures). Everything else is skipped
+without being materialized.
+
+Parsed sections are cached next to the results, keyed by file size and
+mtime, so regenerating reports only parses new or changed files. Cache
+misses are parsed in parallel across files.
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Bump when the selection or the cached layout changes.
+PARSER_VERSION = 1
+
+CACHE_DIR_NAME = ".warp-cache"
+CHUNK_SIZE = 1 << 20
+
+# Selection spec: True decodes the value, a dict descends into an object
+# and selects its keys ("*" matches any key not listed), False skips it.
+_HEAVY = {"by_host": False, "by_client": False}
+_SECTION = {"*": True, **_HEAVY}
+WARP_SELECT = {
+    "total": _SECTION,
+    "operations": {"*": _SECTION},
+    "by_op_type": {"*": _SECTION},
+    "summary": True,
+}
+
+_STRUCT_RE = re.compile(r'["{}\[\]]')
+_STRING_RE = re.compile(r'["\\]')
+_SCALAR_END_RE = re.compile(r"[,}\]\s]")
+_WS = " \t\r\n"
+
+
+class _Scanner:
+    """Chunked JSON scanner which can skip values without decoding them."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def _need(self):
+        if self.pos >= len(self.buf) and not self._fill():
+            raise ValueError("Truncated Warp JSON document")
+
+    def seek_document(self):
+        """Skip any terminal output preceding the first '{'."""
+        while True:
+            idx = self.buf.find("{", self.pos)
+            if idx >= 0:
+                self.pos = idx
+                return True
+            self.pos = len(self.buf)
+            if not self._fill():
+                return False
+
+    def peek(self):
+        while True:
+            self._need()
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected '{char}' in Warp JSON, got '{self.buf[self.pos]}'"
+            )
+        self.pos += 1
+
+    def value(self, capture):
+        """Consume one JSON value, returning its raw text if capture is set."""
+        first = self.peek()
+        if first in "{[":
+            return self._container(capture)
+        if first == '"':
+            return self._string(capture)
+        return self._scalar(capture)
+
+    def _consume(self, end, pieces, capture):
+        if capture:
+            pieces.append(self.buf[self.pos : end])
+        self.pos = end
+
+    def _string(self, capture):
+        pieces = []
+        self._consume(self.pos + 1, pieces, capture)
+        escaped = False
+        while True:
+            self._need()
+            if escaped:
+                self._consume(self.pos + 1, pieces, capture)
+                escaped = False
+                continue
+            m = _STRING_RE.search(self.buf, self.pos)
+            if not m:
+                self._consume(len(self.buf), pieces, capture)
+                continue
+            self._consume(m.end(), pieces, capture)
+            if m.group() == "\\":
+                escaped = True
+            else:
+                return "".join(pieces) if capture else None
+
+    def _container(self, capture):
+        pieces = []
+        depth = 0
+        while True:
+            self._need()
+            m = _STRUCT_RE.search(self.buf, self.pos)
+            if not m:
+                self._consume(len(self.buf), pieces, capture)
+                continue
+            char = m.group()
+            if char == '"':
+                self._consume(m.start(), pieces, capture)
+                text = self._string(capture)
+                if capture:
+                    pieces.append(text)
+                continue
+            self._consume(m.end(), pieces, capture)
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return "".join(pieces) if capture else None
+
+    def _scalar(self, capture):
+        pieces = []
+        while True:
+            m = _SCALAR_END_RE.search(self.buf, self.pos)
+            if m:
+                self._consume(m.start(), pieces, capture)
+                return "".join(pieces) if capture else None
+            self._consume(len(self.buf), pieces, capture)
+            if not self._fill():
+                return "".join(pieces) if capture else None
+
+    def select(self, spec):
+        """Decode the current value according to a selection spec."""
+        if spec is True:
+            return json.loads(self.value(capture=True))
+        if self.peek() != "{":
+            # Not an object, nothing to descend into: keep it whole.
+            return json.loads(self.value(capture=True))
+        self.expect("{")
+        result = {}
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            key = json.loads(self.value(capture=True))
+            self.expect(":")
+            sub = spec.get(key, spec.get("*", False))
+            if sub:
+                result[key] = self.select(sub)
+            else:
+                self.value(capture=False)
+            sep = self.peek()
+            self.pos += 1
+            if sep == "}":
+                return result
+            if sep != ",":
+                raise ValueError(f"Unexpected '{sep}' in Warp JSON object")
+
+
+def parse_warp_file(path, select=None) -> Dict[str, Any]:
+    """
+    Parse the selected sections of one Warp output file.
+
+    Raises ValueError if the file has no JSON document in it.
+    """
+    with open(path, "r", errors="replace") as f:
+        scanner = _Scanner(f)
+        if not scanner.seek_document():
+            raise ValueError(f"No JSON found in {path}")
+        data = scanner.select(select or WARP_SELECT)
+    data["_filename"] = os.path.basename(path)
+    data["_filepath"] = str(path)
+    return data
+
+
+def _cache_key(path):
+    st = os.stat(path)
+    return {"version": PARSER_VERSION, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def _cache_file(path, cache_dir):
+    return Path(cache_dir) / (Path(path).name + ".cache.json")
+
+
+def _load_cached(path, cache_dir):
+    try:
+        with open(_cache_file(path, cache_dir), "r") as f:
+            cached = json.load(f)
+        if cached.get("key") == _cache_key(path):
+            data = cached["data"]
+            data["_filepath"] = str(path)
+            return data
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _store_cached(path, cache_dir, data):
+    cache_file = _cache_file(path, cache_dir)
+    tmp = cache_file.with_suffix(".tmp")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"key": _cache_key(path), "data": data}, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"Warning: could not cache {path}: {e}", file=sys.stderr)
+
+
+def _parse_worker(path):
+    try:
+        return path, parse_warp_file(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def parse_warp_files(
+    paths: Iterable, cache_dir=None, jobs: Optional[int] = None, use_cache=True
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse several Warp output files, in parallel for cache misses.
+
+    Returns a dict mapping each successfully parsed path (as str) to its
+    data. Files which fail to parse are reported and left out.
+    """
+    paths = [str(p) for p in paths]
+    parsed = {}
+    misses = []
+    for path in paths:
+        cdir = cache_dir or Path(path).parent / CACHE_DIR_NAME
+        data = _load_cached(path, cdir) if use_cache else None
+        if data is not None:
+            parsed[path] = data
+        else:
+            misses.append(path)
+
+    if len(misses) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            outcomes = list(executor.map(_parse_worker, misses))
+    else:
+        outcomes = [_parse_worker(path) for path in misses]
+
+    for path, data, error in outcomes:
+        if error is not None:
+            print(f"Error loading {path}: {error}")
+            continue
+        parsed[path] = data
+        if use_cache:
+            _store_cached(path, cache_dir or Path(path).parent / CACHE_DIR_NAME, data)
+
+    return parsed
+
+
+def load_warp_results(results_dir: Path, jobs: Optional[int] = None) -> List[Dict]:
+    """Load all warp_benchmark_*.json files in results_dir, sorted by name."""
+    json_files = sorted(Path(results_dir).glob("warp_benchmark_*.json"))
+    parsed = parse_warp_files(json_files, jobs=jobs)
+    return [parsed[str(p)] for p in json_files if str(p) in parsed]
+
+
+def throughput_series(section: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the per-segment throughput series of a total or op section."""
+    segmented = section.get("throughput", {}).get("segmented", {})
+    return [
+        {
+            "start": seg.get("start"),
+            "bytes_per_sec": seg.get("bytes_per_sec", 0),
+            "obj_per_sec": seg.get("obj_per_sec", 0),
+        }
+        for seg in segmented.get("segments", []) or []
+    ]
+
+
+def latency_percentiles(op_data: Dict[str, Any]) -> Dict[str, float]:
+    """Return latency percentiles in milliseconds for one operation type."""
+    if "percentiles_millis" in op_data:
+        return {str(k): v for k, v in op_data["percentiles_millis"].items()}
+    latency = op_data.get("latency", {})
+    percentiles = {}
+    for key, value in latency.items():
+        if key.startswith("p") and key[1:].isdigit():
+            # Warp reports request latencies in nanoseconds.
+            percentiles[key[1:]] = value / 1_000_000
+    return percentiles
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <warp_benchmark_*.json>...")
+        return 1
+    parsed = parse_warp_files(sys.argv[1:])
+    for path, data in parsed.items():
+        total = data.get("total", {})
+        print(
+            f"{data['_filename']}: requests={total.get('total_requests', 0)} "
+            f"segments={len(throughput_series(total))} "
+            f"ops={','.join(sorted(data.get('operations', {})))}"
+        )
+    return 0 if len(parsed) == len(sys.argv) - 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,17 @@
 Generate HTML visualization for NFS test results
 """
 
-import json
+import argparse
 import os
 import sys
 import glob
-import base64
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 
+from parse_nfstest_results import parse_all_results, write_results
+from report_writer import ReportWriter
+
 # Try to import matplotlib, but make it optional
 try:
     import matplotlib
@@ -584,21 +586,27 @@ def generate_overall_chart(summary, output_dir):
         return None
 
 
-def embed_image(image_path):
-    """Embed image as base64 data URI"""
-    if not os.path.exists(image_path):
-        return None
-
+def chart_tag(report, chart_path, alt):
+    """Add a chart to the report assets and return its img tag"""
+    if not chart_path:
+        return ""
+    tag = report.img_tag(chart_path, alt=alt)
+    # The chart now lives in the report assets (or is embedded)
     try:
-        with open(image_path, "rb") as f:
-            data = base64.b64encode(f.read()).decode()
-        return f"data:image/png;base64,{data}"
-    except:
-        return None
+        os.remove(chart_path)
+    except OSError:
+        pass
+    return tag
+
 
+def generate_html(results, output_dir, single_file=False):
+    """
+    Generate HTML report from parsed results
 
-def generate_html(results, output_dir):
-    """Generate HTML report from parsed results"""
+    The report is streamed to disk suite by suite. Charts are stored under
+    content hash names in output_dir/assets, unless single_file is set in
+    which case they are embedded into the report.
+    """
     summary = results["overall_summary"]
 
     # Calculate statistics
@@ -611,51 +619,97 @@ def generate_html(results, output_dir):
     total_time = format_time(summary["total_time"])
     num_suites = len(summary["test_suites_run"])
 
-    # Generate graphs
-    graphs_html = ""
-    overall_chart = generate_overall_chart(summary, output_dir)
-    if overall_chart:
-        img_data = embed_image(overall_chart)
-        if img_data:
+    # Generate configuration HTML
+    config_html = ""
+    if results["test_suites"]:
+        # Get configuration from first test suite
+        for suite_data in results["test_suites"].values():
+            if suite_data and suite_data[0]["configuration"]:
+                config = suite_data[0]["configuration"]
+                config_items = ""
+                for key, value in sorted(config.items()):
+                    if key and value and value != "None":
+                        config_items += f"""
+                        <div class="config-item">
+                            <span class="config-key">{key.replace('_', ' ').title()}:</span>
+                            <span class="config-value">{value}</span>
+                        </div>
+                        """
+
+                if config_items:
+                    config_html = f"""
+                    <div class="config-section">
+                        <h3>Test Configuration</h3>
+                        <div class="config-grid">
+                            {config_items}
+                        </div>
+                    </div>
+                    """
+                break
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    head, tail = HTML_TEMPLATE.split("{test_suites_html}")
+    html_path = os.path.join(output_dir, "index.html")
+
+    with ReportWriter(html_path, single_file=single_file) as report:
+        # Generate graphs
+        graphs_html = ""
+        overall_chart = generate_overall_chart(summary, output_dir)
+        img = chart_tag(report, overall_chart, "Overall Results")
+        if img:
             graphs_html += f"""
             <div class="graph-container">
                 <h2 style="color: var(--primary-color); margin-bottom: 20px;">Test Results Overview</h2>
-                <img src="{img_data}" alt="Overall Results">
+                {img}
             </div>
             """
 
-    # Generate test suites HTML
-    test_suites_html = ""
-    for suite_name, suite_data in results["test_suites"].items():
-        if not suite_data:
-            continue
-
-        # Calculate suite statistics
-        suite_total = sum(r["summary"]["total"] for r in suite_data)
-        suite_passed = sum(r["summary"]["passed"] for r in suite_data)
-        suite_failed = sum(r["summary"]["failed"] for r in suite_data)
-        suite_time = sum(r["summary"]["total_time"] for r in suite_data)
-        has_failures = suite_failed > 0
-
-        # Generate suite chart
-        suite_chart = generate_suite_chart(suite_name, suite_data, output_dir)
-
-        # Build test details table
-        test_rows = ""
-        for result in suite_data:
-            for test in result["tests"]:
-                status_class = test["status"].lower()
-                test_rows += f"""
+        report.write(
+            head.format(
+                timestamp=timestamp,
+                total_tests=total_tests,
+                passed_tests=passed_tests,
+                failed_tests=failed_tests,
+                pass_rate=pass_rate,
+                pass_percentage=pass_percentage,
+                fail_percentage=fail_percentage,
+                total_time=total_time,
+                num_suites=num_suites,
+                graphs_html=graphs_html,
+            )
+        )
+
+        # Write test suites one at a time
+        for suite_name, suite_data in results["test_suites"].items():
+            if not suite_data:
+                continue
+
+            # Calculate suite statistics
+            suite_total = sum(r["summary"]["total"] for r in suite_data)
+            suite_passed = sum(r["summary"]["passed"] for r in suite_data)
+            suite_failed = sum(r["summary"]["failed"] for r in suite_data)
+            suite_time = sum(r["summary"]["total_time"] for r in suite_data)
+            has_failures = suite_failed > 0
+
+            # Generate suite chart
+            suite_chart = generate_suite_chart(suite_name, suite_data, output_dir)
+            img = chart_tag(report, suite_chart, f"{suite_name} Results")
+
+            # Build test details table
+            test_rows = []
+            for result in suite_data:
+                for test in result["tests"]:
+                    status_class = test["status"].lower()
+                    test_rows.append(f"""
                 <tr>
                     <td>{test['name']}</td>
                     <td>{test['description'][:100]}...</td>
                     <td><span class="status {status_class}">{test['status']}</span></td>
                     <td>{test['duration']:.3f}s</td>
                 </tr>
-                """
+                """)
 
-        # Build suite HTML
-        test_suites_html += f"""
+            report.write(f"""
         <div class="test-suite">
             <div class="suite-header" data-has-failures="{str(has_failures).lower()}">
                 <h2>
@@ -671,7 +725,7 @@ def generate_html(results, output_dir):
                 </div>
             </div>
             <div class="suite-content">
-                {f'<div class="graph-container"><img src="{embed_image(suite_chart)}" alt="{suite_name} Results"></div>' if suite_chart and embed_image(suite_chart) else ''}
+                {f'<div class="graph-container">{img}</div>' if img else ''}
                 <table class="test-table">
                     <thead>
                         <tr>
@@ -682,72 +736,34 @@ def generate_html(results, output_dir):
                         </tr>
                     </thead>
                     <tbody>
-                        {test_rows}
+                        {"".join(test_rows)}
                     </tbody>
                 </table>
             </div>
         </div>
-        """
+        """)
 
-    # Generate configuration HTML
-    config_html = ""
-    if results["test_suites"]:
-        # Get configuration from first test suite
-        for suite_data in results["test_suites"].values():
-            if suite_data and suite_data[0]["configuration"]:
-                config = suite_data[0]["configuration"]
-                config_items = ""
-                for key, value in sorted(config.items()):
-                    if key and value and value != "None":
-                        config_items += f"""
-                        <div class="config-item">
-                            <span class="config-key">{key.replace('_', ' ').title()}:</span>
-                            <span class="config-value">{value}</span>
-                        </div>
-                        """
-
-                if config_items:
-                    config_html = f"""
-                    <div class="config-section">
-                        <h3>Test Configuration</h3>
-                        <div class="config-grid">
-                            {config_items}
-                        </div>
-                    </div>
-                    """
-                break
-
-    # Generate final HTML
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    html_content = HTML_TEMPLATE.format(
-        timestamp=timestamp,
-        total_tests=total_tests,
-        passed_tests=passed_tests,
-        failed_tests=failed_tests,
-        pass_rate=pass_rate,
-        pass_percentage=pass_percentage,
-        fail_percentage=fail_percentage,
-        total_time=total_time,
-        num_suites=num_suites,
-        graphs_html=graphs_html,
-        test_suites_html=test_suites_html,
-        config_html=config_html,
-    )
-
-    # Write HTML file
-    html_path = os.path.join(output_dir, "index.html")
-    with open(html_path, "w") as f:
-        f.write(html_content)
+        report.write(tail.format(timestamp=timestamp, config_html=config_html))
 
     return html_path
 
 
 def main():
     """Main entry point"""
-    if len(sys.argv) > 1:
-        results_dir = sys.argv[1]
-    else:
-        results_dir = "workflows/nfstest/results/last-run"
+    parser = argparse.ArgumentParser(description="Generate nfstest HTML report")
+    parser.add_argument(
+        "results_dir",
+        nargs="?",
+        default="workflows/nfstest/results/last-run",
+        help="Directory with nfstest logs",
+    )
+    parser.add_argument(
+        "--single-file",
+        action="store_true",
+        help="Embed images into a self-contained HTML file, for archiving",
+    )
+    args = parser.parse_args()
+    results_dir = args.results_dir
 
     if not os.path.exists(results_dir):
         print(
@@ -755,18 +771,10 @@ def main():
         )
         sys.exit(1)
 
-    # Check for parsed results
-    parsed_file = os.path.join(results_dir, "parsed_results.json")
-    if not os.path.exists(parsed_file):
-        print(
-            f"Error: Parsed results file not found. Run parse_nfstest_results.py first.",
-            file=sys.stderr,
-        )
-        sys.exit(1)
-
-    # Load parsed results
-    with open(parsed_file, "r") as f:
-        results = json.load(f)
+    # Refresh the aggregated results; only logs new since the last parse
+    # are parsed, everything else comes from the parse cache.
+    results = parse_all_results(results_dir)
+    write_results(results, results_dir)
 
     # Create HTML output directory - use absolute path from results_dir
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(results_dir)))
@@ -774,7 +782,7 @@ def main():
     os.makedirs(html_dir, exist_ok=True)
 
     # Generate HTML report
-    html_path = generate_html(results, html_dir)
+    html_path = generate_html(results, html_dir, args.single_file)
 
     print(f"HTML report generated: {html_path}")
     print(f"Directory ready for transfer: {html_dir}")
@@ -2,17 +2,36 @@
 # SPDX-License-Identifier: copyleft-next-0.3.1
 """
 Parse NFS test results from log files and extract key metrics.
+
+Logs are parsed in parallel and the per-log output is cached in the
+results directory, keyed by log size and mtime, so re-running after a new
+test run only parses the new logs.
 """
 
+import argparse
 import os
 import re
 import sys
 import json
 import glob
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 
+TEST_SUITES = ["interop", "alloc", "dio", "lock", "posix", "sparse", "ssc"]
+
+CACHE_FILE = ".parse_cache.json"
+# Bump when the per-log result layout changes to invalidate old caches.
+CACHE_VERSION = 2
+
+OPTS_LONG_RE = re.compile(r"OPTS:.*?-\s*(.+?)(?:--|\s*$)")
+OPTS_SHORT_RE = re.compile(r"OPTS:.*?-\s*(\w+)\s*=\s*(.+)")
+RUNNING_TEST_RE = re.compile(r"Running test '(\w+)'")
+TIME_RE = re.compile(r"TIME:\s*([\d.]+)([ms]?)")
+SUMMARY_RE = re.compile(r"(\d+)\s+tests\s*\((\d+)\s+passed,\s*(\d+)\s+failed")
+TOTAL_TIME_RE = re.compile(r"Total time:\s*(.+)")
+
 
 def parse_timestamp(timestamp_str):
     """Parse timestamp from log format"""
@@ -29,11 +48,39 @@ def parse_timestamp(timestamp_str):
     return 0
 
 
+def infer_test_suite(log_path):
+    """Infer the test suite from the log path, preferring directory names"""
+    parts = Path(log_path).parts
+    for part in reversed(parts[:-1]):
+        if part in TEST_SUITES:
+            return part
+    name = parts[-1] if parts else ""
+    for suite in TEST_SUITES:
+        if suite in name:
+            return suite
+    return ""
+
+
+def parse_total_time(time_str):
+    """Convert format like "2m22.099818s" to seconds"""
+    total_seconds = 0
+    if "m" in time_str:
+        parts = time_str.split("m")
+        total_seconds += int(parts[0]) * 60
+        if len(parts) > 1:
+            seconds_part = parts[1].replace("s", "").strip()
+            if seconds_part:
+                total_seconds += float(seconds_part)
+    elif "s" in time_str:
+        total_seconds = float(time_str.replace("s", "").strip())
+    return total_seconds
+
+
 def parse_test_log(log_path):
     """Parse a single NFS test log file"""
     results = {
         "file": os.path.basename(log_path),
-        "test_suite": "",
+        "test_suite": infer_test_suite(log_path),
         "tests": [],
         "summary": {
             "total": 0,
@@ -46,144 +93,132 @@ def parse_test_log(log_path):
         "test_groups": defaultdict(list),
     }
 
-    # Determine test suite from filename
-    if "interop" in log_path:
-        results["test_suite"] = "interop"
-    elif "alloc" in log_path:
-        results["test_suite"] = "alloc"
-    elif "dio" in log_path:
-        results["test_suite"] = "dio"
-    elif "lock" in log_path:
-        results["test_suite"] = "lock"
-    elif "posix" in log_path:
-        results["test_suite"] = "posix"
-    elif "sparse" in log_path:
-        results["test_suite"] = "sparse"
-    elif "ssc" in log_path:
-        results["test_suite"] = "ssc"
-
     current_test = None
-    start_time = None
-
-    with open(log_path, "r") as f:
-        lines = f.readlines()
-
-    for i, line in enumerate(lines):
-        # Parse configuration options
-        if line.strip().startswith("OPTS:") and "--" in line:
-            opts_match = re.search(r"OPTS:.*?-\s*(.+?)(?:--|\s*$)", line)
-            if opts_match:
-                opt_str = opts_match.group(1).strip()
-                if "=" in opt_str:
-                    key = opt_str.split("=")[0].replace("-", "_")
-                    value = opt_str.split("=", 1)[1] if "=" in opt_str else "true"
-                    results["configuration"][key] = value
-
-        # Parse individual OPTS lines for configuration
-        if line.strip().startswith("OPTS:") and "=" in line and "--" not in line:
-            opts_match = re.search(r"OPTS:.*?-\s*(\w+)\s*=\s*(.+)", line)
-            if opts_match:
-                key = opts_match.group(1).replace("-", "_")
-                value = opts_match.group(2).strip()
-                results["configuration"][key] = value
-
-        # Parse test start
-        if line.startswith("*** "):
-            test_desc = line[4:].strip()
-            current_test = {
-                "name": "",
-                "description": test_desc,
-                "status": "unknown",
-                "duration": 0,
-                "errors": [],
-            }
-
-        # Parse test name
-        if "TEST: Running test" in line:
-            test_match = re.search(r"Running test '(\w+)'", line)
-            if test_match and current_test:
-                current_test["name"] = test_match.group(1)
-
-        # Parse test results
-        if line.strip().startswith("PASS:"):
-            if current_test:
+
+    with open(log_path, "r", errors="replace") as f:
+        for line in f:
+            stripped = line.strip()
+
+            # Parse configuration options
+            if stripped.startswith("OPTS:"):
+                if "--" in line:
+                    opts_match = OPTS_LONG_RE.search(line)
+                    if opts_match:
+                        opt_str = opts_match.group(1).strip()
+                        if "=" in opt_str:
+                            key = opt_str.split("=")[0].replace("-", "_")
+                            value = opt_str.split("=", 1)[1]
+                            results["configuration"][key] = value
+                elif "=" in line:
+                    opts_match = OPTS_SHORT_RE.search(line)
+                    if opts_match:
+                        key = opts_match.group(1).replace("-", "_")
+                        value = opts_match.group(2).strip()
+                        results["configuration"][key] = value
+
+            # Parse test start
+            if line.startswith("*** "):
+                current_test = {
+                    "name": "",
+                    "description": line[4:].strip(),
+                    "status": "unknown",
+                    "duration": 0,
+                    "errors": [],
+                }
+
+            # Parse test name
+            if current_test and "TEST: Running test" in line:
+                test_match = RUNNING_TEST_RE.search(line)
+                if test_match:
+                    current_test["name"] = test_match.group(1)
+
+            if current_test is None:
+                pass
+            elif stripped.startswith("PASS:"):
                 current_test["status"] = "passed"
                 pass_msg = line.split("PASS:", 1)[1].strip()
-                if "assertions" not in current_test:
-                    current_test["assertions"] = []
-                current_test["assertions"].append(
+                current_test.setdefault("assertions", []).append(
                     {"status": "PASS", "message": pass_msg}
                 )
-
-        if line.strip().startswith("FAIL:"):
-            if current_test:
+            elif stripped.startswith("FAIL:"):
                 current_test["status"] = "failed"
                 fail_msg = line.split("FAIL:", 1)[1].strip()
                 current_test["errors"].append(fail_msg)
-                if "assertions" not in current_test:
-                    current_test["assertions"] = []
-                current_test["assertions"].append(
+                current_test.setdefault("assertions", []).append(
                     {"status": "FAIL", "message": fail_msg}
                 )
-
-        # Parse test timing
-        if line.strip().startswith("TIME:"):
-            time_match = re.search(r"TIME:\s*([\d.]+)([ms]?)", line)
-            if time_match and current_test:
-                duration = float(time_match.group(1))
-                unit = time_match.group(2) if time_match.group(2) else "s"
-                if unit == "m":
-                    duration *= 60
-                elif unit == "ms":
-                    duration /= 1000
-                current_test["duration"] = duration
-                results["tests"].append(current_test)
-
-                # Group tests by category (first part of test name)
-                if current_test["name"]:
-                    # Group by NFS version tested
-                    if "NFSv3" in current_test["description"]:
-                        results["test_groups"]["NFSv3"].append(current_test)
-                    if "NFSv4" in current_test["description"]:
-                        if "NFSv4.1" in current_test["description"]:
-                            results["test_groups"]["NFSv4.1"].append(current_test)
-                        else:
-                            results["test_groups"]["NFSv4.0"].append(current_test)
-
-                current_test = None
-
-        # Parse final summary
-        if "tests (" in line and "passed," in line:
-            summary_match = re.search(
-                r"(\d+)\s+tests\s*\((\d+)\s+passed,\s*(\d+)\s+failed", line
-            )
-            if summary_match:
-                results["summary"]["total"] = int(summary_match.group(1))
-                results["summary"]["passed"] = int(summary_match.group(2))
-                results["summary"]["failed"] = int(summary_match.group(3))
-
-        # Parse total time
-        if line.startswith("Total time:"):
-            time_match = re.search(r"Total time:\s*(.+)", line)
-            if time_match:
-                time_str = time_match.group(1).strip()
-                # Convert format like "2m22.099818s" to seconds
-                total_seconds = 0
-                if "m" in time_str:
-                    parts = time_str.split("m")
-                    total_seconds += int(parts[0]) * 60
-                    if len(parts) > 1:
-                        seconds_part = parts[1].replace("s", "").strip()
-                        if seconds_part:
-                            total_seconds += float(seconds_part)
-                elif "s" in time_str:
-                    total_seconds = float(time_str.replace("s", "").strip())
-                results["summary"]["total_time"] = total_seconds
+            elif stripped.startswith("TIME:"):
+                time_match = TIME_RE.search(line)
+                if time_match:
+                    duration = float(time_match.group(1))
+                    unit = time_match.group(2) if time_match.group(2) else "s"
+                    if unit == "m":
+                        duration *= 60
+                    elif unit == "ms":
+                        duration /= 1000
+                    current_test["duration"] = duration
+                    results["tests"].append(current_test)
+
+                    # Group tests by NFS version tested
+                    if current_test["name"]:
+                        groups = results["test_groups"]
+                        description = current_test["description"]
+                        if "NFSv3" in description:
+                            groups["NFSv3"].append(current_test)
+                        if "NFSv4.1" in description:
+                            groups["NFSv4.1"].append(current_test)
+                        elif "NFSv4" in description:
+                            groups["NFSv4.0"].append(current_test)
+
+                    current_test = None
+
+            # Parse final summary
+            if "tests (" in line and "passed," in line:
+                summary_match = SUMMARY_RE.search(line)
+                if summary_match:
+                    results["summary"]["total"] = int(summary_match.group(1))
+                    results["summary"]["passed"] = int(summary_match.group(2))
+                    results["summary"]["failed"] = int(summary_match.group(3))
+
+            # Parse total time
+            if line.startswith("Total time:"):
+                time_match = TOTAL_TIME_RE.search(line)
+                if time_match:
+                    results["summary"]["total_time"] = parse_total_time(
+                        time_match.group(1).strip()
+                    )
 
     return results
 
 
-def parse_all_results(results_dir):
+def load_parse_cache(results_dir):
+    """Load the per-log parse cache, returning an empty one if unusable"""
+    cache_path = os.path.join(results_dir, CACHE_FILE)
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["logs"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_parse_cache(results_dir, logs):
+    """Atomically write the per-log parse cache"""
+    cache_path = os.path.join(results_dir, CACHE_FILE)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "logs": logs}, f, separators=(",", ":")
+            )
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write parse cache: {e}", file=sys.stderr)
+
+
+def parse_all_results(results_dir, jobs=None, use_cache=True):
     """Parse all test results in a directory"""
     all_results = {
         "timestamp": datetime.now().isoformat(),
@@ -199,29 +234,35 @@ def parse_all_results(results_dir):
 
     # Find all log files
     log_pattern = os.path.join(results_dir, "**/*.log")
-    log_files = glob.glob(log_pattern, recursive=True)
-
-    for log_file in sorted(log_files):
-        # Parse the log file
-        suite_results = parse_test_log(log_file)
-
-        # Determine suite category from path
-        if "/interop/" in log_file:
-            suite_key = "interop"
-        elif "/alloc/" in log_file:
-            suite_key = "alloc"
-        elif "/dio/" in log_file:
-            suite_key = "dio"
-        elif "/lock/" in log_file:
-            suite_key = "lock"
-        elif "/posix/" in log_file:
-            suite_key = "posix"
-        elif "/sparse/" in log_file:
-            suite_key = "sparse"
-        elif "/ssc/" in log_file:
-            suite_key = "ssc"
+    log_files = sorted(glob.glob(log_pattern, recursive=True))
+
+    cache = load_parse_cache(results_dir) if use_cache else {}
+    logs = {}
+    misses = []
+    for log_file in log_files:
+        rel_path = os.path.relpath(log_file, results_dir)
+        st = os.stat(log_file)
+        entry = cache.get(rel_path)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            logs[rel_path] = entry
         else:
-            suite_key = suite_results["test_suite"] or "unknown"
+            logs[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns}
+            misses.append(log_file)
+
+    if len(misses) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = list(executor.map(parse_test_log, misses, chunksize=8))
+    else:
+        parsed = [parse_test_log(log_file) for log_file in misses]
+    for log_file, suite_results in zip(misses, parsed):
+        logs[os.path.relpath(log_file, results_dir)]["result"] = suite_results
+
+    if misses or len(logs) != len(cache):
+        save_parse_cache(results_dir, logs)
+
+    for log_file in log_files:
+        suite_results = logs[os.path.relpath(log_file, results_dir)]["result"]
+        suite_key = suite_results["test_suite"] or "unknown"
 
         # Store results
         if suite_key not in all_results["test_suites"]:
@@ -231,28 +272,41 @@ def parse_all_results(results_dir):
         all_results["test_suites"][suite_key].append(suite_results)
 
         # Update overall summary
-        all_results["overall_summary"]["total_tests"] += suite_results["summary"][
-            "total"
-        ]
-        all_results["overall_summary"]["total_passed"] += suite_results["summary"][
-            "passed"
-        ]
-        all_results["overall_summary"]["total_failed"] += suite_results["summary"][
-            "failed"
-        ]
-        all_results["overall_summary"]["total_time"] += suite_results["summary"][
-            "total_time"
-        ]
+        summary = suite_results["summary"]
+        overall = all_results["overall_summary"]
+        overall["total_tests"] += summary["total"]
+        overall["total_passed"] += summary["passed"]
+        overall["total_failed"] += summary["failed"]
+        overall["total_time"] += summary["total_time"]
 
     return all_results
 
 
+def write_results(results, results_dir):
+    """Write the aggregated results consumed by the HTML generator"""
+    output_file = os.path.join(results_dir, "parsed_results.json")
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    return output_file
+
+
 def main():
     """Main entry point"""
-    if len(sys.argv) > 1:
-        results_dir = sys.argv[1]
-    else:
-        results_dir = "workflows/nfstest/results/last-run"
+    parser = argparse.ArgumentParser(description="Parse nfstest result logs")
+    parser.add_argument(
+        "results_dir",
+        nargs="?",
+        default="workflows/nfstest/results/last-run",
+        help="Directory with nfstest logs",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=None, help="Number of parser processes"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and rebuild the parse cache"
+    )
+    args = parser.parse_args()
+    results_dir = args.results_dir
 
     if not os.path.exists(results_dir):
         print(
@@ -261,16 +315,20 @@ def main():
         sys.exit(1)
 
     # Parse all results
-    results = parse_all_results(results_dir)
+    results = parse_all_results(results_dir, args.jobs, not args.no_cache)
 
     # Output as JSON
     print(json.dumps(results, indent=2))
 
-    # Save to file
-    output_file = os.path.join(results_dir, "parsed_results.json")
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    output_file = write_results(results, results_dir)
 
+    summary = results["overall_summary"]
+    print(
+        f"Parsed {summary['total_tests']} tests ({summary['total_passed']} passed, "
+        f"{summary['total_failed']} failed) across "
+        f"{len(summary['test_suites_run'])} suites",
+        file=sys.stderr,
+    )
     print(f"\nResults saved to: {output_file}", file=sys.stderr)
 
 
@@ -0,0 +1 @@
+../../../scripts/report_writer.py
\ No newline at end of file
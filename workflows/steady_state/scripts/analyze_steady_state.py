@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: copyleft-next-0.3.1
+"""
+Analyze how the steady_state runs converged.
+
+fio stops a steady state run once its ss=iops and ss=iops_slope criteria
+hold over ss_dur, but says nothing about when the device actually became
+steady. This splits the IOPS and bandwidth logs of each run into rounds,
+applies the SNIA PTS criteria over a measurement window of consecutive
+rounds (range within 20% and slope excursion within 10% of the window
+average) and reports per device:
+
+- the time to steady state of the ss_iops and ss_bw runs, and whether and
+  when fio itself considered them steady
+- the data written before steady state, in device capacities
+- suggested runtime, ss_dur and prefill settings for the next run
+
+Runs without interval logs fall back to the samples fio keeps in its JSON
+output, which only cover the last ss_dur of the run.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import fio_logs
+
+# Steady state run -> tracking variable
+TESTS = {"ss_iops": "iops", "ss_bw": "bw"}
+# SNIA PTS: 1 minute rounds, 5 round measurement window
+DEFAULT_ROUND = 60
+DEFAULT_WINDOW_ROUNDS = 5
+# Margin of the suggested runtime over the time to steady state
+RUNTIME_MARGIN = 1.25
+# Most prefill loops to suggest: SNIA PTS preconditions with twice the
+# capacity, more passes only make every run longer.
+MAX_PREFILL_LOOP = 4
+PREFILL_FILE = "prefill.json"
+
+# Role defaults, used when extra_vars.yaml is not available
+DEFAULT_SETTINGS = {
+    "ssd_steady_state_runtime": "6h",
+    "ssd_steady_state_prefill_loop": 2,
+    "ssd_steady_state_iops_mean_dur": "4h",
+    "ssd_steady_state_iops_slope_dur": "4h",
+    "ssd_steady_state_bw_mean_dur": "2h",
+    "ssd_steady_state_bw_slope_dur": "2h",
+}
+
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(d|h|m|min|s|ms|us)?\s*$", re.I)
+_DURATION_UNITS = {
+    None: 1,
+    "d": 86400,
+    "h": 3600,
+    "m": 60,
+    "min": 60,
+    "s": 1,
+    "ms": 1e-3,
+    "us": 1e-6,
+}
+
+
+def parse_duration(value):
+    """Seconds of a fio time value such as 6h, 30m or 90."""
+    match = _DURATION_RE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    unit = match.group(2).lower() if match.group(2) else None
+    return float(match.group(1)) * _DURATION_UNITS[unit]
+
+
+def format_duration(seconds):
+    """A fio time value for seconds, rounded up to whole minutes."""
+    minutes = max(1, int(math.ceil(seconds / 60)))
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+
+def load_fio_json(path):
+    """Load fio JSON output, skipping any warnings printed before it."""
+    with open(path) as f:
+        text = f.read()
+    start = text.find("{")
+    if start < 0:
+        raise ValueError(f"No JSON in {path}")
+    return json.loads(text[start:])
+
+
+def load_settings(extra_vars):
+    """The steady_state settings of extra_vars.yaml, role defaults otherwise."""
+    settings = dict(DEFAULT_SETTINGS)
+    if extra_vars and os.path.exists(extra_vars):
+        try:
+            import yaml
+
+            with open(extra_vars) as f:
+                data = yaml.safe_load(f) or {}
+            settings.update({k: data[k] for k in DEFAULT_SETTINGS if k in data})
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Warning: could not read {extra_vars}: {e}", file=sys.stderr)
+    return settings
+
+
+def fio_steady_state(data):
+    """The steady state result of each job group of a fio steady state run."""
+    jobs = []
+    for job in data.get("jobs", []):
+        ss = job.get("steady_state")
+        if not ss:
+            continue
+        jobs.append(
+            {
+                "job": job.get("jobname"),
+                "criterion": f"{ss.get('ss')}:{ss.get('criterion')}",
+                "attained": bool(ss.get("attained")),
+                "duration_s": ss.get("duration"),
+                "runtime_s": job.get("job_runtime", 0) / 1000,
+                "samples": ss.get("data", {}),
+            }
+        )
+    return jobs
+
+
+def round_series(host_dir, test, kind, round_s):
+    """
+    The mean of kind (iops or bw) over each round of a run, summed over
+    all jobs and data directions, from its interval logs. None without
+    logs.
+    """
+    logs = fio_logs.find_logs([host_dir]).get((test, kind))
+    if not logs:
+        return None
+    series = fio_logs.load_series(logs, kind, int(round_s * 1000))
+    values = np.array(list(series.values.values()))
+    if not len(values):
+        return None
+    # The last round is usually partial
+    return np.nansum(values, axis=0)[:-1]
+
+
+def json_round_series(fio_jobs, kind, round_s):
+    """
+    Rounds from the per second samples of fio's steady state window, and
+    the time of the first sample in the run.
+    """
+    samples = [np.asarray(j["samples"].get(kind, []), dtype=float) for j in fio_jobs]
+    samples = [s for s in samples if len(s)]
+    if not samples:
+        return None, 0
+    n = min(len(s) for s in samples)
+    total = np.sum([s[-n:] for s in samples], axis=0)
+    per_round = max(1, int(round_s))
+    rounds = len(total) // per_round
+    offset = max(j["runtime_s"] for j in fio_jobs) - n
+    return total[: rounds * per_round].reshape(rounds, per_round).mean(axis=1), offset
+
+
+def converge(rounds, window, max_range_pct, max_slope_pct):
+    """Index of the first round of the first steady window, None if never steady."""
+    steady = fio_logs.steady_windows(rounds, window, max_range_pct, max_slope_pct)
+    if not steady.any():
+        return None
+    return int(np.argmax(steady))
+
+
+def prefill_capacity(host_dir):
+    """Device capacity and bytes written by the prefill, from its fio output."""
+    path = host_dir / PREFILL_FILE
+    if not path.exists():
+        return None
+    try:
+        data = load_fio_json(path)
+    except (OSError, ValueError):
+        return None
+    written = capacity = 0
+    for job in data.get("jobs", []):
+        options = {**data.get("global options", {}), **job.get("job options", {})}
+        written += job.get("write", {}).get("io_bytes", 0)
+        try:
+            capacity += int(options.get("size", 0)) * int(options.get("numjobs", 1))
+        except ValueError:
+            pass
+    if not capacity:
+        return None
+    return {"capacity_bytes": capacity, "written_bytes": written}
+
+
+def analyze_test(host_dir, test, round_s, window, max_range_pct, max_slope_pct):
+    path = host_dir / f"{test}.json"
+    kind = TESTS[test]
+    fio_jobs = []
+    if path.exists():
+        try:
+            fio_jobs = fio_steady_state(load_fio_json(path))
+        except (OSError, ValueError) as e:
+            print(f"Warning: {path}: {e}", file=sys.stderr)
+
+    rounds = round_series(host_dir, test, kind, round_s)
+    source, offset = "logs", 0.0
+    if rounds is None:
+        rounds, offset = json_round_series(fio_jobs, kind, round_s)
+        source = "fio json"
+    if rounds is None and not fio_jobs:
+        return None
+
+    result = {
+        "tracking": kind,
+        "source": None if rounds is None else source,
+        "rounds": 0 if rounds is None else len(rounds),
+        "fio": [{k: v for k, v in j.items() if k != "samples"} for j in fio_jobs],
+        "fio_attained": bool(fio_jobs) and all(j["attained"] for j in fio_jobs),
+        "runtime_s": max((j["runtime_s"] for j in fio_jobs), default=None),
+        "steady": False,
+    }
+    if rounds is None:
+        return result
+    if result["runtime_s"] is None:
+        result["runtime_s"] = offset + len(rounds) * round_s
+
+    first = converge(rounds, window, max_range_pct, max_slope_pct)
+    if first is None:
+        return result
+    view = rounds[first : first + window]
+    result.update(
+        {
+            "steady": True,
+            "steady_round": first,
+            # The window is only known to be steady once its last round ends
+            "time_to_steady_state_s": offset + (first + window) * round_s,
+            "steady_start_s": offset + first * round_s,
+            "steady_mean": float(view.mean()),
+            "range_pct": float(np.ptp(view) / view.mean() * 100),
+            "from_first_window": first == 0 and offset == 0,
+        }
+    )
+    if source == "logs":
+        bw = round_series(host_dir, test, "bw", round_s)
+        if bw is not None:
+            # bw is in KiB/s
+            result["written_before_steady_bytes"] = float(
+                np.nansum(bw[: first + window]) * round_s * 1024
+            )
+    return result
+
+
+def capacities_before_steady(tests, prefill):
+    """
+    Device capacities written by the steady state runs before they were
+    steady, None when the capacity or the data written is unknown.
+    """
+    written = [
+        r["written_before_steady_bytes"]
+        for r in tests.values()
+        if r and r["steady"] and "written_before_steady_bytes" in r
+    ]
+    if not prefill or not written:
+        return None
+    return max(written) / prefill["capacity_bytes"]
+
+
+def suggest(tests, settings, window_s, passes=None):
+    """
+    Runtime, ss_dur and prefill suggestions for the next run of a device,
+    given the capacities_before_steady() of its runs.
+    """
+    suggestions = {}
+    notes = []
+    runtime = parse_duration(settings["ssd_steady_state_runtime"])
+    loops = int(settings["ssd_steady_state_prefill_loop"])
+
+    # Without any rounds there is nothing to base a suggestion on
+    measured = [r for r in tests.values() if r and r["rounds"]]
+    if not measured:
+        return suggestions, notes
+    steady = {t: r for t, r in tests.items() if r and r["steady"]}
+    if len(steady) < len(measured):
+        suggestions["ssd_steady_state_runtime"] = format_duration(runtime * 2)
+        if loops < MAX_PREFILL_LOOP:
+            suggestions["ssd_steady_state_prefill_loop"] = loops + 1
+        notes.append(
+            "not steady within the run, more preconditioning and a longer "
+            "runtime are needed"
+        )
+        return suggestions, notes
+
+    needed = max(r["time_to_steady_state_s"] for r in steady.values())
+    suggested = max(needed * RUNTIME_MARGIN, window_s)
+    suggestions["ssd_steady_state_runtime"] = format_duration(suggested)
+    if suggested < runtime:
+        notes.append(
+            f"steady after {format_duration(needed)}, the {format_duration(runtime)} "
+            "runtime can be reduced"
+        )
+
+    for test, result in steady.items():
+        name = TESTS[test]
+        for criterion in ("mean", "slope"):
+            key = f"ssd_steady_state_{name}_{criterion}_dur"
+            current = parse_duration(settings[key])
+            # ss_dur can not exceed the runtime, and fio can never stop a
+            # run before ss_dur has elapsed: at least until the device
+            # was steady.
+            dur = max(min(current, suggested), result["time_to_steady_state_s"])
+            if format_duration(dur) != format_duration(current):
+                suggestions[key] = format_duration(dur)
+
+    if all(r["from_first_window"] for r in steady.values()):
+        if loops > 1:
+            suggestions["ssd_steady_state_prefill_loop"] = loops - 1
+            notes.append(
+                "steady from the first measurement window, the prefill can "
+                "be shortened"
+            )
+    elif passes is not None and passes >= 1:
+        notes.append(
+            f"{passes:.1f} device capacities of random writes before steady "
+            "state, a longer prefill would shorten the steady state runs"
+        )
+        if loops < MAX_PREFILL_LOOP:
+            suggestions["ssd_steady_state_prefill_loop"] = min(
+                loops + int(passes), MAX_PREFILL_LOOP
+            )
+    return suggestions, notes
+
+
+def analyze_host(host_dir, settings, round_s, window, max_range_pct, max_slope_pct):
+    tests = {
+        test: analyze_test(
+            host_dir, test, round_s, window, max_range_pct, max_slope_pct
+        )
+        for test in TESTS
+    }
+    if not any(tests.values()):
+        return None
+    prefill = prefill_capacity(host_dir)
+    result = {"tests": tests, "prefill": prefill}
+    steady = [r for r in tests.values() if r and r["steady"]]
+    result["time_to_steady_state_s"] = (
+        max(r["time_to_steady_state_s"] for r in steady) if steady else None
+    )
+    result["capacities_before_steady"] = capacities_before_steady(tests, prefill)
+    result["suggestions"], result["notes"] = suggest(
+        tests, settings, window * round_s, result["capacities_before_steady"]
+    )
+    return result
+
+
+def print_report(results):
+    for host, result in results.items():
+        print(f"{host}:")
+        for test, r in result["tests"].items():
+            if not r:
+                print(f"  {test}: no results")
+                continue
+            fio_state = "attained" if r["fio_attained"] else "not attained"
+            if r["steady"]:
+                line = (
+                    f"steady after {r['time_to_steady_state_s'] / 60:.0f} min "
+                    f"at {r['steady_mean']:.0f} {r['tracking']}"
+                )
+            elif r["rounds"]:
+                line = f"not steady over {r['rounds']} rounds"
+            else:
+                line = "no logs or samples to analyze"
+            runtime = r["runtime_s"] or 0
+            print(
+                f"  {test}: {line}, fio {fio_state} after {runtime / 60:.0f} min "
+                f"({r['source'] or 'fio json'})"
+            )
+        if result["capacities_before_steady"] is not None:
+            print(
+                f"  {result['capacities_before_steady']:.1f} device capacities "
+                "written before steady state"
+            )
+        for key, value in result["suggestions"].items():
+            print(f"  suggest {key.upper()}={value}")
+        for note in result["notes"]:
+            print(f"  note: {note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze the convergence of steady_state runs"
+    )
+    parser.add_argument(
+        "results_dir", help="steady_state results directory, one directory per host"
+    )
+    parser.add_argument(
+        "--round",
+        type=float,
+        default=DEFAULT_ROUND,
+        help=f"Round length in seconds (default: {DEFAULT_ROUND})",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW_ROUNDS,
+        help=f"Rounds of the measurement window (default: {DEFAULT_WINDOW_ROUNDS})",
+    )
+    parser.add_argument(
+        "--max-range-pct", type=float, default=fio_logs.DEFAULT_MAX_RANGE_PCT
+    )
+    parser.add_argument(
+        "--max-slope-pct", type=float, default=fio_logs.DEFAULT_MAX_SLOPE_PCT
+    )
+    parser.add_argument(
+        "--extra-vars",
+        default="extra_vars.yaml",
+        help="kdevops extra_vars.yaml with the current settings",
+    )
+    parser.add_argument(
+        "--output",
+        help="JSON report (default: <results_dir>/steady_state_analysis.json)",
+    )
+    args = parser.parse_args()
+
+    results_dir = Path(args.results_dir)
+    settings = load_settings(args.extra_vars)
+    results = {}
+    for host_dir in sorted(p for p in results_dir.iterdir() if p.is_dir()):
+        result = analyze_host(
+            host_dir,
+            settings,
+            args.round,
+            args.window,
+            args.max_range_pct,
+            args.max_slope_pct,
+        )
+        if result:
+            results[host_dir.name] = result
+    if not results:
+        print(f"No steady state results found in {results_dir}", file=sys.stderr)
+        return 1
+
+    print_report(results)
+    output = args.output or results_dir / "steady_state_analysis.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Analysis saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
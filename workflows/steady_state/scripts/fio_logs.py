@@ -0,0 +1 @@
+../../../scripts/fio_logs.py
\ No newline at end of file